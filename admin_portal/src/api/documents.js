@@ -50,13 +50,13 @@ export const sendDocumentToLead = async (templateId, leadId) => {
 };
 
 // Get Documents
-export const getUserDocuments = async (userId) => {
-  const { data } = await axiosClient.get(`/documents/user/${userId}`);
+export const getUserDocuments = async (userId, params = {}) => {
+  const { data } = await axiosClient.get(`/documents/user/${userId}`, { params });
   return data;
 };
 
-export const getLeadDocuments = async (leadId) => {
-  const { data } = await axiosClient.get(`/documents/lead/${leadId}`);
+export const getLeadDocuments = async (leadId, params = {}) => {
+  const { data } = await axiosClient.get(`/documents/lead/${leadId}`, { params });
   return data;
 };
 
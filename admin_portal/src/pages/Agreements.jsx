@@ -50,6 +50,10 @@ const Agreements = () => {
   const [templates, setTemplates] = useState([]);
   const [leads, setLeads] = useState([]);
   const [agreements, setAgreements] = useState([]);
+  const [agreementsTotal, setAgreementsTotal] = useState(0);
+  const [totalIsEstimate, setTotalIsEstimate] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [courseFilter, setCourseFilter] = useState("twenty_week");
   const [statusFilter, setStatusFilter] = useState("all");
   const [loading, setLoading] = useState(false);
@@ -128,8 +132,10 @@ const Agreements = () => {
     }
   };
 
-  const loadAgreements = async () => {
-    setLoading(true);
+  // Without a cursor the list is replaced; with one the next page is appended
+  const loadAgreements = async (cursor = null) => {
+    const setBusy = cursor ? setLoadingMore : setLoading;
+    setBusy(true);
     setError(null);
     try {
       const params = {};
@@ -139,14 +145,25 @@ const Agreements = () => {
       if (statusFilter && statusFilter !== "all") {
         params.status = statusFilter;
       }
+      if (cursor) {
+        params.cursor = cursor;
+      }
       const data = await getAllDocuments(params);
-      setAgreements(Array.isArray(data.documents) ? data.documents : []);
+      const page = Array.isArray(data.documents) ? data.documents : [];
+      setAgreements((current) => (cursor ? [...current, ...page] : page));
+      setAgreementsTotal(data.total ?? page.length);
+      setTotalIsEstimate(Boolean(data.total_is_estimate));
+      setNextCursor(data.next_cursor || null);
     } catch (err) {
       console.error(err);
       setError("Unable to load agreements");
-      setAgreements([]);
+      if (!cursor) {
+        setAgreements([]);
+        setAgreementsTotal(0);
+        setNextCursor(null);
+      }
     } finally {
-      setLoading(false);
+      setBusy(false);
     }
   };
 
@@ -352,12 +369,13 @@ const Agreements = () => {
     });
   };
 
+  // total covers every match; the status counts only the pages loaded so far
   const stats = useMemo(() => {
-    const total = agreements.length;
+    const total = Math.max(agreementsTotal, agreements.length);
     const awaiting = agreements.filter((doc) => doc.status === "student_signed").length;
     const completed = agreements.filter((doc) => doc.status === "completed").length;
     return { total, awaiting, completed };
-  }, [agreements]);
+  }, [agreements, agreementsTotal]);
 
   return (
     <div className="p-6 space-y-6">
@@ -682,6 +700,22 @@ const Agreements = () => {
               </tbody>
             </table>
           </div>
+          {!loading && nextCursor && (
+            <div className="mt-4 flex items-center justify-between text-sm text-slate-500">
+              <span>
+                Showing {agreements.length} of {totalIsEstimate ? "about " : ""}
+                {agreementsTotal}
+              </span>
+              <button
+                type="button"
+                className="px-3 py-1.5 rounded-lg text-sm font-medium border border-slate-200 text-slate-700 hover:bg-slate-50 disabled:opacity-50"
+                onClick={() => loadAgreements(nextCursor)}
+                disabled={loadingMore}
+              >
+                {loadingMore ? "Loading..." : "Load more"}
+              </button>
+            </div>
+          )}
         </div>
       </div>
 
@@ -35,7 +35,7 @@ const Dashboard = () => {
           externships: externshipsResult.status === "fulfilled" ? externshipsResult.value.length : 0,
           pendingAgreements:
             agreementsResult.status === "fulfilled"
-              ? (agreementsResult.value?.documents?.length ?? 0)
+              ? (agreementsResult.value?.total ?? agreementsResult.value?.documents?.length ?? 0)
               : 0
         });
       } catch (error) {
@@ -21,6 +21,9 @@ const Documents = () => {
   const [activeTab, setActiveTab] = useState("templates");
   const [templates, setTemplates] = useState([]);
   const [documents, setDocuments] = useState([]);
+  const [documentsTotal, setDocumentsTotal] = useState(0);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [users, setUsers] = useState([]);
   const [leads, setLeads] = useState([]);
   const [loading, setLoading] = useState(false);
@@ -75,48 +78,46 @@ const Documents = () => {
     }
   };
 
-  const loadDocumentsByUser = async (userId) => {
-    setLoading(true);
+  // Without a cursor the list is replaced; with one the next page is appended
+  const loadDocumentPage = async (fetchPage, errorMessage, cursor = null) => {
+    const setBusy = cursor ? setLoadingMore : setLoading;
+    setBusy(true);
     try {
-      const data = await getUserDocuments(userId);
-      setDocuments(Array.isArray(data.documents) ? data.documents : []);
+      const data = await fetchPage(cursor ? { cursor } : {});
+      const page = Array.isArray(data.documents) ? data.documents : [];
+      setDocuments((current) => (cursor ? [...current, ...page] : page));
+      setDocumentsTotal(data.total ?? page.length);
+      setNextCursor(data.next_cursor || null);
       setError(null);
     } catch (err) {
       console.error(err);
-      setError("Unable to load user documents");
-      setDocuments([]);
+      setError(errorMessage);
+      if (!cursor) {
+        setDocuments([]);
+        setDocumentsTotal(0);
+        setNextCursor(null);
+      }
     } finally {
-      setLoading(false);
+      setBusy(false);
     }
   };
 
-  const loadDocumentsByLead = async (leadId) => {
-    setLoading(true);
-    try {
-      const data = await getLeadDocuments(leadId);
-      setDocuments(Array.isArray(data.documents) ? data.documents : []);
-      setError(null);
-    } catch (err) {
-      console.error(err);
-      setError("Unable to load lead documents");
-      setDocuments([]);
-    } finally {
-      setLoading(false);
-    }
-  };
+  const loadDocumentsByUser = (userId, cursor = null) =>
+    loadDocumentPage((params) => getUserDocuments(userId, params), "Unable to load user documents", cursor);
 
-  const loadAllDocuments = async () => {
-    setLoading(true);
-    try {
-      const data = await getAllDocuments();
-      setDocuments(Array.isArray(data.documents) ? data.documents : []);
-      setError(null);
-    } catch (err) {
-      console.error(err);
-      setError("Unable to load all documents");
-      setDocuments([]);
-    } finally {
-      setLoading(false);
+  const loadDocumentsByLead = (leadId, cursor = null) =>
+    loadDocumentPage((params) => getLeadDocuments(leadId, params), "Unable to load lead documents", cursor);
+
+  const loadAllDocuments = (cursor = null) =>
+    loadDocumentPage((params) => getAllDocuments(params), "Unable to load all documents", cursor);
+
+  const loadMoreDocuments = () => {
+    if (activeTab === "all") {
+      loadAllDocuments(nextCursor);
+    } else if (recipientType === "user") {
+      loadDocumentsByUser(selectedRecipientId, nextCursor);
+    } else {
+      loadDocumentsByLead(selectedRecipientId, nextCursor);
     }
   };
 
@@ -596,6 +597,20 @@ const Documents = () => {
                       ))}
                     </tbody>
                   </table>
+                  {nextCursor && (
+                    <div className="mt-4 flex items-center justify-between text-sm text-slate-500">
+                      <span>
+                        Showing {documents.length} of {documentsTotal}
+                      </span>
+                      <button
+                        onClick={loadMoreDocuments}
+                        disabled={loadingMore}
+                        className="px-3 py-1.5 text-sm font-medium border border-slate-200 text-slate-700 rounded-lg hover:bg-slate-50 disabled:opacity-50"
+                      >
+                        {loadingMore ? "Loading..." : "Load more"}
+                      </button>
+                    </div>
+                  )}
                 </div>
               )}
             </section>
@@ -658,6 +673,20 @@ const Documents = () => {
                   ))}
                 </tbody>
               </table>
+              {nextCursor && (
+                <div className="mt-4 flex items-center justify-between text-sm text-slate-500">
+                  <span>
+                    Showing {documents.length} of {documentsTotal}
+                  </span>
+                  <button
+                    onClick={loadMoreDocuments}
+                    disabled={loadingMore}
+                    className="px-3 py-1.5 text-sm font-medium border border-slate-200 text-slate-700 rounded-lg hover:bg-slate-50 disabled:opacity-50"
+                  >
+                    {loadingMore ? "Loading..." : "Load more"}
+                  </button>
+                </div>
+              )}
             </div>
           )}
         </section>
@@ -0,0 +1,31 @@
+"""add xapi keyset index
+
+Revision ID: 0013_xapi_keyset_index
+Revises: a30190520a19
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0013_xapi_keyset_index'
+down_revision: Union[str, None] = 'a30190520a19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Supports the (stored_at, id) continuation used by GET /xapi/statements
+    op.create_index(
+        'idx_xapi_statements_stored_at_id',
+        'xapi_statements',
+        ['stored_at', 'id'],
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_xapi_statements_stored_at_id', 'xapi_statements', if_exists=True)
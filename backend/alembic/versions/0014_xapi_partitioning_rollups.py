@@ -0,0 +1,142 @@
+"""partition xapi_statements by month and add daily rollups
+
+Revision ID: 0014_xapi_partitioning_rollups
+Revises: 0013_xapi_keyset_index
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0014_xapi_partitioning_rollups'
+down_revision: Union[str, None] = '0013_xapi_keyset_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Move the existing heap table (and its index names) out of the way
+    op.execute("ALTER TABLE xapi_statements RENAME TO xapi_statements_legacy")
+    op.execute(
+        "ALTER TABLE xapi_statements_legacy RENAME CONSTRAINT xapi_statements_pkey "
+        "TO xapi_statements_legacy_pkey"
+    )
+    op.execute(
+        "ALTER INDEX IF EXISTS idx_xapi_statements_stored_at_id "
+        "RENAME TO idx_xapi_statements_legacy_stored_at_id"
+    )
+    op.execute("ALTER INDEX IF EXISTS idx_xapi_actor_gin RENAME TO idx_xapi_legacy_actor_gin")
+
+    # Partition key must be part of the primary key
+    op.execute("""
+        CREATE TABLE xapi_statements (
+            id UUID NOT NULL,
+            actor JSONB NOT NULL,
+            verb JSONB NOT NULL,
+            object JSONB NOT NULL,
+            result JSONB,
+            context JSONB,
+            timestamp TIMESTAMPTZ NOT NULL,
+            stored_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            CONSTRAINT xapi_statements_pkey PRIMARY KEY (id, stored_at)
+        ) PARTITION BY RANGE (stored_at)
+    """)
+    op.execute("CREATE TABLE xapi_statements_default PARTITION OF xapi_statements DEFAULT")
+
+    # One partition per month of existing data, through two months ahead
+    op.execute("""
+        DO $$
+        DECLARE
+            month_start date;
+            last_month date := (date_trunc('month', now()) + interval '2 months')::date;
+        BEGIN
+            SELECT COALESCE(date_trunc('month', min(COALESCE(stored_at, timestamp))), date_trunc('month', now()))::date
+              INTO month_start
+              FROM xapi_statements_legacy;
+            WHILE month_start <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF xapi_statements FOR VALUES FROM (%L) TO (%L)',
+                    'xapi_statements_p' || to_char(month_start, 'YYYYMM'),
+                    month_start::text || ' 00:00:00+00',
+                    (month_start + interval '1 month')::date::text || ' 00:00:00+00'
+                );
+                month_start := (month_start + interval '1 month')::date;
+            END LOOP;
+        END $$;
+    """)
+
+    op.execute("""
+        INSERT INTO xapi_statements (id, actor, verb, object, result, context, timestamp, stored_at)
+        SELECT id, actor, verb, object, result, context, timestamp, COALESCE(stored_at, timestamp)
+        FROM xapi_statements_legacy
+    """)
+    op.execute("DROP TABLE xapi_statements_legacy")
+
+    op.create_index('idx_xapi_statements_stored_at_id', 'xapi_statements', ['stored_at', 'id'])
+    op.execute("CREATE INDEX idx_xapi_actor_gin ON xapi_statements USING gin (actor)")
+
+    op.create_table(
+        'xapi_daily_rollups',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('actor_key', sa.String(length=320), nullable=False),
+        sa.Column('activity_id', sa.String(length=2048), nullable=False),
+        sa.Column('statements', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('completions', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('best_score', sa.Numeric(10, 2), nullable=True),
+        sa.Column('time_spent_seconds', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_statement_at', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('day', 'actor_key', 'activity_id'),
+    )
+    op.create_index('idx_xapi_daily_rollups_actor_day', 'xapi_daily_rollups', ['actor_key', 'day'])
+    op.create_index('idx_xapi_daily_rollups_activity_day', 'xapi_daily_rollups', ['activity_id', 'day'])
+
+    op.create_table(
+        'xapi_checkpoints',
+        sa.Column('consumer', sa.String(length=100), primary_key=True),
+        sa.Column('last_stored_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('last_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.text('now()')),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('xapi_checkpoints')
+    op.drop_index('idx_xapi_daily_rollups_activity_day', 'xapi_daily_rollups', if_exists=True)
+    op.drop_index('idx_xapi_daily_rollups_actor_day', 'xapi_daily_rollups', if_exists=True)
+    op.drop_table('xapi_daily_rollups')
+
+    op.execute("ALTER TABLE xapi_statements RENAME TO xapi_statements_partitioned")
+    op.execute(
+        "ALTER INDEX IF EXISTS idx_xapi_statements_stored_at_id "
+        "RENAME TO idx_xapi_statements_partitioned_stored_at_id"
+    )
+    op.execute("ALTER INDEX IF EXISTS idx_xapi_actor_gin RENAME TO idx_xapi_partitioned_actor_gin")
+    op.execute(
+        "ALTER TABLE xapi_statements_partitioned RENAME CONSTRAINT xapi_statements_pkey "
+        "TO xapi_statements_partitioned_pkey"
+    )
+    op.create_table(
+        'xapi_statements',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('actor', postgresql.JSONB(), nullable=False),
+        sa.Column('verb', postgresql.JSONB(), nullable=False),
+        sa.Column('object', postgresql.JSONB(), nullable=False),
+        sa.Column('result', postgresql.JSONB()),
+        sa.Column('context', postgresql.JSONB()),
+        sa.Column('timestamp', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('stored_at', sa.TIMESTAMP(timezone=True), server_default=sa.text("now()")),
+    )
+    op.execute("""
+        INSERT INTO xapi_statements (id, actor, verb, object, result, context, timestamp, stored_at)
+        SELECT id, actor, verb, object, result, context, timestamp, stored_at
+        FROM xapi_statements_partitioned
+    """)
+    op.execute("DROP TABLE xapi_statements_partitioned CASCADE")
+    op.create_index('idx_xapi_statements_stored_at_id', 'xapi_statements', ['stored_at', 'id'])
+    op.execute("CREATE INDEX idx_xapi_actor_gin ON xapi_statements USING gin (actor)")
@@ -0,0 +1,32 @@
+"""add module_progress.last_activity_at projected from xAPI
+
+Revision ID: 0015_module_progress_last_activity
+Revises: 0014_xapi_partitioning_rollups
+Create Date: 2026-10-19 09:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0015_module_progress_last_activity'
+down_revision: Union[str, None] = '0014_xapi_partitioning_rollups'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Populated by the module progress projector; its first run backfills
+    # from the oldest retained xAPI statement.
+    op.add_column(
+        'module_progress',
+        sa.Column('last_activity_at', sa.TIMESTAMP(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM xapi_checkpoints WHERE consumer = 'module_progress_projection'")
+    op.drop_column('module_progress', 'last_activity_at')
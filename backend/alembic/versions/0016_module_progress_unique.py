@@ -0,0 +1,72 @@
+"""enforce one module_progress row per enrollment and module
+
+Revision ID: 0016_module_progress_unique
+Revises: 0015_module_progress_last_activity
+Create Date: 2026-10-19 10:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0016_module_progress_unique'
+down_revision: Union[str, None] = '0015_module_progress_last_activity'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Concurrent get-or-create writes could leave duplicates. Keep the most
+    # recently updated row, folding in the best engagement figures of the rest.
+    op.execute("""
+        WITH ranked AS (
+            SELECT id,
+                   enrollment_id,
+                   module_id,
+                   row_number() OVER (
+                       PARTITION BY enrollment_id, module_id
+                       ORDER BY last_accessed_at DESC NULLS LAST, id
+                   ) AS rn
+            FROM module_progress
+        ),
+        merged AS (
+            SELECT enrollment_id,
+                   module_id,
+                   max(active_time_seconds) AS active_time_seconds,
+                   max(last_activity_at) AS last_activity_at
+            FROM module_progress
+            GROUP BY enrollment_id, module_id
+            HAVING count(*) > 1
+        )
+        UPDATE module_progress mp
+        SET active_time_seconds = merged.active_time_seconds,
+            last_activity_at = merged.last_activity_at
+        FROM ranked, merged
+        WHERE ranked.id = mp.id
+          AND ranked.rn = 1
+          AND merged.enrollment_id = mp.enrollment_id
+          AND merged.module_id = mp.module_id
+    """)
+    op.execute("""
+        DELETE FROM module_progress mp
+        USING (
+            SELECT id,
+                   row_number() OVER (
+                       PARTITION BY enrollment_id, module_id
+                       ORDER BY last_accessed_at DESC NULLS LAST, id
+                   ) AS rn
+            FROM module_progress
+        ) ranked
+        WHERE ranked.id = mp.id AND ranked.rn > 1
+    """)
+    op.create_unique_constraint(
+        'uq_module_progress_enrollment_module',
+        'module_progress',
+        ['enrollment_id', 'module_id'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_module_progress_enrollment_module', 'module_progress', type_='unique')
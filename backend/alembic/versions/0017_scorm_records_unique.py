@@ -0,0 +1,47 @@
+"""enforce one scorm_records row per user and module
+
+Revision ID: 0017_scorm_records_unique
+Revises: 0016_module_progress_unique
+Create Date: 2026-10-19 11:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0017_scorm_records_unique'
+down_revision: Union[str, None] = '0016_module_progress_unique'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Racing get-or-create writes could leave duplicates; the table has no
+    # timestamps, so keep the most advanced attempt (passed/completed, then
+    # highest score).
+    op.execute("""
+        DELETE FROM scorm_records sr
+        USING (
+            SELECT id,
+                   row_number() OVER (
+                       PARTITION BY user_id, module_id
+                       ORDER BY (lesson_status IN ('passed', 'completed')) DESC NULLS LAST,
+                                score_raw DESC NULLS LAST,
+                                score_scaled DESC NULLS LAST,
+                                id
+                   ) AS rn
+            FROM scorm_records
+        ) ranked
+        WHERE ranked.id = sr.id AND ranked.rn > 1
+    """)
+    op.create_unique_constraint(
+        'uq_scorm_records_user_module',
+        'scorm_records',
+        ['user_id', 'module_id'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_scorm_records_user_module', 'scorm_records', type_='unique')
@@ -0,0 +1,54 @@
+"""materialized view of enrollment x module progress for cohort analytics
+
+Revision ID: 0018_program_progress_view
+Revises: 0017_scorm_records_unique
+Create Date: 2026-10-19 12:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0018_program_progress_view'
+down_revision: Union[str, None] = '0017_scorm_records_unique'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS program_module_progress_mv AS
+        SELECT e.id AS enrollment_id,
+               e.user_id,
+               e.program_id,
+               e.status AS enrollment_status,
+               e.start_date,
+               m.id AS module_id,
+               m.code AS module_code,
+               m.title AS module_title,
+               m.position AS module_position,
+               COALESCE(mp.scorm_status, 'not_started') AS scorm_status,
+               mp.score,
+               COALESCE(mp.progress_pct, 0) AS progress_pct,
+               COALESCE(mp.active_time_seconds, 0) AS active_time_seconds,
+               GREATEST(mp.last_accessed_at, mp.last_activity_at) AS last_seen_at,
+               now() AS refreshed_at
+        FROM enrollments e
+        JOIN modules m ON m.program_id = e.program_id
+        LEFT JOIN module_progress mp ON mp.enrollment_id = e.id AND mp.module_id = m.id
+    """)
+    # Required for REFRESH MATERIALIZED VIEW CONCURRENTLY
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_program_module_progress_mv_enrollment_module "
+        "ON program_module_progress_mv (enrollment_id, module_id)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_program_module_progress_mv_program "
+        "ON program_module_progress_mv (program_id, enrollment_id, module_position)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS program_module_progress_mv")
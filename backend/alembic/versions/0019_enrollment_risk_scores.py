@@ -0,0 +1,55 @@
+"""add enrollment_risk_scores for at-risk learner scoring
+
+Revision ID: 0019_enrollment_risk_scores
+Revises: 0018_program_progress_view
+Create Date: 2026-10-19 13:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0019_enrollment_risk_scores'
+down_revision: Union[str, None] = '0018_program_progress_view'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'enrollment_risk_scores',
+        sa.Column(
+            'enrollment_id',
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey('enrollments.id', ondelete='CASCADE'),
+            primary_key=True,
+        ),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('program_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('risk_score', sa.Numeric(5, 2), nullable=False),
+        sa.Column('risk_level', sa.String(10), nullable=False),
+        sa.Column('inactivity_days', sa.Integer(), nullable=False),
+        sa.Column('pace_gap', sa.Numeric(5, 4), nullable=False),
+        sa.Column('time_percentile', sa.Numeric(5, 4)),
+        sa.Column('average_score', sa.Numeric(6, 2)),
+        sa.Column('modules_completed', sa.Integer(), nullable=False),
+        sa.Column('modules_total', sa.Integer(), nullable=False),
+        sa.Column('last_activity_at', sa.TIMESTAMP(timezone=True)),
+        sa.Column('computed_at', sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.text('now()')),
+    )
+    op.create_index(
+        'idx_enrollment_risk_scores_program_score',
+        'enrollment_risk_scores',
+        ['program_id', 'risk_score'],
+    )
+    op.create_index('idx_enrollment_risk_scores_score', 'enrollment_risk_scores', ['risk_score'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_enrollment_risk_scores_score', 'enrollment_risk_scores')
+    op.drop_index('idx_enrollment_risk_scores_program_score', 'enrollment_risk_scores')
+    op.drop_table('enrollment_risk_scores')
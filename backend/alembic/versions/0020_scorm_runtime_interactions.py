@@ -0,0 +1,66 @@
+"""add scorm_interactions and numeric session time to scorm_records
+
+Revision ID: 0020_scorm_runtime_interactions
+Revises: 0019_enrollment_risk_scores
+Create Date: 2026-10-19 14:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0020_scorm_runtime_interactions'
+down_revision: Union[str, None] = '0019_enrollment_risk_scores'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('scorm_records', sa.Column('session_time_seconds', sa.Numeric(10, 2)))
+    op.add_column(
+        'scorm_records',
+        sa.Column('total_time_seconds', sa.Numeric(12, 2), nullable=False, server_default=sa.text('0')),
+    )
+    # Both SCORM 1.2 timespans (HHHH:MM:SS.SS) and ISO 8601 day/time
+    # durations (PT1H2M3S) are valid interval literals.
+    op.execute(r"""
+        UPDATE scorm_records
+        SET session_time_seconds = extract(epoch FROM session_time::interval),
+            total_time_seconds = extract(epoch FROM session_time::interval)
+        WHERE session_time ~ '^\d{2,4}:[0-5]\d:[0-5]\d(\.\d{1,2})?$'
+           OR session_time ~ '^P(\d+(\.\d+)?D)?(T(\d+(\.\d+)?H)?(\d+(\.\d+)?M)?(\d+(\.\d+)?S)?)?$'
+              AND session_time NOT IN ('P', 'PT')
+    """)
+
+    op.create_table(
+        'scorm_interactions',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            'record_id',
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey('scorm_records.id', ondelete='CASCADE'),
+            nullable=False,
+        ),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('interaction_id', sa.String()),
+        sa.Column('type', sa.String(30)),
+        sa.Column('learner_response', sa.Text()),
+        sa.Column('correct_responses', sa.JSON()),
+        sa.Column('result', sa.String(30)),
+        sa.Column('weighting', sa.Numeric(10, 4)),
+        sa.Column('latency_seconds', sa.Numeric(10, 2)),
+        sa.Column('timestamp', sa.String(40)),
+        sa.Column('description', sa.Text()),
+        sa.Column('recorded_at', sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.text('now()')),
+        sa.UniqueConstraint('record_id', 'position', name='uq_scorm_interactions_record_position'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('scorm_interactions')
+    op.drop_column('scorm_records', 'total_time_seconds')
+    op.drop_column('scorm_records', 'session_time_seconds')
@@ -0,0 +1,102 @@
+"""add background_jobs and trigger-maintained report_source_versions
+
+Revision ID: 0021_background_jobs
+Revises: 0020_scorm_runtime_interactions
+Create Date: 2026-10-19 15:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0021_background_jobs'
+down_revision: Union[str, None] = '0020_scorm_runtime_interactions'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Writes to these tables invalidate cached report artifacts
+SOURCE_TABLES = (
+    "users",
+    "compliance.attendance_logs",
+    "compliance.complaints",
+    "compliance.credentials",
+    "compliance.externships",
+    "compliance.skills_checkoffs",
+    "compliance.withdrawals",
+    "compliance.refunds",
+    "compliance.transcripts",
+)
+
+
+def _trigger_name(table: str) -> str:
+    return "trg_report_source_version_" + table.replace(".", "_")
+
+
+def upgrade() -> None:
+    op.create_table(
+        'background_jobs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('kind', sa.String(50), nullable=False),
+        sa.Column('params', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False, server_default='queued'),
+        sa.Column('cache_key', sa.String(64), nullable=False),
+        sa.Column('progress_done', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('progress_total', sa.Integer()),
+        sa.Column('error', sa.Text()),
+        sa.Column('artifact_sha256', sa.String(64)),
+        sa.Column('artifact_size', sa.BigInteger()),
+        sa.Column('artifact_filename', sa.String(255)),
+        sa.Column('content_type', sa.String(100)),
+        sa.Column('row_count', sa.Integer()),
+        sa.Column('created_by', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='SET NULL')),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.text('now()')),
+        sa.Column('started_at', sa.TIMESTAMP(timezone=True)),
+        sa.Column('finished_at', sa.TIMESTAMP(timezone=True)),
+        sa.Column('expires_at', sa.TIMESTAMP(timezone=True)),
+    )
+    op.create_index('idx_background_jobs_cache_key', 'background_jobs', ['cache_key', 'status'])
+    op.create_index('idx_background_jobs_status_created', 'background_jobs', ['status', 'created_at'])
+
+    op.create_table(
+        'report_source_versions',
+        sa.Column('table_name', sa.String(120), primary_key=True),
+        sa.Column('version', sa.BigInteger(), nullable=False, server_default=sa.text('0')),
+        sa.Column('changed_at', sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.text('now()')),
+    )
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_report_source_version() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO report_source_versions (table_name, version, changed_at)
+            VALUES (
+                CASE WHEN TG_TABLE_SCHEMA = 'public' THEN TG_TABLE_NAME
+                     ELSE TG_TABLE_SCHEMA || '.' || TG_TABLE_NAME END,
+                1,
+                now()
+            )
+            ON CONFLICT (table_name) DO UPDATE
+            SET version = report_source_versions.version + 1, changed_at = now();
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    for table in SOURCE_TABLES:
+        op.execute(
+            f"CREATE TRIGGER {_trigger_name(table)} "
+            f"AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION bump_report_source_version()"
+        )
+
+
+def downgrade() -> None:
+    for table in SOURCE_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {_trigger_name(table)} ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS bump_report_source_version()")
+    op.drop_table('report_source_versions')
+    op.drop_index('idx_background_jobs_status_created', table_name='background_jobs')
+    op.drop_index('idx_background_jobs_cache_key', table_name='background_jobs')
+    op.drop_table('background_jobs')
@@ -0,0 +1,64 @@
+"""index compliance report filter columns; version enrollments and modules
+
+Revision ID: 0022_compliance_report_indexes
+Revises: 0021_background_jobs
+Create Date: 2026-10-19 16:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0022_compliance_report_indexes'
+down_revision: Union[str, None] = '0021_background_jobs'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Date range, per-student/program and status filters of /reports/compliance/*
+INDEXES = (
+    ('idx_attendance_logs_user_started', 'attendance_logs', ['user_id', 'started_at']),
+    ('idx_attendance_logs_module_started', 'attendance_logs', ['module_id', 'started_at']),
+    ('idx_attendance_logs_started', 'attendance_logs', ['started_at']),
+    ('idx_complaints_user_submitted', 'complaints', ['user_id', 'submitted_at']),
+    ('idx_complaints_status_submitted', 'complaints', ['status', 'submitted_at']),
+    ('idx_complaints_submitted', 'complaints', ['submitted_at']),
+    ('idx_credentials_user_issued', 'credentials', ['user_id', 'issued_at']),
+    ('idx_credentials_program_issued', 'credentials', ['program_id', 'issued_at']),
+    ('idx_credentials_issued', 'credentials', ['issued_at']),
+    ('idx_externships_user_verified', 'externships', ['user_id', 'verified_at']),
+    ('idx_externships_verified', 'externships', ['verified_at']),
+    ('idx_skills_checkoffs_user_signed', 'skills_checkoffs', ['user_id', 'signed_at']),
+    ('idx_skills_checkoffs_module_signed', 'skills_checkoffs', ['module_id', 'signed_at']),
+    ('idx_skills_checkoffs_status_signed', 'skills_checkoffs', ['status', 'signed_at']),
+    ('idx_skills_checkoffs_signed', 'skills_checkoffs', ['signed_at']),
+    ('idx_withdrawals_enrollment_requested', 'withdrawals', ['enrollment_id', 'requested_at']),
+    ('idx_withdrawals_requested', 'withdrawals', ['requested_at']),
+    ('idx_refunds_withdrawal_approved', 'refunds', ['withdrawal_id', 'approved_at']),
+    ('idx_refunds_approved', 'refunds', ['approved_at']),
+    ('idx_transcripts_user_generated', 'transcripts', ['user_id', 'generated_at']),
+    ('idx_transcripts_program_generated', 'transcripts', ['program_id', 'generated_at']),
+    ('idx_transcripts_generated', 'transcripts', ['generated_at']),
+)
+
+# Program/student filters read these, so cached report jobs depend on them too
+VERSIONED_TABLES = ('enrollments', 'modules')
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, schema='compliance', if_not_exists=True)
+    for table in VERSIONED_TABLES:
+        op.execute(
+            f"CREATE TRIGGER trg_report_source_version_{table} "
+            f"AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION bump_report_source_version()"
+        )
+
+
+def downgrade() -> None:
+    for table in VERSIONED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS trg_report_source_version_{table} ON {table}")
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, schema='compliance', if_exists=True)
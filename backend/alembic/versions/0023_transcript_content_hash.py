@@ -0,0 +1,29 @@
+"""add content hash to transcripts for content-addressed PDFs
+
+Revision ID: 0023_transcript_content_hash
+Revises: 0022_compliance_report_indexes
+Create Date: 2026-10-19 17:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0023_transcript_content_hash'
+down_revision: Union[str, None] = '0022_compliance_report_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing transcripts keep their per-transcript PDF (content_hash stays NULL)
+    op.add_column('transcripts', sa.Column('content_hash', sa.String(64)), schema='compliance')
+    op.create_index('idx_transcripts_content_hash', 'transcripts', ['content_hash'], schema='compliance')
+
+
+def downgrade() -> None:
+    op.drop_index('idx_transcripts_content_hash', table_name='transcripts', schema='compliance')
+    op.drop_column('transcripts', 'content_hash', schema='compliance')
@@ -0,0 +1,44 @@
+"""track signed PDF rendering on signed_documents
+
+Revision ID: 0024_signed_pdf_queue
+Revises: 0023_transcript_content_hash
+Create Date: 2026-10-19 18:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0024_signed_pdf_queue'
+down_revision: Union[str, None] = '0023_transcript_content_hash'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('signed_documents', sa.Column('pdf_status', sa.String(20), nullable=True))
+    op.add_column('signed_documents', sa.Column('pdf_requested_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column(
+        'signed_documents',
+        sa.Column('pdf_attempts', sa.Integer(), nullable=False, server_default=sa.text('0')),
+    )
+    op.add_column('signed_documents', sa.Column('pdf_error', sa.Text(), nullable=True))
+    op.create_index(
+        'idx_signed_documents_pdf_pending',
+        'signed_documents',
+        ['pdf_requested_at'],
+        postgresql_where=sa.text("pdf_status = 'pending'"),
+    )
+    # PDFs rendered synchronously before this revision
+    op.execute("UPDATE signed_documents SET pdf_status = 'ready' WHERE signed_file_path IS NOT NULL")
+
+
+def downgrade() -> None:
+    op.drop_index('idx_signed_documents_pdf_pending', table_name='signed_documents')
+    op.drop_column('signed_documents', 'pdf_error')
+    op.drop_column('signed_documents', 'pdf_attempts')
+    op.drop_column('signed_documents', 'pdf_requested_at')
+    op.drop_column('signed_documents', 'pdf_status')
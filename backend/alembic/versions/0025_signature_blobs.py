@@ -0,0 +1,39 @@
+"""store normalized signature images by content hash
+
+Revision ID: 0025_signature_blobs
+Revises: 0024_signed_pdf_queue
+Create Date: 2026-10-19 19:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0025_signature_blobs'
+down_revision: Union[str, None] = '0024_signed_pdf_queue'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('document_signatures', sa.Column('signature_hash', sa.String(64), nullable=True))
+    # New captures keep only the hash; existing rows are moved to the blob
+    # store by scripts/migrate_signature_images.py
+    op.alter_column('document_signatures', 'signature_data', existing_type=sa.Text(), nullable=True)
+
+
+def downgrade() -> None:
+    hash_only = op.get_bind().execute(
+        sa.text("SELECT count(*) FROM document_signatures WHERE signature_data IS NULL")
+    ).scalar()
+    if hash_only:
+        # Signatures are legal records; never drop them to make the downgrade fit
+        raise RuntimeError(
+            f"{hash_only} signatures exist only in the signature blob store; "
+            "restore their signature_data before downgrading"
+        )
+    op.alter_column('document_signatures', 'signature_data', existing_type=sa.Text(), nullable=False)
+    op.drop_column('document_signatures', 'signature_hash')
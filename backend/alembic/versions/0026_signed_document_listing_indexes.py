@@ -0,0 +1,34 @@
+"""index signed_documents for keyset-paginated listings
+
+Revision ID: 0026_document_listing_indexes
+Revises: 0025_signature_blobs
+Create Date: 2026-10-19 20:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0026_document_listing_indexes'
+down_revision: Union[str, None] = '0025_signature_blobs'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    'idx_signed_documents_created': ['created_at', 'id'],
+    'idx_signed_documents_user_created': ['user_id', 'created_at', 'id'],
+    'idx_signed_documents_lead_created': ['lead_id', 'created_at', 'id'],
+    'idx_signed_documents_status_created': ['status', 'created_at', 'id'],
+}
+
+
+def upgrade() -> None:
+    for name, columns in INDEXES.items():
+        op.create_index(name, 'signed_documents', columns)
+
+
+def downgrade() -> None:
+    for name in INDEXES:
+        op.drop_index(name, table_name='signed_documents')
@@ -0,0 +1,54 @@
+"""content-addressed file store for templates and signed documents
+
+Revision ID: 0027_file_store
+Revises: 0026_document_listing_indexes
+Create Date: 2026-10-19 21:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0027_file_store'
+down_revision: Union[str, None] = '0026_document_listing_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'file_blobs',
+        sa.Column('hash', sa.String(64), primary_key=True),
+        sa.Column('ref_count', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.text('now()')),
+        sa.Column('released_at', sa.TIMESTAMP(timezone=True), nullable=True),
+    )
+    op.add_column('document_templates', sa.Column('blob_hash', sa.String(64), nullable=True))
+    op.add_column('signed_documents', sa.Column('unsigned_blob_hash', sa.String(64), nullable=True))
+    op.add_column('signed_documents', sa.Column('signed_blob_hash', sa.String(64), nullable=True))
+    # New templates keep only the hash; existing files are moved into the
+    # store by scripts/migrate_to_file_store.py
+    op.alter_column('document_templates', 'file_path', existing_type=sa.String(500), nullable=True)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    stored_only = bind.execute(sa.text(
+        "SELECT (SELECT count(*) FROM document_templates WHERE file_path IS NULL)"
+        " + (SELECT count(*) FROM signed_documents"
+        "    WHERE signed_blob_hash IS NOT NULL AND signed_file_path IS NULL)"
+    )).scalar()
+    if stored_only:
+        # Templates and signed agreements are records; never drop them to make the downgrade fit
+        raise RuntimeError(
+            f"{stored_only} templates or signed documents exist only in the file store; "
+            "export them to file paths before downgrading"
+        )
+    op.alter_column('document_templates', 'file_path', existing_type=sa.String(500), nullable=False)
+    op.drop_column('signed_documents', 'signed_blob_hash')
+    op.drop_column('signed_documents', 'unsigned_blob_hash')
+    op.drop_column('document_templates', 'blob_hash')
+    op.drop_table('file_blobs')
@@ -0,0 +1,29 @@
+"""keep each enrollment's active time per module with its risk score
+
+Revision ID: 0028_risk_score_time_per_module
+Revises: 0027_file_store
+Create Date: 2026-10-19 22:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0028_risk_score_time_per_module'
+down_revision: Union[str, None] = '0027_file_store'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Cohort input for incremental scoring; filled by the next daily rescore
+    op.add_column(
+        'enrollment_risk_scores', sa.Column('time_per_module_seconds', sa.Numeric(12, 2), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('enrollment_risk_scores', 'time_per_module_seconds')
@@ -69,6 +69,84 @@ class Settings(BaseModel):
     # Environment
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
 
+    # Background maintenance jobs (in-process scheduler, one runner per job via advisory locks).
+    # Per-worker jobs such as the heartbeat flush always run.
+    BACKGROUND_JOBS_ENABLED: bool = os.getenv("BACKGROUND_JOBS_ENABLED", "true").lower() == "true"
+
+    # Engagement heartbeats (write-behind buffer, flushed per worker)
+    PROGRESS_HEARTBEAT_FLUSH_SECONDS: float = float(os.getenv("PROGRESS_HEARTBEAT_FLUSH_SECONDS", "5"))
+    PROGRESS_HEARTBEAT_MAX_PENDING: int = int(os.getenv("PROGRESS_HEARTBEAT_MAX_PENDING", "5000"))
+
+    # GET /progress/{user_id} snapshot cache per worker (0 disables)
+    PROGRESS_SNAPSHOT_CACHE_SECONDS: float = float(os.getenv("PROGRESS_SNAPSHOT_CACHE_SECONDS", "30"))
+
+    # Cohort analytics materialized view refresh
+    PROGRESS_ANALYTICS_REFRESH_SECONDS: int = int(os.getenv("PROGRESS_ANALYTICS_REFRESH_SECONDS", "300"))
+
+    # At-risk learner scoring batch job
+    AT_RISK_SCORING_INTERVAL_SECONDS: int = int(os.getenv("AT_RISK_SCORING_INTERVAL_SECONDS", "3600"))
+
+    # Server-sent change notifications. Enable the NOTIFY bridge when running
+    # more than one worker so events reach clients connected to any of them.
+    REALTIME_PG_NOTIFY: bool = os.getenv("REALTIME_PG_NOTIFY", "false").lower() == "true"
+    REALTIME_NOTIFY_CHANNEL: str = os.getenv("REALTIME_NOTIFY_CHANNEL", "lms_events")
+    REALTIME_QUEUE_SIZE: int = int(os.getenv("REALTIME_QUEUE_SIZE", "100"))
+    REALTIME_KEEPALIVE_SECONDS: float = float(os.getenv("REALTIME_KEEPALIVE_SECONDS", "15"))
+    REALTIME_STREAM_MAX_SECONDS: float = float(os.getenv("REALTIME_STREAM_MAX_SECONDS", "600"))
+    REALTIME_RETRY_MS: int = int(os.getenv("REALTIME_RETRY_MS", "3000"))
+
+    # Background report jobs (process pool per API worker) and their cached artifacts
+    REPORT_JOB_WORKERS: int = int(os.getenv("REPORT_JOB_WORKERS", "2"))
+    REPORT_JOB_TIMEOUT_SECONDS: int = int(os.getenv("REPORT_JOB_TIMEOUT_SECONDS", "3600"))
+    REPORT_ARTIFACT_DIR: str = os.getenv("REPORT_ARTIFACT_DIR", "var/report_artifacts")
+    REPORT_ARTIFACT_TTL_SECONDS: int = int(os.getenv("REPORT_ARTIFACT_TTL_SECONDS", "86400"))
+    REPORT_JOB_SWEEP_SECONDS: int = int(os.getenv("REPORT_JOB_SWEEP_SECONDS", "900"))
+    # Larger XLSX exports are refused by GET /reports/compliance/{resource}; use /reports/jobs
+    REPORT_XLSX_MAX_ROWS: int = int(os.getenv("REPORT_XLSX_MAX_ROWS", "50000"))
+    # Processes each transcript batch job renders PDFs with
+    TRANSCRIPT_RENDER_WORKERS: int = int(os.getenv("TRANSCRIPT_RENDER_WORKERS", "4"))
+    # Content-addressed transcript PDFs: sweep interval and how long unreferenced files are kept
+    TRANSCRIPT_PDF_SWEEP_SECONDS: int = int(os.getenv("TRANSCRIPT_PDF_SWEEP_SECONDS", "3600"))
+    TRANSCRIPT_PDF_GRACE_SECONDS: int = int(os.getenv("TRANSCRIPT_PDF_GRACE_SECONDS", "3600"))
+
+    # Signed e-signature PDFs are rendered in their own small process pool
+    SIGNED_PDF_WORKERS: int = int(os.getenv("SIGNED_PDF_WORKERS", "1"))
+    SIGNED_PDF_MAX_ATTEMPTS: int = int(os.getenv("SIGNED_PDF_MAX_ATTEMPTS", "3"))
+    SIGNED_PDF_RETRY_SECONDS: int = int(os.getenv("SIGNED_PDF_RETRY_SECONDS", "120"))
+    SIGNED_PDF_DISPATCH_SECONDS: int = int(os.getenv("SIGNED_PDF_DISPATCH_SECONDS", "60"))
+    SIGNED_PDF_DOWNLOAD_WAIT_SECONDS: float = float(os.getenv("SIGNED_PDF_DOWNLOAD_WAIT_SECONDS", "10"))
+    # Parsed document template PDFs kept per process (bytes of template files)
+    TEMPLATE_CACHE_MAX_BYTES: int = int(os.getenv("TEMPLATE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    # Content-addressed file store for document PDFs and signature images (app.services.file_store)
+    FILE_STORE_BACKEND: str = os.getenv("FILE_STORE_BACKEND", "local")  # local | s3
+    FILE_STORE_DIR: str = os.getenv("FILE_STORE_DIR", "var/blobs")
+    FILE_STORE_S3_BUCKET: str | None = os.getenv("FILE_STORE_S3_BUCKET")
+    FILE_STORE_S3_PREFIX: str = os.getenv("FILE_STORE_S3_PREFIX", "blobs/")
+    FILE_STORE_S3_ENDPOINT_URL: str | None = os.getenv("FILE_STORE_S3_ENDPOINT_URL")  # e.g. MinIO
+    FILE_STORE_GC_SECONDS: int = int(os.getenv("FILE_STORE_GC_SECONDS", "3600"))
+    FILE_STORE_GC_GRACE_SECONDS: int = int(os.getenv("FILE_STORE_GC_GRACE_SECONDS", "86400"))
+    # Normalized signature images; now kept in the file store, this directory
+    # holds those stored before it until scripts/migrate_to_file_store.py runs
+    SIGNATURE_BLOB_DIR: str = os.getenv("SIGNATURE_BLOB_DIR", "var/signatures")
+    SIGNATURE_MAX_WIDTH: int = int(os.getenv("SIGNATURE_MAX_WIDTH", "600"))
+    SIGNATURE_MAX_HEIGHT: int = int(os.getenv("SIGNATURE_MAX_HEIGHT", "200"))
+    # Uploads are streamed here before being moved into place (same filesystem keeps the move atomic)
+    UPLOAD_STAGING_DIR: str = os.getenv("UPLOAD_STAGING_DIR", "var/uploads")
+    # Request bodies above this are refused before parsing (the largest upload, H5P at 100MB, plus
+    # multipart overhead); keep in step with client_max_body_size in nginx/nginx.conf
+    MAX_REQUEST_BODY_MB: float = float(os.getenv("MAX_REQUEST_BODY_MB", "105"))
+    # Downloads (app.core.downloads): with a location set, nginx sends files under the root from
+    # that internal location (X-Accel-Redirect) instead of a worker streaming them
+    DOWNLOAD_ACCEL_REDIRECT_LOCATION: str | None = os.getenv("DOWNLOAD_ACCEL_REDIRECT_LOCATION")  # e.g. /protected/
+    DOWNLOAD_ACCEL_REDIRECT_ROOT: str = os.getenv("DOWNLOAD_ACCEL_REDIRECT_ROOT", ".")
+
+    # xAPI statement storage
+    XAPI_MAINTENANCE_INTERVAL_SECONDS: int = int(os.getenv("XAPI_MAINTENANCE_INTERVAL_SECONDS", "900"))
+    XAPI_PARTITION_MONTHS_AHEAD: int = int(os.getenv("XAPI_PARTITION_MONTHS_AHEAD", "2"))
+    XAPI_RAW_RETENTION_MONTHS: int = int(os.getenv("XAPI_RAW_RETENTION_MONTHS", "13"))  # 0 keeps raw forever
+    XAPI_CONSUMER_LAG_SECONDS: int = int(os.getenv("XAPI_CONSUMER_LAG_SECONDS", "120"))
+    XAPI_PROGRESS_PROJECTION_INTERVAL_SECONDS: int = int(os.getenv("XAPI_PROGRESS_PROJECTION_INTERVAL_SECONDS", "60"))
+
     @field_validator('SECRET_KEY')
     @classmethod
     def validate_secret_key(cls, v: str) -> str:
@@ -0,0 +1,138 @@
+"""
+File Downloads
+
+Download endpoints used to return a bare FileResponse: the worker streamed
+every byte, and clients could neither revalidate nor resume. file_download()
+adds, for a file the endpoint has already authorized:
+
+- a strong ETag (the content hash when the caller knows it) and
+  `Cache-Control: private, no-cache`, so browsers revalidate on every use
+- a 304 answer to a matching If-None-Match, without touching the file
+- byte ranges (Range / If-Range, handled by Starlette's FileResponse)
+- with DOWNLOAD_ACCEL_REDIRECT_LOCATION set, an empty response carrying
+  X-Accel-Redirect, so nginx sends the file from an internal location and
+  the worker is free immediately (nginx then answers ranges and
+  revalidation itself, with its own ETag)
+
+X-Accel-Redirect maps files under DOWNLOAD_ACCEL_REDIRECT_ROOT to the same
+relative path under the location, e.g. with the backend in /code (see
+nginx/nginx.conf):
+
+    location /protected/ {
+        internal;
+        alias /code/;  # DOWNLOAD_ACCEL_REDIRECT_ROOT, mounted into nginx
+    }
+
+Files outside the root are sent by the worker as before. nginx runs as
+another user, so files written for download get SERVED_FILE_MODE (0644)
+with make_servable() before they are renamed into place; tempfile.mkstemp
+creates them 0600.
+
+Usage:
+    from app.core.downloads import file_download
+
+    return file_download(request, path, filename="report.pdf", etag=content_hash)
+"""
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Optional, Union
+from urllib.parse import quote
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+
+from app.core.config import settings
+
+CACHE_CONTROL = "private, no-cache"
+# World-readable, so nginx can send the file through X-Accel-Redirect
+SERVED_FILE_MODE = 0o644
+
+
+def quote_etag(tag: str) -> str:
+    """Strong entity tag for an opaque value such as a SHA-256 hex digest."""
+    return f'"{tag}"'
+
+
+def stat_etag(stat_result: os.stat_result) -> str:
+    """ETag from size and mtime, for files whose content hash is not known."""
+    base = f"{stat_result.st_mtime}-{stat_result.st_size}"
+    return quote_etag(hashlib.md5(base.encode(), usedforsecurity=False).hexdigest())
+
+
+def content_disposition(filename: str) -> str:
+    """Attachment header for filename, as FileResponse writes it."""
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """A 304 response if the client's If-None-Match already covers etag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    # If-None-Match uses weak comparison
+    candidates = {candidate.strip().removeprefix("W/") for candidate in header.split(",")}
+    if "*" in candidates or etag in candidates:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    return None
+
+
+def make_servable(path: Union[str, Path]) -> None:
+    """Give a file about to be renamed into a served location SERVED_FILE_MODE."""
+    os.chmod(path, SERVED_FILE_MODE)
+
+
+def accel_redirect_uri(path: Path) -> Optional[str]:
+    """Internal nginx URI for path, or None when X-Accel-Redirect is off or path is outside the root."""
+    location = settings.DOWNLOAD_ACCEL_REDIRECT_LOCATION
+    if not location:
+        return None
+    try:
+        relative = path.resolve().relative_to(Path(settings.DOWNLOAD_ACCEL_REDIRECT_ROOT).resolve())
+    except ValueError:
+        return None
+    return location.rstrip("/") + "/" + quote(relative.as_posix())
+
+
+def file_download(
+    request: Request,
+    path: Path,
+    filename: str,
+    media_type: str = "application/pdf",
+    etag: Optional[str] = None,
+) -> Response:
+    """
+    Send an authorized file, honouring If-None-Match and Range.
+
+    Args:
+        request: The download request
+        path: File to send
+        filename: Name offered in Content-Disposition
+        media_type: Content type of the file
+        etag: Content hash of the file, if known; otherwise the ETag is
+            derived from its size and mtime
+
+    Raises:
+        FileNotFoundError: If path does not exist
+    """
+    stat_result = path.stat()
+    etag = quote_etag(etag) if etag else stat_etag(stat_result)
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    uri = accel_redirect_uri(path)
+    if uri is not None:
+        # Only the headers; nginx supplies the body, length and ranges
+        return Response(
+            media_type=media_type,
+            headers={**headers, "Content-Disposition": content_disposition(filename), "X-Accel-Redirect": uri},
+        )
+    return FileResponse(
+        path, filename=filename, media_type=media_type, headers=headers, stat_result=stat_result
+    )
@@ -41,6 +41,9 @@ MAGIC_BYTES = {
     'png': b'\x89PNG\r\n\x1a\n',
     'jpg': b'\xff\xd8\xff',
     'jpeg': b'\xff\xd8\xff',
+    'gif': b'GIF8',
+    'zip': b'PK',
+    'h5p': b'PK\x03\x04',
 }
 
 # Allowed MIME types
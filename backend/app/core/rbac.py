@@ -9,6 +9,8 @@ from sqlalchemy.orm import Session
 
 from app.db.models.user import User
 
+STAFF_ROLES = {"admin", "staff", "registrar", "instructor", "finance"}
+
 
 # Import get_current_user lazily to avoid circular imports
 def _get_current_user():
@@ -26,6 +28,16 @@ def _get_role_names(user: User) -> List[str]:
     return [r.name for r in roles]
 
 
+def has_staff_access(current_user: User) -> bool:
+    """Check if current user belongs to any staff role."""
+    roles = getattr(current_user, "roles", []) or []
+    for role in roles:
+        role_name = role.name if hasattr(role, "name") else role
+        if role_name in STAFF_ROLES:
+            return True
+    return False
+
+
 def require_roles(allowed_roles: List[str]):
     """
     Dependency factory to require specific roles.
@@ -0,0 +1,169 @@
+"""
+Streaming Upload Intake
+
+Upload handlers used to `await file.read()` the whole body, validate the
+bytes and write them with a blocking open().write(). receive_upload()
+streams the body to a staging file in UPLOAD_STAGING_DIR instead, computing
+SHA-256 and size as it goes:
+
+- the extension is checked before anything is read
+- magic bytes are checked on the first chunk
+- the per-route size limit is checked while copying, so an oversized upload
+  is not staged
+- file I/O and hashing run in worker threads, off the event loop
+
+Starlette has already spooled the multipart file part to a temporary file by
+the time the handler runs, so max_size_mb does not stop an oversized upload
+from being received. The request body as a whole is capped before parsing,
+at MAX_REQUEST_BODY_MB by RequestBodyLimitMiddleware (app.middleware) and by
+client_max_body_size in nginx.
+
+The StagedUpload it returns is moved into place with move_to(), an atomic
+rename, so readers never see a partially written file.
+
+Usage:
+    from app.core.uploads import receive_upload
+
+    with await receive_upload(file, {'.pdf'}, max_size_mb=10) as upload:
+        content = validate_pdf(await upload.read(), upload.filename)
+        await upload.write(content)
+        await upload.move_to(destination)
+"""
+
+import asyncio
+import errno
+import hashlib
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from fastapi import HTTPException, UploadFile
+
+from app.core.config import settings
+from app.core.downloads import make_servable
+from app.core.file_validation import validate_file_extension, validate_magic_bytes
+
+# Bytes read from the request per step; at most this much is held in memory
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class StagedUpload:
+    """An upload streamed to a staging file, with its digest and size."""
+
+    def __init__(self, filename: str, path: Path, size: int, sha256: str):
+        self.filename = filename
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+        self._moved = False
+
+    def __enter__(self) -> "StagedUpload":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.discard()
+
+    async def read(self) -> bytes:
+        """Staged content, for validators that parse the whole file."""
+        return await asyncio.to_thread(self.path.read_bytes)
+
+    async def write(self, content: bytes) -> None:
+        """Replace the staged content, e.g. with a sanitized version."""
+        await asyncio.to_thread(self.path.write_bytes, content)
+        self.size = len(content)
+        self.sha256 = hashlib.sha256(content).hexdigest()
+
+    async def move_to(self, destination: Path) -> Path:
+        """Atomically move the staged file to destination, replacing any file there."""
+        await asyncio.to_thread(_replace, self.path, destination)
+        self._moved = True
+        return destination
+
+    def discard(self) -> None:
+        """Remove the staging file unless it was moved into place."""
+        if not self._moved:
+            self.path.unlink(missing_ok=True)
+
+
+def _replace(source: Path, destination: Path) -> None:
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    # The staging file is 0600 (mkstemp); static files are read by nginx
+    make_servable(source)
+    try:
+        os.replace(source, destination)
+        return
+    except OSError as exc:
+        if exc.errno != errno.EXDEV:
+            raise
+    # Staging dir on another filesystem: copy next to the destination, then rename
+    fd, tmp_name = tempfile.mkstemp(prefix=".tmp-", dir=destination.parent)
+    try:
+        with os.fdopen(fd, "wb") as tmp, open(source, "rb") as src:
+            shutil.copyfileobj(src, tmp, UPLOAD_CHUNK_SIZE)
+        make_servable(tmp_name)
+        os.replace(tmp_name, destination)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    source.unlink(missing_ok=True)
+
+
+def _write_chunk(handle, digest, chunk: bytes) -> None:
+    digest.update(chunk)
+    handle.write(chunk)
+
+
+async def receive_upload(
+    file: UploadFile,
+    allowed_extensions: set[str],
+    max_size_mb: float,
+    filename: Optional[str] = None,
+) -> StagedUpload:
+    """
+    Stream an upload to a staging file, validating it on the way.
+
+    Args:
+        file: Incoming upload
+        allowed_extensions: Set of allowed extensions (e.g., {'.pdf', '.jpg'})
+        max_size_mb: Maximum allowed size in megabytes
+        filename: Name to validate instead of file.filename (e.g. sanitized)
+
+    Returns:
+        StagedUpload; use it as a context manager so the staging file is
+        removed if the handler fails before move_to()
+
+    Raises:
+        HTTPException: If extension, magic bytes or size are invalid
+    """
+    filename = filename or file.filename
+    validate_file_extension(filename, allowed_extensions)
+    max_bytes = int(max_size_mb * 1024 * 1024)
+
+    staging_dir = Path(settings.UPLOAD_STAGING_DIR)
+    staging_dir.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix="upload-", dir=staging_dir)
+    path = Path(tmp_name)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                if size == 0:
+                    validate_magic_bytes(chunk, filename)
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"File too large. Maximum size is {max_size_mb:g}MB"
+                    )
+                await asyncio.to_thread(_write_chunk, handle, digest, chunk)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+
+    if size == 0:
+        path.unlink(missing_ok=True)
+        raise HTTPException(status_code=400, detail="Uploaded file is empty")
+    return StagedUpload(filename, path, size, digest.hexdigest())
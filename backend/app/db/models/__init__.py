@@ -1,14 +1,17 @@
 from .user import User  # noqa: F401
 from .role import Role, UserRole  # noqa: F401
 from .program import Program, Module  # noqa: F401
-from .enrollment import Enrollment, ModuleProgress  # noqa: F401
-from .scorm import ScormRecord  # noqa: F401
-from .xapi import XapiStatement  # noqa: F401
+from .enrollment import Enrollment, ModuleProgress, EnrollmentRiskScore  # noqa: F401
+from .progress_views import program_module_progress  # noqa: F401
+from .scorm import ScormRecord, ScormInteraction  # noqa: F401
+from .xapi import XapiStatement, XapiDailyRollup, XapiCheckpoint  # noqa: F401
 from .audit_log import AuditLog  # noqa: F401
 from .refresh_token import RefreshToken  # noqa: F401
 from .document import DocumentTemplate, SignedDocument, DocumentSignature, DocumentAuditLog  # noqa: F401
+from .file_blob import FileBlob  # noqa: F401
 from .registration_request import RegistrationRequest  # noqa: F401
 from .login_attempt import LoginAttempt  # noqa: F401
+from .background_job import BackgroundJob, ReportSourceVersion  # noqa: F401
 
 # Compliance models
 from .compliance.attendance import AttendanceLog  # noqa: F401
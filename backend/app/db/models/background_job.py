@@ -0,0 +1,109 @@
+from sqlalchemy import (
+    DDL,
+    BigInteger,
+    Column,
+    ForeignKey,
+    Index,
+    Integer,
+    JSON,
+    String,
+    Text,
+    TIMESTAMP,
+    event,
+    text,
+)
+from sqlalchemy.dialects.postgresql import UUID
+import uuid
+from app.db.base import Base
+
+
+class BackgroundJob(Base):
+    """
+    A long-running export (report, transcript batch, ...) executed in the
+    background job process pool; the finished artifact is a content-addressed
+    file under REPORT_ARTIFACT_DIR.
+    """
+    __tablename__ = "background_jobs"
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    kind = Column(String(50), nullable=False)
+    params = Column(JSON, nullable=False)
+    status = Column(String(20), nullable=False, default="queued")  # queued/running/succeeded/failed/expired
+    # Hash of kind, params and the source tables' versions; equal keys mean an identical artifact
+    cache_key = Column(String(64), nullable=False)
+    progress_done = Column(Integer, nullable=False, default=0)
+    progress_total = Column(Integer)
+    error = Column(Text)
+    artifact_sha256 = Column(String(64))
+    artifact_size = Column(BigInteger)
+    artifact_filename = Column(String(255))
+    content_type = Column(String(100))
+    row_count = Column(Integer)
+    created_by = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"))
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text("now()"))
+    started_at = Column(TIMESTAMP(timezone=True))
+    finished_at = Column(TIMESTAMP(timezone=True))
+    expires_at = Column(TIMESTAMP(timezone=True))
+
+    __table_args__ = (
+        Index("idx_background_jobs_cache_key", "cache_key", "status"),
+        Index("idx_background_jobs_status_created", "status", "created_at"),
+    )
+
+
+class ReportSourceVersion(Base):
+    """Change counter per table, bumped by a statement-level trigger on every write."""
+    __tablename__ = "report_source_versions"
+    table_name = Column(String(120), primary_key=True)  # schema-qualified unless in public
+    version = Column(BigInteger, nullable=False, default=0)
+    changed_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text("now()"))
+
+
+# Tables report jobs read from; writes to any of them invalidate cached artifacts
+REPORT_SOURCE_TABLES = (
+    "users",
+    "enrollments",  # program/student filters
+    "modules",
+    "compliance.attendance_logs",
+    "compliance.complaints",
+    "compliance.credentials",
+    "compliance.externships",
+    "compliance.skills_checkoffs",
+    "compliance.withdrawals",
+    "compliance.refunds",
+    "compliance.transcripts",
+)
+
+REPORT_SOURCE_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION bump_report_source_version() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO report_source_versions (table_name, version, changed_at)
+    VALUES (
+        CASE WHEN TG_TABLE_SCHEMA = 'public' THEN TG_TABLE_NAME ELSE TG_TABLE_SCHEMA || '.' || TG_TABLE_NAME END,
+        1,
+        now()
+    )
+    ON CONFLICT (table_name) DO UPDATE
+    SET version = report_source_versions.version + 1, changed_at = now();
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def report_source_trigger_sql(table: str) -> str:
+    name = "trg_report_source_version_" + table.replace(".", "_")
+    return (
+        f"DROP TRIGGER IF EXISTS {name} ON {table};"
+        f"CREATE TRIGGER {name} AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+        "FOR EACH STATEMENT EXECUTE FUNCTION bump_report_source_version()"
+    )
+
+
+# Keep databases built with create_all in step with the alembic migration
+for statement in (REPORT_SOURCE_FUNCTION_SQL, *map(report_source_trigger_sql, REPORT_SOURCE_TABLES)):
+    event.listen(Base.metadata, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+event.listen(
+    Base.metadata,
+    "after_drop",
+    DDL("DROP FUNCTION IF EXISTS bump_report_source_version() CASCADE").execute_if(dialect="postgresql"),
+)
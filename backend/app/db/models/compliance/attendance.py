@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, TIMESTAMP, ForeignKey
+from sqlalchemy import Column, String, TIMESTAMP, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from app.db.base import Base
@@ -6,7 +6,12 @@ from app.db.base import Base
 
 class AttendanceLog(Base):
     __tablename__ = "attendance_logs"
-    __table_args__ = {"schema": "compliance"}
+    __table_args__ = (
+        Index("idx_attendance_logs_user_started", "user_id", "started_at"),
+        Index("idx_attendance_logs_module_started", "module_id", "started_at"),
+        Index("idx_attendance_logs_started", "started_at"),
+        {"schema": "compliance"},
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"))
     module_id = Column(UUID(as_uuid=True), ForeignKey("modules.id", ondelete="CASCADE"))
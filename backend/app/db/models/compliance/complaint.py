@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, TIMESTAMP, ForeignKey
+from sqlalchemy import Column, String, Text, TIMESTAMP, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from app.db.base import Base
@@ -6,7 +6,12 @@ from app.db.base import Base
 
 class Complaint(Base):
     __tablename__ = "complaints"
-    __table_args__ = {"schema": "compliance"}
+    __table_args__ = (
+        Index("idx_complaints_user_submitted", "user_id", "submitted_at"),
+        Index("idx_complaints_status_submitted", "status", "submitted_at"),
+        Index("idx_complaints_submitted", "submitted_at"),
+        {"schema": "compliance"},
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"))
     submitted_at = Column(TIMESTAMP(timezone=True), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, TIMESTAMP, ForeignKey
+from sqlalchemy import Column, String, TIMESTAMP, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from app.db.base import Base
@@ -6,7 +6,12 @@ from app.db.base import Base
 
 class Credential(Base):
     __tablename__ = "credentials"
-    __table_args__ = {"schema": "compliance"}
+    __table_args__ = (
+        Index("idx_credentials_user_issued", "user_id", "issued_at"),
+        Index("idx_credentials_program_issued", "program_id", "issued_at"),
+        Index("idx_credentials_issued", "issued_at"),
+        {"schema": "compliance"},
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"))
     program_id = Column(UUID(as_uuid=True), ForeignKey("programs.id", ondelete="CASCADE"))
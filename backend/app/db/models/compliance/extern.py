@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Boolean, TIMESTAMP, ForeignKey, Text
+from sqlalchemy import Column, String, Integer, Boolean, TIMESTAMP, ForeignKey, Index, Text
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from app.db.base import Base
@@ -6,7 +6,11 @@ from app.db.base import Base
 
 class Externship(Base):
     __tablename__ = "externships"
-    __table_args__ = {"schema": "compliance"}
+    __table_args__ = (
+        Index("idx_externships_user_verified", "user_id", "verified_at"),
+        Index("idx_externships_verified", "verified_at"),
+        {"schema": "compliance"},
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"))
     site_name = Column(String, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, TIMESTAMP, ForeignKey, Text
+from sqlalchemy import Column, String, TIMESTAMP, ForeignKey, Index, Text
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from app.db.base import Base
@@ -6,7 +6,13 @@ from app.db.base import Base
 
 class SkillCheckoff(Base):
     __tablename__ = "skills_checkoffs"
-    __table_args__ = {"schema": "compliance"}
+    __table_args__ = (
+        Index("idx_skills_checkoffs_user_signed", "user_id", "signed_at"),
+        Index("idx_skills_checkoffs_module_signed", "module_id", "signed_at"),
+        Index("idx_skills_checkoffs_status_signed", "status", "signed_at"),
+        Index("idx_skills_checkoffs_signed", "signed_at"),
+        {"schema": "compliance"},
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"))
     module_id = Column(UUID(as_uuid=True), ForeignKey("modules.id", ondelete="CASCADE"))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, TIMESTAMP, ForeignKey, Numeric, Text
+from sqlalchemy import Column, TIMESTAMP, ForeignKey, Index, Numeric, String, Text
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from app.db.base import Base
@@ -6,10 +6,18 @@ from app.db.base import Base
 
 class Transcript(Base):
     __tablename__ = "transcripts"
-    __table_args__ = {"schema": "compliance"}
+    __table_args__ = (
+        Index("idx_transcripts_user_generated", "user_id", "generated_at"),
+        Index("idx_transcripts_program_generated", "program_id", "generated_at"),
+        Index("idx_transcripts_generated", "generated_at"),
+        Index("idx_transcripts_content_hash", "content_hash"),
+        {"schema": "compliance"},
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"))
     program_id = Column(UUID(as_uuid=True), ForeignKey("programs.id", ondelete="CASCADE"))
     gpa = Column(Numeric(3, 2))
     generated_at = Column(TIMESTAMP(timezone=True))
     pdf_url = Column(Text)
+    # SHA-256 of the rendered inputs; identical transcripts share one PDF
+    content_hash = Column(String(64))
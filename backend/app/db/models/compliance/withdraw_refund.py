@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, TIMESTAMP, ForeignKey, Text
+from sqlalchemy import Column, Integer, TIMESTAMP, ForeignKey, Index, Text
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from app.db.base import Base
@@ -6,7 +6,11 @@ from app.db.base import Base
 
 class Withdrawal(Base):
     __tablename__ = "withdrawals"
-    __table_args__ = {"schema": "compliance"}
+    __table_args__ = (
+        Index("idx_withdrawals_enrollment_requested", "enrollment_id", "requested_at"),
+        Index("idx_withdrawals_requested", "requested_at"),
+        {"schema": "compliance"},
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     enrollment_id = Column(UUID(as_uuid=True), ForeignKey("enrollments.id", ondelete="CASCADE"))
     requested_at = Column(TIMESTAMP(timezone=True), nullable=False)
@@ -17,7 +21,11 @@ class Withdrawal(Base):
 
 class Refund(Base):
     __tablename__ = "refunds"
-    __table_args__ = {"schema": "compliance"}
+    __table_args__ = (
+        Index("idx_refunds_withdrawal_approved", "withdrawal_id", "approved_at"),
+        Index("idx_refunds_approved", "approved_at"),
+        {"schema": "compliance"},
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     withdrawal_id = Column(UUID(as_uuid=True), ForeignKey("compliance.withdrawals.id", ondelete="CASCADE"))
     amount_cents = Column(Integer, nullable=False)
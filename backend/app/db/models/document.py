@@ -7,7 +7,7 @@ with full audit trail for legal compliance.
 
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Boolean
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Boolean, Index, Integer, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 
@@ -27,7 +27,10 @@ class DocumentTemplate(Base):
     name = Column(String(255), nullable=False)  # e.g., "Enrollment Agreement"
     description = Column(Text, nullable=True)
     version = Column(String(50), nullable=False)  # e.g., "v2.0"
-    file_path = Column(String(500), nullable=False)  # Path to PDF template
+    # PDF in the file store (app.services.file_store); file_path is only set
+    # on templates uploaded before the store existed
+    blob_hash = Column(String(64), nullable=True)
+    file_path = Column(String(500), nullable=True)  # Path to PDF template
     is_active = Column(Boolean, default=True)
     requires_counter_signature = Column(Boolean, default=False)  # School official signature
 
@@ -65,10 +68,19 @@ class SignedDocument(Base):
     form_data = Column(JSONB, nullable=True)
     retention_expires_at = Column(DateTime(timezone=True), nullable=True)
 
-    # File paths
+    # PDFs in the file store; the unsigned copy is the template's blob itself.
+    # The *_file_path columns are only set on documents from before the store.
+    unsigned_blob_hash = Column(String(64), nullable=True)
+    signed_blob_hash = Column(String(64), nullable=True)
     unsigned_file_path = Column(String(500), nullable=True)  # Pre-filled PDF
     signed_file_path = Column(String(500), nullable=True)  # Final signed PDF
 
+    # Signed PDF rendering (app.services.signed_pdfs): pending -> ready | failed
+    pdf_status = Column(String(20), nullable=True)
+    pdf_requested_at = Column(DateTime(timezone=True), nullable=True)
+    pdf_attempts = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    pdf_error = Column(Text, nullable=True)
+
     # Timestamps
     created_at = Column(DateTime(timezone=True), default=utcnow, nullable=False)
     sent_at = Column(DateTime(timezone=True), nullable=True)  # When sent to student
@@ -84,6 +96,19 @@ class SignedDocument(Base):
     signatures = relationship("DocumentSignature", back_populates="document", cascade="all, delete-orphan")
     audit_logs = relationship("DocumentAuditLog", back_populates="document", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index(
+            "idx_signed_documents_pdf_pending",
+            "pdf_requested_at",
+            postgresql_where=text("pdf_status = 'pending'"),
+        ),
+        # Keyset pages of the document listings, newest first
+        Index("idx_signed_documents_created", "created_at", "id"),
+        Index("idx_signed_documents_user_created", "user_id", "created_at", "id"),
+        Index("idx_signed_documents_lead_created", "lead_id", "created_at", "id"),
+        Index("idx_signed_documents_status_created", "status", "created_at", "id"),
+    )
+
 
 class DocumentSignature(Base):
     """Individual signatures on a document"""
@@ -94,7 +119,10 @@ class DocumentSignature(Base):
     signer_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)  # Null for lead signatures
 
     signature_type = Column(String(50), nullable=False)  # "applicant", "student", or "school_official"
-    signature_data = Column(Text, nullable=False)  # Base64 encoded signature image
+    # Normalized PNG in the file store (app.services.signature_images);
+    # signature_data is only set on rows captured before the store existed
+    signature_hash = Column(String(64), nullable=True)
+    signature_data = Column(Text, nullable=True)  # Base64 encoded signature image
 
     # Legal audit trail
     signed_at = Column(DateTime(timezone=True), default=utcnow, nullable=False)
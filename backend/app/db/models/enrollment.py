@@ -1,4 +1,6 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, Date, TIMESTAMP, JSON
+from sqlalchemy import (
+    Column, String, Integer, ForeignKey, Date, TIMESTAMP, JSON, Numeric, UniqueConstraint, Index, text
+)
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from app.db.base import Base
@@ -27,3 +29,33 @@ class ModuleProgress(Base):
     active_time_seconds = Column(Integer, default=0)  # Time with page focused + activity
     sections_viewed = Column(JSON, default=list)  # List of section IDs viewed
     last_accessed_at = Column(TIMESTAMP(timezone=True))  # Last time progress was updated
+    last_activity_at = Column(TIMESTAMP(timezone=True))  # Latest xAPI statement (see xapi_progress_projection)
+
+    __table_args__ = (
+        # One row per module per enrollment; lets writers upsert with ON CONFLICT
+        UniqueConstraint("enrollment_id", "module_id", name="uq_module_progress_enrollment_module"),
+    )
+
+
+class EnrollmentRiskScore(Base):
+    """Latest at-risk score per enrollment (see app.services.risk_scoring)."""
+    __tablename__ = "enrollment_risk_scores"
+    enrollment_id = Column(UUID(as_uuid=True), ForeignKey("enrollments.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), nullable=False)
+    program_id = Column(UUID(as_uuid=True), nullable=False)
+    risk_score = Column(Numeric(5, 2), nullable=False)  # 0-100, higher is more at risk
+    risk_level = Column(String(10), nullable=False)  # low/medium/high
+    inactivity_days = Column(Integer, nullable=False)
+    pace_gap = Column(Numeric(5, 4), nullable=False)  # expected minus actual completion fraction
+    time_percentile = Column(Numeric(5, 4))  # active time per module vs. program cohort
+    time_per_module_seconds = Column(Numeric(12, 2))  # cohort input for incremental runs
+    average_score = Column(Numeric(6, 2))
+    modules_completed = Column(Integer, nullable=False)
+    modules_total = Column(Integer, nullable=False)
+    last_activity_at = Column(TIMESTAMP(timezone=True))
+    computed_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text("now()"))
+
+    __table_args__ = (
+        Index("idx_enrollment_risk_scores_program_score", "program_id", "risk_score"),
+        Index("idx_enrollment_risk_scores_score", "risk_score"),
+    )
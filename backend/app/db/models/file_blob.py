@@ -0,0 +1,83 @@
+"""
+Reference counts for the content-addressed file store (app.services.file_store).
+
+One row per stored blob. Columns that hold blob hashes are listed in
+BLOB_REFERENCES; a before_flush listener adjusts ref_count as ORM inserts,
+updates and deletes of those columns are flushed, in the same transaction.
+Raw SQL and ON DELETE cascades bypass the listener, so the garbage collector
+recounts from the columns before it deletes anything.
+"""
+from collections import Counter
+
+from sqlalchemy import Column, Integer, String, TIMESTAMP, case, event, inspect, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db.models.document import DocumentSignature, DocumentTemplate, SignedDocument
+
+
+class FileBlob(Base):
+    __tablename__ = "file_blobs"
+    hash = Column(String(64), primary_key=True)  # SHA-256 of the content
+    ref_count = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text("now()"))
+    # When ref_count last dropped to zero; collected after FILE_STORE_GC_GRACE_SECONDS
+    released_at = Column(TIMESTAMP(timezone=True))
+
+
+# (model, attribute) pairs holding FileBlob hashes
+BLOB_REFERENCES = (
+    (DocumentTemplate, "blob_hash"),
+    (SignedDocument, "unsigned_blob_hash"),
+    (SignedDocument, "signed_blob_hash"),
+    (DocumentSignature, "signature_hash"),
+)
+_ATTRIBUTES = {}
+for _model, _attribute in BLOB_REFERENCES:
+    _ATTRIBUTES.setdefault(_model, []).append(_attribute)
+
+
+def _reference_deltas(session: Session) -> Counter:
+    deltas: Counter = Counter()
+    for instance in session.new:
+        for attribute in _ATTRIBUTES.get(type(instance), ()):
+            if value := getattr(instance, attribute):
+                deltas[value] += 1
+    for instance in session.dirty:
+        for attribute in _ATTRIBUTES.get(type(instance), ()):
+            history = inspect(instance).attrs[attribute].history
+            for value in history.added:
+                if value:
+                    deltas[value] += 1
+            for value in history.deleted:
+                if value:
+                    deltas[value] -= 1
+    for instance in session.deleted:
+        for attribute in _ATTRIBUTES.get(type(instance), ()):
+            # Loads the value if the instance was expired, e.g. by a commit
+            history = inspect(instance).attrs[attribute].load_history()
+            for value in (*history.unchanged, *history.deleted):
+                if value:
+                    deltas[value] -= 1
+    return deltas
+
+
+@event.listens_for(Session, "before_flush")
+def _count_blob_references(session: Session, flush_context, instances) -> None:
+    deltas = _reference_deltas(session)
+    # Sorted, so concurrent flushes lock file_blobs rows in the same order
+    for blob_hash, delta in sorted(deltas.items()):
+        if not delta:
+            continue
+        statement = insert(FileBlob).values(
+            hash=blob_hash, ref_count=max(delta, 0), released_at=None if delta > 0 else text("now()")
+        )
+        ref_count = FileBlob.ref_count + delta
+        session.execute(statement.on_conflict_do_update(
+            index_elements=[FileBlob.hash],
+            set_={
+                "ref_count": ref_count,
+                "released_at": case((ref_count <= 0, text("now()")), else_=None),
+            },
+        ))
@@ -0,0 +1,80 @@
+from sqlalchemy import (
+    DDL,
+    Column,
+    Date,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    TIMESTAMP,
+    event,
+)
+from sqlalchemy.dialects.postgresql import UUID
+from app.db.base import Base
+
+PROGRAM_PROGRESS_VIEW = "program_module_progress_mv"
+
+# One row per enrollment x module of the enrollment's program, whether or not
+# the student has a progress row yet. Feeds the cohort summary and matrix
+# endpoints; refreshed by app.services.progress_analytics.
+PROGRAM_PROGRESS_VIEW_SQL = f"""
+CREATE MATERIALIZED VIEW IF NOT EXISTS {PROGRAM_PROGRESS_VIEW} AS
+SELECT e.id AS enrollment_id,
+       e.user_id,
+       e.program_id,
+       e.status AS enrollment_status,
+       e.start_date,
+       m.id AS module_id,
+       m.code AS module_code,
+       m.title AS module_title,
+       m.position AS module_position,
+       COALESCE(mp.scorm_status, 'not_started') AS scorm_status,
+       mp.score,
+       COALESCE(mp.progress_pct, 0) AS progress_pct,
+       COALESCE(mp.active_time_seconds, 0) AS active_time_seconds,
+       GREATEST(mp.last_accessed_at, mp.last_activity_at) AS last_seen_at,
+       now() AS refreshed_at
+FROM enrollments e
+JOIN modules m ON m.program_id = e.program_id
+LEFT JOIN module_progress mp ON mp.enrollment_id = e.id AND mp.module_id = m.id
+"""
+
+# REFRESH ... CONCURRENTLY requires a unique index on the view
+PROGRAM_PROGRESS_VIEW_INDEXES = (
+    f"CREATE UNIQUE INDEX IF NOT EXISTS uq_{PROGRAM_PROGRESS_VIEW}_enrollment_module "
+    f"ON {PROGRAM_PROGRESS_VIEW} (enrollment_id, module_id)",
+    f"CREATE INDEX IF NOT EXISTS idx_{PROGRAM_PROGRESS_VIEW}_program "
+    f"ON {PROGRAM_PROGRESS_VIEW} (program_id, enrollment_id, module_position)",
+)
+
+# Read-only description of the view for queries. It lives in its own
+# MetaData so create_all/drop_all never treat it as a table.
+program_module_progress = Table(
+    PROGRAM_PROGRESS_VIEW,
+    MetaData(),
+    Column("enrollment_id", UUID(as_uuid=True), primary_key=True),
+    Column("user_id", UUID(as_uuid=True)),
+    Column("program_id", UUID(as_uuid=True)),
+    Column("enrollment_status", String),
+    Column("start_date", Date),
+    Column("module_id", UUID(as_uuid=True), primary_key=True),
+    Column("module_code", String),
+    Column("module_title", String),
+    Column("module_position", Integer),
+    Column("scorm_status", String),
+    Column("score", Integer),
+    Column("progress_pct", Integer),
+    Column("active_time_seconds", Integer),
+    Column("last_seen_at", TIMESTAMP(timezone=True)),
+    Column("refreshed_at", TIMESTAMP(timezone=True)),
+)
+
+# Keep databases built with create_all (tests, first run) in step with the
+# alembic migration; the view must go before the tables it reads from.
+for statement in (PROGRAM_PROGRESS_VIEW_SQL, *PROGRAM_PROGRESS_VIEW_INDEXES):
+    event.listen(Base.metadata, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+event.listen(
+    Base.metadata,
+    "before_drop",
+    DDL(f"DROP MATERIALIZED VIEW IF EXISTS {PROGRAM_PROGRESS_VIEW}").execute_if(dialect="postgresql"),
+)
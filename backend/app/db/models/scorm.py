@@ -1,4 +1,4 @@
-from sqlalchemy import Column, JSON, String, Numeric, ForeignKey
+from sqlalchemy import Column, JSON, String, Integer, Text, Numeric, ForeignKey, TIMESTAMP, UniqueConstraint, text
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from app.db.base import Base
@@ -13,4 +13,34 @@ class ScormRecord(Base):
     score_scaled = Column(Numeric(4, 3))
     score_raw = Column(Numeric(6, 2))
     session_time = Column(String)
+    # session_time in seconds, and the sum of finished sessions (cmi total_time)
+    session_time_seconds = Column(Numeric(10, 2))
+    total_time_seconds = Column(Numeric(12, 2), nullable=False, server_default=text("0"))
     interactions = Column(JSON)
+
+    __table_args__ = (
+        # One record per learner per module; writers upsert with ON CONFLICT
+        UniqueConstraint("user_id", "module_id", name="uq_scorm_records_user_module"),
+    )
+
+
+class ScormInteraction(Base):
+    """One cmi.interactions.n entry, appended by the SCORM runtime commit API."""
+    __tablename__ = "scorm_interactions"
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    record_id = Column(UUID(as_uuid=True), ForeignKey("scorm_records.id", ondelete="CASCADE"), nullable=False)
+    position = Column(Integer, nullable=False)  # n in cmi.interactions.n
+    interaction_id = Column(String)
+    type = Column(String(30))
+    learner_response = Column(Text)
+    correct_responses = Column(JSON(none_as_null=True))
+    result = Column(String(30))
+    weighting = Column(Numeric(10, 4))
+    latency_seconds = Column(Numeric(10, 2))
+    timestamp = Column(String(40))
+    description = Column(Text)
+    recorded_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text("now()"))
+
+    __table_args__ = (
+        UniqueConstraint("record_id", "position", name="uq_scorm_interactions_record_position"),
+    )
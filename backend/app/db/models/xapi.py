@@ -1,16 +1,92 @@
-from sqlalchemy import Column, JSON, TIMESTAMP, text
+from sqlalchemy import (
+    DDL,
+    Column,
+    Date,
+    Index,
+    Integer,
+    JSON,
+    Numeric,
+    PrimaryKeyConstraint,
+    String,
+    TIMESTAMP,
+    event,
+    text,
+)
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from app.db.base import Base
 
 
 class XapiStatement(Base):
+    """
+    Raw xAPI statements (append-only).
+
+    The table is range-partitioned by month on stored_at; partitions are
+    created ahead of time and dropped after retention by
+    app.services.xapi_maintenance. The partition key must be part of the
+    primary key, hence (id, stored_at).
+    """
     __tablename__ = "xapi_statements"
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), default=uuid.uuid4)
     actor = Column(JSON, nullable=False)
     verb = Column(JSON, nullable=False)
     object = Column(JSON, nullable=False)
     result = Column(JSON)
     context = Column(JSON)
     timestamp = Column(TIMESTAMP(timezone=True), nullable=False)
-    stored_at = Column(TIMESTAMP(timezone=True), server_default=text("now()"))
+    stored_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text("now()"))
+
+    __table_args__ = (
+        PrimaryKeyConstraint("id", "stored_at"),
+        # Keyset pagination / export order
+        Index("idx_xapi_statements_stored_at_id", "stored_at", "id"),
+        {"postgresql_partition_by": "RANGE (stored_at)"},
+    )
+
+
+# Catch-all partition so inserts never fail when no monthly partition exists
+# yet (e.g. fresh databases built with create_all). Maintenance moves rows out
+# of it when the matching monthly partition is created.
+event.listen(
+    XapiStatement.__table__,
+    "after_create",
+    DDL(
+        "CREATE TABLE IF NOT EXISTS xapi_statements_default "
+        "PARTITION OF xapi_statements DEFAULT"
+    ).execute_if(dialect="postgresql"),
+)
+
+
+class XapiDailyRollup(Base):
+    """Per-day, per-actor, per-activity aggregates read by instructor dashboards."""
+    __tablename__ = "xapi_daily_rollups"
+    day = Column(Date, nullable=False)
+    actor_key = Column(String(320), nullable=False)  # mbox, account or name
+    activity_id = Column(String(2048), nullable=False)
+    statements = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)
+    completions = Column(Integer, nullable=False, default=0)
+    best_score = Column(Numeric(10, 2))
+    time_spent_seconds = Column(Integer, nullable=False, default=0)
+    last_statement_at = Column(TIMESTAMP(timezone=True))
+
+    __table_args__ = (
+        PrimaryKeyConstraint("day", "actor_key", "activity_id"),
+        Index("idx_xapi_daily_rollups_actor_day", "actor_key", "day"),
+        Index("idx_xapi_daily_rollups_activity_day", "activity_id", "day"),
+    )
+
+
+class XapiCheckpoint(Base):
+    """
+    Progress marker for an incremental consumer of xapi_statements.
+
+    Each consumer (daily rollup, module progress projection, ...) records the
+    (stored_at, id) key of the last statement it has processed. Raw partitions
+    are only dropped once every consumer has moved past them.
+    """
+    __tablename__ = "xapi_checkpoints"
+    consumer = Column(String(100), primary_key=True)
+    last_stored_at = Column(TIMESTAMP(timezone=True), nullable=False)
+    last_id = Column(UUID(as_uuid=True), nullable=False)
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text("now()"))
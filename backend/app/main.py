@@ -1,3 +1,6 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
@@ -6,6 +9,7 @@ import logging
 
 from app.db import models  # noqa: F401 ensure model registration
 from app.core.config import settings
+from app.middleware.body_limit import RequestBodyLimitMiddleware
 from app.middleware.security import (
     SecurityHeadersMiddleware,
     UserContextMiddleware,
@@ -35,7 +39,20 @@ from app.routers import (
     content,
     documents,
     public_signing,
+    events,
+    jobs,
 )
+from app.services.background_jobs import SWEEP_JOB_NAME, shutdown_executor, sweep_jobs
+from app.services.file_store import GC_JOB_NAME as FILE_STORE_GC_JOB, collect_garbage
+from app.services.progress_analytics import REFRESH_JOB_NAME, refresh_program_progress
+from app.services.progress_buffer import flush_heartbeats
+from app.services.realtime import PgNotifyBridge, broker as realtime_broker
+from app.services.risk_scoring import JOB_NAME as RISK_SCORING_JOB, run_scoring
+from app.services.scheduler import PeriodicJob, run_local, scheduler
+from app.services.signed_pdfs import DISPATCH_JOB_NAME as SIGNED_PDF_DISPATCH_JOB, dispatch_pending_pdfs
+from app.services.transcripts import SWEEP_JOB_NAME as TRANSCRIPT_SWEEP_JOB, sweep_transcript_pdfs
+from app.services.xapi_maintenance import run_maintenance as run_xapi_maintenance
+from app.services.xapi_progress_projection import project_statements as project_xapi_progress
 
 # Configure logging for audit trail
 logging.basicConfig(
@@ -46,7 +63,75 @@ logging.basicConfig(
 # Initialize DB tables (alembic will handle migrations; create_all is safe for first run)
 # Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="AADA LMS API", version="1.0")
+# Periodic maintenance jobs (each run is serialized across workers by an advisory lock)
+scheduler.register(PeriodicJob(
+    name="xapi-maintenance",
+    interval_seconds=settings.XAPI_MAINTENANCE_INTERVAL_SECONDS,
+    func=run_xapi_maintenance,
+))
+scheduler.register(PeriodicJob(
+    name="xapi-progress-projection",
+    interval_seconds=settings.XAPI_PROGRESS_PROJECTION_INTERVAL_SECONDS,
+    func=project_xapi_progress,
+))
+scheduler.register(PeriodicJob(
+    name=REFRESH_JOB_NAME,
+    interval_seconds=settings.PROGRESS_ANALYTICS_REFRESH_SECONDS,
+    func=refresh_program_progress,
+))
+scheduler.register(PeriodicJob(
+    name=RISK_SCORING_JOB,
+    interval_seconds=settings.AT_RISK_SCORING_INTERVAL_SECONDS,
+    func=run_scoring,
+))
+scheduler.register(PeriodicJob(
+    name=SWEEP_JOB_NAME,
+    interval_seconds=settings.REPORT_JOB_SWEEP_SECONDS,
+    func=sweep_jobs,
+))
+scheduler.register(PeriodicJob(
+    name=TRANSCRIPT_SWEEP_JOB,
+    interval_seconds=settings.TRANSCRIPT_PDF_SWEEP_SECONDS,
+    func=sweep_transcript_pdfs,
+))
+scheduler.register(PeriodicJob(
+    name=SIGNED_PDF_DISPATCH_JOB,
+    interval_seconds=settings.SIGNED_PDF_DISPATCH_SECONDS,
+    func=dispatch_pending_pdfs,
+))
+scheduler.register(PeriodicJob(
+    name=FILE_STORE_GC_JOB,
+    interval_seconds=settings.FILE_STORE_GC_SECONDS,
+    func=collect_garbage,
+))
+scheduler.register(PeriodicJob(
+    name="progress-heartbeat-flush",
+    interval_seconds=settings.PROGRESS_HEARTBEAT_FLUSH_SECONDS,
+    initial_delay_seconds=settings.PROGRESS_HEARTBEAT_FLUSH_SECONDS,
+    func=flush_heartbeats,
+    exclusive=False,  # each worker flushes its own buffer
+))
+
+
+# Fan change notifications out across workers through LISTEN/NOTIFY
+realtime_bridge = PgNotifyBridge(realtime_broker) if settings.REALTIME_PG_NOTIFY else None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    scheduler.start(exclusive_jobs=settings.BACKGROUND_JOBS_ENABLED)
+    if realtime_bridge is not None:
+        realtime_bridge.start()
+    yield
+    await scheduler.stop()
+    shutdown_executor()
+    if realtime_bridge is not None:
+        await asyncio.to_thread(realtime_bridge.stop)
+    # Persist heartbeats still buffered in this worker
+    await asyncio.to_thread(run_local, flush_heartbeats)
+
+
+app = FastAPI(title="AADA LMS API", version="1.0", lifespan=lifespan)
 
 
 @app.exception_handler(RequestValidationError)
@@ -74,6 +159,9 @@ async def add_cache_headers(request: Request, call_next):
     # Static content - cache for 1 year
     if request.url.path.startswith("/static"):
         response.headers["Cache-Control"] = "public, max-age=31536000"
+    # Server-sent event streams - never cache
+    elif response.headers.get("content-type", "").startswith("text/event-stream"):
+        response.headers["Cache-Control"] = "no-store"
     # API GET responses - cache for 5 minutes
     elif request.method == "GET" and request.url.path.startswith("/api"):
         response.headers["Cache-Control"] = "private, max-age=300"
@@ -89,6 +177,8 @@ async def add_cache_headers(request: Request, call_next):
 app.add_middleware(SecurityHeadersMiddleware)
 app.add_middleware(AuditLoggingMiddleware)  # Needs to run after UserContext populates request.state
 app.add_middleware(UserContextMiddleware)   # Runs first to populate request.state
+# Oversized bodies are refused before any middleware or form parsing reads them
+app.add_middleware(RequestBodyLimitMiddleware, max_bytes=int(settings.MAX_REQUEST_BODY_MB * 1024 * 1024))
 
 # CORS middleware - use environment variable for production flexibility
 allowed_origins = [origin.strip() for origin in settings.ALLOWED_ORIGINS.split(",")]
@@ -150,6 +240,8 @@ app.include_router(leads.router, prefix=api_prefix)
 app.include_router(content.router, prefix=api_prefix)
 app.include_router(documents.router, prefix=api_prefix)
 app.include_router(public_signing.router, prefix=api_prefix)  # Public endpoints (no auth)
+app.include_router(events.router, prefix=api_prefix)
+app.include_router(jobs.router, prefix=api_prefix)
 
 from fastapi.staticfiles import StaticFiles  # noqa: E402
 import os  # noqa: E402
@@ -0,0 +1,75 @@
+"""
+Request body size limit.
+
+Starlette parses a multipart form, spooling every file part to disk, before
+the endpoint (and receive_upload()'s per-route size check) runs. This
+middleware refuses oversized bodies before that happens:
+
+- a Content-Length above the limit is answered with 413 without reading
+  the body
+- a body sent without Content-Length (chunked) is counted as it is read
+  and cut off with 413 once it exceeds the limit
+
+nginx enforces the same limit in front of the API (client_max_body_size in
+nginx/nginx.conf).
+"""
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class RequestBodyLimitMiddleware:
+    """Answer 413 to requests whose body is larger than max_bytes."""
+
+    def __init__(self, app: ASGIApp, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    def _too_large(self) -> JSONResponse:
+        limit_mb = self.max_bytes / (1024 * 1024)
+        return JSONResponse(
+            status_code=413, content={"detail": f"Request body too large. Maximum size is {limit_mb:g}MB"}
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            await self._too_large()(scope, receive, send)
+            return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes and not response_started:
+                    exceeded = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            nonlocal response_started
+            if exceeded:
+                return  # FastAPI answers a failed form parse with 400; this is a 413
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded:
+                raise
+        if exceeded:
+            await self._too_large()(scope, receive, send)
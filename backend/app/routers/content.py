@@ -11,6 +11,7 @@ Provides endpoints for instructors/admins to:
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Form
 from pathlib import Path
 from typing import Optional
+import asyncio
 import shutil
 import re
 from sqlalchemy.orm import Session
@@ -19,6 +20,7 @@ from app.db.session import get_db
 from app.db.models.program import Module
 from app.db.models.user import User
 from app.routers.auth import get_current_user
+from app.core.uploads import receive_upload
 
 router = APIRouter(prefix="/content", tags=["content"])
 
@@ -31,10 +33,10 @@ MARKDOWN_EXTENSIONS = {".md", ".markdown"}
 H5P_EXTENSIONS = {".h5p"}
 SUPPLEMENTAL_EXTENSIONS = {".pdf", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".mp4", ".mp3", ".zip"}
 
-# Maximum file sizes (in bytes)
-MAX_MARKDOWN_SIZE = 10 * 1024 * 1024  # 10 MB
-MAX_H5P_SIZE = 100 * 1024 * 1024  # 100 MB
-MAX_SUPPLEMENTAL_SIZE = 50 * 1024 * 1024  # 50 MB
+# Maximum file sizes (in MB), enforced while the upload streams in
+MAX_MARKDOWN_SIZE_MB = 10
+MAX_H5P_SIZE_MB = 100
+MAX_SUPPLEMENTAL_SIZE_MB = 50
 
 
 def require_admin(current_user: User = Depends(get_current_user)):
@@ -97,39 +99,19 @@ async def upload_module_markdown(
     # Validate module
     module = validate_module_id(module_id, db)
 
-    # Validate file extension
-    if not file.filename or Path(file.filename).suffix.lower() not in MARKDOWN_EXTENSIONS:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid file type. Allowed: {', '.join(MARKDOWN_EXTENSIONS)}"
-        )
-
-    # Check file size
-    contents = await file.read()
-    if len(contents) > MAX_MARKDOWN_SIZE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large. Maximum size: {MAX_MARKDOWN_SIZE / (1024*1024):.1f} MB"
-        )
-
-    # Get numeric ID for file path
-    numeric_id = get_module_numeric_id(module.code)
-
-    # Create module directory if it doesn't exist
-    module_dir = MODULES_BASE / f"module{numeric_id}"
-    module_dir.mkdir(parents=True, exist_ok=True)
-
-    # Save file
-    file_path = module_dir / f"Module_{numeric_id}_Lessons_Branded.md"
+    # Validate extension and size while streaming to a staging file
+    with await receive_upload(file, MARKDOWN_EXTENSIONS, MAX_MARKDOWN_SIZE_MB) as upload:
+        # Get numeric ID for file path
+        numeric_id = get_module_numeric_id(module.code)
+        file_path = MODULES_BASE / f"module{numeric_id}" / f"Module_{numeric_id}_Lessons_Branded.md"
 
-    # Backup existing file if it exists
-    if file_path.exists():
-        backup_path = file_path.with_suffix('.md.backup')
-        shutil.copy2(file_path, backup_path)
+        # Backup existing file if it exists
+        if file_path.exists():
+            backup_path = file_path.with_suffix('.md.backup')
+            await asyncio.to_thread(shutil.copy2, file_path, backup_path)
 
-    # Write new content
-    with open(file_path, 'wb') as f:
-        f.write(contents)
+        # Replace the lessons in one step
+        await upload.move_to(file_path)
 
     message = "Module markdown uploaded successfully"
     return {
@@ -178,43 +160,23 @@ async def upload_h5p_activity(
     # Validate module
     module = validate_module_id(module_id, db)
 
-    # Validate file extension
-    if not file.filename or Path(file.filename).suffix.lower() not in H5P_EXTENSIONS:
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid file type. Must be .h5p"
-        )
-
     # Sanitize activity_id
     activity_id = sanitize_filename(activity_id)
     if not activity_id.endswith('.h5p'):
         activity_id = f"{activity_id}.h5p"
 
-    # Check file size
-    contents = await file.read()
-    if len(contents) > MAX_H5P_SIZE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large. Maximum size: {MAX_H5P_SIZE / (1024*1024):.1f} MB"
-        )
-
-    # Get numeric ID for file path
-    numeric_id = get_module_numeric_id(module.code)
-
-    # Create module directory if it doesn't exist
-    module_dir = MODULES_BASE / f"module{numeric_id}"
-    module_dir.mkdir(parents=True, exist_ok=True)
-
-    # Save H5P file
-    h5p_path = module_dir / activity_id
+    # Validate extension, package signature and size while streaming
+    with await receive_upload(file, H5P_EXTENSIONS, MAX_H5P_SIZE_MB) as upload:
+        # Get numeric ID for file path
+        numeric_id = get_module_numeric_id(module.code)
 
-    with open(h5p_path, 'wb') as f:
-        f.write(contents)
+        # Save H5P file
+        h5p_path = await upload.move_to(MODULES_BASE / f"module{numeric_id}" / activity_id)
 
     # Clear cache for this activity (if exists)
     cache_dir = H5P_CACHE / activity_id.replace('.h5p', '')
     if cache_dir.exists():
-        shutil.rmtree(cache_dir)
+        await asyncio.to_thread(shutil.rmtree, cache_dir)
 
     return {
         "message": "H5P activity uploaded successfully",
@@ -309,40 +271,24 @@ async def upload_supplemental_file(
     # Sanitize filename
     safe_filename = sanitize_filename(file.filename)
 
-    # Validate file extension
-    if Path(safe_filename).suffix.lower() not in SUPPLEMENTAL_EXTENSIONS:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid file type. Allowed: {', '.join(SUPPLEMENTAL_EXTENSIONS)}"
-        )
-
-    # Check file size
-    contents = await file.read()
-    if len(contents) > MAX_SUPPLEMENTAL_SIZE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large. Maximum size: {MAX_SUPPLEMENTAL_SIZE / (1024*1024):.1f} MB"
-        )
-
-    # Get numeric ID for file path
-    numeric_id = get_module_numeric_id(module.code)
-
-    # Create target directory
-    module_dir = MODULES_BASE / f"module{numeric_id}"
-    if subfolder:
-        # Sanitize subfolder name
-        safe_subfolder = re.sub(r'[^a-zA-Z0-9_-]', '_', subfolder)
-        target_dir = module_dir / safe_subfolder
-    else:
-        target_dir = module_dir / "files"
-
-    target_dir.mkdir(parents=True, exist_ok=True)
-
-    # Save file
-    file_path = target_dir / safe_filename
+    # Validate extension, magic bytes and size while streaming
+    with await receive_upload(
+        file, SUPPLEMENTAL_EXTENSIONS, MAX_SUPPLEMENTAL_SIZE_MB, filename=safe_filename
+    ) as upload:
+        # Get numeric ID for file path
+        numeric_id = get_module_numeric_id(module.code)
 
-    with open(file_path, 'wb') as f:
-        f.write(contents)
+        # Target directory
+        module_dir = MODULES_BASE / f"module{numeric_id}"
+        if subfolder:
+            # Sanitize subfolder name
+            safe_subfolder = re.sub(r'[^a-zA-Z0-9_-]', '_', subfolder)
+            target_dir = module_dir / safe_subfolder
+        else:
+            target_dir = module_dir / "files"
+
+        # Save file
+        file_path = await upload.move_to(target_dir / safe_filename)
 
     return {
         "message": "File uploaded successfully",
@@ -5,16 +5,19 @@ Provides endpoints for managing enrollment agreements and other signed documents
 Implements legally compliant e-signature workflow with full audit trail.
 """
 
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Request, Query
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Request, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session, joinedload
 from pathlib import Path
-from typing import List, Optional, Tuple, Dict, Any
+from typing import List, Optional, Tuple, Dict, Any, Union
+import asyncio
 import contextlib
+import time
 import uuid
 from datetime import datetime, timezone, timedelta
 import json
-import shutil
 import logging
 
 from app.db.session import get_db
@@ -29,7 +32,6 @@ from app.db.models.document import (
 from app.services.token_service import TokenService
 from app.services.email import (
     send_enrollment_agreement_email,
-    send_completed_agreement_email,
     EmailDeliveryError,
 )
 from app.services.sms import send_enrollment_agreement_sms
@@ -44,54 +46,43 @@ from app.schemas.document import (
     EnrollmentAgreementRequest,
     CounterSignRequest,
 )
-from app.services.pdf_service import PDFSignatureService
-from app.services.enrollment_pdf import SchemaDrivenPDFService
+from app.services.file_store import BlobNotFound, get_file_store
+from app.services.realtime import STAFF_TOPIC, document_topic, publish, user_topic
+from app.services.signed_pdfs import (
+    DOCUMENTS_BASE,
+    PDF_PENDING,
+    InvalidDocumentPath,
+    request_signed_pdf,
+    resolve_document_file,
+    template_source,
+)
+from app.services.signature_images import InvalidSignatureImage, store_signature
+from app.services.template_cache import template_cache
+from app.core.downloads import CACHE_CONTROL, content_disposition, file_download, not_modified, quote_etag
 from app.core.file_validation import validate_pdf, validate_file
+from app.core.uploads import receive_upload
 from app.utils.encryption import decrypt_value
-from app.core.rbac import require_admin, require_roles
+from app.utils.pagination import decode_timestamp_id_cursor, encode_cursor, estimated_count
+from app.core.rbac import has_staff_access, require_admin, require_roles
 from app.core.config import settings
-from app.domain.enrollment.schema import get_enrollment_agreement_schema
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 
-# File storage paths
-DOCUMENTS_BASE = Path("app/static/documents")
-TEMPLATES_DIR = DOCUMENTS_BASE / "templates"
-UNSIGNED_DIR = DOCUMENTS_BASE / "unsigned"
-SIGNED_DIR = DOCUMENTS_BASE / "signed"
-
-# Ensure directories exist
-for directory in [TEMPLATES_DIR, UNSIGNED_DIR, SIGNED_DIR]:
-    directory.mkdir(parents=True, exist_ok=True)
-
 ENROLLMENT_COURSES = {
     "twenty_week": "20-Week Course",
     "expanded_functions": "Expanded Functions Course",
 }
 ENROLLMENT_RETENTION_YEARS = 5
+# Download of a signed PDF still being generated: poll interval and Retry-After
+SIGNED_PDF_POLL_SECONDS = 0.5
+SIGNED_PDF_RETRY_AFTER_SECONDS = 2
+# Document listing page sizes
+DOCUMENT_PAGE_SIZE = 100
+MAX_DOCUMENT_PAGE_SIZE = 500
 admin_or_registrar = require_roles(["admin", "registrar"])
-STAFF_ROLES = {"admin", "staff", "registrar", "instructor", "finance"}
 AD_HOC_LEAD_SOURCE = "Digital Enrollment"
-ACKNOWLEDGEMENT_POSITIONS = [
-    ("initial_agreement_catalog", (420, 530)),
-    ("initial_school_outcomes", (420, 485)),
-    ("initial_employment", (420, 440)),
-    ("initial_refund_policy", (420, 395)),
-    ("initial_complaint_procedure", (420, 350)),
-    ("initial_authorization", (420, 305)),
-]
-
-
-def _has_staff_access(current_user: User) -> bool:
-    """Check if current user belongs to any staff role."""
-    roles = getattr(current_user, "roles", []) or []
-    for role in roles:
-        role_name = role.name if hasattr(role, "name") else role
-        if role_name in STAFF_ROLES:
-            return True
-    return False
 
 
 def _normalize_template_path(template_path: str) -> Path:
@@ -103,180 +94,77 @@ def _normalize_template_path(template_path: str) -> Path:
 
 
 def _resolve_document_file(path_value: Optional[str]) -> Optional[Path]:
-    """
-    Securely resolve stored document/template paths to absolute filesystem paths.
-
-    Security: Prevents path traversal attacks by validating paths stay within allowed directories.
-
-    Args:
-        path_value: Relative path to document file
-
-    Returns:
-        Absolute Path to file if valid and exists, None if path_value is None
-
-    Raises:
-        HTTPException: 400 for invalid paths, 403 for unauthorized access, 404 if not found
-    """
-    if not path_value:
-        return None
-
-    # Security: Block path traversal attempts
-    if ".." in path_value or path_value.startswith("/"):
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid file path"
-        )
-
-    candidate = Path(path_value)
-
-    # Security: Block absolute paths from user input
-    if candidate.is_absolute():
-        raise HTTPException(
-            status_code=400,
-            detail="Absolute paths not allowed"
-        )
-
-    # Define allowed base directory (app/static)
-    allowed_base = DOCUMENTS_BASE.parent.resolve()
-
-    # Resolve path relative to allowed base
-    resolved = (allowed_base / candidate).resolve()
-
-    # Security: Verify resolved path is within allowed directory
+    """Resolve a stored document path (resolve_document_file()); 400/403/404 if it is not servable."""
     try:
-        resolved.relative_to(allowed_base)
-    except ValueError:
-        raise HTTPException(
-            status_code=403,
-            detail="Access denied"
-        )
-
-    # Check if file exists
-    if not resolved.exists():
-        raise HTTPException(
-            status_code=404,
-            detail="File not found"
-        )
-
-    return resolved
+        return resolve_document_file(path_value)
+    except InvalidDocumentPath as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except PermissionError:
+        raise HTTPException(status_code=403, detail="Access denied")
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
 
 
-def _copy_template_to_unsigned(document_id: uuid.UUID, template_path: str) -> str:
-    """Copy the template PDF into the unsigned directory for tracking."""
-    source = _normalize_template_path(template_path)
+def _reference_unsigned_copy(document: SignedDocument, template: DocumentTemplate) -> None:
+    """Record the template PDF as the document's unsigned copy; stored once, never copied."""
+    if template.blob_hash:
+        document.unsigned_blob_hash = template.blob_hash
+        return
+    source = _normalize_template_path(template.file_path)
     if not source.exists():
-        return template_path
+        document.unsigned_file_path = template.file_path
+        return
+    content = template_cache.get(template.id, template.version, source).content
+    document.unsigned_blob_hash = get_file_store().put_bytes(content)
 
-    filename = f"{document_id}_unsigned{source.suffix or '.pdf'}"
-    destination = UNSIGNED_DIR / filename
-    shutil.copyfile(source, destination)
-    return str(destination.relative_to(DOCUMENTS_BASE.parent))
 
+def _file_response(
+    request: Request, source: Union[str, Path], filename: str, media_type: str = "application/pdf"
+) -> Response:
+    """
+    Serve a blob (by hash) or a file with an ETag; 404 if the content is missing.
 
-def _generate_signed_pdf(
-    document: SignedDocument,
-    template: DocumentTemplate,
-    db: Session,
-    current_user: Optional[User],
-    request: Optional[Request]
-) -> bool:
-    """Generate/refresh the final signed PDF with all collected signatures."""
-    template_path = _resolve_document_file(template.file_path)
-
-    all_signatures = (
-        db.query(DocumentSignature)
-        .filter(DocumentSignature.document_id == document.id)
-        .order_by(DocumentSignature.signed_at.asc())
-        .all()
+    Local files and blobs go through file_download(), which also answers
+    Range requests. Blobs in a remote store (S3) are streamed whole: Range
+    is ignored there and the response is always a full 200.
+    """
+    if isinstance(source, Path):
+        return file_download(request, source, filename, media_type)
+    store = get_file_store()
+    path = store.local_path(source)
+    if path is not None:
+        try:
+            return file_download(request, path, filename, media_type, etag=source)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Document file not found")
+
+    # Remote store: revalidation is answered here, the content streamed through (no ranges)
+    etag = quote_etag(source)
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    try:
+        body = store.open(source)
+    except BlobNotFound:
+        raise HTTPException(status_code=404, detail="Document file not found")
+    return StreamingResponse(
+        iter(lambda: body.read(1024 * 1024), b""),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": content_disposition(filename),
+            "ETag": etag,
+            "Cache-Control": CACHE_CONTROL,
+        },
+        background=BackgroundTask(body.close),
     )
 
-    if not all_signatures:
-        return False
 
-    form_data = document.form_data if isinstance(document.form_data, dict) else {}
-    signed_filename = f"{document.id}_signed.pdf"
-    signed_path = SIGNED_DIR / signed_filename
-
-    schema = None
-    schema_loaded = False
+def _store_signature(signature_data: str) -> str:
+    """Normalize and store a captured signature image; 400 if it is not one."""
     try:
-        schema = get_enrollment_agreement_schema()
-        schema_loaded = True
-    except Exception:  # pragma: no cover - schema file missing or invalid
-        schema_loaded = False
-
-    use_schema_pdf = schema_loaded and template.name.lower().startswith("enrollment agreement")
-    if use_schema_pdf:
-        schema_service = SchemaDrivenPDFService(schema)
-        success = schema_service.generate_pdf(
-            output_pdf_path=signed_path,
-            document=document,
-            form_data=form_data,
-            signatures=all_signatures,
-        )
-    else:
-        if not template_path or not template_path.exists():
-            return False
-
-        # Arrange signatures in two columns to avoid overlap
-        signature_list: List[Tuple[str, str, int, int]] = []
-        base_x = 80
-        base_y = 120
-        column_width = 250
-        row_height = 90
-        signatures_per_row = 2
-
-        for index, sig in enumerate(all_signatures):
-            row = index // signatures_per_row
-            column = index % signatures_per_row
-            x_pos = base_x + column * column_width
-            y_pos = base_y + row * row_height
-            signature_list.append((sig.signature_data, sig.signature_type, x_pos, y_pos))
-
-        acknowledgements = []
-        ack_values = form_data.get("acknowledgements") if isinstance(form_data, dict) else None
-        if isinstance(ack_values, dict):
-            for key, (ack_x, ack_y) in ACKNOWLEDGEMENT_POSITIONS:
-                value = ack_values.get(key)
-                if isinstance(value, str) and value.strip():
-                    initials = value.strip().upper()[:4]
-                    acknowledgements.append((initials, ack_x, ack_y))
-
-        metadata = {
-            "title": template.name,
-            "author": "AADA LMS",
-            "subject": template.name,
-            "document_id": str(document.id),
-            "signed_date": datetime.now(timezone.utc).isoformat(),
-        }
-
-        success = PDFSignatureService.overlay_signatures(
-            template_pdf_path=template_path,
-            output_pdf_path=signed_path,
-            signatures=signature_list,
-            metadata=metadata,
-            acknowledgements=acknowledgements,
-        )
-
-    if not success:
-        return False
-
-    document.signed_file_path = str(signed_path.relative_to(Path("app")))
-    if document.status == "completed" and not document.completed_at:
-        document.completed_at = datetime.now(timezone.utc)
-    db.commit()
-
-    log_document_event(
-        db=db,
-        document_id=document.id,
-        event_type="pdf_generated",
-        user_id=getattr(current_user, "id", None),
-        event_details=json.dumps({"signed_file_path": document.signed_file_path}),
-        ip_address=request.client.host if (request and request.client) else None,
-        user_agent=request.headers.get("user-agent") if request else None,
-    )
-
-    return True
+        return store_signature(signature_data)
+    except InvalidSignatureImage as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid signature image: {exc}")
 
 
 def _serialize_document(doc: SignedDocument, template: Optional[DocumentTemplate]) -> dict:
@@ -293,6 +181,9 @@ def _serialize_document(doc: SignedDocument, template: Optional[DocumentTemplate
         "status": doc.status,
         "unsigned_file_path": doc.unsigned_file_path,
         "signed_file_path": doc.signed_file_path,
+        "unsigned_blob_hash": doc.unsigned_blob_hash,
+        "signed_blob_hash": doc.signed_blob_hash,
+        "pdf_status": doc.pdf_status,
         "created_at": doc.created_at,
         "sent_at": doc.sent_at,
         "student_viewed_at": doc.student_viewed_at,
@@ -349,6 +240,18 @@ def _derive_signer_fields(
     return provided_name or default_name, provided_email or decrypted_email
 
 
+def _publish_document_event(document: SignedDocument, event_type: str) -> None:
+    """Notify the signer, staff and any open signing page of a signature."""
+    topics = [STAFF_TOPIC, document_topic(document.id)]
+    if document.user_id:
+        topics.append(user_topic(document.user_id))
+    publish(
+        event_type,
+        {"document_id": document.id, "user_id": document.user_id, "status": document.status},
+        topics,
+    )
+
+
 def log_document_event(
     db: Session,
     document_id: uuid.UUID,
@@ -397,28 +300,18 @@ async def create_document_template(
             detail=f"Template '{name}' version {version} already exists"
         )
 
-    # Read file content
-    content = await file.read()
+    with await receive_upload(file, {'.pdf'}, max_size_mb=10) as upload:
+        # PDF structure validation; templates are stored as uploaded
+        await asyncio.to_thread(validate_pdf, await upload.read(), file.filename, sanitize=False)
 
-    # Comprehensive PDF validation (extension, size, magic bytes, structure)
-    validate_pdf(content, file.filename, max_size_mb=10)
-
-    # Generate unique filename
-    template_id = uuid.uuid4()
-    filename = f"{template_id}_{file.filename}"
-    file_path = TEMPLATES_DIR / filename
-
-    # Save file
-    with open(file_path, 'wb') as f:
-        f.write(content)
+        blob_hash = await asyncio.to_thread(get_file_store().put_file, upload.path, True)
 
     # Create database record
     template = DocumentTemplate(
-        id=template_id,
         name=name,
         description=description,
         version=version,
-        file_path=str(file_path.relative_to(DOCUMENTS_BASE.parent)),
+        blob_hash=blob_hash,
         requires_counter_signature=requires_counter_signature,
         is_active=True
     )
@@ -426,6 +319,7 @@ async def create_document_template(
     db.add(template)
     db.commit()
     db.refresh(template)
+    template_cache.invalidate(template.id)
 
     return template
 
@@ -541,22 +435,18 @@ def send_enrollment_agreement(
         signing_token=signing_token,
         token_expires_at=token_expires_at,
         status="pending",
-        unsigned_file_path=template.file_path,
         course_type=payload.course_type,
         form_data=form_payload,
         retention_expires_at=retention_expires_at,
         sent_at=datetime.now(timezone.utc),
     )
+    # The unsigned copy kept for auditing is the template PDF itself
+    _reference_unsigned_copy(document, template)
 
     db.add(document)
     db.commit()
     db.refresh(document)
 
-    # Copy template into unsigned directory for auditing
-    document.unsigned_file_path = _copy_template_to_unsigned(document.id, template.file_path)
-    db.commit()
-    db.refresh(document)
-
     log_document_event(
         db=db,
         document_id=document.id,
@@ -648,6 +538,7 @@ def toggle_template_active(
     template.is_active = not template.is_active
     db.commit()
     db.refresh(template)
+    template_cache.invalidate(template.id)
 
     return {
         "id": template.id,
@@ -680,14 +571,16 @@ def delete_template(
             detail=f"Cannot delete template: {document_count} document(s) use this template. Mark as inactive instead."
         )
 
-    # Delete file
-    if template.file_path:
-        file_path = Path(template.file_path)
+    # Templates from before the file store have their own file; blobs are
+    # released with the row and collected once nothing references them
+    if template.file_path and not template.blob_hash:
+        file_path = _normalize_template_path(template.file_path)
         if file_path.exists():
             file_path.unlink()
 
     db.delete(template)
     db.commit()
+    template_cache.invalidate(template_id)
 
     return {"message": "Template deleted successfully"}
 
@@ -709,30 +602,20 @@ async def upload_student_document(
     Max size: 10MB
     Security: Full validation (extension, magic bytes, structure)
     """
-    # Read file content
-    content = await file.read()
-
-    # Validate file type and structure
-    file_type = validate_file(
-        content,
-        file.filename,
-        allowed_types={'.pdf', '.png', '.jpg', '.jpeg'},
-        max_size_mb=10
-    )
-
-    # Create student documents directory if needed
-    STUDENT_DOCS_DIR = DOCUMENTS_BASE / "student_uploads" / str(current_user.id)
-    STUDENT_DOCS_DIR.mkdir(parents=True, exist_ok=True)
-
-    # Generate unique filename
-    doc_id = uuid.uuid4()
-    ext = Path(file.filename).suffix.lower()
-    filename = f"{doc_id}_{document_type}{ext}"
-    file_path = STUDENT_DOCS_DIR / filename
+    allowed_types = {'.pdf', '.png', '.jpg', '.jpeg'}
+    with await receive_upload(file, allowed_types, max_size_mb=10) as upload:
+        # Validate structure and store the sanitized file
+        content, file_type = await asyncio.to_thread(
+            validate_file, await upload.read(), file.filename, allowed_types=allowed_types, max_size_mb=10
+        )
+        await upload.write(content)
 
-    # Save file
-    with open(file_path, 'wb') as f:
-        f.write(content)
+        # Generate unique filename
+        STUDENT_DOCS_DIR = DOCUMENTS_BASE / "student_uploads" / str(current_user.id)
+        doc_id = uuid.uuid4()
+        ext = Path(file.filename).suffix.lower()
+        filename = f"{doc_id}_{document_type}{ext}"
+        file_path = await upload.move_to(STUDENT_DOCS_DIR / filename)
 
     # TODO: Store metadata in database (create StudentDocument model)
     # For now, return success with file info
@@ -743,7 +626,8 @@ async def upload_student_document(
         "filename": file.filename,
         "file_type": file_type,
         "file_path": str(file_path.relative_to(Path("app/static"))),
-        "size_bytes": len(content),
+        "size_bytes": upload.size,
+        "sha256": upload.sha256,
         "uploaded_at": datetime.now(timezone.utc).isoformat(),
         "uploaded_by": current_user.id
     }
@@ -870,7 +754,7 @@ def counter_sign_document(
         document_id=document.id,
         signer_id=current_user.id,
         signature_type="school_official",
-        signature_data=payload.signature_data,
+        signature_hash=_store_signature(payload.signature_data),
         signed_at=datetime.now(timezone.utc),
         ip_address=request.client.host if request.client else "unknown",
         user_agent=request.headers.get("user-agent") or "unknown",
@@ -898,123 +782,124 @@ def counter_sign_document(
         user_agent=request.headers.get("user-agent"),
     )
 
-    template = db.query(DocumentTemplate).filter(DocumentTemplate.id == document.template_id).first()
-    generated_pdf = False
-    if template:
-        generated_pdf = _generate_signed_pdf(document, template, db, current_user, request)
-        if generated_pdf:
-            db.refresh(document)
+    # The signed PDF is rendered in the background; the completed agreement
+    # is emailed to the signer once it is ready
+    request_signed_pdf(
+        db,
+        document,
+        user_id=current_user.id,
+        ip_address=request.client.host if request.client else None,
+        user_agent=request.headers.get("user-agent"),
+    )
+    db.refresh(document)
 
-    if not generated_pdf and not document.signed_file_path:
-        # Fallback to the unsigned file so downloads still succeed.
-        document.signed_file_path = document.unsigned_file_path
-        db.commit()
-        db.refresh(document)
+    _publish_document_event(document, "document.counter_signed")
+
+    return document
 
-    # Send the completed agreement PDF to the original signer
-    if document.signed_file_path and document.signer_email:
+
+class DocumentListFilters:
+    """Query parameters shared by the document listing endpoints."""
+
+    def __init__(
+        self,
+        status_filter: Optional[str] = Query(None, alias="status", description="Filter by document status"),
+        template_id: Optional[uuid.UUID] = Query(None, description="Filter by document template"),
+        created_from: Optional[datetime] = Query(None, description="Only documents created at or after this time"),
+        created_to: Optional[datetime] = Query(None, description="Only documents created before this time"),
+        limit: int = Query(DOCUMENT_PAGE_SIZE, ge=1, le=MAX_DOCUMENT_PAGE_SIZE, description="Page size"),
+        cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    ):
+        self.status = status_filter
+        self.template_id = template_id
+        self.created_from = created_from
+        self.created_to = created_to
+        self.limit = limit
+        self.cursor = cursor
+
+
+def _list_documents(db: Session, query, filters: DocumentListFilters) -> dict:
+    """
+    One page of documents, newest first, with template metadata.
+
+    Pages are keyset ranges on (created_at, id); templates are joined in the
+    same query, and the total is exact up to a bound and estimated beyond it.
+    """
+    if filters.status:
+        query = query.filter(SignedDocument.status == filters.status)
+    if filters.template_id:
+        query = query.filter(SignedDocument.template_id == filters.template_id)
+    if filters.created_from:
+        query = query.filter(SignedDocument.created_at >= filters.created_from)
+    if filters.created_to:
+        query = query.filter(SignedDocument.created_at < filters.created_to)
+
+    total, exact = estimated_count(db, query)
+
+    if filters.cursor:
         try:
-            pdf_path = Path(document.signed_file_path)
-            if pdf_path.exists():
-                pdf_content = pdf_path.read_bytes()
-                course_label = template.title if template else "Dental Assisting"
-
-                # Get signer name from the first signature (student/lead signature)
-                first_sig = (
-                    db.query(DocumentSignature)
-                    .filter(
-                        DocumentSignature.document_id == document.id,
-                        DocumentSignature.signature_type != "school_official"
-                    )
-                    .order_by(DocumentSignature.signed_at.asc())
-                    .first()
-                )
-                signer_name = first_sig.typed_name if first_sig else "Student"
-
-                send_completed_agreement_email(
-                    to_email=document.signer_email,
-                    signer_name=signer_name,
-                    course_label=course_label,
-                    pdf_content=pdf_content,
-                    pdf_filename=f"AADA_Enrollment_Agreement_{document.id}.pdf"
-                )
-                logger.info(
-                    f"Sent completed agreement email to {document.signer_email} "
-                    f"for document {document.id}"
-                )
-        except EmailDeliveryError as e:
-            logger.error(f"Failed to send completed agreement email: {e}")
-            # Don't fail the counter-signature, just log the error
-        except Exception as e:
-            logger.error(f"Unexpected error sending completed agreement email: {e}")
+            after = decode_timestamp_id_cursor(filters.cursor)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        query = query.filter(tuple_(SignedDocument.created_at, SignedDocument.id) < tuple_(*after))
 
-    return document
+    documents = (
+        query.options(joinedload(SignedDocument.template))
+        .order_by(SignedDocument.created_at.desc(), SignedDocument.id.desc())
+        .limit(filters.limit + 1)
+        .all()
+    )
+    next_cursor = None
+    if len(documents) > filters.limit:
+        documents = documents[:filters.limit]
+        next_cursor = encode_cursor([documents[-1].created_at, documents[-1].id])
+
+    return {
+        "documents": [_serialize_document(doc, doc.template) for doc in documents],
+        "total": total,
+        "total_is_estimate": not exact,
+        "next_cursor": next_cursor,
+    }
 
 
 @router.get("/user/{user_id}", response_model=SignedDocumentListResponse)
 def get_user_documents(
     user_id: uuid.UUID,
+    filters: DocumentListFilters = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Get all documents for a specific user"""
+    """Get documents for a specific user"""
 
-    if str(current_user.id) != str(user_id) and not _has_staff_access(current_user):
+    if str(current_user.id) != str(user_id) and not has_staff_access(current_user):
         raise HTTPException(status_code=403, detail="Access denied")
 
-    documents = (
-        db.query(SignedDocument)
-        .filter(SignedDocument.user_id == user_id)
-        .order_by(SignedDocument.created_at.desc())
-        .all()
-    )
-
-    enriched_docs = [
-        _serialize_document(
-            doc,
-            db.query(DocumentTemplate).filter(DocumentTemplate.id == doc.template_id).first(),
-        )
-        for doc in documents
-    ]
-
-    return {"documents": enriched_docs, "total": len(enriched_docs)}
+    query = db.query(SignedDocument).filter(SignedDocument.user_id == user_id)
+    return _list_documents(db, query, filters)
 
 
 @router.get("/lead/{lead_id}", response_model=SignedDocumentListResponse)
 def get_lead_documents(
     lead_id: uuid.UUID,
+    filters: DocumentListFilters = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
-    """Get all documents for a specific lead"""
+    """Get documents for a specific lead"""
 
     # Verify lead exists
-    lead = db.query(Lead).filter(Lead.id == lead_id).first()
+    lead = db.query(Lead.id).filter(Lead.id == lead_id).first()
     if not lead:
         raise HTTPException(status_code=404, detail="Lead not found")
 
-    documents = (
-        db.query(SignedDocument)
-        .filter(SignedDocument.lead_id == lead_id)
-        .order_by(SignedDocument.created_at.desc())
-        .all()
-    )
-
-    enriched_docs = [
-        _serialize_document(
-            doc,
-            db.query(DocumentTemplate).filter(DocumentTemplate.id == doc.template_id).first(),
-        )
-        for doc in documents
-    ]
-
-    return {"documents": enriched_docs, "total": len(enriched_docs)}
+    query = db.query(SignedDocument).filter(SignedDocument.lead_id == lead_id)
+    return _list_documents(db, query, filters)
 
 
 @router.get("/", response_model=SignedDocumentListResponse)
 def get_all_documents(
     course_type: Optional[str] = Query(None, description="Filter by course type slug"),
-    status_filter: Optional[str] = Query(None, alias="status", description="Filter by document status"),
+    filters: DocumentListFilters = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(admin_or_registrar),
 ):
@@ -1023,19 +908,7 @@ def get_all_documents(
     query = db.query(SignedDocument)
     if course_type:
         query = query.filter(SignedDocument.course_type == course_type)
-    if status_filter:
-        query = query.filter(SignedDocument.status == status_filter)
-
-    documents = query.order_by(SignedDocument.created_at.desc()).all()
-    enriched_docs = [
-        _serialize_document(
-            doc,
-            db.query(DocumentTemplate).filter(DocumentTemplate.id == doc.template_id).first(),
-        )
-        for doc in documents
-    ]
-
-    return {"documents": enriched_docs, "total": len(enriched_docs)}
+    return _list_documents(db, query, filters)
 
 
 @router.get("/{document_id}", response_model=SignedDocumentResponse)
@@ -1053,7 +926,7 @@ def get_document(
         raise HTTPException(status_code=404, detail="Document not found")
 
     # Check access: user can see their own documents or admin can see all
-    if str(document.user_id) != str(current_user.id) and not _has_staff_access(current_user):
+    if str(document.user_id) != str(current_user.id) and not has_staff_access(current_user):
         raise HTTPException(status_code=403, detail="Access denied")
 
     # Log document viewed event (first time only)
@@ -1076,7 +949,7 @@ def get_document(
 # ==================== Signature Management ====================
 
 @router.post("/{document_id}/sign", response_model=DocumentSignatureResponse)
-async def sign_document(
+def sign_document(
     document_id: uuid.UUID,
     signature_data: DocumentSignatureCreate,
     request: Request,
@@ -1111,7 +984,7 @@ async def sign_document(
         document_id=document_id,
         signer_id=current_user.id,
         signature_type=signature_data.signature_type,
-        signature_data=signature_data.signature_data,
+        signature_hash=_store_signature(signature_data.signature_data),
         typed_name=signature_data.typed_name,
         ip_address=request.client.host if request.client else "unknown",
         user_agent=request.headers.get("user-agent", "unknown")
@@ -1158,20 +1031,47 @@ async def sign_document(
             document.status = "completed"
             document.completed_at = document.completed_at or datetime.now(timezone.utc)
             db.commit()
-        _generate_signed_pdf(document, template, db, current_user, request)
+        request_signed_pdf(
+            db,
+            document,
+            user_id=current_user.id,
+            ip_address=request.client.host if request.client else None,
+            user_agent=request.headers.get("user-agent"),
+        )
+
+    _publish_document_event(
+        document,
+        "document.signed" if signature_data.signature_type == "student" else "document.counter_signed",
+    )
 
-    return signature
+    response = DocumentSignatureResponse.model_validate(signature)
+    response.pdf_status = document.pdf_status
+    return response
 
 
 # ==================== Document Download ====================
 
 @router.get("/{document_id}/download")
-async def download_document(
+def download_document(
     document_id: uuid.UUID,
+    request: Request,
+    wait: Optional[float] = Query(
+        None, ge=0, le=60, description="Seconds to wait for a signed PDF that is still being generated"
+    ),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Download a document (template or signed version)"""
+    """
+    Download a document (template or signed version)
+
+    While the signed PDF is still being generated the request waits up to
+    ``wait`` seconds (SIGNED_PDF_DOWNLOAD_WAIT_SECONDS by default), then
+    answers 202 with the pdf_status and a Retry-After header.
+
+    The PDF carries its content hash as ETag, so If-None-Match is answered
+    with 304. Range requests are served for locally stored PDFs (see
+    app.core.downloads and _file_response).
+    """
 
     document = db.query(SignedDocument).filter(SignedDocument.id == document_id).first()
 
@@ -1179,9 +1079,23 @@ async def download_document(
         raise HTTPException(status_code=404, detail="Document not found")
 
     # Allow the student who owns the document or any staff role to download
-    if str(document.user_id) != str(current_user.id) and not _has_staff_access(current_user):
+    if str(document.user_id) != str(current_user.id) and not has_staff_access(current_user):
         raise HTTPException(status_code=403, detail="Access denied")
 
+    if document.pdf_status == PDF_PENDING:
+        # A sync endpoint: the wait, the session and the file store all block a threadpool thread
+        deadline = time.monotonic() + (settings.SIGNED_PDF_DOWNLOAD_WAIT_SECONDS if wait is None else wait)
+        while document.pdf_status == PDF_PENDING and time.monotonic() < deadline:
+            db.rollback()  # don't sit idle in a transaction while waiting
+            time.sleep(SIGNED_PDF_POLL_SECONDS)
+            db.refresh(document)
+        if document.pdf_status == PDF_PENDING:
+            return JSONResponse(
+                status_code=202,
+                content={"document_id": str(document.id), "pdf_status": document.pdf_status},
+                headers={"Retry-After": str(SIGNED_PDF_RETRY_AFTER_SECONDS)},
+            )
+
     # Get template for unsigned version
     template = db.query(DocumentTemplate).filter(
         DocumentTemplate.id == document.template_id
@@ -1190,20 +1104,15 @@ async def download_document(
     if not template:
         raise HTTPException(status_code=404, detail="Template not found")
 
-    signed_path = _resolve_document_file(document.signed_file_path)
-    template_path = _resolve_document_file(template.file_path)
-
     # Return signed version if exists, otherwise template
-    file_path = signed_path if signed_path and signed_path.exists() else template_path
+    source = document.signed_blob_hash or _resolve_document_file(document.signed_file_path)
+    if not source:
+        source = template_source(template)
 
-    if not file_path or not file_path.exists():
+    if not source:
         raise HTTPException(status_code=404, detail="Document file not found")
 
-    return FileResponse(
-        path=file_path,
-        filename=f"{template.name}_v{template.version}.pdf",
-        media_type="application/pdf"
-    )
+    return _file_response(request, source, f"{template.name}_v{template.version}.pdf")
 
 
 # ==================== Audit Trail ====================
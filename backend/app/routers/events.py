@@ -0,0 +1,44 @@
+"""Server-sent change notifications for the student and admin portals"""
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.db.models.user import User
+from app.routers.auth import get_current_user
+from app.core.rbac import has_staff_access
+from app.services.realtime import STAFF_TOPIC, broker, stream_events, user_topic
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+SSE_HEADERS = {
+    "Cache-Control": "no-store",
+    "X-Accel-Buffering": "no",  # let nginx pass frames through unbuffered
+}
+
+
+@router.get("/stream")
+async def stream_change_events(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream change notifications (text/event-stream).
+
+    Students receive events about their own progress and documents; staff
+    also receive every learner's. Event types: progress.updated,
+    xapi.completed, document.signed, document.counter_signed, plus resync
+    when events were dropped. Clients refetch the affected resource.
+    """
+    topics = [user_topic(current_user.id)]
+    if has_staff_access(current_user):
+        topics.append(STAFF_TOPIC)
+    # The stream outlives the request's session; hand its connection back now
+    db.close()
+
+    subscription = broker.subscribe(topics)
+    return StreamingResponse(
+        stream_events(subscription),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
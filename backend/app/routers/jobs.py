@@ -0,0 +1,54 @@
+"""Status and downloads for background jobs (report exports, transcript batches)"""
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from app.core.rbac import require_staff
+from app.db.models.background_job import BackgroundJob
+from app.db.models.user import User
+from app.db.session import get_db
+from app.schemas.jobs import BackgroundJobRead
+from app.services.background_jobs import artifact_path
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+def get_job_or_404(db: Session, job_id: UUID, kind: Optional[str] = None) -> BackgroundJob:
+    job = db.get(BackgroundJob, job_id)
+    if not job or (kind is not None and job.kind != kind):
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
+
+
+def job_artifact_response(job: BackgroundJob) -> FileResponse:
+    """The finished artifact, or 409 while the job has not succeeded and 410 once it is gone."""
+    if job.status in ("queued", "running"):
+        raise HTTPException(status_code=409, detail="Job is not finished yet.")
+    if job.status == "failed":
+        raise HTTPException(status_code=409, detail=f"Job failed: {job.error}")
+    path = artifact_path(job)
+    if job.status != "succeeded" or path is None or not path.exists():
+        raise HTTPException(status_code=410, detail="Job output has expired; submit it again.")
+    return FileResponse(path, media_type=job.content_type, filename=job.artifact_filename)
+
+
+@router.get("/{job_id}", response_model=BackgroundJobRead)
+def get_job(
+    job_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_staff),
+):
+    job = get_job_or_404(db, job_id)
+    return BackgroundJobRead.from_job(job, f"/api/jobs/{job.id}/download")
+
+
+@router.get("/{job_id}/download")
+def download_job(
+    job_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_staff),
+) -> FileResponse:
+    return job_artifact_response(get_job_or_404(db, job_id))
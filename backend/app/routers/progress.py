@@ -1,17 +1,30 @@
 """Student progress tracking router"""
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from uuid import UUID
-from pydantic import BaseModel
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+from pydantic import BaseModel, Field
 from datetime import datetime, timezone
+import time
 
 from app.db.session import get_db
 from app.db.models.user import User
-from app.db.models.enrollment import Enrollment, ModuleProgress
-from app.db.models.program import Module
-from app.db.models.xapi import XapiStatement
+from app.db.models.enrollment import Enrollment, EnrollmentRiskScore, ModuleProgress
+from app.db.models.program import Module, Program
 from app.routers.auth import get_current_user
+from app.services.progress_analytics import (
+    REFRESH_JOB_NAME,
+    iter_program_matrix,
+    program_summary,
+    refresh_program_progress,
+)
+from app.services.progress_buffer import flush_heartbeats, heartbeat_buffer
+from app.services.progress_cache import progress_snapshot_cache
+from app.services.realtime import STAFF_TOPIC, publish, user_topic
+from app.services.scheduler import run_exclusive, run_local
 
 
 class ProgressUpdate(BaseModel):
@@ -26,6 +39,16 @@ class ProgressUpdate(BaseModel):
     sections_viewed: Optional[List[str]] = None
 
 
+class ProgressHeartbeat(BaseModel):
+    """Engagement sample sent periodically while a student reads a module."""
+    enrollment_id: UUID
+    module_id: UUID
+    last_scroll_position: Optional[int] = Field(default=None, ge=0)
+    # Seconds of active time since the previous heartbeat (not a running total)
+    active_time_delta_seconds: int = Field(default=0, ge=0, le=3600)
+    sections_viewed: Optional[List[str]] = Field(default=None, max_length=500)
+
+
 class ModuleProgressResponse(BaseModel):
     id: UUID
     enrollment_id: UUID
@@ -56,8 +79,60 @@ class OverallProgressResponse(BaseModel):
     modules: List[ModuleProgressResponse]
 
 
+class ProgramModuleSummary(BaseModel):
+    module_id: UUID
+    module_code: str
+    module_title: str
+    students: int
+    completed: int
+    in_progress: int
+    failed: int
+    not_started: int
+    completion_rate: float
+    average_score: Optional[float]
+    average_progress_pct: float
+    active_time_seconds: int
+
+
+class ProgramProgressSummary(BaseModel):
+    program_id: UUID
+    refreshed_at: Optional[datetime]
+    students: int
+    students_completed: int
+    average_completion_pct: float
+    modules: List[ProgramModuleSummary]
+
+
+class AtRiskLearner(BaseModel):
+    enrollment_id: UUID
+    user_id: UUID
+    program_id: UUID
+    risk_score: float
+    risk_level: str
+    inactivity_days: int
+    pace_gap: float
+    time_percentile: Optional[float]
+    average_score: Optional[float]
+    modules_completed: int
+    modules_total: int
+    last_activity_at: Optional[datetime]
+    computed_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 router = APIRouter(prefix="/progress", tags=["progress"])
 
+RISK_LEVELS = {"low": 0, "medium": 1, "high": 2}
+
+COMPLETED_STATUSES = ("completed", "passed")
+
+# Heartbeat access checks already passed: (user, enrollment, module) -> expiry
+HEARTBEAT_ACCESS_TTL_SECONDS = 300
+_HEARTBEAT_ACCESS_MAX = 10000
+_heartbeat_access: Dict[Tuple[UUID, UUID, UUID], float] = {}
+
 
 def _has_role(user: User, allowed: set[str]) -> bool:
     for role in getattr(user, "roles", []) or []:
@@ -70,104 +145,224 @@ def _has_role(user: User, allowed: set[str]) -> bool:
     return False
 
 
-@router.get("/{user_id}", response_model=OverallProgressResponse)
-def get_user_progress(
-    user_id: UUID,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """Get overall progress for a user"""
-    # Students can only see their own progress
-    if user_id != current_user.id and not _has_role(current_user, {"admin", "instructor"}):
-        raise HTTPException(status_code=403, detail="Not authorized to view this progress")
-
-    # Get active enrollment
-    enrollment = db.query(Enrollment).filter(
-        Enrollment.user_id == user_id,
-        Enrollment.status == "active"
+def _with_pending_heartbeats(response: ModuleProgressResponse) -> ModuleProgressResponse:
+    """Overlay heartbeats buffered in this worker so a reload resumes where the student was."""
+    pending = heartbeat_buffer.pending(response.enrollment_id, response.module_id)
+    if pending is None:
+        return response
+    if pending.last_scroll_position is not None:
+        response.last_scroll_position = pending.last_scroll_position
+    response.active_time_seconds = (response.active_time_seconds or 0) + pending.active_time_delta
+    response.sections_viewed = list(dict.fromkeys([*(response.sections_viewed or []), *pending.sections]))
+    if response.last_accessed_at is None or pending.last_accessed_at > response.last_accessed_at:
+        response.last_accessed_at = pending.last_accessed_at
+    return response
+
+
+def _check_heartbeat_access(db: Session, current_user: User, enrollment_id: UUID, module_id: UUID) -> None:
+    """Verify once per TTL that the module belongs to the enrollment and the user may write it."""
+    key = (current_user.id, enrollment_id, module_id)
+    now = time.monotonic()
+    if _heartbeat_access.get(key, 0) > now:
+        return
+
+    row = db.query(Enrollment.user_id).join(
+        Module, Module.program_id == Enrollment.program_id
+    ).filter(
+        Enrollment.id == enrollment_id,
+        Module.id == module_id
     ).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Enrollment or module not found")
+    if row.user_id != current_user.id and not _has_role(current_user, {"admin", "instructor"}):
+        raise HTTPException(status_code=403, detail="Not authorized to update this progress")
 
-    if not enrollment:
-        raise HTTPException(status_code=404, detail="No active enrollment found")
+    if len(_heartbeat_access) >= _HEARTBEAT_ACCESS_MAX:
+        _heartbeat_access.clear()
+    _heartbeat_access[key] = now + HEARTBEAT_ACCESS_TTL_SECONDS
 
-    # Get all modules in the program
-    modules = db.query(Module).filter(
-        Module.program_id == enrollment.program_id
-    ).order_by(Module.position).all()
 
-    if not modules:
-        return OverallProgressResponse(
-            user_id=user_id,
-            enrollment_id=enrollment.id,
-            program_name="Unknown",
-            total_modules=0,
-            completed_modules=0,
-            completion_percentage=0.0,
-            modules=[]
-        )
+def _require_staff(current_user: User) -> None:
+    if not _has_role(current_user, {"admin", "instructor"}):
+        raise HTTPException(status_code=403, detail="Admin or Instructor role required")
 
-    # BATCH QUERY: Get all progress records at once (fixes N+1)
-    module_ids = [m.id for m in modules]
-    progress_records = db.query(ModuleProgress).filter(
-        ModuleProgress.enrollment_id == enrollment.id,
-        ModuleProgress.module_id.in_(module_ids)
-    ).all()
 
-    # Create lookup dict for O(1) access
-    progress_by_module = {p.module_id: p for p in progress_records}
+def _require_program(db: Session, program_id: UUID) -> None:
+    if db.get(Program, program_id) is None:
+        raise HTTPException(status_code=404, detail="Program not found")
 
-    # Get progress for each module
-    module_progress_list = []
-    completed_count = 0
 
-    for module in modules:
-        # Get module progress record from dict (O(1) lookup)
-        progress = progress_by_module.get(module.id)
+# Cohort analytics (registered before /{user_id} routes). Served from the
+# program_module_progress_mv materialized view, so figures can lag live
+# progress by up to PROGRESS_ANALYTICS_REFRESH_SECONDS; see refreshed_at.
 
-        # Get last activity from xAPI statements
-        last_statement = db.query(XapiStatement).filter(
-            XapiStatement.actor['mbox'].as_string() == f"mailto:{current_user.email}"
-        ).order_by(XapiStatement.stored_at.desc()).first() if False else None  # Disabled for now
+@router.get("/programs/{program_id}/summary", response_model=ProgramProgressSummary)
+def get_program_summary(
+    program_id: UUID,
+    enrollment_status: Optional[str] = Query(default="active", description="Enrollment status; empty for all."),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Per-module completion figures and cohort totals for a program"""
+    _require_staff(current_user)
+    _require_program(db, program_id)
+    return program_summary(db, program_id, enrollment_status or None)
 
-        # Default values if no progress record exists
-        scorm_status = progress.scorm_status if progress else "incomplete"
-        score = progress.score if progress else None
-        progress_pct = progress.progress_pct if progress else 0
 
-        # Count completed modules
-        if scorm_status in ["completed", "passed"]:
-            completed_count += 1
+@router.get("/programs/{program_id}/matrix")
+def get_program_matrix(
+    program_id: UUID,
+    enrollment_status: Optional[str] = Query(default="active", description="Enrollment status; empty for all."),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Students x modules status grid, streamed as compact columnar JSON.
+
+    See app.services.progress_analytics.iter_program_matrix for the layout.
+    """
+    _require_staff(current_user)
+    _require_program(db, program_id)
+    return StreamingResponse(
+        iter_program_matrix(db, program_id, enrollment_status or None),
+        media_type="application/json",
+    )
 
-        module_progress_list.append(ModuleProgressResponse(
-            id=progress.id if progress else module.id,
-            enrollment_id=enrollment.id,
-            module_id=module.id,
-            module_code=module.code,
-            module_title=module.title,
-            scorm_status=scorm_status,
-            score=score,
-            progress_pct=progress_pct,
-            last_activity=last_statement.stored_at if last_statement else None,
-            last_scroll_position=progress.last_scroll_position if progress else 0,
-            active_time_seconds=progress.active_time_seconds if progress else 0,
-            sections_viewed=progress.sections_viewed if progress else [],
-            last_accessed_at=progress.last_accessed_at if progress else None
-        ))
-
-    total_modules = len(modules)
-    completion_percentage = (completed_count / total_modules * 100) if total_modules > 0 else 0.0
 
+@router.post("/programs/refresh")
+def refresh_program_analytics(current_user: User = Depends(get_current_user)):
+    """Refresh cohort analytics for all programs now instead of waiting for the schedule"""
+    _require_staff(current_user)
+    result = run_exclusive(REFRESH_JOB_NAME, lambda db: {"refreshed_at": refresh_program_progress(db)})
+    if result is None:
+        raise HTTPException(status_code=409, detail="A refresh is already running")
+    return result
+
+
+@router.get("/at-risk", response_model=List[AtRiskLearner])
+def list_at_risk_learners(
+    program_id: Optional[UUID] = Query(default=None, description="Limit to one program."),
+    min_level: str = Query(
+        default="medium", pattern="^(low|medium|high)$", description="Lowest risk level to include."
+    ),
+    limit: int = Query(default=100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Active enrollments ranked by risk score (recomputed by the at-risk scoring job)"""
+    _require_staff(current_user)
+    levels = [level for level, rank in RISK_LEVELS.items() if rank >= RISK_LEVELS[min_level]]
+    query = db.query(EnrollmentRiskScore).filter(EnrollmentRiskScore.risk_level.in_(levels))
+    if program_id:
+        query = query.filter(EnrollmentRiskScore.program_id == program_id)
+    return query.order_by(
+        EnrollmentRiskScore.risk_score.desc(),
+        EnrollmentRiskScore.enrollment_id
+    ).limit(limit).all()
+
+
+def _load_progress_snapshot(db: Session, user_id: UUID) -> Optional[OverallProgressResponse]:
+    """
+    Build a user's progress overview in one statement.
+
+    The active enrollment is joined to its program and every module of the
+    program, left-joined to the enrollment's progress rows; window counts
+    supply the totals. A program without modules yields one row with NULL
+    module columns.
+    """
+    enrollment = (
+        select(Enrollment.id, Enrollment.program_id)
+        .where(Enrollment.user_id == user_id, Enrollment.status == "active")
+        .order_by(Enrollment.start_date.desc())
+        .limit(1)
+        .cte("active_enrollment")
+    )
+    is_completed = ModuleProgress.scorm_status.in_(COMPLETED_STATUSES)
+    rows = db.execute(
+        select(
+            enrollment.c.id.label("enrollment_id"),
+            Program.name.label("program_name"),
+            Module.id.label("module_id"),
+            Module.code.label("module_code"),
+            Module.title.label("module_title"),
+            ModuleProgress.id.label("progress_id"),
+            ModuleProgress.scorm_status,
+            ModuleProgress.score,
+            ModuleProgress.progress_pct,
+            ModuleProgress.last_activity_at,
+            ModuleProgress.last_scroll_position,
+            ModuleProgress.active_time_seconds,
+            ModuleProgress.sections_viewed,
+            ModuleProgress.last_accessed_at,
+            func.count(Module.id).over().label("total_modules"),
+            func.count(ModuleProgress.id).filter(is_completed).over().label("completed_modules"),
+        )
+        .select_from(enrollment)
+        .outerjoin(Program, Program.id == enrollment.c.program_id)
+        .outerjoin(Module, Module.program_id == enrollment.c.program_id)
+        .outerjoin(
+            ModuleProgress,
+            and_(ModuleProgress.enrollment_id == enrollment.c.id, ModuleProgress.module_id == Module.id),
+        )
+        .order_by(Module.position)
+    ).all()
+
+    if not rows:
+        return None
+
+    first = rows[0]
+    total_modules = first.total_modules
+    completed_modules = first.completed_modules
+    modules = [
+        ModuleProgressResponse(
+            id=row.progress_id or row.module_id,
+            enrollment_id=row.enrollment_id,
+            module_id=row.module_id,
+            module_code=row.module_code,
+            module_title=row.module_title,
+            scorm_status=row.scorm_status if row.progress_id else "incomplete",
+            score=row.score,
+            progress_pct=row.progress_pct if row.progress_id else 0,
+            last_activity=row.last_activity_at,
+            last_scroll_position=row.last_scroll_position if row.progress_id else 0,
+            active_time_seconds=row.active_time_seconds if row.progress_id else 0,
+            sections_viewed=row.sections_viewed if row.progress_id else [],
+            last_accessed_at=row.last_accessed_at
+        )
+        for row in rows
+        if row.module_id is not None
+    ]
     return OverallProgressResponse(
         user_id=user_id,
-        enrollment_id=enrollment.id,
-        program_name=f"Program {enrollment.program_id}",  # TODO: Join with Program table
+        enrollment_id=first.enrollment_id,
+        program_name=first.program_name or "Unknown",
         total_modules=total_modules,
-        completed_modules=completed_count,
-        completion_percentage=completion_percentage,
-        modules=module_progress_list
+        completed_modules=completed_modules,
+        completion_percentage=(completed_modules / total_modules * 100) if total_modules > 0 else 0.0,
+        modules=modules
     )
 
 
+@router.get("/{user_id}", response_model=OverallProgressResponse)
+def get_user_progress(
+    user_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get overall progress for a user"""
+    # Students can only see their own progress
+    if user_id != current_user.id and not _has_role(current_user, {"admin", "instructor"}):
+        raise HTTPException(status_code=403, detail="Not authorized to view this progress")
+
+    snapshot = progress_snapshot_cache.get(user_id)
+    if snapshot is None:
+        snapshot = _load_progress_snapshot(db, user_id)
+        if snapshot is None:
+            raise HTTPException(status_code=404, detail="No active enrollment found")
+        progress_snapshot_cache.set(user_id, snapshot.enrollment_id, snapshot)
+    return snapshot
+
+
 @router.get("/{user_id}/module/{module_id}", response_model=ModuleProgressResponse)
 def get_module_progress(
     user_id: UUID,
@@ -200,14 +395,9 @@ def get_module_progress(
         ModuleProgress.module_id == module_id
     ).first()
 
-    # Get last activity from xAPI
-    last_statement = db.query(XapiStatement).filter(
-        XapiStatement.actor['mbox'].as_string() == f"mailto:{current_user.email}"
-    ).order_by(XapiStatement.stored_at.desc()).first() if False else None  # Disabled for now
-
     if not progress:
         # Create default progress if none exists
-        return ModuleProgressResponse(
+        response = ModuleProgressResponse(
             id=module.id,
             enrollment_id=enrollment.id,
             module_id=module.id,
@@ -216,14 +406,15 @@ def get_module_progress(
             scorm_status="incomplete",
             score=None,
             progress_pct=0,
-            last_activity=last_statement.stored_at if last_statement else None,
+            last_activity=None,
             last_scroll_position=0,
             active_time_seconds=0,
             sections_viewed=[],
             last_accessed_at=None
         )
+        return _with_pending_heartbeats(response)
 
-    return ModuleProgressResponse(
+    response = ModuleProgressResponse(
         id=progress.id,
         enrollment_id=enrollment.id,
         module_id=module.id,
@@ -232,12 +423,13 @@ def get_module_progress(
         scorm_status=progress.scorm_status,
         score=progress.score,
         progress_pct=progress.progress_pct,
-        last_activity=last_statement.stored_at if last_statement else None,
+        last_activity=progress.last_activity_at,
         last_scroll_position=progress.last_scroll_position or 0,
         active_time_seconds=progress.active_time_seconds or 0,
         sections_viewed=progress.sections_viewed or [],
         last_accessed_at=progress.last_accessed_at
     )
+    return _with_pending_heartbeats(response)
 
 
 @router.post("/", response_model=ModuleProgressResponse, status_code=201)
@@ -269,51 +461,33 @@ def update_progress(
     if not module:
         raise HTTPException(status_code=404, detail="Module not found")
 
-    # Get or create progress record
-    progress = db.query(ModuleProgress).filter(
-        ModuleProgress.enrollment_id == progress_data.enrollment_id,
-        ModuleProgress.module_id == progress_data.module_id
-    ).first()
-
-    if not progress:
-        progress = ModuleProgress(
-            enrollment_id=progress_data.enrollment_id,
-            module_id=progress_data.module_id,
-            scorm_status=progress_data.scorm_status or "incomplete",
-            score=progress_data.score,
-            progress_pct=progress_data.progress_pct or 0,
-            last_scroll_position=progress_data.last_scroll_position or 0,
-            active_time_seconds=progress_data.active_time_seconds or 0,
-            sections_viewed=progress_data.sections_viewed or [],
-            last_accessed_at=datetime.now(timezone.utc)
-        )
-        db.add(progress)
-    else:
-        # Update existing progress
-        if progress_data.scorm_status:
-            progress.scorm_status = progress_data.scorm_status
-        if progress_data.score is not None:
-            progress.score = progress_data.score
-        if progress_data.progress_pct is not None:
-            progress.progress_pct = progress_data.progress_pct
-        # Update engagement tracking fields
-        if progress_data.last_scroll_position is not None:
-            progress.last_scroll_position = progress_data.last_scroll_position
-        if progress_data.active_time_seconds is not None:
-            progress.active_time_seconds = progress_data.active_time_seconds
-        if progress_data.sections_viewed is not None:
-            progress.sections_viewed = progress_data.sections_viewed
-        progress.last_accessed_at = datetime.now(timezone.utc)
-
-    db.commit()
-    db.refresh(progress)
-
-    # Get last activity
-    last_statement = db.query(XapiStatement).filter(
-        XapiStatement.actor['mbox'].as_string() == f"mailto:{current_user.email}"
-    ).order_by(XapiStatement.stored_at.desc()).first() if False else None  # Disabled for now
-
-    return ModuleProgressResponse(
+    # Insert-or-update in one statement; fields not sent keep their value
+    now = datetime.now(timezone.utc)
+    stmt = pg_insert(ModuleProgress).values(
+        id=uuid4(),
+        enrollment_id=progress_data.enrollment_id,
+        module_id=progress_data.module_id,
+        scorm_status=progress_data.scorm_status or "incomplete",
+        score=progress_data.score,
+        progress_pct=progress_data.progress_pct or 0,
+        last_scroll_position=progress_data.last_scroll_position or 0,
+        active_time_seconds=progress_data.active_time_seconds or 0,
+        sections_viewed=progress_data.sections_viewed or [],
+        last_accessed_at=now
+    )
+    updates = {"last_accessed_at": stmt.excluded.last_accessed_at}
+    if progress_data.scorm_status:
+        updates["scorm_status"] = stmt.excluded.scorm_status
+    for field in ("score", "progress_pct", "last_scroll_position", "active_time_seconds", "sections_viewed"):
+        if getattr(progress_data, field) is not None:
+            updates[field] = getattr(stmt.excluded, field)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ModuleProgress.enrollment_id, ModuleProgress.module_id],
+        set_=updates
+    ).returning(ModuleProgress)
+    progress = db.scalars(stmt, execution_options={"populate_existing": True}).one()
+
+    response = ModuleProgressResponse(
         id=progress.id,
         enrollment_id=progress.enrollment_id,
         module_id=progress.module_id,
@@ -322,9 +496,51 @@ def update_progress(
         scorm_status=progress.scorm_status,
         score=progress.score,
         progress_pct=progress.progress_pct,
-        last_activity=last_statement.stored_at if last_statement else None,
+        last_activity=progress.last_activity_at,
         last_scroll_position=progress.last_scroll_position or 0,
         active_time_seconds=progress.active_time_seconds or 0,
         sections_viewed=progress.sections_viewed or [],
         last_accessed_at=progress.last_accessed_at
     )
+    db.commit()
+    progress_snapshot_cache.invalidate_enrollments([progress.enrollment_id])
+    publish(
+        "progress.updated",
+        {
+            "user_id": enrollment.user_id,
+            "enrollment_id": progress.enrollment_id,
+            "module_ids": [progress.module_id],
+            "scorm_status": progress.scorm_status,
+            "progress_pct": progress.progress_pct,
+        },
+        [user_topic(enrollment.user_id), STAFF_TOPIC],
+    )
+    return response
+
+
+@router.post("/heartbeat", status_code=202)
+def record_heartbeat(
+    heartbeat: ProgressHeartbeat,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Record scroll position, active time and viewed sections for a module.
+
+    Heartbeats are buffered and coalesced in memory and written in batches
+    (see app.services.progress_buffer), so this endpoint does no writes.
+    Use POST /progress/ for status and score changes.
+    """
+    _check_heartbeat_access(db, current_user, heartbeat.enrollment_id, heartbeat.module_id)
+
+    flush_now = heartbeat_buffer.add(
+        heartbeat.enrollment_id,
+        heartbeat.module_id,
+        last_scroll_position=heartbeat.last_scroll_position,
+        active_time_delta=heartbeat.active_time_delta_seconds,
+        sections_viewed=heartbeat.sections_viewed,
+    )
+    if flush_now:
+        background_tasks.add_task(run_local, flush_heartbeats)
+    return {"status": "accepted"}
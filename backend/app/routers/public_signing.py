@@ -9,10 +9,12 @@ Security features:
 - IP and user agent tracking
 """
 
-from fastapi import APIRouter, HTTPException, status, Request, Depends
+from fastapi import APIRouter, HTTPException, status, Request, Depends, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional, List, Dict, Any
-import base64
+from uuid import UUID
+import asyncio
 import copy
 import json
 from datetime import datetime, timezone
@@ -31,7 +33,11 @@ from app.schemas.document import (
     DocumentSignResponse,
     AdvisorDirectoryEntry,
 )
-from app.routers.documents import _generate_signed_pdf
+from app.routers.documents import _publish_document_event
+from app.routers.events import SSE_HEADERS
+from app.services.realtime import broker, document_topic, stream_events
+from app.services.signature_images import InvalidSignatureImage, store_signature
+from app.services.signed_pdfs import request_signed_pdf
 from app.domain.enrollment.schema import get_enrollment_agreement_schema
 from app.domain.enrollment.advisors import list_advisors
 
@@ -227,7 +233,7 @@ async def preview_document(
 
 
 @router.post("/{token}", dependencies=[Depends(rate_limit_public_endpoints)])
-async def submit_signature(
+def submit_signature(
     token: str,
     sign_request: DocumentSignRequest,
     request: Request,
@@ -276,10 +282,10 @@ async def submit_signature(
             detail="Typed name is required"
         )
 
-    # Validate base64 signature data
+    # Validate, normalize and store the signature image (the row keeps its hash)
     try:
-        base64.b64decode(sign_request.signature_data)
-    except Exception:
+        signature_hash = store_signature(sign_request.signature_data)
+    except InvalidSignatureImage:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid signature data format"
@@ -294,7 +300,7 @@ async def submit_signature(
         document_id=document.id,
         signer_id=document.user_id,  # None for leads
         signature_type="applicant" if document.lead_id else "student",
-        signature_data=sign_request.signature_data,
+        signature_hash=signature_hash,
         signed_at=datetime.now(timezone.utc),
         ip_address=ip_address,
         user_agent=user_agent,
@@ -344,7 +350,10 @@ async def submit_signature(
             .first()
         )
     if template:
-        _generate_signed_pdf(document, template, db, current_user=None, request=request)
+        # Rendered in the background; GET /{token}/status reports pdf_status
+        request_signed_pdf(db, document, ip_address=ip_address, user_agent=user_agent)
+
+    _publish_document_event(document, "document.signed")
 
     return DocumentSignResponse(
         success=True,
@@ -352,7 +361,8 @@ async def submit_signature(
         document_id=str(document.id),
         status=document.status,
         signed_at=document.student_signed_at.isoformat(),
-        requires_counter_signature=document.template.requires_counter_signature
+        requires_counter_signature=document.template.requires_counter_signature,
+        pdf_status=document.pdf_status,
     )
 
 
@@ -387,5 +397,47 @@ async def get_document_status(
         "status": document.status,
         "signed_at": document.student_signed_at.isoformat() if document.student_signed_at else None,
         "completed_at": document.completed_at.isoformat() if document.completed_at else None,
-        "requires_counter_signature": document.template.requires_counter_signature
+        "requires_counter_signature": document.template.requires_counter_signature,
+        "pdf_status": document.pdf_status,
     }
+
+
+def _document_status(db: Session, document_id: UUID) -> Optional[str]:
+    return db.query(SignedDocument.status).filter(SignedDocument.id == document_id).scalar()
+
+
+@router.get("/{token}/events", dependencies=[Depends(rate_limit_public_endpoints)])
+async def stream_document_status(
+    token: str,
+    db: Session = Depends(get_db)
+):
+    """
+    Stream signing-status changes for a pending document (public endpoint)
+
+    Replaces polling GET /{token}/status: the signing page subscribes while
+    the token is valid and receives document.signed / document.counter_signed
+    events. The stream ends once the document is completed; a document
+    completed while the stream was being opened gets 204, which stops
+    EventSource from reconnecting.
+
+    Rate Limit:
+        - 10 requests per 60 seconds per IP
+    """
+    # Database work runs in a worker thread, not on the event loop
+    document = await asyncio.to_thread(get_document_by_token, token, db)
+    document_id = document.id
+
+    # Subscribe before re-reading the status, so a completion in between is not missed
+    subscription = broker.subscribe([document_topic(document_id)])
+    current_status = await asyncio.to_thread(_document_status, db, document_id)
+    # The stream outlives the request's session; hand its connection back now
+    db.close()
+    if current_status == "completed":
+        broker.unsubscribe(subscription)
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+    return StreamingResponse(
+        stream_events(subscription, until=lambda event: event.data.get("status") == "completed"),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
@@ -1,105 +1,68 @@
-import csv
-from datetime import datetime
-from decimal import Decimal
-from io import BytesIO, StringIO
-from typing import Any, Dict, List
-
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import StreamingResponse
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.units import inch
-from reportlab.pdfgen import canvas
+import tempfile
+from datetime import date, datetime, timezone
+from io import BytesIO
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Literal, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
-from app.db.models.compliance.attendance import AttendanceLog
-from app.db.models.compliance.complaint import Complaint
-from app.db.models.compliance.credential import Credential
-from app.db.models.compliance.extern import Externship
-from app.db.models.compliance.skills import SkillCheckoff
-from app.db.models.compliance.transcript import Transcript
-from app.db.models.compliance.withdraw_refund import Refund, Withdrawal
+from app.core.config import settings
+from app.core.rbac import require_staff
+from app.db.models.background_job import BackgroundJob
 from app.db.models.user import User
 from app.db.session import get_db
-from app.utils.encryption import decrypt_value
+from app.routers.jobs import get_job_or_404, job_artifact_response
+from app.schemas.jobs import BackgroundJobRead
+from app.services.background_jobs import submit_job
+from app.services.compliance_reports import (
+    COMPLIANCE_MODELS,
+    CONTENT_TYPES,
+    InvalidReportQuery,
+    ReportFilters,
+    arrow_schema,
+    count_rows,
+    filter_clauses,
+    iter_csv,
+    iter_parquet,
+    iter_report_batches,
+    iter_report_rows,
+    missing_dependency,
+    project_fields,
+    source_tables,
+    write_pdf,
+    write_xlsx,
+)
+from app.services.report_bundles import iter_bundle
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
-COMPLIANCE_MODELS = {
-    "attendance": AttendanceLog,
-    "complaints": Complaint,
-    "credentials": Credential,
-    "externships": Externship,
-    "skills": SkillCheckoff,
-    "withdrawals": Withdrawal,
-    "refunds": Refund,
-    "transcripts": Transcript,
-}
-
-
-def _serialize_record(record, db: Session) -> Dict[str, Any]:
-    row: Dict[str, Any] = {}
-
-    # Add decrypted student name FIRST if record has user_id
-    if hasattr(record, 'user_id') and record.user_id:
-        user = db.query(User).filter(User.id == record.user_id).first()
-        if user:
-            first_name = decrypt_value(db, user.first_name)
-            last_name = decrypt_value(db, user.last_name)
-            row['student_name'] = f"{first_name} {last_name}"
-
-    # Then add all other fields
-    for column in record.__table__.columns:  # type: ignore[attr-defined]
-        value = getattr(record, column.name)
-        if isinstance(value, (datetime, Decimal)):
-            row[column.name] = value.isoformat() if isinstance(value, datetime) else str(value)
-        else:
-            row[column.name] = str(value) if value is not None else None
-
-    return row
-
-
-def _generate_csv(rows: List[Dict[str, Any]], filename: str) -> StreamingResponse:
-    buffer = StringIO()
-    if rows:
-        writer = csv.DictWriter(buffer, fieldnames=list(rows[0].keys()))
-        writer.writeheader()
-        for row in rows:
-            writer.writerow(row)
+
+class ReportJobRequest(BaseModel):
+    resource: str
+    format: Literal["csv", "pdf", "xlsx", "parquet"] = "csv"
+    start: Optional[date] = None
+    end: Optional[date] = None
+    program_id: Optional[UUID] = None
+    user_id: Optional[UUID] = None
+    status: Optional[str] = None
+    columns: Optional[List[str]] = None
+
+
+def _generate_csv(rows: Iterable[Dict[str, Any]], fieldnames: List[str], filename: str) -> StreamingResponse:
     response = StreamingResponse(
-        iter([buffer.getvalue()]),
+        iter_csv(rows, fieldnames),
         media_type="text/csv",
     )
     response.headers["Content-Disposition"] = f'attachment; filename="{filename}.csv"'
     return response
 
 
-def _generate_pdf(rows: List[Dict[str, Any]], filename: str) -> StreamingResponse:
+def _generate_pdf(rows: Iterable[Dict[str, Any]], filename: str) -> StreamingResponse:
     buffer = BytesIO()
-    pdf = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-    margin = inch
-    y = height - margin
-
-    pdf.setFont("Helvetica-Bold", 16)
-    pdf.drawString(margin, y, f"{filename.title()} Report")
-    y -= 0.4 * inch
-
-    pdf.setFont("Helvetica", 10)
-    for row in rows or [{}]:
-        if not row:
-            pdf.drawString(margin, y, "No data available.")
-            break
-        line = ", ".join(f"{key}: {value}" for key, value in row.items())
-        if y < margin:
-            pdf.showPage()
-            pdf.setFont("Helvetica", 10)
-            y = height - margin
-        pdf.drawString(margin, y, line)
-        y -= 0.25 * inch
-
-    pdf.showPage()
-    pdf.save()
-    buffer.seek(0)
+    write_pdf(rows, filename, buffer)
 
     response = StreamingResponse(
         iter([buffer.getvalue()]),
@@ -109,27 +72,202 @@ def _generate_pdf(rows: List[Dict[str, Any]], filename: str) -> StreamingRespons
     return response
 
 
+def _generate_file(write: Callable[[BinaryIO], None], fmt: str, filename: str) -> StreamingResponse:
+    # XLSX is a ZIP finished only at the end, so it is written to a temporary
+    # file (not memory) and streamed from there
+    spool = tempfile.TemporaryFile()
+    try:
+        write(spool)
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+
+    def iter_file():
+        with spool:
+            yield from iter(lambda: spool.read(256 * 1024), b"")
+
+    response = StreamingResponse(iter_file(), media_type=CONTENT_TYPES[fmt])
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}.{fmt}"'
+    return response
+
+
+def _ensure_available(fmt: str) -> None:
+    package = missing_dependency(fmt)
+    if package:
+        raise HTTPException(status_code=501, detail=f"{fmt} export requires the {package} package.")
+
+
+def _split(value: Optional[str]) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()] if value else []
+
+
+def _report_query(resource: str, filters: ReportFilters, columns: Optional[List[str]]):
+    try:
+        return filter_clauses(resource, filters), project_fields(COMPLIANCE_MODELS[resource], columns)
+    except InvalidReportQuery as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
 @router.get("/health")
 def health() -> Dict[str, str]:
     return {"reports": "ok"}
 
 
+@router.get("/compliance/bundle")
+def export_compliance_bundle(
+    resources: Optional[str] = Query(
+        default=None,
+        description="Comma-separated compliance resources (default: all).",
+    ),
+    formats: str = Query(default="csv,pdf", description="Comma-separated formats: csv, pdf, xlsx, parquet."),
+    start: Optional[date] = Query(default=None, description="Earliest record date (inclusive)."),
+    end: Optional[date] = Query(default=None, description="Latest record date (inclusive)."),
+    program_id: Optional[UUID] = Query(default=None),
+    user_id: Optional[UUID] = Query(default=None, description="Only this student's records."),
+    current_user: User = Depends(require_staff),
+) -> StreamingResponse:
+    """
+    Download several compliance exports as one ZIP.
+
+    Parts are rendered concurrently in the report worker pool and added to the
+    streamed archive as they finish; manifest.json lists each file's row
+    count and SHA-256 checksum.
+    """
+    selected = _split(resources) or list(COMPLIANCE_MODELS)
+    unknown = [name for name in selected if name not in COMPLIANCE_MODELS]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Compliance resource not found: {', '.join(unknown)}.")
+    selected_formats = _split(formats)
+    if not selected_formats or any(fmt not in CONTENT_TYPES for fmt in selected_formats):
+        raise HTTPException(status_code=400, detail=f"formats must be among: {', '.join(CONTENT_TYPES)}.")
+    for fmt in selected_formats:
+        _ensure_available(fmt)
+
+    filters = ReportFilters(start=start, end=end, program_id=program_id, user_id=user_id)
+    for resource in selected:
+        _report_query(resource, filters, None)
+    parts = [
+        {"resource": resource, "format": fmt, **filters.to_params()}
+        for resource in selected
+        for fmt in selected_formats
+    ]
+    filename = f"compliance_bundle_{datetime.now(timezone.utc):%Y%m%d_%H%M%S}.zip"
+    return StreamingResponse(
+        iter_bundle(parts, filters.to_params()),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @router.get("/compliance/{resource}")
 def export_compliance_report(
     resource: str,
     format: str = Query(
         default="csv",
-        pattern="^(csv|pdf)$",
-        description="Choose csv or pdf export format.",
+        pattern="^(csv|pdf|xlsx|parquet)$",
+        description="Choose csv, pdf, xlsx or parquet export format.",
+    ),
+    start: Optional[date] = Query(default=None, description="Earliest record date (inclusive)."),
+    end: Optional[date] = Query(default=None, description="Latest record date (inclusive)."),
+    program_id: Optional[UUID] = Query(default=None),
+    user_id: Optional[UUID] = Query(default=None, description="Only this student's records."),
+    status: Optional[str] = Query(default=None, description="complaints and skills only."),
+    columns: Optional[str] = Query(
+        default=None,
+        description="Comma-separated fields to export (default: all, student_name first).",
     ),
     db: Session = Depends(get_db),
+    current_user: User = Depends(require_staff),
 ) -> StreamingResponse:
     model = COMPLIANCE_MODELS.get(resource)
     if not model:
         raise HTTPException(status_code=404, detail="Compliance resource not found.")
-    records = db.query(model).all()
-    rows = [_serialize_record(record, db) for record in records]
+    _ensure_available(format)
+    filters = ReportFilters(start=start, end=end, program_id=program_id, user_id=user_id, status=status)
+    where, fields = _report_query(resource, filters, _split(columns))
     filename = f"{resource}_report"
+    if format == "xlsx":
+        # Written in full before the first byte goes out, so only up to a size
+        if count_rows(db, model, where) > settings.REPORT_XLSX_MAX_ROWS:
+            raise HTTPException(
+                status_code=400,
+                detail=(
+                    f"XLSX exports of more than {settings.REPORT_XLSX_MAX_ROWS} rows run as report jobs: "
+                    "POST /reports/jobs."
+                ),
+            )
+        batches = iter_report_batches(db, model, where=where, fields=fields)
+        return _generate_file(lambda out: write_xlsx(batches, fields, resource, out), format, filename)
+    if format == "parquet":
+        batches = iter_report_batches(db, model, where=where, fields=fields)
+        response = StreamingResponse(
+            iter_parquet(batches, arrow_schema(model, fields)), media_type=CONTENT_TYPES[format]
+        )
+        response.headers["Content-Disposition"] = f'attachment; filename="{filename}.parquet"'
+        return response
+    rows = iter_report_rows(db, model, where=where, fields=fields)
     if format == "csv":
-        return _generate_csv(rows, filename)
+        return _generate_csv(rows, fields, filename)
     return _generate_pdf(rows, filename)
+
+
+@router.post("/jobs", response_model=BackgroundJobRead, status_code=status.HTTP_202_ACCEPTED)
+def create_report_job(
+    payload: ReportJobRequest,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_staff),
+):
+    """
+    Render a compliance report in the background.
+
+    Returns 202 with a job to poll, or 200 with an already finished job when
+    an identical report was rendered since the source tables last changed.
+    """
+    if payload.resource not in COMPLIANCE_MODELS:
+        raise HTTPException(status_code=404, detail="Compliance resource not found.")
+    _ensure_available(payload.format)
+    filters = ReportFilters(
+        start=payload.start,
+        end=payload.end,
+        program_id=payload.program_id,
+        user_id=payload.user_id,
+        status=payload.status,
+    )
+    _, fields = _report_query(payload.resource, filters, payload.columns)
+    params: Dict[str, Any] = {"resource": payload.resource, "format": payload.format, **filters.to_params()}
+    if payload.columns:
+        params["columns"] = fields
+    job = submit_job(
+        db,
+        "compliance_report",
+        params,
+        source_tables(payload.resource, filters),
+        created_by=current_user.id,
+    )
+    if job.status == "succeeded":
+        response.status_code = status.HTTP_200_OK
+    return _job_response(job)
+
+
+def _job_response(job: BackgroundJob) -> BackgroundJobRead:
+    return BackgroundJobRead.from_job(job, f"/api/reports/jobs/{job.id}/download")
+
+
+@router.get("/jobs/{job_id}", response_model=BackgroundJobRead)
+def get_report_job(
+    job_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_staff),
+):
+    return _job_response(get_job_or_404(db, job_id, kind="compliance_report"))
+
+
+@router.get("/jobs/{job_id}/download")
+def download_report_job(
+    job_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_staff),
+) -> FileResponse:
+    return job_artifact_response(get_job_or_404(db, job_id, kind="compliance_report"))
@@ -1,8 +1,9 @@
 """SCORM tracking router - Save and retrieve SCORM 1.2/2004 data"""
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from uuid import UUID
+from typing import Dict, List, Optional, Union
+from uuid import UUID, uuid4
 from pydantic import BaseModel
 from decimal import Decimal
 
@@ -10,6 +11,8 @@ from app.db.session import get_db
 from app.db.models.scorm import ScormRecord
 from app.db.models.user import User
 from app.routers.auth import get_current_user
+from app.services.scorm_runtime import InvalidCmiValue, commit_runtime, list_interactions
+from app.utils.durations import parse_scorm_session_time
 
 
 class ScormDataCreate(BaseModel):
@@ -38,12 +41,42 @@ class ScormDataResponse(BaseModel):
     score_scaled: Optional[Decimal]
     score_raw: Optional[Decimal]
     session_time: Optional[str]
+    session_time_seconds: Optional[Decimal] = None
+    total_time_seconds: Optional[Decimal] = None
     interactions: Optional[dict]
 
     class Config:
         from_attributes = True
 
 
+class ScormRuntimeCommit(BaseModel):
+    """cmi.* elements set since the previous LMSCommit/Commit"""
+    user_id: Optional[UUID] = None  # defaults to the current user
+    cmi: Dict[str, Union[str, int, float, None]]
+    finish: bool = False  # LMSFinish/Terminate: accrue session_time into total_time_seconds
+
+
+class ScormRuntimeCommitResponse(BaseModel):
+    record_id: UUID
+    interactions_written: int
+
+
+class ScormInteractionResponse(BaseModel):
+    position: int
+    interaction_id: Optional[str]
+    type: Optional[str]
+    learner_response: Optional[str]
+    correct_responses: Optional[List[str]]
+    result: Optional[str]
+    weighting: Optional[Decimal]
+    latency_seconds: Optional[Decimal]
+    timestamp: Optional[str]
+    description: Optional[str]
+
+    class Config:
+        from_attributes = True
+
+
 router = APIRouter(prefix="/scorm", tags=["scorm"])
 
 
@@ -60,43 +93,71 @@ def upsert_scorm_record(
     ):
         raise HTTPException(status_code=403, detail="Not authorized to update this record")
 
-    # Check if record exists
-    existing = db.query(ScormRecord).filter(
-        ScormRecord.user_id == data.user_id,
-        ScormRecord.module_id == data.module_id
+    # Single-statement upsert: concurrent tabs can no longer race a
+    # read-then-insert into duplicate rows. Fields left out keep their value.
+    values = {
+        "lesson_status": data.lesson_status,
+        "score_scaled": data.score_scaled,
+        "score_raw": data.score_raw,
+        "session_time": data.session_time,
+        "session_time_seconds": parse_scorm_session_time(data.session_time),
+        "interactions": data.interactions,
+    }
+    stmt = pg_insert(ScormRecord).values(id=uuid4(), user_id=data.user_id, module_id=data.module_id, **values)
+    updates = {name: getattr(stmt.excluded, name) for name, value in values.items() if value is not None}
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ScormRecord.user_id, ScormRecord.module_id],
+        # DO UPDATE (even a no-op) so RETURNING yields the existing row
+        set_=updates or {"lesson_status": ScormRecord.lesson_status},
+    ).returning(ScormRecord)
+    record = db.scalars(stmt, execution_options={"populate_existing": True}).one()
+    response = ScormDataResponse.model_validate(record)
+    db.commit()
+    return response
+
+
+@router.post("/runtime/{module_id}/commit", response_model=ScormRuntimeCommitResponse)
+def commit_scorm_runtime(
+    module_id: UUID,
+    data: ScormRuntimeCommit,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Apply the cmi.* deltas of one SCO commit (interactions are appended, not rewritten)"""
+    user_id = data.user_id or current_user.id
+    if user_id != current_user.id and not any(
+        role in ["admin", "instructor"] for role in current_user.roles
+    ):
+        raise HTTPException(status_code=403, detail="Not authorized to update this record")
+
+    try:
+        return commit_runtime(db, user_id, module_id, data.cmi, finish=data.finish)
+    except InvalidCmiValue as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+
+@router.get("/records/{user_id}/{module_id}/interactions", response_model=List[ScormInteractionResponse])
+def get_scorm_interactions(
+    user_id: UUID,
+    module_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get the recorded interactions of a SCORM record in cmi.interactions order"""
+    if user_id != current_user.id and not any(
+        role in ["admin", "instructor"] for role in current_user.roles
+    ):
+        raise HTTPException(status_code=403, detail="Not authorized to view this record")
+
+    record = db.query(ScormRecord).filter(
+        ScormRecord.user_id == user_id,
+        ScormRecord.module_id == module_id
     ).first()
 
-    if existing:
-        # Update existing record
-        if data.lesson_status is not None:
-            existing.lesson_status = data.lesson_status
-        if data.score_scaled is not None:
-            existing.score_scaled = data.score_scaled
-        if data.score_raw is not None:
-            existing.score_raw = data.score_raw
-        if data.session_time is not None:
-            existing.session_time = data.session_time
-        if data.interactions is not None:
-            existing.interactions = data.interactions
-
-        db.commit()
-        db.refresh(existing)
-        return existing
-    else:
-        # Create new record
-        record = ScormRecord(
-            user_id=data.user_id,
-            module_id=data.module_id,
-            lesson_status=data.lesson_status,
-            score_scaled=data.score_scaled,
-            score_raw=data.score_raw,
-            session_time=data.session_time,
-            interactions=data.interactions
-        )
-        db.add(record)
-        db.commit()
-        db.refresh(record)
-        return record
+    if not record:
+        raise HTTPException(status_code=404, detail="SCORM record not found")
+
+    return list_interactions(db, record.id)
 
 
 @router.get("/records/{user_id}/{module_id}", response_model=ScormDataResponse)
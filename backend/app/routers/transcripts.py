@@ -1,27 +1,35 @@
-from datetime import datetime, timezone
-from decimal import Decimal, ROUND_HALF_UP
-from io import BytesIO
+from datetime import date, datetime, timezone
+from decimal import Decimal
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from fastapi.responses import FileResponse
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.units import inch
-from reportlab.pdfgen import canvas
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
+from app.core.downloads import file_download
+from app.core.rbac import require_staff
 from app.db.models.compliance.transcript import Transcript
 from app.db.models.enrollment import Enrollment, ModuleProgress
 from app.db.models.program import Module, Program
 from app.db.models.user import User
 from app.db.session import get_db
+from app.routers.jobs import get_job_or_404, job_artifact_response
+from app.schemas.jobs import BackgroundJobRead
 from app.schemas.transcripts import ModuleResult, TranscriptGenerate, TranscriptRead
+from app.services.background_jobs import submit_job
+from app.services.transcripts import calculate_gpa, ensure_transcript_pdf, program_label
+from app.utils.encryption import decrypt_user_names
 
 router = APIRouter(prefix="/transcripts", tags=["transcripts"])
 
-GENERATED_DIR = Path("generated/transcripts")
+
+class TranscriptBatchRequest(BaseModel):
+    program_id: UUID
+    start: Optional[date] = None  # cohort: enrollments starting on/after
+    end: Optional[date] = None  # and on/before
 
 
 def _latest_enrollment(db: Session, user_id: UUID, program_id: UUID) -> Enrollment:
@@ -67,15 +75,6 @@ def _module_results(db: Session, enrollment: Enrollment) -> List[ModuleResult]:
     return results
 
 
-def _calculate_gpa(results: List[ModuleResult]) -> Decimal | None:
-    scores = [module.score for module in results if module.score is not None]
-    if not scores:
-        return None
-    avg_score = sum(scores) / len(scores)
-    gpa = min(4.0, avg_score / 25)
-    return Decimal(str(gpa)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-
-
 def _fetch_user_program(db: Session, user_id: UUID, program_id: UUID) -> tuple[User, Program]:
     user = db.get(User, user_id)
     program = db.get(Program, program_id)
@@ -88,58 +87,19 @@ def _fetch_user_program(db: Session, user_id: UUID, program_id: UUID) -> tuple[U
 
 
 def _render_transcript_pdf(
+    db: Session,
     user: User,
     program: Program,
     transcript: Transcript,
     modules: List[ModuleResult],
     gpa: Decimal | None,
 ) -> Path:
-    GENERATED_DIR.mkdir(parents=True, exist_ok=True)
-    pdf_path = GENERATED_DIR / f"{transcript.id}.pdf"
-    buffer = BytesIO()
-    pdf = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-    margin = inch
-    y = height - margin
-
-    pdf.setFont("Helvetica-Bold", 18)
-    pdf.drawString(margin, y, "AADA Official Transcript")
-    y -= 0.5 * inch
-
-    pdf.setFont("Helvetica", 12)
-    pdf.drawString(margin, y, f"Student: {user.first_name} {user.last_name}")
-    y -= 0.25 * inch
-    pdf.drawString(margin, y, f"Program: {program.name} ({program.code})")
-    y -= 0.25 * inch
-    if gpa is not None:
-        pdf.drawString(margin, y, f"GPA: {float(gpa):.2f}")
-        y -= 0.25 * inch
-    pdf.drawString(margin, y, f"Issued: {transcript.generated_at.date().isoformat()}")
-    y -= 0.4 * inch
-
-    pdf.setFont("Helvetica-Bold", 12)
-    pdf.drawString(margin, y, "Modules")
-    y -= 0.3 * inch
-
-    pdf.setFont("Helvetica", 11)
-    for module in modules:
-        if y < margin:
-            pdf.showPage()
-            y = height - margin
-            pdf.setFont("Helvetica", 11)
-        pdf.drawString(
-            margin,
-            y,
-            f"{module.module_code} - {module.module_title} | Score: "
-            f"{module.score if module.score is not None else 'N/A'} | "
-            f"Progress: {module.progress_pct if module.progress_pct is not None else 'N/A'}%",
-        )
-        y -= 0.22 * inch
-
-    pdf.showPage()
-    pdf.save()
-    buffer.seek(0)
-    pdf_path.write_bytes(buffer.getvalue())
+    """Point transcript at the PDF for its inputs, rendering it only if they changed."""
+    student_name = decrypt_user_names(db, [user.id]).get(user.id, "")
+    content_hash, pdf_path = ensure_transcript_pdf(
+        student_name, program_label(program), transcript.generated_at, modules, gpa
+    )
+    transcript.content_hash = content_hash
     return pdf_path
 
 
@@ -170,7 +130,7 @@ def generate_transcript(
 ) -> TranscriptRead:
     enrollment = _latest_enrollment(db, payload.user_id, payload.program_id)
     modules = _module_results(db, enrollment)
-    gpa = _calculate_gpa(modules)
+    gpa = calculate_gpa(modules)
     transcript = Transcript(
         user_id=payload.user_id,
         program_id=payload.program_id,
@@ -181,7 +141,7 @@ def generate_transcript(
     db.commit()
     db.refresh(transcript)
     user, program = _fetch_user_program(db, payload.user_id, payload.program_id)
-    pdf_path = _render_transcript_pdf(user, program, transcript, modules, gpa)
+    pdf_path = _render_transcript_pdf(db, user, program, transcript, modules, gpa)
     transcript.pdf_url = str(pdf_path)
     db.add(transcript)
     db.commit()
@@ -189,6 +149,55 @@ def generate_transcript(
     return _serialize_transcript(transcript, modules)
 
 
+@router.post("/batch", response_model=BackgroundJobRead, status_code=status.HTTP_202_ACCEPTED)
+def generate_transcript_batch(
+    payload: TranscriptBatchRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_staff),
+):
+    """
+    Issue transcripts for every student enrolled in a program (optionally only
+    a cohort by enrollment start date) as a background job.
+
+    Poll GET /transcripts/batch/{job_id}; the download is a ZIP of all PDFs
+    plus index.csv. Each transcript is also stored like POST /transcripts.
+    """
+    if payload.start and payload.end and payload.start > payload.end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must not be after end.")
+    if not db.get(Program, payload.program_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Program not found")
+    params = {"program_id": str(payload.program_id)}
+    if payload.start:
+        params["start"] = payload.start.isoformat()
+    if payload.end:
+        params["end"] = payload.end.isoformat()
+    # Issuing is not idempotent: only a batch still in flight is reused
+    job = submit_job(db, "transcript_batch", params, (), created_by=current_user.id, reuse_finished=False)
+    return _batch_response(job)
+
+
+def _batch_response(job) -> BackgroundJobRead:
+    return BackgroundJobRead.from_job(job, f"/api/transcripts/batch/{job.id}/download")
+
+
+@router.get("/batch/{job_id}", response_model=BackgroundJobRead)
+def get_transcript_batch(
+    job_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_staff),
+):
+    return _batch_response(get_job_or_404(db, job_id, kind="transcript_batch"))
+
+
+@router.get("/batch/{job_id}/download")
+def download_transcript_batch(
+    job_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_staff),
+) -> FileResponse:
+    return job_artifact_response(get_job_or_404(db, job_id, kind="transcript_batch"))
+
+
 @router.get("/{transcript_id}", response_model=TranscriptRead)
 def get_transcript(transcript_id: UUID, db: Session = Depends(get_db)) -> TranscriptRead:
     transcript = db.get(Transcript, transcript_id)
@@ -200,14 +209,17 @@ def get_transcript(transcript_id: UUID, db: Session = Depends(get_db)) -> Transc
 
 
 @router.get("/{transcript_id}/pdf")
-def download_transcript_pdf(transcript_id: UUID, db: Session = Depends(get_db)) -> FileResponse:
+def download_transcript_pdf(transcript_id: UUID, request: Request, db: Session = Depends(get_db)) -> Response:
     transcript = db.get(Transcript, transcript_id)
     if not transcript or not transcript.pdf_url:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Transcript PDF not available")
     pdf_path = Path(transcript.pdf_url)
-    if not pdf_path.exists():
+    # The PDF is stored under content_hash and never rewritten, so it is a strong ETag
+    etag = transcript.content_hash if pdf_path.name == f"{transcript.content_hash}.pdf" else None
+    try:
+        return file_download(request, pdf_path, f"transcript_{transcript.id}.pdf", etag=etag)
+    except FileNotFoundError:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Transcript PDF missing on server")
-    return FileResponse(path=pdf_path, filename=pdf_path.name, media_type="application/pdf")
 
 
 @router.delete("/{transcript_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -215,8 +227,7 @@ def delete_transcript(transcript_id: UUID, db: Session = Depends(get_db)) -> Non
     transcript = db.get(Transcript, transcript_id)
     if not transcript:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Transcript not found")
-    pdf_url = Path(transcript.pdf_url) if transcript.pdf_url else None
     db.delete(transcript)
     db.commit()
-    if pdf_url and pdf_url.exists():
-        pdf_url.unlink(missing_ok=True)
+    # The PDF may be shared with identical transcripts; sweep_transcript_pdfs
+    # removes it once no transcript references it
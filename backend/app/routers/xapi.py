@@ -1,17 +1,29 @@
-from datetime import datetime
-from typing import List, Optional
+from datetime import date, datetime
+from typing import Iterator, List, Optional, Union
 
-from fastapi import APIRouter, Depends, Query, status
-from sqlalchemy import Text, cast
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Text, cast, tuple_
+from sqlalchemy.orm import Query as OrmQuery, Session
 
 from app.db.session import get_db
-from app.db.models.xapi import XapiStatement
-from app.schemas.xapi import XapiStatementIn, XapiStatementOut
+from app.db.models.xapi import XapiDailyRollup, XapiStatement
+from app.schemas.xapi import (
+    XapiDailyRollupOut,
+    XapiStatementIn,
+    XapiStatementOut,
+    XapiStatementResult,
+)
+from app.utils.pagination import decode_timestamp_id_cursor, encode_cursor
 
 
 router = APIRouter(prefix="/xapi", tags=["xAPI"])
 
+# NDJSON export: rows per keyset page (one short read transaction each) and
+# rows pulled per server-side cursor fetch within a page.
+EXPORT_PAGE_SIZE = 10000
+EXPORT_FETCH_SIZE = 500
+
 
 @router.post("/statements", response_model=XapiStatementOut, status_code=status.HTTP_201_CREATED)
 def create_xapi(statement: XapiStatementIn, db: Session = Depends(get_db)):
@@ -23,14 +35,12 @@ def create_xapi(statement: XapiStatementIn, db: Session = Depends(get_db)):
     return rec
 
 
-@router.get("/statements", response_model=List[XapiStatementOut])
-def list_xapi_statements(
-    agent: Optional[str] = Query(default=None, description="Filter by agent e-mail or name substring."),
-    verb: Optional[str] = Query(default=None, description="Filter by verb id or display text."),
-    since: Optional[datetime] = Query(default=None, description="Return statements stored since this timestamp."),
-    limit: int = Query(default=200, le=1000, description="Maximum statements to return."),
-    db: Session = Depends(get_db),
-) -> List[XapiStatementOut]:
+def _filtered_query(
+    db: Session,
+    agent: Optional[str],
+    verb: Optional[str],
+    since: Optional[datetime],
+) -> OrmQuery:
     query = db.query(XapiStatement)
     if agent:
         query = query.filter(cast(XapiStatement.actor, Text).ilike(f"%{agent}%"))
@@ -38,9 +48,133 @@ def list_xapi_statements(
         query = query.filter(cast(XapiStatement.verb, Text).ilike(f"%{verb}%"))
     if since:
         query = query.filter(XapiStatement.timestamp >= since)
-    records = (
-        query.order_by(XapiStatement.timestamp.desc())
+    return query
+
+
+def _keyset_page(query: OrmQuery, after: Optional[tuple[datetime, object]]) -> OrmQuery:
+    """Order by (stored_at, id) and continue strictly after the given key."""
+    if after is not None:
+        query = query.filter(tuple_(XapiStatement.stored_at, XapiStatement.id) > tuple_(*after))
+    return query.order_by(XapiStatement.stored_at.asc(), XapiStatement.id.asc())
+
+
+def _stream_ndjson(
+    db: Session, query: OrmQuery, after: Optional[tuple[datetime, object]]
+) -> Iterator[str]:
+    """
+    Yield statements as newline-delimited JSON in constant memory.
+
+    Each page is read through a server-side cursor (yield_per) and the read
+    transaction is closed before the next page starts, so a multi-million row
+    export never pins a snapshot for its whole duration.
+    """
+    while True:
+        page = _keyset_page(query, after).limit(EXPORT_PAGE_SIZE).yield_per(EXPORT_FETCH_SIZE)
+        rows = 0
+        lines: List[str] = []
+        for record in page:
+            lines.append(XapiStatementOut.model_validate(record).model_dump_json())
+            after = (record.stored_at, record.id)
+            rows += 1
+            if len(lines) >= EXPORT_FETCH_SIZE:
+                yield "\n".join(lines) + "\n"
+                lines = []
+        if lines:
+            yield "\n".join(lines) + "\n"
+        db.rollback()
+        if rows < EXPORT_PAGE_SIZE:
+            break
+
+
+@router.get(
+    "/statements",
+    response_model=Union[XapiStatementResult, List[XapiStatementOut]],
+)
+def list_xapi_statements(
+    request: Request,
+    agent: Optional[str] = Query(default=None, description="Filter by agent e-mail or name substring."),
+    verb: Optional[str] = Query(default=None, description="Filter by verb id or display text."),
+    since: Optional[datetime] = Query(default=None, description="Return statements stored since this timestamp."),
+    limit: int = Query(default=200, ge=1, le=1000, description="Maximum statements to return."),
+    more: Optional[str] = Query(
+        default=None,
+        description=(
+            "Continuation token from a previous 'result' response. "
+            "'ndjson' also accepts one and streams the statements after it."
+        ),
+    ),
+    format: str = Query(
+        default="list",
+        pattern="^(list|result|ndjson)$",
+        description=(
+            "list: newest statements as a JSON array (legacy). "
+            "result: LRS-style {statements, more} pages in stored order. "
+            "ndjson: stream every matching statement as newline-delimited JSON."
+        ),
+    ),
+    db: Session = Depends(get_db),
+):
+    query = _filtered_query(db, agent, verb, since)
+
+    if format == "list":
+        return (
+            query.order_by(XapiStatement.timestamp.desc())
+            .limit(limit)
+            .all()
+        )
+
+    after = None
+    if more:
+        try:
+            after = decode_timestamp_id_cursor(more)
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+    if format == "ndjson":
+        return StreamingResponse(
+            _stream_ndjson(db, query, after),
+            media_type="application/x-ndjson",
+        )
+
+    records = _keyset_page(query, after).limit(limit + 1).all()
+    more_url = None
+    if len(records) > limit:
+        records = records[:limit]
+        last = records[-1]
+        token = encode_cursor([last.stored_at, last.id])
+        next_url = request.url.include_query_params(more=token)
+        more_url = f"{next_url.path}?{next_url.query}"
+    return XapiStatementResult(
+        statements=[XapiStatementOut.model_validate(record) for record in records],
+        more=more_url,
+    )
+
+
+@router.get("/rollups", response_model=List[XapiDailyRollupOut])
+def list_xapi_rollups(
+    actor: Optional[str] = Query(default=None, description="Exact actor key, e.g. mailto:student@example.com."),
+    activity: Optional[str] = Query(default=None, description="Exact activity (object) id."),
+    start: Optional[date] = Query(default=None, description="First day to include."),
+    end: Optional[date] = Query(default=None, description="Last day to include."),
+    limit: int = Query(default=500, ge=1, le=5000, description="Maximum rows to return."),
+    db: Session = Depends(get_db),
+) -> List[XapiDailyRollupOut]:
+    """Daily per-actor/per-activity aggregates; dashboards read these instead of raw statements."""
+    query = db.query(XapiDailyRollup)
+    if actor:
+        actor = actor.strip()
+        # mbox keys are stored lowercased (see xapi_maintenance.actor_key)
+        if actor.lower().startswith("mailto:"):
+            actor = actor.lower()
+        query = query.filter(XapiDailyRollup.actor_key == actor)
+    if activity:
+        query = query.filter(XapiDailyRollup.activity_id == activity)
+    if start:
+        query = query.filter(XapiDailyRollup.day >= start)
+    if end:
+        query = query.filter(XapiDailyRollup.day <= end)
+    return (
+        query.order_by(XapiDailyRollup.day.desc(), XapiDailyRollup.actor_key, XapiDailyRollup.activity_id)
         .limit(limit)
         .all()
     )
-    return records
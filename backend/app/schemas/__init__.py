@@ -14,7 +14,7 @@ from .finance import (
 )
 from .skills import SkillCheckoffCreate, SkillCheckoffRead, SkillCheckoffUpdate
 from .transcripts import ModuleResult, TranscriptGenerate, TranscriptRead
-from .xapi import XapiStatementIn, XapiStatementOut
+from .xapi import XapiDailyRollupOut, XapiStatementIn, XapiStatementOut, XapiStatementResult
 
 __all__ = [
     "AttendanceCreate",
@@ -45,6 +45,8 @@ __all__ = [
     "ModuleResult",
     "TranscriptGenerate",
     "TranscriptRead",
+    "XapiDailyRollupOut",
     "XapiStatementIn",
     "XapiStatementOut",
+    "XapiStatementResult",
 ]
@@ -8,6 +8,10 @@ from datetime import datetime
 from pydantic import BaseModel, Field, field_validator
 import html
 
+# Signature pad captures are base64 data URLs of mostly empty canvases; a
+# few hundred KB at most. Larger payloads are rejected before decoding.
+SIGNATURE_DATA_MAX_LENGTH = 2 * 1024 * 1024
+
 
 # ==================== Document Template Schemas ====================
 
@@ -30,7 +34,8 @@ class DocumentTemplateUpdate(BaseModel):
 
 class DocumentTemplateResponse(DocumentTemplateBase):
     id: UUID
-    file_path: str
+    blob_hash: Optional[str] = None
+    file_path: Optional[str] = None
     is_active: bool
     created_at: datetime
     updated_at: Optional[datetime] = None
@@ -69,6 +74,9 @@ class SignedDocumentResponse(BaseModel):
     status: str
     unsigned_file_path: Optional[str] = None
     signed_file_path: Optional[str] = None
+    unsigned_blob_hash: Optional[str] = None
+    signed_blob_hash: Optional[str] = None
+    pdf_status: Optional[str] = None  # signed PDF generation: pending/ready/failed
     created_at: datetime
     sent_at: Optional[datetime] = None
     student_viewed_at: Optional[datetime] = None
@@ -92,7 +100,10 @@ class SignedDocumentWithTemplate(SignedDocumentResponse):
 
 class SignedDocumentListResponse(BaseModel):
     documents: List[SignedDocumentWithTemplate]
+    # Exact up to a bound, then the planner's estimate (total_is_estimate)
     total: int
+    total_is_estimate: bool = False
+    next_cursor: Optional[str] = None
 
 
 class EnrollmentAgreementRequest(BaseModel):
@@ -106,7 +117,7 @@ class EnrollmentAgreementRequest(BaseModel):
 
 
 class CounterSignRequest(BaseModel):
-    signature_data: str = Field(..., min_length=1)
+    signature_data: str = Field(..., min_length=1, max_length=SIGNATURE_DATA_MAX_LENGTH)
     typed_name: str = Field(..., max_length=255)
 
 
@@ -121,7 +132,8 @@ class AdvisorDirectoryEntry(BaseModel):
 
 class DocumentSignatureCreate(BaseModel):
     signature_type: str = Field(..., pattern="^(applicant|student|school_official)$")
-    signature_data: str = Field(..., min_length=1)  # Base64 encoded signature image
+    # Base64 encoded signature image
+    signature_data: str = Field(..., min_length=1, max_length=SIGNATURE_DATA_MAX_LENGTH)
     typed_name: str = Field(..., max_length=255)  # Required for all signatures
 
 
@@ -134,6 +146,7 @@ class DocumentSignatureResponse(BaseModel):
     ip_address: str
     user_agent: str
     typed_name: Optional[str] = None
+    pdf_status: Optional[str] = None  # of the document's signed PDF
 
     class Config:
         from_attributes = True
@@ -179,7 +192,8 @@ class DocumentDownloadResponse(BaseModel):
 
 class DocumentSignRequest(BaseModel):
     """Request to sign a document via public endpoint"""
-    signature_data: str = Field(..., min_length=1)  # Base64 encoded signature image
+    # Base64 encoded signature image
+    signature_data: str = Field(..., min_length=1, max_length=SIGNATURE_DATA_MAX_LENGTH)
     typed_name: str = Field(..., min_length=1, max_length=255)
     form_data: Optional[Dict[str, Any]] = Field(None, max_length=100)
 
@@ -225,3 +239,4 @@ class DocumentSignResponse(BaseModel):
     status: str
     signed_at: str
     requires_counter_signature: bool
+    pdf_status: Optional[str] = None
@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class BackgroundJobRead(BaseModel):
+    id: UUID
+    kind: str
+    status: str  # queued/running/succeeded/failed/expired
+    progress_done: int
+    progress_total: Optional[int] = None
+    row_count: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    download_url: Optional[str] = None
+
+    @classmethod
+    def from_job(cls, job, download_url: str) -> "BackgroundJobRead":
+        return cls(
+            id=job.id,
+            kind=job.kind,
+            status=job.status,
+            progress_done=job.progress_done or 0,
+            progress_total=job.progress_total,
+            row_count=job.row_count,
+            error=job.error,
+            created_at=job.created_at,
+            finished_at=job.finished_at,
+            expires_at=job.expires_at,
+            download_url=download_url if job.status == "succeeded" else None,
+        )
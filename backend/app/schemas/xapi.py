@@ -1,5 +1,6 @@
-from datetime import datetime
-from typing import Any, Dict, Optional
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, ConfigDict
@@ -19,3 +20,24 @@ class XapiStatementOut(XapiStatementIn):
     stored_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class XapiStatementResult(BaseModel):
+    """LRS-style StatementResult: one page plus a relative URL for the next page."""
+
+    statements: List[XapiStatementOut]
+    more: Optional[str] = None
+
+
+class XapiDailyRollupOut(BaseModel):
+    day: date
+    actor_key: str
+    activity_id: str
+    statements: int
+    attempts: int
+    completions: int
+    best_score: Optional[Decimal] = None
+    time_spent_seconds: int
+    last_statement_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,342 @@
+"""
+Background job queue for long-running exports.
+
+Report PDFs and similar artifacts can take longer to render than the proxy's
+read timeout, so they are submitted as jobs instead:
+
+1. submit_job() computes a cache key from the job kind, its parameters and
+   the current versions of the source tables (report_source_versions, bumped
+   by triggers on every write). A finished, unexpired job with the same key
+   is returned as-is; so is a queued or running one.
+2. Otherwise a background_jobs row is created and run_job(id) is submitted
+   to a process pool (spawned processes, REPORT_JOB_WORKERS per API worker).
+   The child opens its own session, calls the handler registered for the
+   job kind, and records progress and the outcome on the row.
+3. Artifacts are stored content-addressed as <sha256><ext> under
+   REPORT_ARTIFACT_DIR and kept for REPORT_ARTIFACT_TTL_SECONDS.
+   sweep_jobs() (scheduled) expires old jobs, deletes unreferenced files and
+   fails jobs orphaned by a restart.
+"""
+import hashlib
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import select, text, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+# Register every mapper in spawned workers (the CRM models are not in app.db.models)
+from app.db import models  # noqa: F401
+from app.db.models import crm  # noqa: F401
+from app.db import session as session_module
+from app.db.models.background_job import BackgroundJob
+from app.services.scheduler import run_local
+
+logger = logging.getLogger(__name__)
+
+SWEEP_JOB_NAME = "background-job-sweep"
+
+# Job kind -> "module:function". Handlers are resolved by name so that spawned
+# worker processes import only what the job needs. Signature:
+#     handler(db, params, out: BinaryIO, progress(done, total)) -> {"filename", "content_type", "row_count"}
+JOB_HANDLERS: Dict[str, str] = {
+    "compliance_report": "app.services.compliance_reports:render_compliance_report",
+    "transcript_batch": "app.services.transcripts:render_transcript_batch",
+}
+
+ACTIVE_STATUSES = ("queued", "running")
+PROGRESS_WRITE_INTERVAL = 1.0  # seconds between progress updates
+# Unreferenced files younger than this may belong to a job finishing right now
+ARTIFACT_GRACE_SECONDS = 600
+
+# Process pools by name -> settings attribute holding their size. Signed PDFs
+# get their own small pool so a signature is never queued behind hour-long
+# report, transcript batch or bundle renders.
+JOBS_POOL = "jobs"
+SIGNED_PDF_POOL = "signed_pdfs"
+POOL_WORKERS_SETTING: Dict[str, str] = {
+    JOBS_POOL: "REPORT_JOB_WORKERS",
+    SIGNED_PDF_POOL: "SIGNED_PDF_WORKERS",
+}
+
+_executors: Dict[str, ProcessPoolExecutor] = {}
+_executor_lock = threading.Lock()
+
+
+def artifact_dir() -> Path:
+    path = Path(settings.REPORT_ARTIFACT_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def artifact_path(job: BackgroundJob) -> Optional[Path]:
+    if not job.artifact_sha256 or not job.artifact_filename:
+        return None
+    return artifact_dir() / f"{job.artifact_sha256}{Path(job.artifact_filename).suffix}"
+
+
+def source_versions(db: Session, tables: Iterable[str]) -> Dict[str, int]:
+    names = sorted(set(tables))
+    rows = db.execute(
+        text("SELECT table_name, version FROM report_source_versions WHERE table_name = ANY(:names)"),
+        {"names": names},
+    ).all()
+    versions = {name: 0 for name in names}
+    versions.update({name: version for name, version in rows})
+    return versions
+
+
+def cache_key(kind: str, params: Dict[str, Any], versions: Dict[str, int]) -> str:
+    payload = json.dumps({"kind": kind, "params": params, "sources": versions}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def find_reusable_job(db: Session, key: str, reuse_finished: bool = True) -> Optional[BackgroundJob]:
+    """An unexpired finished job with the key (whose file still exists), else one in flight."""
+    now = datetime.now(timezone.utc)
+    candidates = db.scalars(
+        select(BackgroundJob)
+        .where(BackgroundJob.cache_key == key, BackgroundJob.status.in_(("succeeded", *ACTIVE_STATUSES)))
+        .order_by(BackgroundJob.created_at.desc())
+    ).all()
+    for job in candidates:
+        if job.status == "succeeded" and reuse_finished:
+            path = artifact_path(job)
+            if job.expires_at and job.expires_at > now and path is not None and path.exists():
+                return job
+    return next((job for job in candidates if job.status in ACTIVE_STATUSES), None)
+
+
+def _get_executor(pool: str = JOBS_POOL) -> ProcessPoolExecutor:
+    with _executor_lock:
+        executor = _executors.get(pool)
+        if executor is None:
+            executor = _executors[pool] = ProcessPoolExecutor(
+                max_workers=getattr(settings, POOL_WORKERS_SETTING[pool]),
+                # Fresh interpreters: no inherited DB connections or threads
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return executor
+
+
+def run_in_pool(func: Callable[..., Any], *args: Any, pool: str = JOBS_POOL) -> Future:
+    """Run a picklable module-level function in the named process pool."""
+    return _get_executor(pool).submit(func, *args)
+
+
+def shutdown_executor() -> None:
+    """Shut down every process pool, cancelling work not yet started."""
+    with _executor_lock:
+        while _executors:
+            _, executor = _executors.popitem()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _mark_failed(db: Session, job_id: UUID, error: str) -> None:
+    db.execute(
+        text(
+            "UPDATE background_jobs SET status = 'failed', error = :error, finished_at = now() "
+            "WHERE id = :id AND status IN ('queued', 'running')"
+        ),
+        {"id": job_id, "error": error[:2000]},
+    )
+    db.commit()
+
+
+def _on_done(job_id: UUID, future: Future) -> None:
+    # The child records its own failures; this catches a child that died
+    # outright (killed, out of memory) or a pool shut down with the job queued.
+    try:
+        future.result()
+    except Exception as exc:
+        logger.error("Background job %s did not complete: %r", job_id, exc)
+        error = f"Job worker failed: {exc!r}"
+        run_local(lambda db: _mark_failed(db, job_id, error))
+
+
+def submit_job(
+    db: Session,
+    kind: str,
+    params: Dict[str, Any],
+    sources: Iterable[str],
+    created_by: Optional[UUID] = None,
+    reuse_finished: bool = True,
+) -> BackgroundJob:
+    """
+    Queue a job, or return an equivalent cached/in-flight one.
+
+    Args:
+        db: Database session
+        kind: Key of JOB_HANDLERS
+        params: JSON-serializable handler parameters
+        sources: Tables the artifact is derived from (see REPORT_SOURCE_TABLES)
+        created_by: Requesting user
+        reuse_finished: False for jobs with side effects (e.g. issuing
+            transcripts); only an identical job still in flight is reused
+
+    Returns:
+        The job (check .status; "succeeded" means the artifact can be downloaded now)
+    """
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    key = cache_key(kind, params, source_versions(db, sources))
+    existing = find_reusable_job(db, key, reuse_finished)
+    if existing is not None:
+        return existing
+
+    job = BackgroundJob(kind=kind, params=params, cache_key=key, status="queued", created_by=created_by)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    future = _get_executor().submit(run_job, str(job.id))
+    future.add_done_callback(lambda f, job_id=job.id: _on_done(job_id, f))
+    return job
+
+
+def _resolve_handler(kind: str):
+    module_name, _, func_name = JOB_HANDLERS[kind].partition(":")
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def run_job(job_id: str) -> None:
+    """Process-pool entry point: execute one job with a session of its own."""
+    db: Session = session_module.SessionLocal()
+    job_uuid = UUID(job_id)
+    temp_path: Optional[Path] = None
+    try:
+        # Claimed only while still queued: the sweeper may have given up on it
+        claimed = db.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == job_uuid, BackgroundJob.status == "queued")
+            .values(status="running", started_at=datetime.now(timezone.utc))
+        ).rowcount
+        db.commit()
+        if not claimed:
+            return
+        job = db.get(BackgroundJob, job_uuid)
+
+        last_write = 0.0
+
+        def progress(done: int, total: Optional[int]) -> None:
+            nonlocal last_write
+            now = time.monotonic()
+            if now - last_write < PROGRESS_WRITE_INTERVAL and done != total:
+                return
+            last_write = now
+            # Separate short transaction: the handler may hold a cursor open
+            with session_module.engine.begin() as conn:
+                conn.execute(
+                    text("UPDATE background_jobs SET progress_done = :done, progress_total = :total WHERE id = :id"),
+                    {"done": done, "total": total, "id": job_uuid},
+                )
+
+        handler = _resolve_handler(job.kind)
+        fd, name = tempfile.mkstemp(dir=artifact_dir(), prefix=".job-")
+        temp_path = Path(name)
+        with os.fdopen(fd, "wb") as out:
+            info = handler(db, dict(job.params), out, progress)
+        db.rollback()  # end the handler's read transaction
+
+        sha256 = sha256_file(temp_path)
+        suffix = Path(info["filename"]).suffix
+        final_path = artifact_dir() / f"{sha256}{suffix}"
+        size = temp_path.stat().st_size
+        os.replace(temp_path, final_path)
+        temp_path = None
+
+        finished = datetime.now(timezone.utc)
+        values = {
+            "status": "succeeded",
+            "artifact_sha256": sha256,
+            "artifact_size": size,
+            "artifact_filename": info["filename"],
+            "content_type": info["content_type"],
+            "row_count": info.get("row_count"),
+            "finished_at": finished,
+            "expires_at": finished + timedelta(seconds=settings.REPORT_ARTIFACT_TTL_SECONDS),
+        }
+        if info.get("row_count"):
+            values["progress_done"] = info["row_count"]
+        # Like _mark_failed: a job the sweeper already failed stays failed
+        # (its artifact is then unreferenced and swept after the grace period)
+        db.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == job_uuid, BackgroundJob.status == "running")
+            .values(**values)
+        )
+        db.commit()
+    except Exception as exc:
+        db.rollback()
+        logger.exception("Background job %s failed", job_id)
+        _mark_failed(db, job_uuid, f"{type(exc).__name__}: {exc}")
+    finally:
+        if temp_path is not None:
+            temp_path.unlink(missing_ok=True)
+        db.close()
+
+
+def sweep_jobs(db: Session) -> Dict[str, int]:
+    """
+    Expire finished jobs past their TTL, delete artifact files no live job
+    references, and fail jobs that have been running (since started_at), or
+    waiting to start (since created_at), for longer than
+    REPORT_JOB_TIMEOUT_SECONDS: their worker process is gone.
+    """
+    expired = db.execute(text(
+        "UPDATE background_jobs SET status = 'expired' WHERE status = 'succeeded' AND expires_at <= now()"
+    )).rowcount
+    orphaned = db.execute(
+        text(
+            "UPDATE background_jobs SET status = 'failed', error = 'Timed out or interrupted', finished_at = now() "
+            "WHERE (status = 'queued' AND created_at < now() - make_interval(secs => :timeout)) "
+            "OR (status = 'running' AND started_at < now() - make_interval(secs => :timeout))"
+        ),
+        {"timeout": settings.REPORT_JOB_TIMEOUT_SECONDS},
+    ).rowcount
+    live = set(db.scalars(
+        select(BackgroundJob.artifact_sha256).where(
+            BackgroundJob.status == "succeeded", BackgroundJob.artifact_sha256.isnot(None)
+        )
+    ))
+    db.commit()
+
+    removed = 0
+    now = time.time()
+    for path in artifact_dir().iterdir():
+        age = now - path.stat().st_mtime
+        if path.is_dir():
+            # Work directories of bundles whose stream never finished
+            if path.name.startswith(".bundle-") and age > settings.REPORT_JOB_TIMEOUT_SECONDS:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+            continue
+        if path.name.startswith(".job-"):
+            stale = age > settings.REPORT_JOB_TIMEOUT_SECONDS
+        else:
+            stale = path.name.split(".", 1)[0] not in live and age > ARTIFACT_GRACE_SECONDS
+        if stale:
+            path.unlink(missing_ok=True)
+            removed += 1
+    if expired or orphaned or removed:
+        logger.info("Swept background jobs: %d expired, %d orphaned, %d files removed", expired, orphaned, removed)
+    return {"expired": expired, "orphaned": orphaned, "files_removed": removed}
@@ -0,0 +1,525 @@
+"""
+Compliance table exports (CSV, PDF, XLSX and Parquet).
+
+Rows are read from a server-side cursor EXPORT_BATCH_SIZE at a time with one
+batched name decrypt per batch, so exports run in flat memory. Used both by
+the streaming GET /reports/compliance/{resource} endpoint and by background
+report jobs (render_compliance_report), which run in worker processes.
+
+Exports can be narrowed with ReportFilters (date range, program, student,
+status), which REPORT_FILTERS maps to indexed WHERE clauses for each
+resource, and projected to a subset of columns so only those are selected.
+
+CSV and PDF hold text. XLSX and Parquet keep column types (timestamps,
+decimals, integers, booleans; UUIDs as strings) and are written batch by
+batch: openpyxl in write-only mode, pyarrow with one row group per batch
+(iter_parquet() yields each row group as soon as it is written).
+Both libraries are optional; missing_dependency() reports which is absent.
+"""
+import csv
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from io import StringIO
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.pdfgen import canvas
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, Numeric, func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.db.models.compliance.attendance import AttendanceLog
+from app.db.models.compliance.complaint import Complaint
+from app.db.models.compliance.credential import Credential
+from app.db.models.compliance.extern import Externship
+from app.db.models.compliance.skills import SkillCheckoff
+from app.db.models.compliance.transcript import Transcript
+from app.db.models.compliance.withdraw_refund import Refund, Withdrawal
+from app.db.models.enrollment import Enrollment
+from app.db.models.program import Module
+from app.utils.encryption import decrypt_user_names
+
+# Optional writers for the typed export formats
+try:
+    from openpyxl import Workbook
+except ImportError:  # pragma: no cover - optional dependency
+    Workbook = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = pq = None
+
+COMPLIANCE_MODELS = {
+    "attendance": AttendanceLog,
+    "complaints": Complaint,
+    "credentials": Credential,
+    "externships": Externship,
+    "skills": SkillCheckoff,
+    "withdrawals": Withdrawal,
+    "refunds": Refund,
+    "transcripts": Transcript,
+}
+
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "pdf": "application/pdf",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Rows fetched per server-side cursor round trip (and per CSV chunk)
+EXPORT_BATCH_SIZE = 1000
+
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+
+class InvalidReportQuery(ValueError):
+    """A filter or column the requested resource does not support."""
+
+
+@dataclass(frozen=True)
+class ReportFilters:
+    start: Optional[date] = None  # inclusive
+    end: Optional[date] = None  # inclusive
+    program_id: Optional[UUID] = None
+    user_id: Optional[UUID] = None
+    status: Optional[str] = None
+
+    def to_params(self) -> Dict[str, str]:
+        """JSON-safe form for background job params (unset filters omitted)."""
+        return {name: str(value) for name, value in vars(self).items() if value is not None}
+
+    @classmethod
+    def from_params(cls, params: Dict[str, Any]) -> "ReportFilters":
+        def parsed(name, parse):
+            value = params.get(name)
+            return parse(value) if value is not None else None
+
+        return cls(
+            start=parsed("start", date.fromisoformat),
+            end=parsed("end", date.fromisoformat),
+            program_id=parsed("program_id", UUID),
+            user_id=parsed("user_id", UUID),
+            status=parsed("status", str),
+        )
+
+
+@dataclass(frozen=True)
+class FilterSpec:
+    """How ReportFilters apply to one compliance table."""
+    date_column: Any
+    user: Callable[[UUID], ColumnElement]
+    program: Callable[[UUID], ColumnElement]
+    status_column: Any = None
+    # Tables the user/program predicates look up (part of the job cache key)
+    lookup_tables: Tuple[str, ...] = ()
+
+
+def _program_modules(program_id: UUID):
+    return select(Module.id).where(Module.program_id == program_id)
+
+
+def _program_students(program_id: UUID):
+    return select(Enrollment.user_id).where(Enrollment.program_id == program_id)
+
+
+def _enrollments(**criteria):
+    return select(Enrollment.id).filter_by(**criteria)
+
+
+def _withdrawals(**criteria):
+    return select(Withdrawal.id).where(Withdrawal.enrollment_id.in_(_enrollments(**criteria)))
+
+
+REPORT_FILTERS: Dict[str, FilterSpec] = {
+    "attendance": FilterSpec(
+        date_column=AttendanceLog.started_at,
+        user=lambda user_id: AttendanceLog.user_id == user_id,
+        program=lambda program_id: AttendanceLog.module_id.in_(_program_modules(program_id)),
+        lookup_tables=("modules",),
+    ),
+    "complaints": FilterSpec(
+        date_column=Complaint.submitted_at,
+        user=lambda user_id: Complaint.user_id == user_id,
+        program=lambda program_id: Complaint.user_id.in_(_program_students(program_id)),
+        status_column=Complaint.status,
+        lookup_tables=("enrollments",),
+    ),
+    "credentials": FilterSpec(
+        date_column=Credential.issued_at,
+        user=lambda user_id: Credential.user_id == user_id,
+        program=lambda program_id: Credential.program_id == program_id,
+    ),
+    "externships": FilterSpec(
+        date_column=Externship.verified_at,
+        user=lambda user_id: Externship.user_id == user_id,
+        program=lambda program_id: Externship.user_id.in_(_program_students(program_id)),
+        lookup_tables=("enrollments",),
+    ),
+    "skills": FilterSpec(
+        date_column=SkillCheckoff.signed_at,
+        user=lambda user_id: SkillCheckoff.user_id == user_id,
+        program=lambda program_id: SkillCheckoff.module_id.in_(_program_modules(program_id)),
+        status_column=SkillCheckoff.status,
+        lookup_tables=("modules",),
+    ),
+    "withdrawals": FilterSpec(
+        date_column=Withdrawal.requested_at,
+        user=lambda user_id: Withdrawal.enrollment_id.in_(_enrollments(user_id=user_id)),
+        program=lambda program_id: Withdrawal.enrollment_id.in_(_enrollments(program_id=program_id)),
+        lookup_tables=("enrollments",),
+    ),
+    "refunds": FilterSpec(
+        date_column=Refund.approved_at,
+        user=lambda user_id: Refund.withdrawal_id.in_(_withdrawals(user_id=user_id)),
+        program=lambda program_id: Refund.withdrawal_id.in_(_withdrawals(program_id=program_id)),
+        lookup_tables=("compliance.withdrawals", "enrollments"),
+    ),
+    "transcripts": FilterSpec(
+        date_column=Transcript.generated_at,
+        user=lambda user_id: Transcript.user_id == user_id,
+        program=lambda program_id: Transcript.program_id == program_id,
+    ),
+}
+
+
+def filter_clauses(resource: str, filters: ReportFilters) -> List[ColumnElement]:
+    """WHERE clauses for filters on resource; raises InvalidReportQuery."""
+    spec = REPORT_FILTERS[resource]
+    clauses: List[ColumnElement] = []
+    if filters.start and filters.end and filters.start > filters.end:
+        raise InvalidReportQuery("start must not be after end.")
+    # Half-open range on the raw column so its index can be used
+    if filters.start:
+        clauses.append(spec.date_column >= filters.start)
+    if filters.end:
+        clauses.append(spec.date_column < filters.end + timedelta(days=1))
+    if filters.user_id:
+        clauses.append(spec.user(filters.user_id))
+    if filters.program_id:
+        clauses.append(spec.program(filters.program_id))
+    if filters.status:
+        if spec.status_column is None:
+            raise InvalidReportQuery(f"{resource} reports cannot be filtered by status.")
+        clauses.append(spec.status_column == filters.status)
+    return clauses
+
+
+def source_tables(resource: str, filters: Optional[ReportFilters] = None) -> List[str]:
+    """Qualified tables an export of resource reads (student names come from users)."""
+    table = COMPLIANCE_MODELS[resource].__table__  # type: ignore[attr-defined]
+    tables = [f"{table.schema}.{table.name}" if table.schema else table.name]
+    if "user_id" in table.columns:
+        tables.append("users")
+    if filters and (filters.user_id or filters.program_id):
+        tables.extend(REPORT_FILTERS[resource].lookup_tables)
+    return tables
+
+
+def report_fields(model) -> List[str]:
+    columns = [column.name for column in model.__table__.columns]  # type: ignore[attr-defined]
+    # Decrypted student name FIRST if records have a user_id
+    return (["student_name"] if "user_id" in columns else []) + columns
+
+
+def project_fields(model, columns: Optional[Sequence[str]]) -> List[str]:
+    """Validate a columns= projection; None or empty means every field."""
+    fields = report_fields(model)
+    if not columns:
+        return fields
+    unknown = [name for name in columns if name not in fields]
+    if unknown:
+        raise InvalidReportQuery(
+            f"Unknown columns: {', '.join(unknown)}. Available: {', '.join(fields)}."
+        )
+    # Keep the table's column order and drop duplicates
+    return [name for name in fields if name in columns]
+
+
+def _typed_value(value: Any) -> Any:
+    return str(value) if isinstance(value, UUID) else value
+
+
+def _as_text(value: Any) -> Optional[str]:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value) if value is not None else None
+
+
+def count_rows(db: Session, model, where: Sequence[ColumnElement] = ()) -> int:
+    return db.execute(select(func.count()).select_from(model).where(*where)).scalar_one()
+
+
+def iter_report_batches(
+    db: Session,
+    model,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    where: Sequence[ColumnElement] = (),
+    fields: Optional[List[str]] = None,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Read a compliance table batch by batch without loading it into memory.
+
+    Only the columns behind fields (default: report_fields(model)) are
+    selected. Records come from a server-side cursor batch_size at a time;
+    student names for each batch are decrypted with a single query. Values
+    keep their types except UUIDs, which become strings.
+    """
+    fields = fields or report_fields(model)
+    with_names = "student_name" in fields
+    table = model.__table__  # type: ignore[attr-defined]
+    selected = [
+        column for column in table.columns
+        if column.name in fields or (with_names and column.name == "user_id")
+    ]
+    stmt = (
+        select(*selected)
+        .where(*where)
+        .order_by(*table.primary_key.columns)
+        .execution_options(yield_per=batch_size)
+    )
+    for batch in db.execute(stmt).partitions():
+        student_names: Dict[Any, str] = {}
+        if with_names:
+            student_names = decrypt_user_names(db, {record.user_id for record in batch if record.user_id})
+        yield [
+            {
+                name: (
+                    student_names.get(record.user_id) if name == "student_name"
+                    else _typed_value(getattr(record, name))
+                )
+                for name in fields
+            }
+            for record in batch
+        ]
+
+
+def _as_rows(batches: Iterable[List[Dict[str, Any]]]) -> Iterator[Dict[str, Any]]:
+    for batch in batches:
+        for row in batch:
+            yield {name: _as_text(value) for name, value in row.items()}
+
+
+def iter_report_rows(
+    db: Session,
+    model,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    where: Sequence[ColumnElement] = (),
+    fields: Optional[List[str]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Rows of iter_report_batches with every value as text (CSV and PDF)."""
+    return _as_rows(iter_report_batches(db, model, batch_size, where, fields))
+
+
+def iter_csv(rows: Iterable[Dict[str, Any]], fieldnames: List[str], rows_per_chunk: int = EXPORT_BATCH_SIZE):
+    """Yield the CSV header right away, then one chunk per rows_per_chunk rows."""
+    buffer = StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+
+    def drain() -> str:
+        chunk = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+
+    writer.writeheader()
+    yield drain()
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % rows_per_chunk == 0:
+            yield drain()
+    tail = drain()
+    if tail:
+        yield tail
+
+
+def write_pdf(rows: Iterable[Dict[str, Any]], title: str, out: BinaryIO) -> None:
+    pdf = canvas.Canvas(out, pagesize=letter)
+    width, height = letter
+    margin = inch
+    y = height - margin
+
+    pdf.setFont("Helvetica-Bold", 16)
+    pdf.drawString(margin, y, f"{title.title()} Report")
+    y -= 0.4 * inch
+
+    pdf.setFont("Helvetica", 10)
+    empty = True
+    for row in rows:
+        empty = False
+        line = ", ".join(f"{key}: {value}" for key, value in row.items())
+        if y < margin:
+            pdf.showPage()
+            pdf.setFont("Helvetica", 10)
+            y = height - margin
+        pdf.drawString(margin, y, line)
+        y -= 0.25 * inch
+    if empty:
+        pdf.drawString(margin, y, "No data available.")
+
+    pdf.showPage()
+    pdf.save()
+
+
+def missing_dependency(fmt: str) -> Optional[str]:
+    """Name of the package a format needs but is not installed, else None."""
+    if fmt == "xlsx" and Workbook is None:
+        return "openpyxl"
+    if fmt == "parquet" and pa is None:
+        return "pyarrow"
+    return None
+
+
+def _excel_value(value: Any) -> Any:
+    # Excel has no time zones; timestamps are written in UTC
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def write_xlsx(batches: Iterable[List[Dict[str, Any]]], fields: List[str], title: str, out: BinaryIO) -> None:
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=title[:31])  # Excel's sheet name limit
+    sheet.append(fields)
+    for batch in batches:
+        for row in batch:
+            sheet.append([_excel_value(row[name]) for name in fields])
+    workbook.save(out)
+
+
+def _arrow_type(column) -> "pa.DataType":
+    column_type = column.type
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us", tz="UTC" if column_type.timezone else None)
+    if isinstance(column_type, Date):
+        return pa.date32()
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, Integer):
+        return pa.int64()
+    if isinstance(column_type, Float):
+        return pa.float64()
+    if isinstance(column_type, Numeric):
+        if column_type.precision is None:
+            return pa.float64()
+        return pa.decimal128(column_type.precision, column_type.scale or 0)
+    return pa.string()  # text, and UUIDs as their string form
+
+
+def arrow_schema(model, fields: List[str]) -> "pa.Schema":
+    columns = model.__table__.columns  # type: ignore[attr-defined]
+    return pa.schema([
+        pa.field(name, pa.string() if name == "student_name" else _arrow_type(columns[name]))
+        for name in fields
+    ])
+
+
+def _record_batch(batch: List[Dict[str, Any]], schema: "pa.Schema") -> "pa.RecordBatch":
+    arrays = []
+    for field in schema:
+        values = [row[field.name] for row in batch]
+        if pa.types.is_string(field.type):
+            values = [None if value is None else str(value) for value in values]
+        elif pa.types.is_floating(field.type):
+            values = [None if value is None else float(value) for value in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.record_batch(arrays, schema=schema)
+
+
+class _ChunkSink:
+    """Write-only, non-seekable stream that hands written bytes back out with take()."""
+
+    closed = False
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_parquet(batches: Iterable[List[Dict[str, Any]]], schema: "pa.Schema") -> Iterator[bytes]:
+    """
+    Yield a Parquet file as it is written: one row group per batch, then the footer.
+
+    Parquet only appends while writing, so no temporary file is needed and
+    memory stays at about one batch.
+    """
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for batch in batches:
+            writer.write_batch(_record_batch(batch, schema))
+            chunk = sink.take()
+            if chunk:
+                yield chunk
+    yield sink.take()
+
+
+def write_parquet(batches: Iterable[List[Dict[str, Any]]], schema: "pa.Schema", out: BinaryIO) -> None:
+    for chunk in iter_parquet(batches, schema):
+        out.write(chunk)
+
+
+def _counted(
+    batches: Iterable[List[Dict[str, Any]]], total: int, progress: ProgressCallback
+) -> Iterator[List[Dict[str, Any]]]:
+    done = 0
+    for batch in batches:
+        yield batch
+        done += len(batch)
+        progress(done, total)
+    progress(done, total)
+
+
+def render_compliance_report(
+    db: Session, params: Dict[str, Any], out: BinaryIO, progress: ProgressCallback
+) -> Dict[str, Any]:
+    """
+    Background job handler: write one compliance export to out.
+
+    Args:
+        db: Database session (owned by the worker process)
+        params: {"resource": ..., "format": one of CONTENT_TYPES, "columns": [...] (optional),
+                 plus ReportFilters.to_params() entries}
+        out: Binary file the artifact is written to
+        progress: Called with (rows written, total rows)
+
+    Returns:
+        Artifact metadata (filename, content_type, row_count)
+    """
+    resource, fmt = params["resource"], params["format"]
+    model = COMPLIANCE_MODELS[resource]
+    where = filter_clauses(resource, ReportFilters.from_params(params))
+    fields = project_fields(model, params.get("columns"))
+    total = count_rows(db, model, where)
+    progress(0, total)
+    batches = _counted(iter_report_batches(db, model, where=where, fields=fields), total, progress)
+    filename = f"{resource}_report"
+    if fmt == "csv":
+        for chunk in iter_csv(_as_rows(batches), fields):
+            out.write(chunk.encode("utf-8"))
+    elif fmt == "pdf":
+        write_pdf(_as_rows(batches), filename, out)
+    elif fmt == "xlsx":
+        write_xlsx(batches, fields, resource, out)
+    else:
+        write_parquet(batches, arrow_schema(model, fields), out)
+    return {"filename": f"{filename}.{fmt}", "content_type": CONTENT_TYPES[fmt], "row_count": total}
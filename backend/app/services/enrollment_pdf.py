@@ -1,20 +1,31 @@
 """
 Schema-driven PDF generation for enrollment agreements.
+
+The agreement schema is compiled once into a RenderPlan: paragraph styles,
+the brand block, section headers, static text/tables and field labels are
+built up front, and field paths are resolved into accessors. Rendering a
+document then only binds its form values, document id and signatures.
+Plans are cached per schema object, so the schema returned by
+get_enrollment_agreement_schema() is compiled once per process and again
+after reload_enrollment_agreement_schema().
 """
 
 from __future__ import annotations
 
-import base64
+import copy
 import io
+import threading
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Sequence, TYPE_CHECKING, Optional, Tuple
+from typing import Any, Callable, Dict, List, Sequence, TYPE_CHECKING, Optional, Tuple, Union
 
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.styles import ParagraphStyle, StyleSheet1, getSampleStyleSheet
 from reportlab.lib.units import inch
 from reportlab.platypus import (
+    Flowable,
     Image,
     Paragraph,
     SimpleDocTemplate,
@@ -24,59 +35,512 @@ from reportlab.platypus import (
     KeepTogether,
 )
 
+from app.services.signature_images import signature_image
+
 if TYPE_CHECKING:  # pragma: no cover
     from app.db.models.document import DocumentSignature, SignedDocument
 
+BRAND_GOLD = colors.HexColor("#D5AA42")
+BRAND_NAVY = colors.HexColor("#0F172A")
+BRAND_CREAM = colors.HexColor("#FFFDF9")
+BRAND_SLATE = colors.HexColor("#475569")
+
+# Binds one document's form responses to the flowables of a schema element
+Binder = Callable[[Dict[str, Any]], List[Any]]
+PlanStep = Union[Flowable, Binder]
+Accessor = Callable[[Dict[str, Any]], Any]
+
+GOLD_HEADER_STYLE = TableStyle(
+    [
+        ("BACKGROUND", (0, 0), (-1, -1), BRAND_GOLD),
+        ("TEXTCOLOR", (0, 0), (-1, -1), colors.white),
+        ("LEFTPADDING", (0, 0), (-1, -1), 12),
+        ("RIGHTPADDING", (0, 0), (-1, -1), 12),
+        ("TOPPADDING", (0, 0), (-1, -1), 8),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
+        ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+    ]
+)
+SECTION_DESCRIPTION_STYLE = TableStyle(
+    [
+        ("BACKGROUND", (0, 0), (-1, -1), BRAND_CREAM),
+        ("LEFTPADDING", (0, 0), (-1, -1), 10),
+        ("RIGHTPADDING", (0, 0), (-1, -1), 10),
+        ("TOPPADDING", (0, 0), (-1, -1), 8),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
+    ]
+)
+GROUP_DESCRIPTION_STYLE = TableStyle(
+    [
+        ("BACKGROUND", (0, 0), (-1, -1), BRAND_CREAM),
+        ("LEFTPADDING", (0, 0), (-1, -1), 8),
+        ("RIGHTPADDING", (0, 0), (-1, -1), 8),
+        ("TOPPADDING", (0, 0), (-1, -1), 6),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+    ]
+)
+SINGLE_COLUMN_STYLE = TableStyle(
+    [
+        ("TEXTCOLOR", (0, 0), (-1, -1), BRAND_NAVY),
+        ("LINEBELOW", (1, 0), (1, -1), 0.75, BRAND_NAVY),
+        ("LEFTPADDING", (0, 0), (-1, -1), 6),
+        ("RIGHTPADDING", (0, 0), (-1, -1), 6),
+        ("TOPPADDING", (0, 0), (-1, -1), 4),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
+    ]
+)
+GOLD_GRID_STYLE_COMMANDS = [
+    ("BACKGROUND", (0, 0), (-1, 0), BRAND_GOLD),  # Gold header row
+    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+    ("BOX", (0, 0), (-1, -1), 0.75, BRAND_GOLD),  # Gold border
+    ("INNERGRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#E2E8F0")),
+    ("LEFTPADDING", (0, 0), (-1, -1), 10),
+    ("RIGHTPADDING", (0, 0), (-1, -1), 10),
+    ("TOPPADDING", (0, 0), (-1, -1), 8),
+    ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
+]
+METADATA_STYLE = TableStyle(GOLD_GRID_STYLE_COMMANDS + [("VALIGN", (0, 0), (-1, -1), "TOP")])
+DATA_TABLE_STYLE = TableStyle(GOLD_GRID_STYLE_COMMANDS + [("BACKGROUND", (0, 1), (-1, -1), colors.white)])
+ACKNOWLEDGEMENT_STYLE = TableStyle(
+    GOLD_GRID_STYLE_COMMANDS
+    + [("BACKGROUND", (0, 1), (-1, -1), colors.white), ("VALIGN", (0, 0), (-1, -1), "TOP")]
+)
+SIGNATURE_COLUMN_STYLE = TableStyle(
+    [
+        ("LINEABOVE", (0, 0), (-1, 0), 0.75, colors.HexColor("#475569")),
+        ("ALIGN", (0, 0), (-1, 0), "CENTER"),
+        ("ALIGN", (0, 1), (-1, 1), "CENTER"),
+        ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
+    ]
+)
+SIGNATURE_BOX_STYLE = TableStyle(
+    [
+        ("BOX", (0, 0), (-1, -1), 0.5, colors.HexColor("#E2E8F0")),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+    ]
+)
+
+
+class StaticParagraph(Paragraph):
+    """
+    A paragraph whose text never changes between documents.
+
+    Line breaking depends only on the text, style and available width, so the
+    result of wrap() is kept per width and reused by every later render,
+    including by the per-render copies RenderPlan.bind() makes.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wrap_memo: Dict[float, Tuple[Any, ...]] = {}
+
+    def wrap(self, availWidth, availHeight):
+        memo = self._wrap_memo
+        cached = memo.get(availWidth)
+        if cached is not None:
+            size, self._wrapWidths, self.blPara = cached
+            self.width, self.height = size
+            return size
+        size = super().wrap(availWidth, availHeight)
+        if hasattr(self, "blPara"):  # not set when nothing fits
+            memo[availWidth] = (size, self._wrapWidths, self.blPara)
+        return size
+
+
+def build_styles() -> StyleSheet1:
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(
+        name="SectionTitle", fontSize=13, leading=16, spaceAfter=6,
+        spaceBefore=6, fontName="Helvetica-Bold",
+        textColor=BRAND_NAVY))
+    styles.add(ParagraphStyle(
+        name="Body", fontSize=10, leading=14, spaceAfter=4,
+        textColor=BRAND_NAVY))
+    styles.add(ParagraphStyle(
+        name="Small", fontSize=9, leading=12, spaceAfter=2))
+    styles.add(ParagraphStyle(
+        name="TableLabel", fontSize=9, leading=12,
+        fontName="Helvetica-Bold"))
+    styles.add(ParagraphStyle(
+        name="TableValue", fontSize=9, leading=12))
+    styles.add(ParagraphStyle(
+        name="BrandTitle", fontSize=18, leading=20, alignment=0,
+        fontName="Helvetica-Bold", spaceAfter=2,
+        textColor=colors.white))
+    styles.add(ParagraphStyle(
+        name="BrandSubtitle", fontSize=11, leading=14, alignment=0,
+        spaceAfter=2, textColor=colors.white))
+    styles.add(ParagraphStyle(
+        name="BrandAccent", fontSize=9, leading=12, alignment=0,
+        spaceAfter=2, textColor=colors.white))
+    styles.add(ParagraphStyle(
+        name="GoldHeader", fontSize=11, leading=14,
+        textColor=colors.white, alignment=0,
+        fontName="Helvetica-Bold"))
+    styles.add(ParagraphStyle(
+        name="SectionDescription", fontSize=10, leading=14,
+        textColor=BRAND_SLATE))
+    styles.add(ParagraphStyle(
+        name="SignatureLabel", fontSize=9, leading=11, alignment=1,
+        textColor=colors.HexColor("#475569")))
+    return styles
+
+
+@dataclass
+class RenderPlan:
+    """A compiled agreement schema; see compile_render_plan()."""
+
+    title: str
+    version: str
+    styles: StyleSheet1
+    brand: List[Flowable]
+    # Section content in story order: static flowables and per-document binders
+    steps: List[PlanStep]
+    # The cells inside static tables are shared by every render and carry
+    # wrap state while a document is built, so one build at a time per plan
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def story_start(self) -> List[Any]:
+        return [copy.copy(flowable) for flowable in self.brand]
+
+    def bind(self, responses: Dict[str, Any]) -> List[Any]:
+        # Layout marks top-level flowables it pushes to the next frame
+        # (_postponed) and rewrites keepWithNext; shallow copies keep those
+        # marks out of the plan, so a later render starts clean
+        story: List[Any] = []
+        for step in self.steps:
+            if isinstance(step, Flowable):
+                story.append(copy.copy(step))
+            else:
+                story.extend(step(responses))
+        return story
+
+
+def compile_render_plan(schema: Dict[str, Any]) -> RenderPlan:
+    """Build everything in the agreement PDF that does not depend on a document."""
+    styles = build_styles()
+    steps: List[PlanStep] = []
+    for section in schema.get("sections", []):
+        steps.extend(_compile_section(section, styles))
+    return RenderPlan(
+        title=schema.get("title", "Enrollment Agreement"),
+        version=schema.get("version", "v1"),
+        styles=styles,
+        brand=_compile_brand_block(schema.get("brand") or {}, styles),
+        steps=steps,
+    )
+
+
+_plan_lock = threading.Lock()
+_cached_plan: Optional[Tuple[Dict[str, Any], RenderPlan]] = None
+
+
+def get_render_plan(schema: Dict[str, Any]) -> RenderPlan:
+    """
+    The compiled plan for a schema, cached for the most recent schema object.
+
+    get_enrollment_agreement_schema() returns the same object until it is
+    reloaded, so its plan is compiled once; a reloaded (new) schema object
+    replaces the cached plan.
+    """
+    global _cached_plan
+    with _plan_lock:
+        if _cached_plan is None or _cached_plan[0] is not schema:
+            _cached_plan = (schema, compile_render_plan(schema))
+        return _cached_plan[1]
+
+
+def _compile_brand_block(brand: Dict[str, Any], styles: StyleSheet1) -> List[Flowable]:
+    if not brand:
+        return []
+
+    logo_image = None
+    logo_path = brand.get("logoPath")
+    if isinstance(logo_path, str) and logo_path.strip():
+        candidate = Path(logo_path.strip())
+        if not candidate.is_absolute():
+            candidate = Path.cwd() / candidate
+        if candidate.exists():
+            logo_image = Image(str(candidate), width=1.25 * inch, height=1.25 * inch, kind="proportional")
+            logo_image.hAlign = "CENTER"
+
+    text_rows: List[List[Any]] = []
+    school_name = brand.get("schoolName", "Atlanta Academy of Dental Assisting")
+    text_rows.append([StaticParagraph(school_name, styles["BrandTitle"])])
+
+    address = brand.get("address") or []
+    if isinstance(address, list) and address:
+        text_rows.append([StaticParagraph(" • ".join(address), styles["BrandSubtitle"])])
+
+    contact_bits = []
+    if brand.get("phone"):
+        contact_bits.append(f"Phone: {brand['phone']}")
+    if brand.get("website"):
+        contact_bits.append(brand["website"])
+    if contact_bits:
+        text_rows.append([StaticParagraph(" • ".join(contact_bits), styles["BrandAccent"])])
+
+    text_rows.append([StaticParagraph("STUDENT ENROLLMENT AGREEMENT – DENTAL ASSISTING", styles["GoldHeader"])])
+
+    text_table = Table(text_rows, colWidths=[4.8 * inch])
+    text_table.setStyle(
+        TableStyle(
+            [
+                ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+                ("LEFTPADDING", (0, 0), (-1, -1), 0),
+                ("RIGHTPADDING", (0, 0), (-1, -1), 0),
+                ("TOPPADDING", (0, 0), (-1, -1), 0),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 0),
+            ]
+        )
+    )
+
+    if logo_image:
+        brand_layout = Table(
+            [[logo_image, text_table]],
+            colWidths=[1.5 * inch, 4.8 * inch],
+        )
+    else:
+        brand_layout = Table([[text_table]], colWidths=[6.3 * inch])
+
+    brand_layout.setStyle(
+        TableStyle(
+            [
+                ("BACKGROUND", (0, 0), (-1, -1), BRAND_GOLD),
+                ("BOX", (0, 0), (-1, -1), 1, BRAND_GOLD),
+                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+                ("LEFTPADDING", (0, 0), (-1, -1), 10),
+                ("RIGHTPADDING", (0, 0), (-1, -1), 10),
+                ("TOPPADDING", (0, 0), (-1, -1), 12),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 12),
+            ]
+        )
+    )
+
+    return [brand_layout, Spacer(1, 18), Spacer(1, 12)]
+
+
+def _gold_header(title: str, styles: StyleSheet1) -> Table:
+    # Gold banner section header (matching original design)
+    header = Table([[StaticParagraph(title.upper(), styles["GoldHeader"])]], colWidths=[6.3 * inch])
+    header.setStyle(GOLD_HEADER_STYLE)
+    return header
+
+
+def _description(description: str, styles: StyleSheet1, style: TableStyle) -> Table:
+    desc_table = Table([[StaticParagraph(description, styles["SectionDescription"])]], colWidths=[6.3 * inch])
+    desc_table.setStyle(style)
+    return desc_table
+
+
+def _compile_section(section: Dict[str, Any], styles: StyleSheet1) -> List[PlanStep]:
+    steps: List[PlanStep] = []
+    title = section.get("title") or ""
+    if title:
+        steps.append(_gold_header(title, styles))
+
+    description = section.get("description")
+    if description:
+        steps.append(_description(description, styles, SECTION_DESCRIPTION_STYLE))
+
+    for element in section.get("elements", []):
+        steps.extend(_compile_element(element, styles))
+
+    steps.append(Spacer(1, 12))
+    return steps
+
+
+def _compile_element(element: Dict[str, Any], styles: StyleSheet1) -> List[PlanStep]:
+    element_type = element.get("type")
+
+    if element_type == "text":
+        return [StaticParagraph(element.get("content", ""), styles["Body"]), Spacer(1, 6)]
+
+    if element_type == "field_group":
+        binder = _compile_field_group(element, styles)
+        return [binder] if binder else []
+
+    if element_type == "table":
+        headers = element.get("headers", [])
+        rows = [[StaticParagraph(h, styles["TableLabel"]) for h in headers]]
+        for row in element.get("rows", []):
+            rows.append([StaticParagraph(str(cell), styles["TableValue"]) for cell in row])
+        table = Table(rows, colWidths=[2.5 * inch, 2 * inch, 2.5 * inch])
+        table.setStyle(DATA_TABLE_STYLE)
+        return [table, Spacer(1, 8)]
+
+    if element_type == "list":
+        ordered = element.get("ordered", False)
+        steps: List[PlanStep] = []
+        for idx, item in enumerate(element.get("items", []), start=1):
+            prefix = f"{idx}." if ordered else "•"
+            steps.append(StaticParagraph(f"{prefix} {item}", styles["Body"]))
+        steps.append(Spacer(1, 8))
+        return steps
+
+    if element_type == "acknowledgement_list":
+        return [_compile_acknowledgement_list(element, styles)]
+
+    return []
+
+
+@dataclass(frozen=True)
+class _ValueSlot:
+    """Placeholder in a compiled field table for the value of field `index`."""
+
+    index: int
+
+
+def _compile_field_group(element: Dict[str, Any], styles: StyleSheet1) -> Optional[Binder]:
+    fields = element.get("fields") or []
+    if not fields:
+        return None
+    accessors = [_field_accessor(f.get("name", "")) for f in fields]
+    labels = [StaticParagraph(f"<b>{f.get('label', '')}</b>", styles["TableLabel"]) for f in fields]
+    if element.get("layout", "single-column") == "two-column":
+        rows, table_style, col_widths = _two_column_layout(fields, labels)
+    else:
+        rows = [[label, _ValueSlot(index)] for index, label in enumerate(labels)]
+        table_style, col_widths = SINGLE_COLUMN_STYLE, [1.6 * inch, 4.7 * inch]
+
+    headers: List[Flowable] = []
+    title = element.get("title")
+    if title:
+        # Gold banner subsection header
+        headers.append(_gold_header(title, styles))
+    description = element.get("description")
+    if description:
+        headers.append(_description(description, styles, GROUP_DESCRIPTION_STYLE))
+    value_style = styles["TableValue"]
+
+    def bind(responses: Dict[str, Any]) -> List[Any]:
+        values = [Paragraph(_format_value(get(responses)) or "—", value_style) for get in accessors]
+        body = Table(
+            [[values[cell.index] if isinstance(cell, _ValueSlot) else cell for cell in row] for row in rows],
+            colWidths=col_widths,
+        )
+        body.setStyle(table_style)
+        return [KeepTogether([*headers, body]) if headers else body, Spacer(1, 8)]
+
+    return bind
+
+
+def _two_column_layout(
+    fields: List[Dict[str, Any]], labels: List[Paragraph]
+) -> Tuple[List[List[Any]], TableStyle, List[float]]:
+    data: List[List[Any]] = []
+    spans: List[Tuple[str, Tuple[int, int], Tuple[int, int]]] = []
+    row: List[Any] = ["", "", "", ""]
+    col_index = 0
+
+    def flush_row(force: bool = False) -> None:
+        nonlocal row, col_index
+        if force or any(cell not in ("", None) for cell in row):
+            data.append(row)
+            row = ["", "", "", ""]
+            col_index = 0
+
+    for index, (field_def, label) in enumerate(zip(fields, labels)):
+        width = field_def.get("width", "half")
+        if width == "full":
+            flush_row()
+            row = [label, _ValueSlot(index), "", ""]
+            data.append(row)
+            row_index = len(data) - 1
+            spans.append(("SPAN", (1, row_index), (3, row_index)))
+            row = ["", "", "", ""]
+            col_index = 0
+        else:
+            row[col_index] = label
+            row[col_index + 1] = _ValueSlot(index)
+            col_index += 2
+            if col_index >= 4:
+                flush_row()
+
+    flush_row()
+
+    style = [
+        ("TEXTCOLOR", (0, 0), (-1, -1), BRAND_NAVY),
+        ("LINEBELOW", (1, 0), (1, -1), 0.75, BRAND_NAVY),
+        ("LINEBELOW", (3, 0), (3, -1), 0.75, BRAND_NAVY),
+        ("LEFTPADDING", (0, 0), (-1, -1), 4),
+        ("RIGHTPADDING", (0, 0), (-1, -1), 4),
+        ("TOPPADDING", (0, 0), (-1, -1), 4),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
+    ]
+    for span in spans:
+        style.append(span)
+        _, start, end = span
+        style.append(("LINEBELOW", (start[0], start[1]), (end[0], end[1]), 0.75, BRAND_NAVY))
+    return data, TableStyle(style), [1.2 * inch, 1.9 * inch, 1.2 * inch, 1.9 * inch]
+
+
+def _compile_acknowledgement_list(element: Dict[str, Any], styles: StyleSheet1) -> Binder:
+    header_row = [
+        StaticParagraph("<b>Statement</b>", styles["TableLabel"]),
+        StaticParagraph("<b>Initials</b>", styles["TableLabel"]),
+    ]
+    statements = [
+        (ack.get("id"), StaticParagraph(ack.get("label", ""), styles["TableValue"]))
+        for ack in element.get("acknowledgements", [])
+    ]
+    value_style = styles["TableValue"]
+
+    def bind(responses: Dict[str, Any]) -> List[Any]:
+        ack_values = (responses or {}).get("acknowledgements", {})
+        rows = [header_row]
+        for ack_id, label in statements:
+            rows.append([label, Paragraph(ack_values.get(ack_id, "") or "—", value_style)])
+        table = Table(rows, colWidths=[4.5 * inch, 2.5 * inch])
+        table.setStyle(ACKNOWLEDGEMENT_STYLE)
+        return [table, Spacer(1, 8)]
+
+    return bind
+
+
+def _field_accessor(path: str) -> Accessor:
+    """Resolve a dotted response path (e.g. "student.first_name") once."""
+    parts = tuple(path.split(".")) if path else ()
+
+    def get(responses: Dict[str, Any]) -> Any:
+        if not parts:
+            return None
+        cursor: Any = responses
+        for part in parts:
+            if not isinstance(cursor, dict):
+                return None
+            cursor = cursor.get(part)
+            if cursor is None:
+                return None
+        return cursor
+
+    return get
+
+
+def _format_value(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return f"{value}"
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d")
+    return str(value)
+
 
 class SchemaDrivenPDFService:
     """Generate enrollment agreement PDFs from the shared schema/response payloads."""
 
-    BRAND_GOLD = colors.HexColor("#D5AA42")
-    BRAND_NAVY = colors.HexColor("#0F172A")
-    BRAND_CREAM = colors.HexColor("#FFFDF9")
-    BRAND_SLATE = colors.HexColor("#475569")
+    BRAND_GOLD = BRAND_GOLD
+    BRAND_NAVY = BRAND_NAVY
+    BRAND_CREAM = BRAND_CREAM
+    BRAND_SLATE = BRAND_SLATE
 
     def __init__(self, schema: Dict[str, Any]):
         self.schema = schema
-        self.styles = self._build_styles()
-
-    def _build_styles(self) -> Dict[str, ParagraphStyle]:
-        styles = getSampleStyleSheet()
-        styles.add(ParagraphStyle(
-            name="SectionTitle", fontSize=13, leading=16, spaceAfter=6,
-            spaceBefore=6, fontName="Helvetica-Bold",
-            textColor=self.BRAND_NAVY))
-        styles.add(ParagraphStyle(
-            name="Body", fontSize=10, leading=14, spaceAfter=4,
-            textColor=self.BRAND_NAVY))
-        styles.add(ParagraphStyle(
-            name="Small", fontSize=9, leading=12, spaceAfter=2))
-        styles.add(ParagraphStyle(
-            name="TableLabel", fontSize=9, leading=12,
-            fontName="Helvetica-Bold"))
-        styles.add(ParagraphStyle(
-            name="TableValue", fontSize=9, leading=12))
-        styles.add(ParagraphStyle(
-            name="BrandTitle", fontSize=18, leading=20, alignment=0,
-            fontName="Helvetica-Bold", spaceAfter=2,
-            textColor=colors.white))
-        styles.add(ParagraphStyle(
-            name="BrandSubtitle", fontSize=11, leading=14, alignment=0,
-            spaceAfter=2, textColor=colors.white))
-        styles.add(ParagraphStyle(
-            name="BrandAccent", fontSize=9, leading=12, alignment=0,
-            spaceAfter=2, textColor=colors.white))
-        styles.add(ParagraphStyle(
-            name="GoldHeader", fontSize=11, leading=14,
-            textColor=colors.white, alignment=0,
-            fontName="Helvetica-Bold"))
-        styles.add(ParagraphStyle(
-            name="SectionDescription", fontSize=10, leading=14,
-            textColor=self.BRAND_SLATE))
-        styles.add(ParagraphStyle(
-            name="SignatureLabel", fontSize=9, leading=11, alignment=1,
-            textColor=colors.HexColor("#475569")))
-        return styles
+        self.plan = get_render_plan(schema)
+        self.styles = self.plan.styles
 
     def generate_pdf(
         self,
@@ -105,20 +569,17 @@ class SchemaDrivenPDFService:
                 bottomMargin=54,
                 leftMargin=54,
                 rightMargin=54,
-                title=self.schema.get("title", "Enrollment Agreement"),
+                title=self.plan.title,
             )
 
-            story: List[Any] = []
-            story.extend(self._build_brand_block())
-            story.extend(self._build_metadata_block(document))
-
-            for section in self.schema.get("sections", []):
-                story.extend(self._render_section(section, responses))
-
-            story.extend(self._render_signatures(signatures))
+            with self.plan.lock:
+                story: List[Any] = self.plan.story_start()
+                story.extend(self._build_metadata_block(document))
+                story.extend(self.plan.bind(responses))
+                story.extend(self._render_signatures(signatures))
 
-            # Build with custom page template for gold banner
-            doc.build(story, onFirstPage=self._add_gold_header, onLaterPages=self._add_gold_header)
+                # Build with custom page template for gold banner
+                doc.build(story, onFirstPage=self._add_gold_header, onLaterPages=self._add_gold_header)
             return True
         except Exception as exc:  # pragma: no cover - logged for debugging
             print(f"Failed to build schema-driven PDF: {exc}")
@@ -143,361 +604,19 @@ class SchemaDrivenPDFService:
 
         canvas_obj.restoreState()
 
-    def _build_brand_block(self) -> List[Any]:
-        brand = self.schema.get("brand") or {}
-        if not brand:
-            return []
-
-        logo_image = None
-        logo_path = brand.get("logoPath")
-        if isinstance(logo_path, str) and logo_path.strip():
-            candidate = Path(logo_path.strip())
-            if not candidate.is_absolute():
-                candidate = Path.cwd() / candidate
-            if candidate.exists():
-                logo_image = Image(str(candidate), width=1.25 * inch, height=1.25 * inch, kind="proportional")
-                logo_image.hAlign = "CENTER"
-
-        text_rows: List[List[Any]] = []
-        school_name = brand.get("schoolName", "Atlanta Academy of Dental Assisting")
-        text_rows.append([Paragraph(school_name, self.styles["BrandTitle"])])
-
-        address = brand.get("address") or []
-        if isinstance(address, list) and address:
-            text_rows.append([Paragraph(" • ".join(address), self.styles["BrandSubtitle"])])
-
-        contact_bits = []
-        if brand.get("phone"):
-            contact_bits.append(f"Phone: {brand['phone']}")
-        if brand.get("website"):
-            contact_bits.append(brand["website"])
-        if contact_bits:
-            text_rows.append([Paragraph(" • ".join(contact_bits), self.styles["BrandAccent"])])
-
-        text_rows.append([Paragraph("STUDENT ENROLLMENT AGREEMENT – DENTAL ASSISTING", self.styles["GoldHeader"])])
-
-        text_table = Table(text_rows, colWidths=[4.8 * inch])
-        text_table.setStyle(
-            TableStyle(
-                [
-                    ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                    ("LEFTPADDING", (0, 0), (-1, -1), 0),
-                    ("RIGHTPADDING", (0, 0), (-1, -1), 0),
-                    ("TOPPADDING", (0, 0), (-1, -1), 0),
-                    ("BOTTOMPADDING", (0, 0), (-1, -1), 0),
-                ]
-            )
-        )
-
-        if logo_image:
-            brand_layout = Table(
-                [[logo_image, text_table]],
-                colWidths=[1.5 * inch, 4.8 * inch],
-            )
-        else:
-            brand_layout = Table([[text_table]], colWidths=[6.3 * inch])
-
-        brand_layout.setStyle(
-            TableStyle(
-                [
-                    ("BACKGROUND", (0, 0), (-1, -1), self.BRAND_GOLD),
-                    ("BOX", (0, 0), (-1, -1), 1, self.BRAND_GOLD),
-                    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                    ("LEFTPADDING", (0, 0), (-1, -1), 10),
-                    ("RIGHTPADDING", (0, 0), (-1, -1), 10),
-                    ("TOPPADDING", (0, 0), (-1, -1), 12),
-                    ("BOTTOMPADDING", (0, 0), (-1, -1), 12),
-                ]
-            )
-        )
-
-        flowables: List[Any] = [brand_layout, Spacer(1, 18)]
-        flowables.append(Spacer(1, 12))
-        return flowables
-
-    def _render_section(self, section: Dict[str, Any], responses: Dict[str, Any]) -> List[Any]:
-        flowables: List[Any] = []
-        title = section.get("title") or ""
-        if title:
-            # Gold banner section header (matching original design)
-            header = Table([[Paragraph(title.upper(), self.styles["GoldHeader"])]], colWidths=[6.3 * inch])
-            header.setStyle(
-                TableStyle(
-                    [
-                        ("BACKGROUND", (0, 0), (-1, -1), self.BRAND_GOLD),
-                        ("TEXTCOLOR", (0, 0), (-1, -1), colors.white),
-                        ("LEFTPADDING", (0, 0), (-1, -1), 12),
-                        ("RIGHTPADDING", (0, 0), (-1, -1), 12),
-                        ("TOPPADDING", (0, 0), (-1, -1), 8),
-                        ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
-                        ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                    ]
-                )
-            )
-            flowables.append(header)
-
-        description = section.get("description")
-        if description:
-            desc_table = Table([[Paragraph(description, self.styles["SectionDescription"])]], colWidths=[6.3 * inch])
-            desc_table.setStyle(
-                TableStyle(
-                    [
-                        ("BACKGROUND", (0, 0), (-1, -1), self.BRAND_CREAM),
-                        ("LEFTPADDING", (0, 0), (-1, -1), 10),
-                        ("RIGHTPADDING", (0, 0), (-1, -1), 10),
-                        ("TOPPADDING", (0, 0), (-1, -1), 8),
-                        ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
-                    ]
-                )
-            )
-            flowables.append(desc_table)
-
-        for element in section.get("elements", []):
-            flowables.extend(self._render_element(element, responses))
-
-        flowables.append(Spacer(1, 12))
-        return flowables
-
-    def _render_field_group(self, element: Dict[str, Any], responses: Dict[str, Any]) -> Optional[Any]:
-        fields = element.get("fields") or []
-        if not fields:
-            return None
-        layout = element.get("layout", "single-column")
-        if layout == "two-column":
-            body = self._render_field_group_two_column(fields, responses)
-        else:
-            body = self._render_field_group_single_column(fields, responses)
-
-        parts: List[Any] = []
-        title = element.get("title")
-        if title:
-            # Gold banner subsection header
-            header = Table([[Paragraph(title.upper(), self.styles["GoldHeader"])]], colWidths=[6.3 * inch])
-            header.setStyle(
-                TableStyle(
-                    [
-                        ("BACKGROUND", (0, 0), (-1, -1), self.BRAND_GOLD),
-                        ("TEXTCOLOR", (0, 0), (-1, -1), colors.white),
-                        ("LEFTPADDING", (0, 0), (-1, -1), 12),
-                        ("RIGHTPADDING", (0, 0), (-1, -1), 12),
-                        ("TOPPADDING", (0, 0), (-1, -1), 8),
-                        ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
-                        ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                    ]
-                )
-            )
-            parts.append(header)
-
-        description = element.get("description")
-        if description:
-            desc = Table([[Paragraph(description, self.styles["SectionDescription"])]], colWidths=[6.3 * inch])
-            desc.setStyle(
-                TableStyle(
-                    [
-                        ("BACKGROUND", (0, 0), (-1, -1), self.BRAND_CREAM),
-                        ("LEFTPADDING", (0, 0), (-1, -1), 8),
-                        ("RIGHTPADDING", (0, 0), (-1, -1), 8),
-                        ("TOPPADDING", (0, 0), (-1, -1), 6),
-                        ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
-                    ]
-                )
-            )
-            parts.append(desc)
-
-        parts.append(body)
-        return KeepTogether(parts) if len(parts) > 1 else body
-
-    def _render_field_group_single_column(self, fields: List[Dict[str, Any]], responses: Dict[str, Any]) -> Any:
-        rows = []
-        for field in fields:
-            value = self._format_value(self._get_value(responses, field.get("name", "")))
-            label = Paragraph(f"<b>{field.get('label', '')}</b>", self.styles["TableLabel"])
-            rows.append([label, Paragraph(value or "—", self.styles["TableValue"])])
-
-        table = Table(rows, colWidths=[1.6 * inch, 4.7 * inch])
-        table.setStyle(
-            TableStyle(
-                [
-                    ("TEXTCOLOR", (0, 0), (-1, -1), self.BRAND_NAVY),
-                    ("LINEBELOW", (1, 0), (1, -1), 0.75, self.BRAND_NAVY),
-                    ("LEFTPADDING", (0, 0), (-1, -1), 6),
-                    ("RIGHTPADDING", (0, 0), (-1, -1), 6),
-                    ("TOPPADDING", (0, 0), (-1, -1), 4),
-                    ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
-                ]
-            )
-        )
-        return table
-
-    def _render_field_group_two_column(self, fields: List[Dict[str, Any]], responses: Dict[str, Any]) -> Any:
-        data: List[List[Any]] = []
-        spans: List[Tuple[str, Tuple[int, int], Tuple[int, int]]] = []
-        row: List[Any] = ["", "", "", ""]
-        col_index = 0
-
-        def flush_row(force: bool = False) -> None:
-            nonlocal row, col_index
-            if force or any(cell not in ("", None) for cell in row):
-                data.append(row)
-                row = ["", "", "", ""]
-                col_index = 0
-
-        for field in fields:
-            value = self._format_value(self._get_value(responses, field.get("name", "")))
-            label = Paragraph(f"<b>{field.get('label', '')}</b>", self.styles["TableLabel"])
-            value_para = Paragraph(value or "—", self.styles["TableValue"])
-            width = field.get("width", "half")
-            if width == "full":
-                flush_row()
-                row = [label, value_para, "", ""]
-                data.append(row)
-                row_index = len(data) - 1
-                spans.append(("SPAN", (1, row_index), (3, row_index)))
-                row = ["", "", "", ""]
-                col_index = 0
-            else:
-                row[col_index] = label
-                row[col_index + 1] = value_para
-                col_index += 2
-                if col_index >= 4:
-                    flush_row()
-
-        flush_row()
-
-        table = Table(data, colWidths=[1.2 * inch, 1.9 * inch, 1.2 * inch, 1.9 * inch])
-        style = [
-            ("TEXTCOLOR", (0, 0), (-1, -1), self.BRAND_NAVY),
-            ("LINEBELOW", (1, 0), (1, -1), 0.75, self.BRAND_NAVY),
-            ("LINEBELOW", (3, 0), (3, -1), 0.75, self.BRAND_NAVY),
-            ("LEFTPADDING", (0, 0), (-1, -1), 4),
-            ("RIGHTPADDING", (0, 0), (-1, -1), 4),
-            ("TOPPADDING", (0, 0), (-1, -1), 4),
-            ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
-        ]
-        for span in spans:
-            style.append(span)
-            _, start, end = span
-            style.append(("LINEBELOW", (start[0], start[1]), (end[0], end[1]), 0.75, self.BRAND_NAVY))
-        table.setStyle(TableStyle(style))
-        return table
-
     def _build_metadata_block(self, document: "SignedDocument") -> List[Any]:
-        version = self.schema.get("version", "v1")
         rows = [
             [Paragraph("<b>Agreement Version</b>",
                        self.styles["TableLabel"]),
-             Paragraph(version, self.styles["TableValue"])],
+             Paragraph(self.plan.version, self.styles["TableValue"])],
             [Paragraph("<b>Document ID</b>",
                        self.styles["TableLabel"]),
              Paragraph(str(document.id), self.styles["TableValue"])],
         ]
         table = Table(rows, colWidths=[2.5 * inch, 4.5 * inch])
-        table.setStyle(
-            TableStyle(
-                [
-                    ("BACKGROUND", (0, 0), (-1, 0), self.BRAND_GOLD),  # Gold header row
-                    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-                    ("BOX", (0, 0), (-1, -1), 0.75, self.BRAND_GOLD),  # Gold border
-                    ("INNERGRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#E2E8F0")),
-                    ("LEFTPADDING", (0, 0), (-1, -1), 10),
-                    ("RIGHTPADDING", (0, 0), (-1, -1), 10),
-                    ("TOPPADDING", (0, 0), (-1, -1), 8),
-                    ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
-                    ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                ]
-            )
-        )
-
+        table.setStyle(METADATA_STYLE)
         return [table, Spacer(1, 18)]
 
-    def _render_element(self, element: Dict[str, Any], responses: Dict[str, Any]) -> List[Any]:
-        element_type = element.get("type")
-        flowables: List[Any] = []
-
-        if element_type == "text":
-            content = element.get("content", "")
-            flowables.append(Paragraph(content, self.styles["Body"]))
-            flowables.append(Spacer(1, 6))
-            return flowables
-
-        if element_type == "field_group":
-            group = self._render_field_group(element, responses)
-            if group:
-                flowables.append(group)
-                flowables.append(Spacer(1, 8))
-            return flowables
-
-        if element_type == "table":
-            headers = element.get("headers", [])
-            rows = [[Paragraph(h, self.styles["TableLabel"]) for h in headers]]
-            for row in element.get("rows", []):
-                rows.append([Paragraph(str(cell), self.styles["TableValue"]) for cell in row])
-            table = Table(rows, colWidths=[2.5 * inch, 2 * inch, 2.5 * inch])
-            table.setStyle(
-                TableStyle(
-                    [
-                        ("BACKGROUND", (0, 0), (-1, 0), self.BRAND_GOLD),  # Gold header row
-                        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-                        ("BOX", (0, 0), (-1, -1), 0.75, self.BRAND_GOLD),  # Gold border
-                        ("INNERGRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#E2E8F0")),
-                        ("BACKGROUND", (0, 1), (-1, -1), colors.white),
-                        ("LEFTPADDING", (0, 0), (-1, -1), 10),
-                        ("RIGHTPADDING", (0, 0), (-1, -1), 10),
-                        ("TOPPADDING", (0, 0), (-1, -1), 8),
-                        ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
-                    ]
-                )
-            )
-            flowables.append(table)
-            flowables.append(Spacer(1, 8))
-            return flowables
-
-        if element_type == "list":
-            ordered = element.get("ordered", False)
-            for idx, item in enumerate(element.get("items", []), start=1):
-                prefix = f"{idx}." if ordered else "•"
-                flowables.append(Paragraph(f"{prefix} {item}", self.styles["Body"]))
-            flowables.append(Spacer(1, 8))
-            return flowables
-
-        if element_type == "acknowledgement_list":
-            rows = [
-                [
-                    Paragraph("<b>Statement</b>", self.styles["TableLabel"]),
-                    Paragraph("<b>Initials</b>", self.styles["TableLabel"]),
-                ]
-            ]
-            ack_values = (responses or {}).get("acknowledgements", {})
-            for ack in element.get("acknowledgements", []):
-                rows.append(
-                    [
-                        Paragraph(ack.get("label", ""), self.styles["TableValue"]),
-                        Paragraph(ack_values.get(ack.get("id"), "") or "—", self.styles["TableValue"]),
-                    ]
-                )
-            table = Table(rows, colWidths=[4.5 * inch, 2.5 * inch])
-            table.setStyle(
-                TableStyle(
-                    [
-                        ("BACKGROUND", (0, 0), (-1, 0), self.BRAND_GOLD),  # Gold header row
-                        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-                        ("BOX", (0, 0), (-1, -1), 0.75, self.BRAND_GOLD),  # Gold border
-                        ("INNERGRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#E2E8F0")),
-                        ("BACKGROUND", (0, 1), (-1, -1), colors.white),
-                        ("LEFTPADDING", (0, 0), (-1, -1), 10),
-                        ("RIGHTPADDING", (0, 0), (-1, -1), 10),
-                        ("TOPPADDING", (0, 0), (-1, -1), 8),
-                        ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
-                        ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                    ]
-                )
-            )
-            flowables.append(table)
-            flowables.append(Spacer(1, 8))
-            return flowables
-
-        return flowables
-
     def _render_signatures(self, signatures: Sequence["DocumentSignature"]) -> List[Any]:
         if not signatures:
             return []
@@ -509,7 +628,7 @@ class SchemaDrivenPDFService:
 
     def _render_signature(self, signature: "DocumentSignature") -> List[Any]:
         flowables: List[Any] = []
-        image = self._decode_signature(signature.signature_data)
+        image = self._decode_signature(signature)
         signed_at = signature.signed_at.astimezone(timezone.utc)
         label = signature.signature_type.replace("_", " ").title()
         signature_cell = image if image else Paragraph("Signature on file", self.styles["Body"])
@@ -521,16 +640,7 @@ class SchemaDrivenPDFService:
             ],
             colWidths=[3.2 * inch],
         )
-        signature_column.setStyle(
-            TableStyle(
-                [
-                    ("LINEABOVE", (0, 0), (-1, 0), 0.75, colors.HexColor("#475569")),
-                    ("ALIGN", (0, 0), (-1, 0), "CENTER"),
-                    ("ALIGN", (0, 1), (-1, 1), "CENTER"),
-                    ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
-                ]
-            )
-        )
+        signature_column.setStyle(SIGNATURE_COLUMN_STYLE)
 
         details_text = (
             f"<b>Name:</b> {signature.typed_name or '—'}<br/>"
@@ -542,50 +652,14 @@ class SchemaDrivenPDFService:
             [[signature_column, Paragraph(details_text, self.styles["Body"])]],
             colWidths=[3.2 * inch, 3.3 * inch],
         )
-        table.setStyle(
-            TableStyle(
-                [
-                    ("BOX", (0, 0), (-1, -1), 0.5, colors.HexColor("#E2E8F0")),
-                    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                ]
-            )
-        )
+        table.setStyle(SIGNATURE_BOX_STYLE)
         flowables.append(table)
         flowables.append(Spacer(1, 10))
         return flowables
 
-    def _get_value(self, responses: Dict[str, Any], path: str) -> Any:
-        if not path:
-            return None
-        parts = path.split(".")
-        cursor: Any = responses
-        for part in parts:
-            if not isinstance(cursor, dict):
-                return None
-            cursor = cursor.get(part)
-            if cursor is None:
-                return None
-        return cursor
-
-    def _format_value(self, value: Any) -> str:
-        if value is None:
-            return ""
-        if isinstance(value, str):
-            return value
-        if isinstance(value, (int, float)):
-            return f"{value}"
-        if isinstance(value, datetime):
-            return value.strftime("%Y-%m-%d")
-        return str(value)
-
-    def _decode_signature(self, signature_data: str | None) -> Image | None:
-        if not signature_data:
-            return None
-        payload = signature_data.split(",", maxsplit=1)[-1]
-        try:
-            image_bytes = base64.b64decode(payload)
-        except Exception:  # pragma: no cover - invalid signature data
+    def _decode_signature(self, signature: "DocumentSignature") -> Image | None:
+        image_bytes = signature_image(signature)
+        if not image_bytes:
             return None
-        buffer = io.BytesIO(image_bytes)
-        img = Image(buffer, width=2.0 * inch, height=0.75 * inch)
-        return img
+        # Normalized signatures are cropped to the ink, so keep their aspect ratio
+        return Image(io.BytesIO(image_bytes), width=2.0 * inch, height=0.75 * inch, kind="proportional")
@@ -0,0 +1,404 @@
+"""
+Content-addressed file store for document PDFs and signature images.
+
+Templates, the unsigned copy of every document and signed PDFs used to be
+separate files under app/static/documents, most unsigned copies
+byte-identical to their template. Files are now stored once under the
+SHA-256 of their content and rows reference them by that hash:
+
+- LocalFileStore keeps blobs in FILE_STORE_DIR, sharded by the first two
+  pairs of hex digits (ab/cd/abcd...), written by atomic rename
+- S3FileStore keeps them in FILE_STORE_S3_BUCKET under the same sharded keys
+  (boto3 is optional and only needed for this backend; FILE_STORE_S3_ENDPOINT_URL
+  points it at MinIO or another S3-compatible service)
+
+Storing content that already exists is a no-op apart from refreshing its
+timestamp, so an unsigned copy costs nothing. Reference counts live in the
+file_blobs table (app.db.models.file_blob). collect_garbage(), a scheduled
+job, recounts them from the referencing columns and deletes blobs nobody has
+referenced for FILE_STORE_GC_GRACE_SECONDS, as well as stored files that
+never got a reference (e.g. a request that failed before committing).
+
+Module content (markdown, H5P packages, supplemental files) is served by
+path from app/static and stays there.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
+
+from sqlalchemy import case, func, select, union_all, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.downloads import make_servable
+from app.db.models.file_blob import BLOB_REFERENCES, FileBlob
+
+# Optional S3 backend
+try:
+    import boto3
+    BOTO3_AVAILABLE = True
+except ImportError:
+    BOTO3_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+GC_JOB_NAME = "file-store-gc"
+CHUNK_SIZE = 1024 * 1024
+
+
+class BlobNotFound(FileNotFoundError):
+    """No stored content for this hash."""
+
+
+def _shard(blob_hash: str) -> str:
+    if len(blob_hash) != 64 or not all(c in "0123456789abcdef" for c in blob_hash):
+        raise ValueError(f"Not a SHA-256 hex digest: {blob_hash!r}")
+    return f"{blob_hash[:2]}/{blob_hash[2:4]}/{blob_hash}"
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        while chunk := handle.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FileStore(ABC):
+    """Backend interface; blobs are immutable and named by their SHA-256."""
+
+    @abstractmethod
+    def put_file(self, path: Path, move: bool = False) -> str:
+        """Store a file's content (moving it into the store if move) and return its hash."""
+
+    @abstractmethod
+    def put_bytes(self, data: bytes) -> str:
+        ...
+
+    @abstractmethod
+    def open(self, blob_hash: str) -> BinaryIO:
+        """Readable binary file for a blob; raises BlobNotFound."""
+
+    def read(self, blob_hash: str) -> bytes:
+        handle = self.open(blob_hash)
+        try:
+            return handle.read()
+        finally:
+            handle.close()
+
+    @abstractmethod
+    def exists(self, blob_hash: str) -> bool:
+        ...
+
+    @abstractmethod
+    def size(self, blob_hash: str) -> int:
+        ...
+
+    def local_path(self, blob_hash: str) -> Optional[Path]:
+        """Filesystem path of a blob, if the backend has one (for FileResponse)."""
+        return None
+
+    @abstractmethod
+    def delete(self, blob_hash: str) -> None:
+        ...
+
+    @abstractmethod
+    def iter_blobs(self) -> Iterator[Tuple[str, float]]:
+        """(hash, last modified as a Unix timestamp) of every stored blob."""
+
+    @abstractmethod
+    def modified_at(self, blob_hash: str) -> Optional[float]:
+        ...
+
+
+class LocalFileStore(FileStore):
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def path(self, blob_hash: str) -> Path:
+        return self.root / _shard(blob_hash)
+
+    def put_file(self, path: Path, move: bool = False) -> str:
+        blob_hash = file_sha256(path)
+        destination = self.path(blob_hash)
+        if self._touch(destination):
+            if move:
+                Path(path).unlink(missing_ok=True)
+            return blob_hash
+
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        if move:
+            try:
+                make_servable(path)
+                os.replace(path, destination)
+                return blob_hash
+            except OSError:
+                pass  # other filesystem: copy below
+        fd, tmp_name = tempfile.mkstemp(prefix=".tmp-", dir=destination.parent)
+        try:
+            with os.fdopen(fd, "wb") as tmp, open(path, "rb") as source:
+                shutil.copyfileobj(source, tmp, CHUNK_SIZE)
+            make_servable(tmp_name)
+            os.replace(tmp_name, destination)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        if move:
+            Path(path).unlink(missing_ok=True)
+        return blob_hash
+
+    def put_bytes(self, data: bytes) -> str:
+        blob_hash = hashlib.sha256(data).hexdigest()
+        destination = self.path(blob_hash)
+        if self._touch(destination):
+            return blob_hash
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(prefix=".tmp-", dir=destination.parent)
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            make_servable(tmp_name)
+            os.replace(tmp_name, destination)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        return blob_hash
+
+    @staticmethod
+    def _touch(destination: Path) -> bool:
+        # A fresh mtime keeps the garbage collector off content about to be referenced again
+        try:
+            os.utime(destination)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def open(self, blob_hash: str) -> BinaryIO:
+        try:
+            return open(self.path(blob_hash), "rb")
+        except FileNotFoundError as exc:
+            raise BlobNotFound(blob_hash) from exc
+
+    def exists(self, blob_hash: str) -> bool:
+        return self.path(blob_hash).is_file()
+
+    def size(self, blob_hash: str) -> int:
+        try:
+            return self.path(blob_hash).stat().st_size
+        except FileNotFoundError as exc:
+            raise BlobNotFound(blob_hash) from exc
+
+    def local_path(self, blob_hash: str) -> Optional[Path]:
+        return self.path(blob_hash)
+
+    def delete(self, blob_hash: str) -> None:
+        self.path(blob_hash).unlink(missing_ok=True)
+
+    def iter_blobs(self) -> Iterator[Tuple[str, float]]:
+        if not self.root.is_dir():
+            return
+        for path in self.root.glob("??/??/*"):
+            if path.name.startswith(".tmp-") or not path.is_file():
+                continue
+            try:
+                yield path.name, path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+
+    def modified_at(self, blob_hash: str) -> Optional[float]:
+        try:
+            return self.path(blob_hash).stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+
+class S3FileStore(FileStore):
+    """
+    Blobs in an S3-compatible bucket.
+
+    client is anything with the boto3 S3 client methods used here
+    (put_object, get_object, head_object, copy_object, delete_object and the
+    list_objects_v2 paginator); by default one is created from settings.
+    """
+
+    def __init__(self, bucket: str, prefix: str = "", client: Any = None):
+        if client is None:
+            if not BOTO3_AVAILABLE:
+                raise RuntimeError("FILE_STORE_BACKEND=s3 requires boto3 (pip install boto3)")
+            client = boto3.client("s3", endpoint_url=settings.FILE_STORE_S3_ENDPOINT_URL or None)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def key(self, blob_hash: str) -> str:
+        return self.prefix + _shard(blob_hash)
+
+    def _head(self, blob_hash: str) -> Optional[Dict[str, Any]]:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self.key(blob_hash))
+        except Exception as exc:
+            if _is_not_found(exc):
+                return None
+            raise
+
+    def _put(self, blob_hash: str, body: Any) -> str:
+        key = self.key(blob_hash)
+        if self._head(blob_hash) is not None:
+            # Copy onto itself to refresh LastModified, like the local store's touch
+            self.client.copy_object(
+                Bucket=self.bucket, Key=key, CopySource={"Bucket": self.bucket, "Key": key},
+                MetadataDirective="REPLACE",
+            )
+            return blob_hash
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=body)
+        return blob_hash
+
+    def put_file(self, path: Path, move: bool = False) -> str:
+        blob_hash = file_sha256(path)
+        with open(path, "rb") as body:
+            self._put(blob_hash, body)
+        if move:
+            Path(path).unlink(missing_ok=True)
+        return blob_hash
+
+    def put_bytes(self, data: bytes) -> str:
+        return self._put(hashlib.sha256(data).hexdigest(), data)
+
+    def open(self, blob_hash: str) -> BinaryIO:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self.key(blob_hash))["Body"]
+        except Exception as exc:
+            if _is_not_found(exc):
+                raise BlobNotFound(blob_hash) from exc
+            raise
+
+    def exists(self, blob_hash: str) -> bool:
+        return self._head(blob_hash) is not None
+
+    def size(self, blob_hash: str) -> int:
+        head = self._head(blob_hash)
+        if head is None:
+            raise BlobNotFound(blob_hash)
+        return head["ContentLength"]
+
+    def delete(self, blob_hash: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self.key(blob_hash))
+
+    def iter_blobs(self) -> Iterator[Tuple[str, float]]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for item in page.get("Contents", []):
+                yield item["Key"].rsplit("/", 1)[-1], item["LastModified"].timestamp()
+
+    def modified_at(self, blob_hash: str) -> Optional[float]:
+        head = self._head(blob_hash)
+        return None if head is None else head["LastModified"].timestamp()
+
+
+def _is_not_found(exc: Exception) -> bool:
+    # botocore ClientError (and compatible clients) carry the S3 error code
+    response = getattr(exc, "response", None) or {}
+    return response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+
+def get_file_store() -> FileStore:
+    """The configured store (one per process and configuration)."""
+    if settings.FILE_STORE_BACKEND == "s3":
+        if not settings.FILE_STORE_S3_BUCKET:
+            raise RuntimeError("FILE_STORE_BACKEND=s3 requires FILE_STORE_S3_BUCKET")
+        return _s3_store(settings.FILE_STORE_S3_BUCKET, settings.FILE_STORE_S3_PREFIX)
+    return LocalFileStore(Path(settings.FILE_STORE_DIR))
+
+
+@lru_cache(maxsize=None)
+def _s3_store(bucket: str, prefix: str) -> "S3FileStore":
+    # boto3 clients are thread-safe and expensive to create
+    return S3FileStore(bucket, prefix)
+
+
+def recount_references(db: Session) -> None:
+    """Set every file_blobs.ref_count from the columns in BLOB_REFERENCES."""
+    references = union_all(*(
+        select(getattr(model, attribute).label("hash")).where(getattr(model, attribute).isnot(None))
+        for model, attribute in BLOB_REFERENCES
+    )).subquery()
+    counted = (
+        select(references.c.hash, func.count().label("refs")).group_by(references.c.hash).subquery()
+    )
+    actual = func.coalesce(
+        select(counted.c.refs).where(counted.c.hash == FileBlob.hash).scalar_subquery(), 0
+    )
+    db.execute(
+        update(FileBlob)
+        .where(FileBlob.ref_count != actual)
+        .values(
+            ref_count=actual,
+            released_at=case((actual <= 0, func.coalesce(FileBlob.released_at, func.now())), else_=None),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    # Referenced hashes without a row (written by raw SQL or before tracking)
+    db.execute(
+        FileBlob.__table__.insert().from_select(
+            ["hash", "ref_count"],
+            select(counted.c.hash, counted.c.refs).where(
+                counted.c.hash.notin_(select(FileBlob.hash))
+            ),
+        )
+    )
+
+
+def collect_garbage(db: Session, store: Optional[FileStore] = None) -> Dict[str, int]:
+    """
+    Delete blobs that nothing has referenced for FILE_STORE_GC_GRACE_SECONDS.
+
+    Reference counts are recounted first, and a blob stored again within the
+    grace period (its timestamp is refreshed) is kept even at zero references,
+    since the request that stored it may not have committed yet.
+    """
+    store = store or get_file_store()
+    grace = settings.FILE_STORE_GC_GRACE_SECONDS
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=grace)
+    cutoff_ts = time.time() - grace
+
+    recount_references(db)
+    db.commit()
+
+    removed = 0
+    candidates = db.scalars(
+        select(FileBlob.hash).where(FileBlob.ref_count <= 0, FileBlob.released_at < cutoff)
+    ).all()
+    for blob_hash in candidates:
+        row = db.scalars(
+            select(FileBlob).where(FileBlob.hash == blob_hash, FileBlob.ref_count <= 0).with_for_update()
+        ).first()
+        modified = store.modified_at(blob_hash)
+        if row is None or (modified is not None and modified >= cutoff_ts):
+            db.rollback()
+            continue
+        db.delete(row)
+        db.flush()
+        store.delete(blob_hash)
+        db.commit()
+        removed += 1
+
+    # Stored content that never got a row
+    tracked = set(db.scalars(select(FileBlob.hash)))
+    db.commit()
+    orphans = 0
+    for blob_hash, modified in store.iter_blobs():
+        if blob_hash not in tracked and modified < cutoff_ts:
+            store.delete(blob_hash)
+            orphans += 1
+
+    if removed or orphans:
+        logger.info("File store GC removed %d unreferenced and %d orphaned blobs", removed, orphans)
+    return {"blobs_removed": removed, "orphans_removed": orphans}
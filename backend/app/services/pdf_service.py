@@ -11,7 +11,7 @@ from pathlib import Path
 from datetime import datetime, timezone
 import base64
 import io
-from typing import List, Tuple
+from typing import List, Tuple, Union
 
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
@@ -24,9 +24,9 @@ class PDFSignatureService:
 
     @staticmethod
     def overlay_signatures(
-        template_pdf_path: Path,
+        template_pdf_path: Union[Path, PdfReader],
         output_pdf_path: Path,
-        signatures: List[Tuple[str, str, int, int]],  # [(base64_image, type, x, y), ...]
+        signatures: List[Tuple[Union[str, bytes, None], str, int, int]],  # [(image, type, x, y), ...]
         metadata: dict = None,
         acknowledgements: List[Tuple[str, int, int]] | None = None,
     ) -> bool:
@@ -34,9 +34,12 @@ class PDFSignatureService:
         Overlay signature images onto a PDF template
 
         Args:
-            template_pdf_path: Path to source PDF
+            template_pdf_path: Path to source PDF, or an already parsed one
+                (e.g. from app.services.template_cache; it is not modified)
             output_pdf_path: Path to save signed PDF
-            signatures: List of (base64_image, type, x_position, y_position)
+            signatures: List of (image, type, x_position, y_position); image
+                is PNG/JPEG bytes (see app.services.signature_images), a
+                base64 string, or None to print only the label
             metadata: Additional metadata to add to PDF
 
         Returns:
@@ -44,7 +47,10 @@ class PDFSignatureService:
         """
         try:
             # Read the template PDF
-            reader = PdfReader(str(template_pdf_path))
+            if isinstance(template_pdf_path, PdfReader):
+                reader = template_pdf_path
+            else:
+                reader = PdfReader(str(template_pdf_path))
             writer = PdfWriter()
 
             # Get the last page (where signatures usually go)
@@ -56,13 +62,14 @@ class PDFSignatureService:
 
             # Add each signature to the overlay
             for sig_data, sig_type, x, y in signatures:
-                # Decode base64 signature image
-                img_data = base64.b64decode(sig_data.split(',')[1] if ',' in sig_data else sig_data)
-                img_buffer = io.BytesIO(img_data)
+                if isinstance(sig_data, str):
+                    # Decode base64 signature image
+                    sig_data = base64.b64decode(sig_data.split(',')[1] if ',' in sig_data else sig_data)
 
                 # Add signature image to PDF
-                img = ImageReader(img_buffer)
-                c.drawImage(img, x, y, width=200, height=50, preserveAspectRatio=True, mask='auto')
+                if sig_data:
+                    img = ImageReader(io.BytesIO(sig_data))
+                    c.drawImage(img, x, y, width=200, height=50, preserveAspectRatio=True, mask='auto')
 
                 # Add signature type label
                 c.setFont("Helvetica", 8)
@@ -93,10 +100,11 @@ class PDFSignatureService:
 
             # Copy all pages from original
             for i, page in enumerate(reader.pages):
+                # add_page clones the page, so the template itself is left untouched
+                written = writer.add_page(page)
                 if i == last_page_num:
                     # Merge signature overlay on last page
-                    page.merge_page(overlay_pdf.pages[0])
-                writer.add_page(page)
+                    written.merge_page(overlay_pdf.pages[0])
 
             # Add metadata to PDF
             if metadata:
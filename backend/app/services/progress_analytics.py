@@ -0,0 +1,218 @@
+"""
+Cohort progress analytics served from the program_module_progress_mv view.
+
+The view flattens enrollment x module progress for every program so that an
+instructor's cohort summary or students x modules matrix is one indexed scan
+instead of a request per student. It is refreshed CONCURRENTLY (readers are
+never blocked) every PROGRESS_ANALYTICS_REFRESH_SECONDS by the scheduler, and
+on demand, for all programs at once, through POST /progress/programs/refresh.
+"""
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+from uuid import UUID
+
+from sqlalchemy import case, func, select, text
+from sqlalchemy.orm import Session
+
+from app.db.models.progress_views import PROGRAM_PROGRESS_VIEW, program_module_progress as mv
+
+REFRESH_JOB_NAME = "program-progress-refresh"
+
+COMPLETED_STATUSES = ("completed", "passed")
+
+# One character per module in matrix rows
+STATUS_CODES = {
+    "not_started": "n",
+    "incomplete": "i",
+    "completed": "c",
+    "passed": "p",
+    "failed": "f",
+}
+UNKNOWN_STATUS_CODE = "?"
+
+MATRIX_FETCH_SIZE = 2000
+
+
+def refresh_program_progress(db: Session) -> Optional[datetime]:
+    """
+    Recompute the view without blocking readers.
+
+    Returns:
+        The new refreshed_at timestamp (None when there are no enrollments)
+    """
+    db.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {PROGRAM_PROGRESS_VIEW}"))
+    db.commit()
+    return db.execute(select(func.max(mv.c.refreshed_at))).scalar()
+
+
+def _filtered(stmt, program_id: UUID, enrollment_status: Optional[str]):
+    stmt = stmt.where(mv.c.program_id == program_id)
+    if enrollment_status:
+        stmt = stmt.where(mv.c.enrollment_status == enrollment_status)
+    return stmt
+
+
+def program_summary(db: Session, program_id: UUID, enrollment_status: Optional[str] = "active") -> Dict[str, Any]:
+    """Per-module completion figures plus cohort totals for one program."""
+    completed = mv.c.scorm_status.in_(COMPLETED_STATUSES)
+    module_rows = db.execute(
+        _filtered(
+            select(
+                mv.c.module_id,
+                mv.c.module_code,
+                mv.c.module_title,
+                mv.c.module_position,
+                func.count().label("students"),
+                func.count().filter(completed).label("completed"),
+                func.count().filter(mv.c.scorm_status == "failed").label("failed"),
+                func.count().filter(mv.c.scorm_status == "not_started").label("not_started"),
+                func.avg(mv.c.score).label("average_score"),
+                func.avg(mv.c.progress_pct).label("average_progress_pct"),
+                func.sum(mv.c.active_time_seconds).label("active_time_seconds"),
+                func.max(mv.c.refreshed_at).label("refreshed_at"),
+            ),
+            program_id,
+            enrollment_status,
+        )
+        .group_by(mv.c.module_id, mv.c.module_code, mv.c.module_title, mv.c.module_position)
+        .order_by(mv.c.module_position)
+    ).all()
+
+    per_student = _filtered(
+        select(
+            mv.c.enrollment_id,
+            func.count().label("modules"),
+            func.sum(case((completed, 1), else_=0)).label("completed"),
+        ),
+        program_id,
+        enrollment_status,
+    ).group_by(mv.c.enrollment_id).subquery()
+    cohort = db.execute(
+        select(
+            func.count().label("students"),
+            func.count().filter(per_student.c.completed == per_student.c.modules).label("students_completed"),
+            func.avg(per_student.c.completed * 100.0 / per_student.c.modules).label("average_completion_pct"),
+        )
+    ).one()
+
+    modules: List[Dict[str, Any]] = []
+    refreshed_at = None
+    for row in module_rows:
+        refreshed_at = row.refreshed_at
+        modules.append({
+            "module_id": row.module_id,
+            "module_code": row.module_code,
+            "module_title": row.module_title,
+            "students": row.students,
+            "completed": row.completed,
+            "in_progress": row.students - row.completed - row.failed - row.not_started,
+            "failed": row.failed,
+            "not_started": row.not_started,
+            "completion_rate": round(row.completed * 100.0 / row.students, 2) if row.students else 0.0,
+            "average_score": round(float(row.average_score), 2) if row.average_score is not None else None,
+            "average_progress_pct": round(float(row.average_progress_pct or 0), 2),
+            "active_time_seconds": int(row.active_time_seconds or 0),
+        })
+
+    return {
+        "program_id": program_id,
+        "refreshed_at": refreshed_at,
+        "students": cohort.students,
+        "students_completed": cohort.students_completed,
+        "average_completion_pct": round(float(cohort.average_completion_pct or 0), 2),
+        "modules": modules,
+    }
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _json(value: Any) -> str:
+    return json.dumps(value, default=_json_default, separators=(",", ":"))
+
+
+def iter_program_matrix(
+    db: Session, program_id: UUID, enrollment_status: Optional[str] = "active"
+) -> Iterator[str]:
+    """
+    Stream the students x modules grid as compact columnar JSON.
+
+    Layout::
+
+        {"program_id": ..., "refreshed_at": ...,
+         "legend": {"n": "not_started", ...},
+         "modules": {"id": [...], "code": [...], "title": [...]},
+         "fields": ["enrollment_id", "user_id", "status", "score", "progress_pct"],
+         "rows": [["<enrollment>", "<user>", "ncpi", [null, 88, 95, null], [0, 100, 100, 40]], ...]}
+
+    status holds one legend character per module and score/progress_pct are
+    arrays in the same module order, so a 500 x 40 grid is a few dozen KB
+    instead of 20,000 nested objects. Rows are read with a server-side cursor
+    and emitted one student at a time.
+    """
+    modules = db.execute(
+        _filtered(
+            select(mv.c.module_id, mv.c.module_code, mv.c.module_title, func.max(mv.c.refreshed_at)),
+            program_id,
+            enrollment_status,
+        )
+        .group_by(mv.c.module_id, mv.c.module_code, mv.c.module_title, mv.c.module_position)
+        .order_by(mv.c.module_position, mv.c.module_id)
+    ).all()
+    column = {row.module_id: index for index, row in enumerate(modules)}
+    refreshed_at = max((row[3] for row in modules), default=None)
+    module_columns = {
+        "id": [row.module_id for row in modules],
+        "code": [row.module_code for row in modules],
+        "title": [row.module_title for row in modules],
+    }
+
+    yield (
+        "{"
+        f'"program_id":{_json(program_id)},'
+        f'"refreshed_at":{_json(refreshed_at)},'
+        f'"legend":{_json({code: status for status, code in STATUS_CODES.items()})},'
+        f'"modules":{_json(module_columns)},'
+        '"fields":["enrollment_id","user_id","status","score","progress_pct"],'
+        '"rows":['
+    )
+
+    cells = _filtered(
+        select(
+            mv.c.enrollment_id,
+            mv.c.user_id,
+            mv.c.module_id,
+            mv.c.scorm_status,
+            mv.c.score,
+            mv.c.progress_pct,
+        ),
+        program_id,
+        enrollment_status,
+    ).order_by(mv.c.enrollment_id, mv.c.module_position)
+
+    def encode(row: list, first: bool) -> str:
+        row[2] = "".join(row[2])
+        return ("" if first else ",") + _json(row)
+
+    width = len(modules)
+    current: Optional[list] = None
+    emitted = 0
+    for cell in db.execute(cells.execution_options(yield_per=MATRIX_FETCH_SIZE)):
+        if current is None or cell.enrollment_id != current[0]:
+            if current is not None:
+                yield encode(current, emitted == 0)
+                emitted += 1
+            current = [cell.enrollment_id, cell.user_id, ["n"] * width, [None] * width, [0] * width]
+        index = column.get(cell.module_id)
+        if index is None:  # view refreshed between the two reads
+            continue
+        current[2][index] = STATUS_CODES.get(cell.scorm_status, UNKNOWN_STATUS_CODE)
+        current[3][index] = cell.score
+        current[4][index] = cell.progress_pct
+    if current is not None:
+        yield encode(current, emitted == 0)
+    yield "]}"
@@ -0,0 +1,200 @@
+"""
+Write-behind buffer for module engagement heartbeats.
+
+The reader posts scroll position, active time and viewed sections every few
+seconds. Writing each heartbeat synchronously costs several queries and a
+commit, so POST /progress/heartbeat only records it here. Pending heartbeats
+are coalesced per (enrollment, module):
+
+- last_scroll_position: latest value wins
+- active_time_seconds: deltas are summed
+- sections_viewed: union, in first-seen order
+
+flush() drains the buffer into batched INSERT ... ON CONFLICT DO UPDATE
+statements (relying on the unique (enrollment_id, module_id) constraint).
+It runs every PROGRESS_HEARTBEAT_FLUSH_SECONDS in every worker (the buffer
+is per-process), when the buffer grows past PROGRESS_HEARTBEAT_MAX_PENDING,
+and once more on shutdown. A heartbeat is therefore at most one flush
+interval stale, and lost only if the process dies without shutting down.
+"""
+import logging
+import threading
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import func, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models.enrollment import ModuleProgress
+from app.services.progress_cache import progress_snapshot_cache
+
+logger = logging.getLogger(__name__)
+
+ProgressKey = Tuple[UUID, UUID]  # (enrollment_id, module_id)
+
+# Existing sections first (in stored order), then new ones, without duplicates
+_SECTIONS_UNION = literal_column(
+    "(SELECT COALESCE(jsonb_agg(s ORDER BY o), '[]'::jsonb) FROM ("
+    "  SELECT s, min(o) AS o FROM ("
+    "    SELECT s, o FROM jsonb_array_elements_text("
+    "      COALESCE(CAST(module_progress.sections_viewed AS jsonb), '[]'::jsonb)"
+    "    ) WITH ORDINALITY AS a(s, o)"
+    "    UNION ALL"
+    "    SELECT s, o + 1000000 FROM jsonb_array_elements_text("
+    "      CAST(excluded.sections_viewed AS jsonb)"
+    "    ) WITH ORDINALITY AS b(s, o)"
+    "  ) AS merged GROUP BY s"
+    ") AS deduped)"
+)
+
+
+def _upsert(rows: List[dict], update_scroll: bool):
+    stmt = pg_insert(ModuleProgress).values(rows)
+    excluded = stmt.excluded
+    set_ = {
+        "active_time_seconds": func.coalesce(ModuleProgress.active_time_seconds, 0) + excluded.active_time_seconds,
+        "sections_viewed": _SECTIONS_UNION,
+        "last_accessed_at": func.greatest(ModuleProgress.last_accessed_at, excluded.last_accessed_at),
+    }
+    if update_scroll:
+        set_["last_scroll_position"] = excluded.last_scroll_position
+    return stmt.on_conflict_do_update(
+        index_elements=[ModuleProgress.enrollment_id, ModuleProgress.module_id],
+        set_=set_,
+    )
+
+
+@dataclass
+class PendingHeartbeat:
+    """Coalesced heartbeats for one (enrollment, module) since the last flush."""
+    last_scroll_position: Optional[int] = None
+    active_time_delta: int = 0
+    sections: Dict[str, None] = field(default_factory=dict)  # ordered set
+    last_accessed_at: Optional[datetime] = None
+
+    def merge(self, other: "PendingHeartbeat") -> None:
+        if other.last_scroll_position is not None:
+            self.last_scroll_position = other.last_scroll_position
+        self.active_time_delta += other.active_time_delta
+        self.sections.update(other.sections)
+        if other.last_accessed_at and (
+            self.last_accessed_at is None or other.last_accessed_at > self.last_accessed_at
+        ):
+            self.last_accessed_at = other.last_accessed_at
+
+
+class ProgressHeartbeatBuffer:
+    """Thread-safe, per-process coalescing buffer of engagement heartbeats."""
+
+    def __init__(self, max_pending: Optional[int] = None):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[ProgressKey, PendingHeartbeat] = {}
+        self.max_pending = max_pending or settings.PROGRESS_HEARTBEAT_MAX_PENDING
+
+    def add(
+        self,
+        enrollment_id: UUID,
+        module_id: UUID,
+        *,
+        last_scroll_position: Optional[int] = None,
+        active_time_delta: int = 0,
+        sections_viewed: Optional[List[str]] = None,
+    ) -> bool:
+        """
+        Record a heartbeat.
+
+        Returns:
+            True when the buffer is over max_pending and should be flushed now
+        """
+        heartbeat = PendingHeartbeat(
+            last_scroll_position=last_scroll_position,
+            active_time_delta=max(active_time_delta, 0),
+            sections=dict.fromkeys(s for s in sections_viewed or [] if s),
+            last_accessed_at=datetime.now(timezone.utc),
+        )
+        with self._lock:
+            self._pending.setdefault((enrollment_id, module_id), PendingHeartbeat()).merge(heartbeat)
+            return len(self._pending) >= self.max_pending
+
+    def pending(self, enrollment_id: UUID, module_id: UUID) -> Optional[PendingHeartbeat]:
+        """Snapshot of what is waiting to be written for one key (for read-your-writes)."""
+        with self._lock:
+            entry = self._pending.get((enrollment_id, module_id))
+            if entry is None:
+                return None
+            snapshot = PendingHeartbeat()
+            snapshot.merge(entry)
+            return snapshot
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def _restore(self, drained: Dict[ProgressKey, PendingHeartbeat]) -> None:
+        """Put drained entries back (older than anything added since)."""
+        with self._lock:
+            for key, entry in drained.items():
+                newer = self._pending.get(key)
+                if newer is not None:
+                    entry.merge(newer)
+                self._pending[key] = entry
+
+    def flush(self, db: Session) -> int:
+        """
+        Write all pending heartbeats with batched upserts and commit.
+
+        On failure the drained entries are merged back so the next flush
+        retries them.
+
+        Returns:
+            Number of progress rows written
+        """
+        with self._flush_lock:
+            with self._lock:
+                drained, self._pending = self._pending, {}
+            if not drained:
+                return 0
+
+            # Heartbeats without a scroll position must not reset the stored
+            # one, so those rows go through an upsert that leaves it alone.
+            with_scroll, without_scroll = [], []
+            for (enrollment_id, module_id), entry in drained.items():
+                row = {
+                    "id": uuid.uuid4(),
+                    "enrollment_id": enrollment_id,
+                    "module_id": module_id,
+                    "scorm_status": "incomplete",
+                    "progress_pct": 0,
+                    "last_scroll_position": entry.last_scroll_position or 0,
+                    "active_time_seconds": entry.active_time_delta,
+                    "sections_viewed": list(entry.sections),
+                    "last_accessed_at": entry.last_accessed_at,
+                }
+                (with_scroll if entry.last_scroll_position is not None else without_scroll).append(row)
+            try:
+                for rows, update_scroll in ((with_scroll, True), (without_scroll, False)):
+                    if rows:
+                        db.execute(_upsert(rows, update_scroll))
+                db.commit()
+            except Exception:
+                db.rollback()
+                self._restore(drained)
+                logger.exception("Failed to flush %d progress heartbeats; will retry", len(drained))
+                raise
+            progress_snapshot_cache.invalidate_enrollments({enrollment_id for enrollment_id, _ in drained})
+            return len(drained)
+
+
+# Global buffer instance (one per worker process)
+heartbeat_buffer = ProgressHeartbeatBuffer()
+
+
+def flush_heartbeats(db: Session) -> int:
+    """Scheduler/shutdown entry point."""
+    return heartbeat_buffer.flush(db)
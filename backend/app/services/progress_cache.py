@@ -0,0 +1,66 @@
+"""
+Short-lived cache of per-enrollment progress snapshots.
+
+GET /progress/{user_id} backs every dashboard view. Snapshots are cached per
+enrollment for PROGRESS_SNAPSHOT_CACHE_SECONDS and dropped as soon as this
+process writes progress for that enrollment (progress updates, heartbeat
+flushes, xAPI projection). Writes made by other workers are picked up when
+the entry expires, so the TTL bounds staleness across processes.
+"""
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+from uuid import UUID
+
+from app.core.config import settings
+
+
+class ProgressSnapshotCache:
+    """Thread-safe TTL cache keyed by user, invalidated by enrollment."""
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_entries: int = 10000):
+        self.ttl_seconds = settings.PROGRESS_SNAPSHOT_CACHE_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: Dict[UUID, Tuple[float, UUID, Any]] = {}  # user -> (expiry, enrollment, snapshot)
+        self._users_by_enrollment: Dict[UUID, UUID] = {}
+
+    def get(self, user_id: UUID) -> Optional[Any]:
+        if self.ttl_seconds <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires, enrollment_id, snapshot = entry
+            if expires <= time.monotonic():
+                self._entries.pop(user_id, None)
+                self._users_by_enrollment.pop(enrollment_id, None)
+                return None
+            return snapshot
+
+    def set(self, user_id: UUID, enrollment_id: UUID, snapshot: Any) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            if len(self._entries) >= self.max_entries and user_id not in self._entries:
+                self._entries.clear()
+                self._users_by_enrollment.clear()
+            self._entries[user_id] = (time.monotonic() + self.ttl_seconds, enrollment_id, snapshot)
+            self._users_by_enrollment[enrollment_id] = user_id
+
+    def invalidate_enrollments(self, enrollment_ids: Iterable[UUID]) -> None:
+        with self._lock:
+            for enrollment_id in enrollment_ids:
+                user_id = self._users_by_enrollment.pop(enrollment_id, None)
+                if user_id is not None:
+                    self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._users_by_enrollment.clear()
+
+
+# Global cache instance (one per worker process)
+progress_snapshot_cache = ProgressSnapshotCache()
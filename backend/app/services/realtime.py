@@ -0,0 +1,267 @@
+"""
+Change notifications pushed to portals over server-sent events.
+
+Instead of polling /progress/{user_id}, /documents/ or the public signing
+status endpoint, clients hold open GET /api/events/stream (or
+/api/public/sign/{token}/events) and refetch only when told something
+changed. Events are small (ids and statuses), never full records.
+
+Routing is by topic:
+
+- "user:<id>": events about one learner (their progress and documents)
+- "staff": every progress/document event, for admin portals
+- "document:<id>": one document's signing status (public signing page)
+
+publish() is safe to call from request threads and scheduler jobs. With
+REALTIME_PG_NOTIFY enabled, events go through PostgreSQL NOTIFY on
+REALTIME_NOTIFY_CHANNEL and every worker's listener thread (including the
+publisher's) delivers them to its own subscribers, so clients connected to
+any Gunicorn worker hear about changes made in any other. Without it,
+delivery is limited to the publishing process.
+
+Delivery is best effort: a subscriber that falls behind by more than
+REALTIME_QUEUE_SIZE events gets a single "resync" event and should refetch.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db import session as session_module
+
+logger = logging.getLogger(__name__)
+
+STAFF_TOPIC = "staff"
+
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more
+MAX_NOTIFY_PAYLOAD = 7900
+
+
+def user_topic(user_id: Any) -> str:
+    return f"user:{user_id}"
+
+
+def document_topic(document_id: Any) -> str:
+    return f"document:{document_id}"
+
+
+@dataclass
+class Event:
+    """One change notification."""
+    type: str
+    data: Dict[str, Any]
+    topics: Tuple[str, ...]
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {"id": self.id, "type": self.type, "data": self.data, "topics": list(self.topics)},
+            default=str,
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def from_json(cls, payload: str) -> "Event":
+        raw = json.loads(payload)
+        return cls(type=raw["type"], data=raw.get("data") or {}, topics=tuple(raw.get("topics") or ()), id=raw["id"])
+
+    def encode(self) -> str:
+        """Server-sent events frame."""
+        data = json.dumps(self.data, default=str, separators=(",", ":"))
+        return f"id: {self.id}\nevent: {self.type}\ndata: {data}\n\n"
+
+
+class Subscription:
+    """A bounded event queue owned by one stream, living on that stream's event loop."""
+
+    def __init__(self, topics: Iterable[str], max_queue: int):
+        self.topics: Set[str] = set(topics)
+        self.loop = asyncio.get_running_loop()
+        self._queue: "asyncio.Queue[Event]" = asyncio.Queue(max_queue)
+        self._overflowed = False
+
+    def _offer(self, event: Event) -> None:
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self._overflowed = True
+
+    async def get(self, timeout: float) -> Optional[Event]:
+        """
+        Next event, or None if nothing arrived within timeout.
+
+        After an overflow the backlog is dropped and a "resync" event is
+        returned instead.
+        """
+        if self._overflowed:
+            self._overflowed = False
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            return Event(type="resync", data={}, topics=())
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBroker:
+    """Per-process pub/sub; optionally fanned out across processes by PgNotifyBridge."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions: Set[Subscription] = set()
+        self.bridge: Optional["PgNotifyBridge"] = None
+
+    def subscribe(self, topics: Iterable[str], max_queue: Optional[int] = None) -> Subscription:
+        """Register a subscription; must be called from the stream's event loop."""
+        subscription = Subscription(topics, max_queue or settings.REALTIME_QUEUE_SIZE)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscriptions)
+
+    def dispatch(self, event: Event) -> None:
+        """Deliver an event to this process's matching subscribers (thread-safe)."""
+        with self._lock:
+            targets = [s for s in self._subscriptions if s.topics.intersection(event.topics)]
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._offer, event)
+            except RuntimeError:  # loop already closed; the stream is gone
+                self.unsubscribe(subscription)
+
+    def publish(self, event_type: str, data: Dict[str, Any], topics: Iterable[str]) -> Event:
+        """
+        Announce a committed change. Never raises: a failed notification must
+        not fail the write that triggered it.
+        """
+        event = Event(type=event_type, data=data, topics=tuple(dict.fromkeys(topics)))
+        bridge = self.bridge
+        if bridge is not None and bridge.listening:
+            try:
+                bridge.notify(event)
+                return event
+            except Exception:
+                logger.exception("NOTIFY failed for %s event; delivering locally only", event_type)
+        self.dispatch(event)
+        return event
+
+
+class PgNotifyBridge:
+    """LISTENs on a dedicated connection and feeds notifications into the broker."""
+
+    def __init__(self, broker: EventBroker, channel: Optional[str] = None, poll_seconds: float = 5.0):
+        self.broker = broker
+        self.channel = channel or settings.REALTIME_NOTIFY_CHANNEL
+        self.poll_seconds = poll_seconds
+        self.listening = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="realtime-listen", daemon=True)
+        self._thread.start()
+        self.broker.bridge = self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_seconds + 1)
+        self.broker.bridge = None
+        self.listening = False
+
+    def notify(self, event: Event) -> None:
+        payload = event.to_json()
+        if len(payload.encode()) > MAX_NOTIFY_PAYLOAD:
+            raise ValueError(f"{event.type} event is too large for NOTIFY")
+        with session_module.engine.connect() as conn:
+            conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": self.channel, "payload": payload})
+            conn.commit()
+
+    def _listen_once(self) -> None:
+        # Detached from the pool: the connection lives as long as the listener
+        raw = session_module.engine.raw_connection()
+        raw.detach()
+        conn = raw.driver_connection
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+            self.listening = True
+            while not self._stop.is_set():
+                if select.select([conn], [], [], self.poll_seconds) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notification = conn.notifies.pop(0)
+                    try:
+                        self.broker.dispatch(Event.from_json(notification.payload))
+                    except (ValueError, KeyError):
+                        logger.warning("Ignoring malformed notification on %s", self.channel)
+        finally:
+            self.listening = False
+            conn.close()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._listen_once()
+            except Exception:
+                logger.exception("Realtime LISTEN connection failed; reconnecting")
+                self._stop.wait(self.poll_seconds)
+
+
+# Global broker instance (one per worker process)
+broker = EventBroker()
+
+
+def publish(event_type: str, data: Dict[str, Any], topics: Iterable[str]) -> Event:
+    return broker.publish(event_type, data, topics)
+
+
+async def stream_events(
+    subscription: Subscription,
+    keepalive_seconds: Optional[float] = None,
+    max_seconds: Optional[float] = None,
+    until=None,
+):
+    """
+    Yield SSE frames for a subscription until the client goes away.
+
+    The stream ends after max_seconds so EventSource reconnects through
+    authentication again (expired or revoked tokens stop receiving events);
+    ``until`` may end it earlier when it returns True for a delivered event.
+    """
+    keepalive = keepalive_seconds or settings.REALTIME_KEEPALIVE_SECONDS
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + (max_seconds or settings.REALTIME_STREAM_MAX_SECONDS)
+    try:
+        yield f"retry: {settings.REALTIME_RETRY_MS}\nevent: ready\ndata: {{}}\n\n"
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            event = await subscription.get(min(keepalive, remaining))
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            yield event.encode()
+            if until is not None and until(event):
+                return
+    finally:
+        broker.unsubscribe(subscription)
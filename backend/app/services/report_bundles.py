@@ -0,0 +1,117 @@
+"""
+Compliance audit bundles: several compliance exports in one ZIP.
+
+Each (resource, format) part is rendered by render_part() in the background
+job process pool, with a session of its own, into a temporary file. The ZIP
+is streamed to the client while that happens: parts are added in the order
+they finish, and manifest.json (row counts, sizes and SHA-256 checksums of
+every part) is written last.
+"""
+import json
+import logging
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+from app.db import session as session_module
+from app.services.background_jobs import artifact_dir, run_in_pool, sha256_file
+from app.services.compliance_reports import render_compliance_report
+
+logger = logging.getLogger(__name__)
+
+COPY_CHUNK_SIZE = 256 * 1024
+
+
+def part_name(params: Dict[str, Any]) -> str:
+    return f"{params['resource']}_report.{params['format']}"
+
+
+def render_part(params: Dict[str, Any], path: str) -> Dict[str, Any]:
+    """Process-pool entry point: render one export (job params) to path."""
+    db = session_module.SessionLocal()
+    try:
+        with open(path, "wb") as out:
+            info = render_compliance_report(db, params, out, lambda done, total: None)
+    finally:
+        db.close()
+    info["sha256"] = sha256_file(Path(path))
+    info["size"] = Path(path).stat().st_size
+    return info
+
+
+class _ZipStream:
+    """Write-only sink for zipfile whose output is drained between writes."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_bundle(parts: List[Dict[str, Any]], filters: Dict[str, str]) -> Iterator[bytes]:
+    """
+    Render parts concurrently and yield the ZIP as they complete.
+
+    Args:
+        parts: render_compliance_report params, one per file
+        filters: Filters applied to every part (recorded in the manifest)
+    """
+    workdir = Path(tempfile.mkdtemp(prefix=".bundle-", dir=artifact_dir()))
+    futures = {}
+    try:
+        for index, params in enumerate(parts):
+            path = workdir / f"{index}-{part_name(params)}"
+            futures[run_in_pool(render_part, params, str(path))] = (params, path)
+
+        manifest: Dict[str, Any] = {
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "filters": filters,
+            "files": [],
+        }
+        sink = _ZipStream()
+        # Non-seekable sink: zipfile writes sizes/CRCs in data descriptors
+        with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as bundle:
+            for future in as_completed(futures):
+                params, path = futures[future]
+                entry = {"file": part_name(params), "resource": params["resource"], "format": params["format"]}
+                try:
+                    info = future.result()
+                except Exception as exc:
+                    logger.exception("Bundle part %s failed", entry["file"])
+                    entry["error"] = f"{type(exc).__name__}: {exc}"
+                    manifest["files"].append(entry)
+                    continue
+                entry.update(row_count=info["row_count"], size=info["size"], sha256=info["sha256"])
+                manifest["files"].append(entry)
+
+                with bundle.open(entry["file"], mode="w", force_zip64=True) as dest, path.open("rb") as src:
+                    for block in iter(lambda: src.read(COPY_CHUNK_SIZE), b""):
+                        dest.write(block)
+                        data = sink.drain()
+                        if data:
+                            yield data
+                path.unlink(missing_ok=True)
+                yield sink.drain()
+
+            manifest["files"].sort(key=lambda item: item["file"])
+            bundle.writestr("manifest.json", json.dumps(manifest, indent=2))
+        yield sink.drain()
+    finally:
+        # Also reached when the client disconnects mid-download
+        for future in futures:
+            future.cancel()
+        shutil.rmtree(workdir, ignore_errors=True)
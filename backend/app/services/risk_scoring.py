@@ -0,0 +1,229 @@
+"""
+At-risk learner scoring over module engagement data.
+
+One aggregate query loads per-enrollment engagement for the active
+enrollments being scored; pandas then derives their features in a single
+vectorized pass:
+
+- inactivity_days: days since the last progress update or xAPI activity
+  (enrollment start date if there is none)
+- pace_gap: expected completion fraction by today (from start_date and
+  expected_end_date) minus the fraction of modules completed
+- time_percentile: active time per started module, ranked within the
+  program's active cohort
+- score shortfall: how far the average module score is below PASSING_SCORE
+
+The weighted features become a 0-100 risk_score and a low/medium/high level,
+stored in enrollment_risk_scores and served ranked by GET /progress/at-risk.
+
+Runs are incremental: the feature query only loads enrollments with
+activity since they were last scored, never scored, or last scored before
+today (inactivity and pace move with the calendar). Cohort percentiles rank
+them against the time per module stored with the other enrollments' scores,
+which cannot have changed without new activity.
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.db.models.enrollment import EnrollmentRiskScore
+
+logger = logging.getLogger(__name__)
+
+JOB_NAME = "at-risk-scoring"
+
+# Feature weights (sum to 1) and the values at which each feature saturates
+WEIGHT_INACTIVITY = 0.35
+WEIGHT_PACE = 0.35
+WEIGHT_TIME = 0.20
+WEIGHT_SCORE = 0.10
+INACTIVITY_SATURATION_DAYS = 21
+PACE_SATURATION = 0.5
+PASSING_SCORE = 70
+
+HIGH_RISK = 60
+MEDIUM_RISK = 35
+
+_FEATURES_SQL = text("""
+    SELECT e.id AS enrollment_id,
+           e.user_id,
+           e.program_id,
+           e.start_date,
+           e.expected_end_date,
+           count(m.id) AS modules_total,
+           count(mp.id) FILTER (WHERE mp.scorm_status IN ('completed', 'passed')) AS modules_completed,
+           count(mp.id) AS modules_started,
+           COALESCE(sum(mp.active_time_seconds), 0) AS active_time_seconds,
+           avg(mp.score) AS average_score,
+           max(GREATEST(mp.last_accessed_at, mp.last_activity_at)) AS last_activity_at,
+           r.computed_at
+    FROM enrollments e
+    LEFT JOIN modules m ON m.program_id = e.program_id
+    LEFT JOIN module_progress mp ON mp.enrollment_id = e.id AND mp.module_id = m.id
+    LEFT JOIN enrollment_risk_scores r ON r.enrollment_id = e.id
+    WHERE e.status = 'active'
+      AND (
+          CAST(:changed_since AS timestamptz) IS NULL
+          OR r.computed_at IS NULL
+          OR r.computed_at < :changed_since
+          OR EXISTS (
+              SELECT 1 FROM module_progress changed
+              WHERE changed.enrollment_id = e.id
+                AND GREATEST(changed.last_accessed_at, changed.last_activity_at) > r.computed_at
+          )
+      )
+    GROUP BY e.id, r.computed_at
+""")
+
+
+def load_features(db: Session, changed_since: Optional[datetime] = None) -> pd.DataFrame:
+    """
+    Engagement per active enrollment.
+
+    With changed_since, only enrollments never scored, last scored before
+    changed_since, or with module activity after their last score.
+    """
+    result = db.execute(_FEATURES_SQL, {"changed_since": changed_since})
+    return pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+
+
+def load_cohort(db: Session, df: pd.DataFrame) -> pd.DataFrame:
+    """Stored time per module of the other scored enrollments in the programs of df."""
+    rows = db.execute(
+        select(
+            EnrollmentRiskScore.enrollment_id,
+            EnrollmentRiskScore.program_id,
+            EnrollmentRiskScore.time_per_module_seconds.label("time_per_module"),
+        ).where(
+            EnrollmentRiskScore.program_id.in_(df["program_id"].unique().tolist()),
+            EnrollmentRiskScore.time_per_module_seconds.is_not(None),
+        )
+    ).all()
+    cohort = pd.DataFrame(rows, columns=["enrollment_id", "program_id", "time_per_module"])
+    return cohort[~cohort["enrollment_id"].isin(df["enrollment_id"])]
+
+
+def score_frame(df: pd.DataFrame, now: datetime, cohort: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Add feature, risk_score and risk_level columns to the loaded frame.
+
+    Time percentiles rank within the frame's programs, plus cohort (see
+    load_cohort()) when df holds only part of them.
+    """
+    df = df.copy()
+    now_ts = pd.Timestamp(now)
+    today = now_ts.normalize()
+    start = pd.to_datetime(df["start_date"]).dt.tz_localize("UTC")
+    end = pd.to_datetime(df["expected_end_date"]).dt.tz_localize("UTC")
+    last_activity = pd.to_datetime(df["last_activity_at"], utc=True)
+
+    last_seen = last_activity.fillna(start)
+    df["inactivity_days"] = ((now_ts - last_seen).dt.total_seconds() // 86400).clip(lower=0).astype(int)
+
+    span_days = (end - start).dt.days
+    expected = ((today - start).dt.days / span_days.where(span_days > 0)).clip(0, 1)
+    modules_total = df["modules_total"].astype(float)
+    actual = (df["modules_completed"] / modules_total.where(modules_total > 0)).fillna(0.0)
+    # No expected end date: no pace expectation to fall behind
+    df["pace_gap"] = (expected - actual).where(expected.notna(), 0.0).clip(-1, 1)
+
+    df["time_per_module"] = df["active_time_seconds"].astype(float) / df["modules_started"].clip(lower=1)
+    times = df[["program_id", "time_per_module"]]
+    if cohort is not None and not cohort.empty:
+        others = cohort[["program_id", "time_per_module"]].astype({"time_per_module": float})
+        times = pd.concat([times, others], ignore_index=True)
+    ranks = times["time_per_module"].groupby(times["program_id"]).rank(pct=True, method="average")
+    df["time_percentile"] = ranks.iloc[:len(df)].to_numpy()
+
+    average_score = pd.to_numeric(df["average_score"], errors="coerce").astype(float)
+    score_shortfall = ((PASSING_SCORE - average_score) / PASSING_SCORE).clip(0, 1).fillna(0.0)
+
+    risk = (
+        WEIGHT_INACTIVITY * (df["inactivity_days"] / INACTIVITY_SATURATION_DAYS).clip(0, 1)
+        + WEIGHT_PACE * (df["pace_gap"] / PACE_SATURATION).clip(0, 1)
+        + WEIGHT_TIME * (1 - df["time_percentile"].fillna(0.5))
+        + WEIGHT_SCORE * score_shortfall
+    )
+    df["risk_score"] = (risk * 100).round(2)
+    df["risk_level"] = np.select(
+        [df["risk_score"] >= HIGH_RISK, df["risk_score"] >= MEDIUM_RISK], ["high", "medium"], default="low"
+    )
+    df["average_score"] = average_score
+    return df
+
+
+def _records(df: pd.DataFrame, now: datetime) -> List[Dict[str, Any]]:
+    def optional(value):
+        return None if pd.isna(value) else float(value)
+
+    def timestamp(value):
+        return None if pd.isna(value) else pd.Timestamp(value).to_pydatetime()
+
+    return [
+        {
+            "enrollment_id": row.enrollment_id,
+            "user_id": row.user_id,
+            "program_id": row.program_id,
+            "risk_score": float(row.risk_score),
+            "risk_level": str(row.risk_level),
+            "inactivity_days": int(row.inactivity_days),
+            "pace_gap": round(float(row.pace_gap), 4),
+            "time_percentile": optional(row.time_percentile),
+            "time_per_module_seconds": round(float(row.time_per_module), 2),
+            "average_score": optional(row.average_score),
+            "modules_completed": int(row.modules_completed),
+            "modules_total": int(row.modules_total),
+            "last_activity_at": timestamp(row.last_activity_at),
+            "computed_at": now,
+        }
+        for row in df.itertuples(index=False)
+    ]
+
+
+def compute_risk_scores(db: Session, full: bool = False, batch_size: int = 1000) -> Dict[str, int]:
+    """
+    Score active enrollments and upsert enrollment_risk_scores.
+
+    Args:
+        db: Database session
+        full: Rescore every active enrollment, not just changed ones
+        batch_size: Rows per upsert statement
+
+    Returns:
+        Counts of enrollments scored and stale scores removed
+    """
+    now = datetime.now(timezone.utc)
+    removed = db.execute(text(
+        "DELETE FROM enrollment_risk_scores r USING enrollments e "
+        "WHERE e.id = r.enrollment_id AND e.status IS DISTINCT FROM 'active'"
+    )).rowcount
+
+    start_of_day = pd.Timestamp(now).normalize().to_pydatetime()
+    df = load_features(db, changed_since=None if full else start_of_day)
+    scored = 0
+    if not df.empty:
+        df = score_frame(df, now, cohort=None if full else load_cohort(db, df))
+        records = _records(df, now)
+        for offset in range(0, len(records), batch_size):
+            stmt = pg_insert(EnrollmentRiskScore).values(records[offset:offset + batch_size])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[EnrollmentRiskScore.enrollment_id],
+                set_={column: stmt.excluded[column] for column in records[0] if column != "enrollment_id"},
+            )
+            db.execute(stmt)
+        scored = len(records)
+    db.commit()
+    if scored or removed:
+        logger.info("Scored %d enrollments for risk, removed %d stale scores", scored, removed)
+    return {"scored": scored, "removed": removed}
+
+
+def run_scoring(db: Session) -> Dict[str, int]:
+    """Scheduler entry point (incremental)."""
+    return compute_risk_scores(db)
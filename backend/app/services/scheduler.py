@@ -0,0 +1,113 @@
+"""
+In-process periodic job scheduler.
+
+Runs maintenance jobs (xAPI rollups, partition retention, ...) on a fixed
+interval from the API process. Every Gunicorn worker starts the same
+scheduler, so each run takes a PostgreSQL advisory lock named after the job:
+whichever worker gets the lock does the work and the others skip that tick.
+
+Jobs are plain synchronous functions taking a Session; they run in a worker
+thread so the event loop is never blocked. The same functions can be invoked
+from cron via backend/scripts.
+
+Jobs that act on per-process state (e.g. flushing an in-memory buffer) are
+registered with exclusive=False: every worker runs them, without the lock.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.db import session as session_module
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PeriodicJob:
+    """A named job and how often to run it."""
+    name: str
+    interval_seconds: float
+    func: Callable[[Session], object]
+    initial_delay_seconds: float = 30.0
+    exclusive: bool = True
+
+
+def run_exclusive(name: str, func: Callable[[Session], object]) -> Optional[object]:
+    """
+    Run func with its own session while holding the advisory lock for name.
+
+    Returns:
+        The job's return value, or None if another process holds the lock
+    """
+    db: Session = session_module.SessionLocal()
+    try:
+        acquired = db.execute(
+            text("SELECT pg_try_advisory_lock(hashtext(:name))"), {"name": name}
+        ).scalar()
+        db.commit()
+        if not acquired:
+            logger.debug("Skipping job %s: lock held elsewhere", name)
+            return None
+        try:
+            return func(db)
+        finally:
+            db.rollback()
+            db.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": name})
+            db.commit()
+    finally:
+        db.close()
+
+
+def run_local(func: Callable[[Session], object]) -> object:
+    """Run func with its own session, without cross-process locking."""
+    db: Session = session_module.SessionLocal()
+    try:
+        return func(db)
+    finally:
+        db.close()
+
+
+class Scheduler:
+    """Owns the asyncio tasks driving registered periodic jobs."""
+
+    def __init__(self):
+        self._jobs: List[PeriodicJob] = []
+        self._tasks: List[asyncio.Task] = []
+
+    def register(self, job: PeriodicJob) -> None:
+        self._jobs.append(job)
+
+    async def _loop(self, job: PeriodicJob) -> None:
+        await asyncio.sleep(job.initial_delay_seconds)
+        while True:
+            try:
+                if job.exclusive:
+                    await asyncio.to_thread(run_exclusive, job.name, job.func)
+                else:
+                    await asyncio.to_thread(run_local, job.func)
+            except Exception:  # keep the loop alive; the next tick retries
+                logger.exception("Background job %s failed", job.name)
+            await asyncio.sleep(job.interval_seconds)
+
+    def start(self, exclusive_jobs: bool = True) -> None:
+        """Start job loops; exclusive_jobs=False starts only per-process jobs."""
+        for job in self._jobs:
+            if job.exclusive and not exclusive_jobs:
+                continue
+            self._tasks.append(asyncio.create_task(self._loop(job), name=f"job:{job.name}"))
+        if self._tasks:
+            logger.info("Started %d background jobs", len(self._tasks))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+
+# Global scheduler instance
+scheduler = Scheduler()
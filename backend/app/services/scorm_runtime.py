@@ -0,0 +1,225 @@
+"""
+SCORM runtime commit handling.
+
+SCO content calls LMSCommit/Commit with the cmi.* elements set since the last
+commit. Instead of rewriting the whole record (and every interaction) per
+commit, POST /scorm/runtime/{module_id}/commit takes those deltas:
+
+- scalar elements (status, score, session_time) are upserted onto the
+  scorm_records row, and the UPDATE is skipped when nothing changed
+- cmi.interactions.n.* become rows in scorm_interactions keyed by n; new
+  interactions are appended and resent ones only fill in their new fields
+
+Both SCORM 1.2 (cmi.core.*) and SCORM 2004 element names are accepted.
+session_time is also stored in seconds, and on finish it is added to
+total_time_seconds so time on task can be summed in SQL.
+"""
+import re
+import uuid
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Mapping, Optional
+from uuid import UUID
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.db.models.scorm import ScormInteraction, ScormRecord
+from app.utils.durations import parse_scorm_session_time
+
+_SCALAR_ELEMENTS = {
+    "cmi.core.lesson_status": "lesson_status",
+    "cmi.completion_status": "completion_status",
+    "cmi.success_status": "success_status",
+    "cmi.core.score.raw": "score_raw",
+    "cmi.score.raw": "score_raw",
+    "cmi.score.scaled": "score_scaled",
+    "cmi.core.session_time": "session_time",
+    "cmi.session_time": "session_time",
+}
+
+_INTERACTION_FIELDS = {
+    "id": "interaction_id",
+    "type": "type",
+    "student_response": "learner_response",  # SCORM 1.2
+    "learner_response": "learner_response",
+    "result": "result",
+    "weighting": "weighting",
+    "latency": "latency_seconds",
+    "time": "timestamp",  # SCORM 1.2
+    "timestamp": "timestamp",
+    "description": "description",
+}
+
+_INTERACTION_KEY = re.compile(r"^cmi\.interactions\.(\d+)\.(.+)$")
+_CORRECT_RESPONSE_KEY = re.compile(r"^correct_responses\.(\d+)\.pattern$")
+
+MAX_INTERACTIONS = 1000
+
+
+class InvalidCmiValue(ValueError):
+    """A cmi element value that cannot be stored (bad number or duration)."""
+
+
+@dataclass
+class CmiDelta:
+    """The cmi.* elements of one commit, split into record and interaction changes."""
+    record: Dict[str, Any] = field(default_factory=dict)
+    interactions: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+
+
+def _decimal(element: str, value: str) -> Decimal:
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise InvalidCmiValue(f"{element} must be a number")
+
+
+def _duration(element: str, value: str) -> float:
+    seconds = parse_scorm_session_time(value)
+    if seconds is None:
+        raise InvalidCmiValue(f"{element} is not a SCORM timespan or ISO 8601 duration")
+    return seconds
+
+
+def _lesson_status(scalars: Dict[str, str]) -> Optional[str]:
+    """SCORM 1.2 lesson_status, or the 2004 success/completion status pair folded into it."""
+    if "lesson_status" in scalars:
+        return scalars["lesson_status"]
+    success = scalars.get("success_status")
+    if success in ("passed", "failed"):
+        return success
+    return scalars.get("completion_status")
+
+
+def parse_cmi(elements: Mapping[str, Any]) -> CmiDelta:
+    """
+    Split committed cmi.* elements into scorm_records and scorm_interactions values.
+
+    Unsupported elements (suspend_data, objectives, *._count, ...) are ignored.
+
+    Raises:
+        InvalidCmiValue: A score, latency or session_time is malformed
+    """
+    delta = CmiDelta()
+    scalars: Dict[str, str] = {}
+    for element, raw in elements.items():
+        if raw is None:
+            continue
+        value = str(raw).strip()
+        if element in _SCALAR_ELEMENTS:
+            scalars[_SCALAR_ELEMENTS[element]] = value
+            continue
+        match = _INTERACTION_KEY.match(element)
+        if not match:
+            continue
+        position, name = int(match.group(1)), match.group(2)
+        if position >= MAX_INTERACTIONS:
+            raise InvalidCmiValue(f"At most {MAX_INTERACTIONS} interactions are supported")
+        interaction = delta.interactions.setdefault(position, {})
+        correct = _CORRECT_RESPONSE_KEY.match(name)
+        if correct:
+            interaction.setdefault("correct_responses", {})[int(correct.group(1))] = value
+        elif name in _INTERACTION_FIELDS:
+            column = _INTERACTION_FIELDS[name]
+            if column == "weighting":
+                interaction[column] = _decimal(element, value)
+            elif column == "latency_seconds":
+                interaction[column] = _duration(element, value)
+            else:
+                interaction[column] = value
+
+    for interaction in delta.interactions.values():
+        if "correct_responses" in interaction:
+            patterns = interaction["correct_responses"]
+            interaction["correct_responses"] = [patterns[index] for index in sorted(patterns)]
+
+    status = _lesson_status(scalars)
+    if status:
+        delta.record["lesson_status"] = status.lower()
+    if "score_raw" in scalars:
+        delta.record["score_raw"] = _decimal("score.raw", scalars["score_raw"])
+    if "score_scaled" in scalars:
+        delta.record["score_scaled"] = _decimal("cmi.score.scaled", scalars["score_scaled"])
+    if "session_time" in scalars:
+        delta.record["session_time"] = scalars["session_time"]
+        delta.record["session_time_seconds"] = _duration("session_time", scalars["session_time"])
+    return delta
+
+
+def _upsert_record(db: Session, user_id: UUID, module_id: UUID, values: Dict[str, Any], finish: bool) -> UUID:
+    insert_values = dict(values)
+    if finish and values.get("session_time_seconds") is not None:
+        insert_values["total_time_seconds"] = values["session_time_seconds"]
+    stmt = pg_insert(ScormRecord).values(id=uuid.uuid4(), user_id=user_id, module_id=module_id, **insert_values)
+    index_elements = [ScormRecord.user_id, ScormRecord.module_id]
+    set_ = {name: getattr(stmt.excluded, name) for name in values}
+    if "total_time_seconds" in insert_values:
+        set_["total_time_seconds"] = ScormRecord.total_time_seconds + stmt.excluded.session_time_seconds
+        stmt = stmt.on_conflict_do_update(index_elements=index_elements, set_=set_)
+    elif set_:
+        # Commits usually resend unchanged values; skip the row rewrite then
+        changed = or_(*(getattr(ScormRecord, name).is_distinct_from(getattr(stmt.excluded, name)) for name in values))
+        stmt = stmt.on_conflict_do_update(index_elements=index_elements, set_=set_, where=changed)
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+
+    record_id = db.execute(stmt.returning(ScormRecord.id)).scalar()
+    if record_id is None:  # existing row left untouched
+        record_id = db.execute(
+            select(ScormRecord.id).where(ScormRecord.user_id == user_id, ScormRecord.module_id == module_id)
+        ).scalar_one()
+    return record_id
+
+
+def _append_interactions(db: Session, record_id: UUID, interactions: Dict[int, Dict[str, Any]]) -> int:
+    columns = sorted({column for interaction in interactions.values() for column in interaction})
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "record_id": record_id,
+            "position": position,
+            **{column: interaction.get(column) for column in columns},
+        }
+        for position, interaction in sorted(interactions.items())
+    ]
+    stmt = pg_insert(ScormInteraction).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ScormInteraction.record_id, ScormInteraction.position],
+        set_={
+            column: func.coalesce(getattr(stmt.excluded, column), getattr(ScormInteraction, column))
+            for column in columns
+        },
+    )
+    db.execute(stmt)
+    return len(rows)
+
+
+def commit_runtime(
+    db: Session, user_id: UUID, module_id: UUID, elements: Mapping[str, Any], finish: bool = False
+) -> Dict[str, Any]:
+    """
+    Apply one runtime commit and commit the transaction.
+
+    Args:
+        db: Database session
+        user_id: Learner the SCO is running for
+        module_id: Module the SCO belongs to
+        elements: cmi.* element -> value pairs set since the previous commit
+        finish: The SCO called LMSFinish/Terminate; session_time is added to total_time_seconds
+
+    Returns:
+        record_id and the number of interactions written
+    """
+    delta = parse_cmi(elements)
+    record_id = _upsert_record(db, user_id, module_id, delta.record, finish)
+    written = _append_interactions(db, record_id, delta.interactions) if delta.interactions else 0
+    db.commit()
+    return {"record_id": record_id, "interactions_written": written}
+
+
+def list_interactions(db: Session, record_id: UUID) -> List[ScormInteraction]:
+    return list(db.scalars(
+        select(ScormInteraction).where(ScormInteraction.record_id == record_id).order_by(ScormInteraction.position)
+    ))
@@ -0,0 +1,143 @@
+"""
+Normalized signature images, stored out of row.
+
+Signature pads submit the whole canvas as a base64 data URL, mostly empty
+pixels, which used to be kept in document_signatures.signature_data and
+decoded again on every PDF render. Now each capture is decoded, cropped to
+the ink's bounding box, downscaled to fit SIGNATURE_MAX_WIDTH x
+SIGNATURE_MAX_HEIGHT and re-encoded as an optimized PNG. The PNG is written
+once to the file store (app.services.file_store) under its SHA-256 and the
+row keeps only that hash in signature_hash.
+
+signature_image() returns the PNG for rendering from a per-process cache.
+Rows captured before this change still carry signature_data and are decoded
+from it; scripts/migrate_signature_images.py moves them to the store. PNGs
+stored in SIGNATURE_BLOB_DIR before the file store existed are still read
+from there until scripts/migrate_to_file_store.py imports them.
+"""
+import base64
+import binascii
+import io
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional
+
+from PIL import Image, ImageOps
+
+from app.core.config import settings
+from app.services.file_store import BlobNotFound, get_file_store
+
+# Transparent margin kept around the ink after cropping
+CROP_PADDING = 4
+# Pixels lighter than this count as background on opaque (e.g. JPEG) captures
+INK_THRESHOLD = 224
+# Largest canvas accepted, checked from the image header before decoding:
+# a 3x-density signature pad is well within it, and the RGBA copy of the
+# largest allowed canvas stays around 32 MB
+MAX_CANVAS_SIDE = 4096
+MAX_CANVAS_PIXELS = 8 * 1024 * 1024
+
+
+class InvalidSignatureImage(ValueError):
+    """The submitted signature is not a decodable, non-blank image."""
+
+
+def decode_signature_payload(signature_data: str) -> bytes:
+    """Image bytes of a base64 string or data URL."""
+    payload = signature_data.split(",", maxsplit=1)[-1]
+    try:
+        return base64.b64decode(payload, validate=True)
+    except (binascii.Error, ValueError) as exc:
+        raise InvalidSignatureImage("Signature is not valid base64") from exc
+
+
+def normalize_signature(signature_data: str) -> bytes:
+    """Decode, crop, downscale and re-encode a captured signature as PNG."""
+    raw = decode_signature_payload(signature_data)
+    unsupported = (OSError, ValueError, Image.DecompressionBombError)
+    try:
+        source = Image.open(io.BytesIO(raw))  # reads the header only
+    except unsupported as exc:
+        raise InvalidSignatureImage("Signature is not a supported image") from exc
+    with source:
+        width, height = source.size
+        if max(width, height) > MAX_CANVAS_SIDE or width * height > MAX_CANVAS_PIXELS:
+            raise InvalidSignatureImage(f"Signature canvas is too large ({width}x{height})")
+        try:
+            image = source.convert("RGBA")
+        except unsupported as exc:
+            raise InvalidSignatureImage("Signature is not a supported image") from exc
+
+    bbox = _ink_bbox(image)
+    if bbox is None:
+        raise InvalidSignatureImage("Signature is blank")
+    left, top, right, bottom = bbox
+    image = image.crop((
+        max(left - CROP_PADDING, 0),
+        max(top - CROP_PADDING, 0),
+        min(right + CROP_PADDING, image.width),
+        min(bottom + CROP_PADDING, image.height),
+    ))
+    image.thumbnail((settings.SIGNATURE_MAX_WIDTH, settings.SIGNATURE_MAX_HEIGHT), Image.Resampling.LANCZOS)
+
+    out = io.BytesIO()
+    image.save(out, "PNG", optimize=True)
+    return out.getvalue()
+
+
+def _ink_bbox(image: Image.Image) -> Optional[tuple]:
+    alpha = image.getchannel("A")
+    if alpha.getextrema()[0] < 255:
+        # Transparent canvas: ink is whatever is not fully transparent
+        return alpha.getbbox()
+    # Opaque background: ink is whatever is noticeably darker than it
+    darkness = ImageOps.invert(image.convert("L"))
+    return darkness.point(lambda value: 255 if value > 255 - INK_THRESHOLD else 0).getbbox()
+
+
+def legacy_signature_path(signature_hash: str) -> Path:
+    """Where the PNG was kept before the file store (SIGNATURE_BLOB_DIR/ab/<hash>.png)."""
+    return Path(settings.SIGNATURE_BLOB_DIR) / signature_hash[:2] / f"{signature_hash}.png"
+
+
+def store_signature(signature_data: str) -> str:
+    """
+    Normalize a captured signature and store it once.
+
+    Returns:
+        SHA-256 of the normalized PNG, for DocumentSignature.signature_hash
+
+    Raises:
+        InvalidSignatureImage: if it cannot be decoded or is blank
+    """
+    return get_file_store().put_bytes(normalize_signature(signature_data))
+
+
+@lru_cache(maxsize=512)
+def load_signature(signature_hash: str) -> bytes:
+    """The stored PNG for a hash; blobs never change, so they are cached."""
+    try:
+        return get_file_store().read(signature_hash)
+    except BlobNotFound:
+        legacy = legacy_signature_path(signature_hash)
+        if legacy.exists():
+            return legacy.read_bytes()
+        raise
+
+
+def signature_image(signature: Any) -> Optional[bytes]:
+    """
+    PNG/JPEG bytes of a DocumentSignature for rendering, or None if it has none.
+
+    Raises OSError if a referenced blob is missing, so the render fails
+    rather than producing an agreement without the signature.
+    """
+    signature_hash = getattr(signature, "signature_hash", None)
+    if signature_hash:
+        return load_signature(signature_hash)
+    if signature.signature_data:
+        try:
+            return decode_signature_payload(signature.signature_data)
+        except InvalidSignatureImage:
+            return None
+    return None
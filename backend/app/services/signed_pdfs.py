@@ -0,0 +1,470 @@
+"""
+Signed-PDF generation queue for e-signature documents.
+
+Signing used to render the final PDF (signature lookup, schema-driven layout
+or template overlay, file writes) while the signer waited. Now the signing
+endpoints only call request_signed_pdf(), which sets the document's
+pdf_status to "pending" and hands generate_signed_pdf() to a process pool of
+its own (SIGNED_PDF_WORKERS), so renders do not wait behind report jobs:
+
+- The queue is the signed_documents row itself (pdf_status,
+  pdf_requested_at, pdf_attempts, pdf_error), so requests survive restarts.
+  A worker holds the row lock while it renders; a signature added meanwhile
+  waits for it and then requests a fresh render.
+- dispatch_pending_pdfs() (scheduled) re-submits documents still pending
+  SIGNED_PDF_RETRY_SECONDS after their last dispatch, e.g. because their
+  worker died, until SIGNED_PDF_MAX_ATTEMPTS renders have been attempted
+  ("failed").
+- Once the PDF of a counter-signed document is ready, the completed
+  agreement is emailed to the signer (once).
+
+build_signed_pdf() does the render itself; the documents router and
+scripts/regen_signed_pdfs.py share its path and template helpers.
+"""
+import json
+import logging
+import os
+import tempfile
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+from uuid import UUID
+
+from sqlalchemy import select, text, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import session as session_module
+from app.db.models.document import DocumentAuditLog, DocumentSignature, DocumentTemplate, SignedDocument
+from app.domain.enrollment.schema import get_enrollment_agreement_schema
+from app.services.background_jobs import SIGNED_PDF_POOL, run_in_pool
+from app.services.email import EmailDeliveryError, send_completed_agreement_email
+from app.services.enrollment_pdf import SchemaDrivenPDFService
+from app.services.file_store import BlobNotFound, get_file_store
+from app.services.pdf_service import PDFSignatureService
+from app.services.realtime import STAFF_TOPIC, document_topic, publish, user_topic
+from app.services.signature_images import signature_image
+from app.services.template_cache import template_cache
+
+logger = logging.getLogger(__name__)
+
+DISPATCH_JOB_NAME = "signed-pdf-dispatch"
+COMPLETED_EMAIL_EVENT = "completed_agreement_emailed"
+
+PDF_PENDING = "pending"
+PDF_READY = "ready"
+PDF_FAILED = "failed"
+
+# Templates and signed PDFs live in the file store (app.services.file_store);
+# paths under here are student uploads and rows from before the store
+DOCUMENTS_BASE = Path("app/static/documents")
+ACKNOWLEDGEMENT_POSITIONS = [
+    ("initial_agreement_catalog", (420, 530)),
+    ("initial_school_outcomes", (420, 485)),
+    ("initial_employment", (420, 440)),
+    ("initial_refund_policy", (420, 395)),
+    ("initial_complaint_procedure", (420, 350)),
+    ("initial_authorization", (420, 305)),
+]
+
+
+class InvalidDocumentPath(ValueError):
+    """A stored document path that is absolute or climbs out of app/static."""
+
+
+def resolve_document_file(path_value: Optional[str]) -> Optional[Path]:
+    """
+    Securely resolve a stored document/template path to an absolute filesystem path.
+
+    Security: Prevents path traversal attacks by validating paths stay within allowed directories.
+
+    Returns:
+        Absolute Path to the file, None if path_value is empty
+
+    Raises:
+        InvalidDocumentPath: path is absolute or contains ".."
+        PermissionError: path resolves outside app/static
+        FileNotFoundError: file does not exist
+    """
+    if not path_value:
+        return None
+
+    # Security: Block path traversal attempts
+    if ".." in path_value or path_value.startswith("/"):
+        raise InvalidDocumentPath("Invalid file path")
+
+    candidate = Path(path_value)
+    if candidate.parts[:1] == (DOCUMENTS_BASE.parent.name,):
+        # Signed PDFs used to be recorded relative to app/ ("static/documents/signed/...")
+        candidate = Path(*candidate.parts[1:])
+
+    # Security: Block absolute paths from user input
+    if candidate.is_absolute():
+        raise InvalidDocumentPath("Absolute paths not allowed")
+
+    # Resolve relative to the allowed base directory (app/static)
+    allowed_base = DOCUMENTS_BASE.parent.resolve()
+    resolved = (allowed_base / candidate).resolve()
+
+    # Security: Verify resolved path is within allowed directory
+    try:
+        resolved.relative_to(allowed_base)
+    except ValueError:
+        raise PermissionError("Access denied")
+
+    if not resolved.exists():
+        raise FileNotFoundError(path_value)
+
+    return resolved
+
+
+def template_source(template: DocumentTemplate) -> Optional[Union[str, Path]]:
+    """The template's PDF: its blob hash, or the file of a template from before the file store."""
+    if template.blob_hash:
+        return template.blob_hash
+    return resolve_document_file(template.file_path)
+
+
+def request_signed_pdf(
+    db: Session,
+    document: SignedDocument,
+    user_id: Optional[UUID] = None,
+    ip_address: Optional[str] = None,
+    user_agent: Optional[str] = None,
+) -> None:
+    """
+    Queue (re-)rendering of a document's signed PDF and return immediately.
+
+    user_id, ip_address and user_agent are recorded on the "pdf_generated"
+    audit event of the render this request triggers.
+    """
+    document.pdf_status = PDF_PENDING
+    document.pdf_requested_at = datetime.now(timezone.utc)
+    document.pdf_attempts = 0
+    document.pdf_error = None
+    db.commit()
+    actor = {
+        "user_id": str(user_id) if user_id else None,
+        "ip_address": ip_address,
+        "user_agent": user_agent,
+    }
+    dispatch(document.id, actor)
+
+
+def dispatch(document_id: UUID, actor: Optional[Dict[str, Any]] = None) -> None:
+    try:
+        future = run_in_pool(generate_signed_pdf, str(document_id), actor, pool=SIGNED_PDF_POOL)
+    except Exception:
+        # Still pending in the database; dispatch_pending_pdfs picks it up
+        logger.exception("Could not submit signed PDF render for document %s", document_id)
+        return
+    future.add_done_callback(lambda f, document_id=document_id: _on_done(document_id, f))
+
+
+def _on_done(document_id: UUID, future: Future) -> None:
+    # Runs in the API process, where the signing page and staff are subscribed
+    try:
+        result = future.result()
+    except Exception as exc:
+        logger.error("Signed PDF render for document %s did not complete: %r", document_id, exc)
+        return
+    if result is None:
+        return
+    topics = [STAFF_TOPIC, document_topic(result["document_id"])]
+    if result["user_id"]:
+        topics.append(user_topic(result["user_id"]))
+    publish("document.pdf_ready" if result["pdf_status"] == PDF_READY else "document.pdf_failed", result, topics)
+
+
+def _claim(db: Session, document_id: UUID) -> Optional[SignedDocument]:
+    """Count an attempt, then lock the document for rendering if still pending."""
+    attempts = db.execute(
+        text(
+            "UPDATE signed_documents SET pdf_attempts = pdf_attempts + 1 "
+            "WHERE id = :id AND pdf_status = 'pending' RETURNING pdf_attempts"
+        ),
+        {"id": document_id},
+    ).scalar()
+    db.commit()  # a worker that dies mid-render still used up its attempt
+    if attempts is None:
+        return None
+    return db.scalars(
+        select(SignedDocument)
+        .where(SignedDocument.id == document_id, SignedDocument.pdf_status == PDF_PENDING)
+        .with_for_update()
+    ).first()
+
+
+def generate_signed_pdf(document_id: str, actor: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Process-pool entry point: render one pending signed PDF.
+
+    Returns:
+        Event payload for the API process, or None if the document was not
+        pending (already rendered by another worker)
+    """
+    actor = actor or {}
+    db: Session = session_module.SessionLocal()
+    document_uuid = UUID(document_id)
+    try:
+        document = _claim(db, document_uuid)
+        if document is None:
+            db.rollback()
+            return None
+        template = db.get(DocumentTemplate, document.template_id)
+        try:
+            generated = template is not None and build_signed_pdf(
+                document,
+                template,
+                db,
+                user_id=UUID(actor["user_id"]) if actor.get("user_id") else None,
+                ip_address=actor.get("ip_address"),
+                user_agent=actor.get("user_agent"),
+            )
+        except Exception as exc:
+            db.rollback()
+            logger.exception("Signed PDF render for document %s failed", document_id)
+            _record_failure(db, document_uuid, f"{type(exc).__name__}: {exc}")
+        else:
+            if not generated:
+                # Missing template file or no signatures: retrying will not help
+                document.pdf_status = PDF_FAILED
+                document.pdf_error = "Signed PDF could not be generated"
+                db.commit()
+            if document.pdf_status == PDF_READY:
+                _send_completed_agreement(db, document, template)
+
+        document = db.get(SignedDocument, document_uuid)
+        return {
+            "document_id": document_id,
+            "user_id": str(document.user_id) if document.user_id else None,
+            "status": document.status,
+            "pdf_status": document.pdf_status,
+        }
+    finally:
+        db.close()
+
+
+def build_signed_pdf(
+    document: SignedDocument,
+    template: DocumentTemplate,
+    db: Session,
+    user_id: Optional[UUID] = None,
+    ip_address: Optional[str] = None,
+    user_agent: Optional[str] = None,
+) -> bool:
+    """
+    Generate/refresh the final signed PDF with all collected signatures.
+
+    Runs in a background worker (generate_signed_pdf()); signing endpoints
+    call request_signed_pdf() instead.
+    """
+    all_signatures = (
+        db.query(DocumentSignature)
+        .filter(DocumentSignature.document_id == document.id)
+        .order_by(DocumentSignature.signed_at.asc())
+        .all()
+    )
+
+    if not all_signatures:
+        return False
+
+    form_data = document.form_data if isinstance(document.form_data, dict) else {}
+    # Rendered to a scratch file, then moved into the file store
+    fd, scratch = tempfile.mkstemp(prefix=f"{document.id}_signed-", suffix=".pdf")
+    os.close(fd)
+    signed_path = Path(scratch)
+    try:
+        success = _render_signed_pdf(document, template, form_data, all_signatures, signed_path)
+        if success:
+            signed_blob_hash = get_file_store().put_file(signed_path, move=True)
+    finally:
+        signed_path.unlink(missing_ok=True)
+
+    if not success:
+        return False
+
+    document.signed_blob_hash = signed_blob_hash
+    document.signed_file_path = None
+    document.pdf_status = PDF_READY
+    document.pdf_error = None
+    if document.status == "completed" and not document.completed_at:
+        document.completed_at = datetime.now(timezone.utc)
+    db.commit()
+
+    db.add(DocumentAuditLog(
+        document_id=document.id,
+        event_type="pdf_generated",
+        user_id=user_id,
+        event_details=json.dumps({"signed_blob_hash": document.signed_blob_hash}),
+        ip_address=ip_address,
+        user_agent=user_agent,
+    ))
+    db.commit()
+
+    return True
+
+
+def _render_signed_pdf(
+    document: SignedDocument,
+    template: DocumentTemplate,
+    form_data: Dict[str, Any],
+    all_signatures: List[DocumentSignature],
+    signed_path: Path,
+) -> bool:
+    """Write the signed PDF (schema-driven layout or template overlay) to signed_path."""
+    schema = None
+    schema_loaded = False
+    try:
+        schema = get_enrollment_agreement_schema()
+        schema_loaded = True
+    except Exception:  # pragma: no cover - schema file missing or invalid
+        schema_loaded = False
+
+    use_schema_pdf = schema_loaded and template.name.lower().startswith("enrollment agreement")
+    if use_schema_pdf:
+        schema_service = SchemaDrivenPDFService(schema)
+        success = schema_service.generate_pdf(
+            output_pdf_path=signed_path,
+            document=document,
+            form_data=form_data,
+            signatures=all_signatures,
+        )
+    else:
+        source = template_source(template)
+        if not source:
+            return False
+
+        # Arrange signatures in two columns to avoid overlap
+        signature_list: List[Tuple[Optional[bytes], str, int, int]] = []
+        base_x = 80
+        base_y = 120
+        column_width = 250
+        row_height = 90
+        signatures_per_row = 2
+
+        for index, sig in enumerate(all_signatures):
+            row = index // signatures_per_row
+            column = index % signatures_per_row
+            x_pos = base_x + column * column_width
+            y_pos = base_y + row * row_height
+            signature_list.append((signature_image(sig), sig.signature_type, x_pos, y_pos))
+
+        acknowledgements = []
+        ack_values = form_data.get("acknowledgements") if isinstance(form_data, dict) else None
+        if isinstance(ack_values, dict):
+            for key, (ack_x, ack_y) in ACKNOWLEDGEMENT_POSITIONS:
+                value = ack_values.get(key)
+                if isinstance(value, str) and value.strip():
+                    initials = value.strip().upper()[:4]
+                    acknowledgements.append((initials, ack_x, ack_y))
+
+        metadata = {
+            "title": template.name,
+            "author": "AADA LMS",
+            "subject": template.name,
+            "document_id": str(document.id),
+            "signed_date": datetime.now(timezone.utc).isoformat(),
+        }
+
+        with template_cache.reader(template.id, template.version, source) as template_pdf:
+            success = PDFSignatureService.overlay_signatures(
+                template_pdf_path=template_pdf,
+                output_pdf_path=signed_path,
+                signatures=signature_list,
+                metadata=metadata,
+                acknowledgements=acknowledgements,
+            )
+    return success
+
+
+def _record_failure(db: Session, document_id: UUID, error: str) -> None:
+    """Give up after SIGNED_PDF_MAX_ATTEMPTS; otherwise leave it pending for a retry."""
+    db.execute(
+        text(
+            "UPDATE signed_documents SET pdf_error = :error, "
+            "pdf_status = CASE WHEN pdf_attempts >= :max_attempts THEN 'failed' ELSE pdf_status END "
+            "WHERE id = :id AND pdf_status = 'pending'"
+        ),
+        {"id": document_id, "error": error[:2000], "max_attempts": settings.SIGNED_PDF_MAX_ATTEMPTS},
+    )
+    db.commit()
+
+
+def _send_completed_agreement(db: Session, document: SignedDocument, template: DocumentTemplate) -> None:
+    """Email the counter-signed agreement to the signer, once per document."""
+    if document.status != "completed" or not document.counter_signed_at or not document.signer_email:
+        return
+    already_sent = db.scalar(
+        select(DocumentAuditLog.id).where(
+            DocumentAuditLog.document_id == document.id, DocumentAuditLog.event_type == COMPLETED_EMAIL_EVENT
+        ).limit(1)
+    )
+    if already_sent or not document.signed_blob_hash:
+        return
+    try:
+        pdf_content = get_file_store().read(document.signed_blob_hash)
+    except BlobNotFound:
+        logger.error("Signed PDF blob %s of document %s is missing", document.signed_blob_hash, document.id)
+        return
+
+    # Signer name from the first student/lead signature
+    first_sig = db.scalars(
+        select(DocumentSignature)
+        .where(DocumentSignature.document_id == document.id, DocumentSignature.signature_type != "school_official")
+        .order_by(DocumentSignature.signed_at.asc())
+        .limit(1)
+    ).first()
+    try:
+        send_completed_agreement_email(
+            to_email=document.signer_email,
+            signer_name=first_sig.typed_name if first_sig else "Student",
+            course_label=template.name if template else "Dental Assisting",
+            pdf_content=pdf_content,
+            pdf_filename=f"AADA_Enrollment_Agreement_{document.id}.pdf",
+        )
+    except EmailDeliveryError as e:
+        logger.error(f"Failed to send completed agreement email: {e}")
+        return
+    db.add(DocumentAuditLog(
+        document_id=document.id,
+        event_type=COMPLETED_EMAIL_EVENT,
+        event_details=json.dumps({"to": document.signer_email}),
+    ))
+    db.commit()
+    logger.info(f"Sent completed agreement email to {document.signer_email} for document {document.id}")
+
+
+def dispatch_pending_pdfs(db: Session) -> Dict[str, int]:
+    """Re-submit renders still pending SIGNED_PDF_RETRY_SECONDS after they were last dispatched."""
+    # Workers that died mid-render never recorded a failure
+    given_up = db.execute(
+        text(
+            "UPDATE signed_documents SET pdf_status = 'failed', "
+            "pdf_error = COALESCE(pdf_error, 'Signed PDF render did not complete') "
+            "WHERE pdf_status = 'pending' AND pdf_attempts >= :max_attempts"
+        ),
+        {"max_attempts": settings.SIGNED_PDF_MAX_ATTEMPTS},
+    ).rowcount
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(seconds=settings.SIGNED_PDF_RETRY_SECONDS)
+    # Rows a worker is rendering right now are locked: skip them
+    document_ids = db.scalars(
+        select(SignedDocument.id)
+        .where(SignedDocument.pdf_status == PDF_PENDING, SignedDocument.pdf_requested_at < cutoff)
+        .order_by(SignedDocument.pdf_requested_at)
+        .limit(100)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if document_ids:
+        # Restart the retry clock, so the next tick does not queue them again
+        db.execute(
+            update(SignedDocument).where(SignedDocument.id.in_(document_ids)).values(pdf_requested_at=now)
+        )
+    db.commit()
+    for document_id in document_ids:
+        dispatch(document_id)
+    if document_ids or given_up:
+        logger.info("Signed PDFs: re-dispatched %d pending renders, gave up on %d", len(document_ids), given_up)
+    return {"dispatched": len(document_ids), "failed": given_up}
@@ -0,0 +1,115 @@
+"""
+Process-wide cache of document template PDFs.
+
+Signing overlays and unsigned copies used to re-read (and, for overlays,
+re-parse) the template file for every document, although templates rarely
+change. Entries hold the template bytes and a parsed PdfReader, keyed by
+DocumentTemplate.id, version and the content's blob hash (file store) or,
+for templates still kept as files, the file's mtime, so replaced content or
+a new version is never served from cache. The cache is an LRU bounded by
+TEMPLATE_CACHE_MAX_BYTES of template file size.
+
+Each process (API workers, background job workers) has its own cache. The
+template endpoints call invalidate() on upload, toggle and delete to free
+entries early; other processes simply stop hitting them.
+"""
+import io
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional, Tuple, Union
+from uuid import UUID
+
+from pypdf import PdfReader
+
+from app.core.config import settings
+from app.services.file_store import get_file_store
+
+CacheKey = Tuple[UUID, str, Union[str, int]]
+# A template's PDF: its blob hash in the file store, or a file path
+TemplateSource = Union[str, Path]
+
+
+@dataclass
+class CachedTemplate:
+    content: bytes
+    _reader: Optional[PdfReader] = None
+    # PdfReader seeks its stream lazily; one user at a time
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @property
+    def reader(self) -> PdfReader:
+        if self._reader is None:
+            self._reader = PdfReader(io.BytesIO(self.content))
+        return self._reader
+
+
+class TemplateCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[CacheKey, CachedTemplate]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, template_id: UUID, version: str, source: TemplateSource) -> CachedTemplate:
+        """The cached entry for a template's PDF, loading it on a miss."""
+        if isinstance(source, Path):
+            key = (template_id, version, source.stat().st_mtime_ns)
+        else:
+            key = (template_id, version, source)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        if isinstance(source, Path):
+            entry = CachedTemplate(content=source.read_bytes())
+        else:
+            entry = CachedTemplate(content=get_file_store().read(source))
+        with self._lock:
+            # Older mtimes/versions of the same template are dead weight now
+            for stale in [k for k in self._entries if k[0] == template_id and k != key]:
+                self._size -= len(self._entries.pop(stale).content)
+            if key not in self._entries and len(entry.content) <= self.max_bytes:
+                self._entries[key] = entry
+                self._size += len(entry.content)
+                while self._size > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._size -= len(evicted.content)
+            return self._entries.get(key, entry)
+
+    @contextmanager
+    def reader(self, template_id: UUID, version: str, source: TemplateSource) -> Iterator[PdfReader]:
+        """
+        Parsed template for the duration of the block.
+
+        Treat its pages as read-only: PdfWriter.add_page() clones a page into
+        the writer, so merge overlays into the page it returns.
+        """
+        entry = self.get(template_id, version, source)
+        with entry.lock:
+            yield entry.reader
+
+    def invalidate(self, template_id: UUID) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == template_id]:
+                self._size -= len(self._entries.pop(key).content)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+
+template_cache = TemplateCache(settings.TEMPLATE_CACHE_MAX_BYTES)
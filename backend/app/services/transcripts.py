@@ -0,0 +1,413 @@
+"""
+Transcript results, GPA and PDF rendering.
+
+Transcript PDFs are content-addressed: the file name is a SHA-256 of
+everything printed on it (student name, program, module results, GPA, issue
+date and TEMPLATE_VERSION), so issuing a transcript whose results have not
+changed on the same day reuses the existing PDF, and any change, or a later
+issue date, renders a new one. Transcript rows
+reference their PDF via pdf_url/content_hash; sweep_transcript_pdfs removes
+files no row references any more.
+
+Shared by POST /transcripts (one student) and cohort batches. A batch
+(render_transcript_batch, run as a "transcript_batch" background job or from
+scripts/transcript_batch.py) loads the module results of every enrollment in
+a program with one joined query, renders the PDFs in parallel in
+TRANSCRIPT_RENDER_WORKERS spawned processes, stores a Transcript row and PDF
+per student like the single-student endpoint, and writes all of them to one
+ZIP together with an index.csv.
+"""
+import csv
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from decimal import Decimal, ROUND_HALF_UP
+from io import BytesIO, StringIO
+from itertools import groupby
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.pdfgen import canvas
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.downloads import make_servable
+from app.db.models.compliance.transcript import Transcript
+from app.db.models.enrollment import Enrollment, ModuleProgress
+from app.db.models.program import Module, Program
+from app.schemas.transcripts import ModuleResult
+from app.utils.encryption import decrypt_user_names
+
+logger = logging.getLogger(__name__)
+
+GENERATED_DIR = Path("generated/transcripts")
+# Bump whenever write_transcript_pdf changes what it prints, so cached PDFs are re-rendered
+TEMPLATE_VERSION = 1
+SWEEP_JOB_NAME = "transcript-pdf-sweep"
+
+
+@dataclass
+class StudentResults:
+    user_id: UUID
+    enrollment_id: UUID
+    student_name: str
+    modules: List[ModuleResult]
+    gpa: Optional[Decimal]
+
+
+def calculate_gpa(results: List[ModuleResult]) -> Decimal | None:
+    scores = [module.score for module in results if module.score is not None]
+    if not scores:
+        return None
+    avg_score = sum(scores) / len(scores)
+    gpa = min(4.0, avg_score / 25)
+    return Decimal(str(gpa)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def write_transcript_pdf(
+    out: BinaryIO,
+    student_name: str,
+    program: str,
+    issued_at: datetime,
+    modules: List[ModuleResult],
+    gpa: Decimal | None,
+) -> None:
+    pdf = canvas.Canvas(out, pagesize=letter)
+    width, height = letter
+    margin = inch
+    y = height - margin
+
+    pdf.setFont("Helvetica-Bold", 18)
+    pdf.drawString(margin, y, "AADA Official Transcript")
+    y -= 0.5 * inch
+
+    pdf.setFont("Helvetica", 12)
+    pdf.drawString(margin, y, f"Student: {student_name}")
+    y -= 0.25 * inch
+    pdf.drawString(margin, y, f"Program: {program}")
+    y -= 0.25 * inch
+    if gpa is not None:
+        pdf.drawString(margin, y, f"GPA: {float(gpa):.2f}")
+        y -= 0.25 * inch
+    pdf.drawString(margin, y, f"Issued: {issued_at.date().isoformat()}")
+    y -= 0.4 * inch
+
+    pdf.setFont("Helvetica-Bold", 12)
+    pdf.drawString(margin, y, "Modules")
+    y -= 0.3 * inch
+
+    pdf.setFont("Helvetica", 11)
+    for module in modules:
+        if y < margin:
+            pdf.showPage()
+            y = height - margin
+            pdf.setFont("Helvetica", 11)
+        pdf.drawString(
+            margin,
+            y,
+            f"{module.module_code} - {module.module_title} | Score: "
+            f"{module.score if module.score is not None else 'N/A'} | "
+            f"Progress: {module.progress_pct if module.progress_pct is not None else 'N/A'}%",
+        )
+        y -= 0.22 * inch
+
+    pdf.showPage()
+    pdf.save()
+
+
+def program_label(program: Program) -> str:
+    return f"{program.name} ({program.code})"
+
+
+def transcript_content_hash(
+    student_name: str, program: str, issued_at: datetime, modules: List[ModuleResult], gpa: Decimal | None
+) -> str:
+    """SHA-256 of the transcript inputs, including the issue date printed on the page."""
+    payload = {
+        "template": TEMPLATE_VERSION,
+        "student_name": student_name,
+        "program": program,
+        "issued": issued_at.date().isoformat(),
+        "gpa": None if gpa is None else str(gpa),
+        "modules": [module.model_dump(mode="json") for module in modules],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def transcript_pdf_path(content_hash: str) -> Path:
+    return GENERATED_DIR / f"{content_hash}.pdf"
+
+
+def store_transcript_pdf(content_hash: str, pdf: bytes) -> Path:
+    """Atomically write a rendered PDF under its content hash."""
+    GENERATED_DIR.mkdir(parents=True, exist_ok=True)
+    path = transcript_pdf_path(content_hash)
+    fd, tmp_name = tempfile.mkstemp(prefix=".tmp-", dir=GENERATED_DIR)
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(pdf)
+        make_servable(tmp_name)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return path
+
+
+def cached_transcript_pdf(content_hash: str) -> Optional[Path]:
+    """
+    The stored PDF for content_hash, if any.
+
+    Its mtime is refreshed so the sweeper's grace period covers the Transcript
+    row about to reference it.
+    """
+    path = transcript_pdf_path(content_hash)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+def ensure_transcript_pdf(
+    student_name: str,
+    program: str,
+    issued_at: datetime,
+    modules: List[ModuleResult],
+    gpa: Decimal | None,
+) -> Tuple[str, Path]:
+    """
+    Return (content hash, PDF path) for a transcript, rendering it only if no
+    PDF with identical inputs exists. The issue date is one of the inputs, so
+    a reused PDF always shows the date of the transcript it is attached to.
+    """
+    content_hash = transcript_content_hash(student_name, program, issued_at, modules, gpa)
+    path = cached_transcript_pdf(content_hash)
+    if path is None:
+        buffer = BytesIO()
+        write_transcript_pdf(buffer, student_name, program, issued_at, modules, gpa)
+        path = store_transcript_pdf(content_hash, buffer.getvalue())
+    return content_hash, path
+
+
+def sweep_transcript_pdfs(db: Session) -> Dict[str, int]:
+    """
+    Delete transcript PDFs that no Transcript row references.
+
+    Referenced PDFs are kept for as long as their transcript record is, and
+    unreferenced ones only once untouched for TRANSCRIPT_PDF_GRACE_SECONDS
+    (a request may be about to reference a PDF it just rendered or reused).
+    """
+    if not GENERATED_DIR.is_dir():
+        return {"files_removed": 0}
+    referenced = {
+        Path(pdf_url).name
+        for pdf_url in db.scalars(select(Transcript.pdf_url).where(Transcript.pdf_url.isnot(None)).distinct())
+    }
+    db.commit()
+
+    removed = 0
+    cutoff = time.time() - settings.TRANSCRIPT_PDF_GRACE_SECONDS
+    for path in GENERATED_DIR.iterdir():
+        if not path.is_file() or path.name in referenced:
+            continue
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            continue
+    if removed:
+        logger.info("Swept %d unreferenced transcript PDFs", removed)
+    return {"files_removed": removed}
+
+
+def load_cohort_results(
+    db: Session,
+    program_id: UUID,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> List[StudentResults]:
+    """
+    Module results and GPA for each student's latest enrollment in a program.
+
+    One query joins the latest enrollment per student (optionally only those
+    starting between start and end, inclusive) with its module progress and
+    modules. Students without module progress are left out, as the
+    single-student endpoint refuses them too.
+    """
+    cohort = [Enrollment.program_id == program_id]
+    if start:
+        cohort.append(Enrollment.start_date >= start)
+    if end:
+        cohort.append(Enrollment.start_date <= end)
+    latest = (
+        select(Enrollment.id, Enrollment.user_id)
+        .where(*cohort)
+        .distinct(Enrollment.user_id)
+        .order_by(Enrollment.user_id, Enrollment.start_date.desc())
+        .subquery()
+    )
+    rows = db.execute(
+        select(
+            latest.c.user_id,
+            latest.c.id.label("enrollment_id"),
+            Module.id.label("module_id"),
+            Module.code,
+            Module.title,
+            ModuleProgress.score,
+            ModuleProgress.progress_pct,
+            ModuleProgress.scorm_status,
+        )
+        .select_from(latest)
+        .join(ModuleProgress, ModuleProgress.enrollment_id == latest.c.id)
+        .join(Module, Module.id == ModuleProgress.module_id)
+        .order_by(latest.c.user_id, Module.position.asc())
+    ).all()
+
+    names = decrypt_user_names(db, {row.user_id for row in rows})
+    students: List[StudentResults] = []
+    for user_id, group in groupby(rows, key=lambda row: row.user_id):
+        group = list(group)
+        modules = [
+            ModuleResult(
+                module_id=row.module_id,
+                module_code=row.code,
+                module_title=row.title,
+                score=row.score,
+                progress_pct=row.progress_pct,
+                scorm_status=row.scorm_status,
+            )
+            for row in group
+        ]
+        students.append(StudentResults(
+            user_id=user_id,
+            enrollment_id=group[0].enrollment_id,
+            student_name=names.get(user_id, ""),
+            modules=modules,
+            gpa=calculate_gpa(modules),
+        ))
+    students.sort(key=lambda student: (student.student_name.casefold(), str(student.user_id)))
+    return students
+
+
+def render_student_pdf(student: StudentResults, label: str, issued_at: datetime) -> bytes:
+    """Process-pool entry point: one transcript PDF (no database access)."""
+    buffer = BytesIO()
+    write_transcript_pdf(buffer, student.student_name, label, issued_at, student.modules, student.gpa)
+    return buffer.getvalue()
+
+
+def _archive_name(student: StudentResults) -> str:
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", student.student_name).strip("_") or "student"
+    return f"{slug}_{str(student.user_id)[:8]}.pdf"
+
+
+def render_transcript_batch(
+    db: Session,
+    params: Dict[str, Any],
+    out: BinaryIO,
+    progress: Callable[[int, Optional[int]], None],
+) -> Dict[str, Any]:
+    """
+    Background job handler: issue transcripts for a program cohort.
+
+    Args:
+        db: Database session (owned by the worker process)
+        params: {"program_id": ..., "start": "YYYY-MM-DD" (optional), "end": ... (optional)}
+        out: Binary file the ZIP is written to
+        progress: Called with (transcripts rendered, students in the cohort)
+
+    Returns:
+        Artifact metadata (filename, content_type, row_count = transcripts issued)
+    """
+    program = db.get(Program, UUID(params["program_id"]))
+    if program is None:
+        raise ValueError(f"Program {params['program_id']} not found")
+    start = date.fromisoformat(params["start"]) if params.get("start") else None
+    end = date.fromisoformat(params["end"]) if params.get("end") else None
+
+    students = load_cohort_results(db, program.id, start, end)
+    total = len(students)
+    progress(0, total)
+    issued_at = datetime.now(timezone.utc)
+    label = program_label(program)
+    transcripts = [
+        Transcript(
+            user_id=student.user_id,
+            program_id=program.id,
+            gpa=student.gpa,
+            generated_at=issued_at,
+            content_hash=transcript_content_hash(
+                student.student_name, label, issued_at, student.modules, student.gpa
+            ),
+        )
+        for student in students
+    ]
+    db.add_all(transcripts)
+    db.flush()
+
+    cached = {}
+    pending = []
+    for student, transcript in zip(students, transcripts):
+        path = cached_transcript_pdf(transcript.content_hash)
+        if path is None:
+            pending.append((student, transcript))
+        else:
+            cached[transcript.id] = path
+
+    index_rows = []
+
+    def add(archive: zipfile.ZipFile, student: StudentResults, transcript: Transcript, path: Path) -> None:
+        transcript.pdf_url = str(path)
+        name = _archive_name(student)
+        archive.write(path, name)
+        index_rows.append([
+            name, student.student_name, student.user_id, transcript.id, student.gpa, len(student.modules)
+        ])
+        progress(len(index_rows), total)
+
+    with zipfile.ZipFile(out, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for student, transcript in zip(students, transcripts):
+            if transcript.id in cached:
+                add(archive, student, transcript, cached[transcript.id])
+        if pending:
+            # Only students whose results changed since their last transcript are rendered
+            with ProcessPoolExecutor(
+                max_workers=max(1, min(settings.TRANSCRIPT_RENDER_WORKERS, len(pending))),
+                mp_context=multiprocessing.get_context("spawn"),
+            ) as pool:
+                futures = {
+                    pool.submit(render_student_pdf, student, label, issued_at): (student, transcript)
+                    for student, transcript in pending
+                }
+                for future in as_completed(futures):
+                    student, transcript = futures[future]
+                    path = store_transcript_pdf(transcript.content_hash, future.result())
+                    add(archive, student, transcript, path)
+
+        index = StringIO()
+        index_writer = csv.writer(index)
+        index_writer.writerow(["file", "student_name", "user_id", "transcript_id", "gpa", "modules"])
+        index_writer.writerows(sorted(index_rows, key=lambda row: row[0]))
+        archive.writestr("index.csv", index.getvalue())
+    db.commit()
+
+    return {
+        "filename": f"transcripts_{program.code}_{issued_at:%Y%m%d}.zip",
+        "content_type": "application/zip",
+        "row_count": total,
+    }
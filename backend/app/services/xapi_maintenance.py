@@ -0,0 +1,349 @@
+"""
+xAPI statement storage maintenance.
+
+- Monthly range partitions on xapi_statements.stored_at are created ahead of
+  time (rows that landed in the DEFAULT partition are moved across).
+- Statements are rolled up incrementally into xapi_daily_rollups, tracked by
+  a (stored_at, id) checkpoint so each statement is counted exactly once.
+- Raw partitions older than the retention window are dropped, but only once
+  every registered consumer has checkpointed past them.
+
+run_maintenance() performs all three and is scheduled from app.main; it can
+also be run from cron via backend/scripts/xapi_maintenance.py.
+"""
+import logging
+import re
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import func, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models.xapi import XapiCheckpoint, XapiDailyRollup, XapiStatement
+from app.utils.durations import parse_iso8601_duration
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_CONSUMER = "daily_rollup"
+PROGRESS_PROJECTION_CONSUMER = "module_progress_projection"  # app.services.xapi_progress_projection
+
+# Consumers that must have processed a partition before it can be dropped.
+RETENTION_CONSUMERS = {ROLLUP_CONSUMER, PROGRESS_PROJECTION_CONSUMER}
+
+PARTITION_PREFIX = "xapi_statements_p"
+DEFAULT_PARTITION = "xapi_statements_default"
+_PARTITION_NAME = re.compile(rf"^{PARTITION_PREFIX}(\d{{4}})(\d{{2}})$")
+
+ATTEMPT_VERBS = {"attempted", "launched", "initialized"}
+COMPLETION_VERBS = {"completed", "passed", "mastered"}
+
+Checkpoint = Tuple[datetime, UUID]
+
+
+# ---------------------------------------------------------------------------
+# Checkpoints and batch reads (shared by every incremental consumer)
+# ---------------------------------------------------------------------------
+
+def get_checkpoint(db: Session, consumer: str) -> Optional[Checkpoint]:
+    row = db.get(XapiCheckpoint, consumer)
+    if not row:
+        return None
+    return row.last_stored_at, row.last_id
+
+
+def save_checkpoint(db: Session, consumer: str, stored_at: datetime, statement_id: UUID) -> None:
+    """Upsert the consumer's checkpoint; caller commits with the batch it covers."""
+    stmt = pg_insert(XapiCheckpoint).values(
+        consumer=consumer, last_stored_at=stored_at, last_id=statement_id
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[XapiCheckpoint.consumer],
+        set_={
+            "last_stored_at": stmt.excluded.last_stored_at,
+            "last_id": stmt.excluded.last_id,
+            "updated_at": func.now(),
+        },
+    )
+    db.execute(stmt)
+
+
+def fetch_statement_batch(
+    db: Session,
+    after: Optional[Checkpoint],
+    limit: int,
+    lag_seconds: Optional[int] = None,
+) -> List[XapiStatement]:
+    """
+    Read the next batch of statements in (stored_at, id) order.
+
+    Statements newer than now - lag are left for a later run: stored_at is
+    assigned at insert time, so a slow transaction can still commit rows
+    slightly older than ones already visible.
+    """
+    lag = settings.XAPI_CONSUMER_LAG_SECONDS if lag_seconds is None else lag_seconds
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=lag)
+    query = db.query(XapiStatement).filter(XapiStatement.stored_at <= cutoff)
+    if after is not None:
+        query = query.filter(tuple_(XapiStatement.stored_at, XapiStatement.id) > tuple_(*after))
+    return (
+        query.order_by(XapiStatement.stored_at.asc(), XapiStatement.id.asc())
+        .limit(limit)
+        .all()
+    )
+
+
+# ---------------------------------------------------------------------------
+# Statement field helpers
+# ---------------------------------------------------------------------------
+
+def actor_key(actor: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Stable identifier for an xAPI agent (mbox, then account, then name)."""
+    if not isinstance(actor, dict):
+        return None
+    mbox = actor.get("mbox")
+    if mbox:
+        return str(mbox).strip().lower()
+    account = actor.get("account")
+    if isinstance(account, dict) and account.get("name"):
+        return f"{account.get('homePage', '')}::{account['name']}"
+    if actor.get("openid"):
+        return str(actor["openid"])
+    if actor.get("name"):
+        return str(actor["name"])
+    return None
+
+
+def verb_name(verb: Optional[Dict[str, Any]]) -> str:
+    """Last path segment of the verb IRI, lowercased (e.g. 'completed')."""
+    verb_id = (verb or {}).get("id") or ""
+    return str(verb_id).rstrip("/").rsplit("/", 1)[-1].lower()
+
+
+def _score(result: Optional[Dict[str, Any]]) -> Optional[Decimal]:
+    score = (result or {}).get("score") or {}
+    try:
+        if score.get("raw") is not None:
+            return Decimal(str(score["raw"]))
+        if score.get("scaled") is not None:
+            return Decimal(str(score["scaled"])) * 100
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Daily rollup
+# ---------------------------------------------------------------------------
+
+def _aggregate(statements: List[XapiStatement]) -> List[Dict[str, Any]]:
+    buckets: Dict[Tuple[date, str, str], Dict[str, Any]] = defaultdict(
+        lambda: {
+            "statements": 0,
+            "attempts": 0,
+            "completions": 0,
+            "best_score": None,
+            "time_spent_seconds": 0,
+            "last_statement_at": None,
+        }
+    )
+    for statement in statements:
+        actor = actor_key(statement.actor)
+        activity = (statement.object or {}).get("id")
+        if not actor or not activity:
+            continue
+        occurred = statement.timestamp.astimezone(timezone.utc)
+        bucket = buckets[(occurred.date(), actor[:320], str(activity)[:2048])]
+        verb = verb_name(statement.verb)
+        bucket["statements"] += 1
+        if verb in ATTEMPT_VERBS:
+            bucket["attempts"] += 1
+        if verb in COMPLETION_VERBS:
+            bucket["completions"] += 1
+        score = _score(statement.result)
+        if score is not None and (bucket["best_score"] is None or score > bucket["best_score"]):
+            bucket["best_score"] = score
+        duration = parse_iso8601_duration((statement.result or {}).get("duration"))
+        if duration:
+            bucket["time_spent_seconds"] += int(round(duration))
+        if bucket["last_statement_at"] is None or occurred > bucket["last_statement_at"]:
+            bucket["last_statement_at"] = occurred
+
+    return [
+        {"day": day, "actor_key": actor, "activity_id": activity, **values}
+        for (day, actor, activity), values in buckets.items()
+    ]
+
+
+def _upsert_rollups(db: Session, rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        return
+    stmt = pg_insert(XapiDailyRollup).values(rows)
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[XapiDailyRollup.day, XapiDailyRollup.actor_key, XapiDailyRollup.activity_id],
+        set_={
+            "statements": XapiDailyRollup.statements + excluded.statements,
+            "attempts": XapiDailyRollup.attempts + excluded.attempts,
+            "completions": XapiDailyRollup.completions + excluded.completions,
+            # GREATEST ignores NULLs in PostgreSQL
+            "best_score": func.greatest(XapiDailyRollup.best_score, excluded.best_score),
+            "time_spent_seconds": XapiDailyRollup.time_spent_seconds + excluded.time_spent_seconds,
+            "last_statement_at": func.greatest(XapiDailyRollup.last_statement_at, excluded.last_statement_at),
+        },
+    )
+    db.execute(stmt)
+
+
+def rollup_statements(db: Session, batch_size: int = 5000, lag_seconds: Optional[int] = None) -> int:
+    """
+    Fold statements stored since the last checkpoint into xapi_daily_rollups.
+
+    Each batch's rollup upsert and checkpoint advance commit together, so a
+    crash mid-run never double counts.
+
+    Returns:
+        Number of statements processed
+    """
+    processed = 0
+    after = get_checkpoint(db, ROLLUP_CONSUMER)
+    while True:
+        batch = fetch_statement_batch(db, after, batch_size, lag_seconds)
+        if not batch:
+            break
+        _upsert_rollups(db, _aggregate(batch))
+        last = batch[-1]
+        after = (last.stored_at, last.id)
+        save_checkpoint(db, ROLLUP_CONSUMER, *after)
+        db.commit()
+        processed += len(batch)
+        if len(batch) < batch_size:
+            break
+    return processed
+
+
+# ---------------------------------------------------------------------------
+# Partition management
+# ---------------------------------------------------------------------------
+
+def _month_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def _add_months(value: date, months: int) -> date:
+    month_index = value.year * 12 + (value.month - 1) + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARTITION_PREFIX}{month.year:04d}{month.month:02d}"
+
+
+def _table_exists(db: Session, name: str) -> bool:
+    return db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None
+
+
+def ensure_partitions(db: Session, months_ahead: Optional[int] = None) -> List[str]:
+    """
+    Create monthly partitions from the current month through months_ahead.
+
+    Rows for a new month that already landed in the DEFAULT partition are
+    moved into the new partition before it is attached.
+
+    Returns:
+        Names of the partitions created
+    """
+    ahead = settings.XAPI_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    has_default = _table_exists(db, DEFAULT_PARTITION)
+    current = _month_start(datetime.now(timezone.utc).date())
+    created: List[str] = []
+    for offset in range(ahead + 1):
+        lower = _add_months(current, offset)
+        upper = _add_months(lower, 1)
+        name = partition_name(lower)
+        if _table_exists(db, name):
+            continue
+        bounds = {"lower": f"{lower.isoformat()} 00:00:00+00", "upper": f"{upper.isoformat()} 00:00:00+00"}
+        db.execute(text(f"CREATE TABLE {name} (LIKE xapi_statements INCLUDING DEFAULTS)"))
+        if has_default:
+            db.execute(
+                text(
+                    f"WITH moved AS ("
+                    f"  DELETE FROM {DEFAULT_PARTITION}"
+                    f"  WHERE stored_at >= CAST(:lower AS timestamptz) AND stored_at < CAST(:upper AS timestamptz)"
+                    f"  RETURNING *"
+                    f") INSERT INTO {name} SELECT * FROM moved"
+                ),
+                bounds,
+            )
+        db.execute(
+            text(
+                f"ALTER TABLE xapi_statements ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{bounds['lower']}') TO ('{bounds['upper']}')"
+            )
+        )
+        db.commit()
+        created.append(name)
+    return created
+
+
+def _monthly_partitions(db: Session) -> List[Tuple[str, date]]:
+    rows = db.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'xapi_statements'::regclass"
+        )
+    ).scalars()
+    partitions = []
+    for name in rows:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def apply_retention(db: Session, retention_months: Optional[int] = None) -> List[str]:
+    """
+    Drop raw monthly partitions that are past retention and fully consumed.
+
+    A partition is dropped only when its upper bound is older than the
+    retention window and every consumer in RETENTION_CONSUMERS has a
+    checkpoint at or beyond that bound.
+
+    Returns:
+        Names of the partitions dropped
+    """
+    months = settings.XAPI_RAW_RETENTION_MONTHS if retention_months is None else retention_months
+    if months <= 0:
+        return []
+
+    checkpoints = [get_checkpoint(db, consumer) for consumer in RETENTION_CONSUMERS]
+    if any(checkpoint is None for checkpoint in checkpoints):
+        return []
+    consumed_through = min(checkpoint[0] for checkpoint in checkpoints)
+
+    retention_cutoff = _add_months(_month_start(datetime.now(timezone.utc).date()), -months)
+    dropped: List[str] = []
+    for name, lower in _monthly_partitions(db):
+        upper = _add_months(lower, 1)
+        upper_ts = datetime(upper.year, upper.month, 1, tzinfo=timezone.utc)
+        if upper > retention_cutoff or upper_ts > consumed_through:
+            continue
+        db.execute(text(f"DROP TABLE {name}"))
+        db.commit()
+        dropped.append(name)
+        logger.info("Dropped xAPI partition %s after rollup", name)
+    return dropped
+
+
+def run_maintenance(db: Session) -> Dict[str, Any]:
+    """Create upcoming partitions, roll up new statements, then apply retention."""
+    created = ensure_partitions(db)
+    rolled_up = rollup_statements(db)
+    dropped = apply_retention(db)
+    return {"partitions_created": created, "statements_rolled_up": rolled_up, "partitions_dropped": dropped}
@@ -0,0 +1,251 @@
+"""
+Project xAPI activity onto module_progress.last_activity_at.
+
+Statements are consumed incrementally in (stored_at, id) order behind the
+PROGRESS_PROJECTION_CONSUMER checkpoint. Each batch is reduced in memory to
+the latest activity per (actor, module), resolved to an enrollment with a
+handful of set-based queries, then applied with a single
+INSERT ... ON CONFLICT DO UPDATE. Progress endpoints read
+the column directly instead of scanning raw statements per request.
+
+Mapping:
+- Actor: mbox "mailto:<email>" matched against decrypted users.email, or
+  account.name holding the user id.
+- Module: a ".../modules/<module uuid>" IRI in object.id or in the context
+  parent/grouping activities.
+- Enrollment: the user's enrollment in the module's program (active first,
+  then most recent start date).
+
+Statements that cannot be mapped are skipped; the checkpoint still advances.
+After each batch commits, affected learners get a progress.updated push
+notification, plus xapi.completed for completed/passed statements.
+"""
+import logging
+import re
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.db.models.xapi import XapiStatement
+from app.services.progress_cache import progress_snapshot_cache
+from app.services.realtime import STAFF_TOPIC, publish, user_topic
+from app.services.xapi_maintenance import (
+    PROGRESS_PROJECTION_CONSUMER,
+    fetch_statement_batch,
+    get_checkpoint,
+    save_checkpoint,
+)
+from app.utils.encryption import ENCRYPTION_KEY
+
+logger = logging.getLogger(__name__)
+
+_MODULE_IRI = re.compile(r"/modules/([0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})")
+
+COMPLETION_VERBS = ("completed", "passed")
+
+# (user ref, module id) where user ref is ("email", address) or ("id", UUID)
+UserRef = Tuple[str, Any]
+
+
+def _user_ref(actor: Optional[Dict[str, Any]]) -> Optional[UserRef]:
+    if not isinstance(actor, dict):
+        return None
+    mbox = actor.get("mbox")
+    if mbox and str(mbox).lower().startswith("mailto:"):
+        return ("email", str(mbox)[len("mailto:"):].strip().lower())
+    account = actor.get("account")
+    if isinstance(account, dict) and account.get("name"):
+        try:
+            return ("id", UUID(str(account["name"])))
+        except ValueError:
+            return None
+    return None
+
+
+def _module_id(statement: XapiStatement) -> Optional[UUID]:
+    candidates = [(statement.object or {}).get("id")]
+    activities = ((statement.context or {}).get("contextActivities") or {})
+    for key in ("parent", "grouping"):
+        value = activities.get(key) or []
+        if isinstance(value, dict):
+            value = [value]
+        candidates.extend(item.get("id") for item in value if isinstance(item, dict))
+    for candidate in candidates:
+        match = _MODULE_IRI.search(str(candidate or ""))
+        if match:
+            return UUID(match.group(1))
+    return None
+
+
+def _is_completion(statement: XapiStatement) -> bool:
+    verb_id = str((statement.verb or {}).get("id") or "")
+    return verb_id.rstrip("/").rsplit("/", 1)[-1] in COMPLETION_VERBS
+
+
+def _latest_activity(
+    statements: Iterable[XapiStatement],
+) -> Tuple[Dict[Tuple[UserRef, UUID], datetime], Set[Tuple[UserRef, UUID]]]:
+    """Latest activity per (user ref, module), and the pairs with a completion statement."""
+    latest: Dict[Tuple[UserRef, UUID], datetime] = {}
+    completed: Set[Tuple[UserRef, UUID]] = set()
+    for statement in statements:
+        user = _user_ref(statement.actor)
+        module_id = _module_id(statement)
+        if user is None or module_id is None:
+            continue
+        # Client clocks can run ahead; never report activity after it was stored
+        occurred = min(statement.timestamp, statement.stored_at)
+        key = (user, module_id)
+        if key not in latest or occurred > latest[key]:
+            latest[key] = occurred
+        if _is_completion(statement):
+            completed.add(key)
+    return latest, completed
+
+
+def _resolve_emails(db: Session, emails: Set[str], known: Dict[str, Optional[UUID]]) -> None:
+    """Fill known with email -> user id for emails not looked up yet this run."""
+    pending = sorted(email for email in emails if email not in known)
+    if not pending:
+        return
+    # Emails are encrypted non-deterministically, so matching has to decrypt;
+    # one query per batch instead of one per statement.
+    rows = db.execute(
+        text(
+            "SELECT id, lower(pgp_sym_decrypt(decode(email, 'base64'), :key)) AS email "
+            "FROM users "
+            "WHERE lower(pgp_sym_decrypt(decode(email, 'base64'), :key)) = ANY(:emails)"
+        ),
+        {"key": ENCRYPTION_KEY, "emails": pending},
+    ).all()
+    for email in pending:
+        known[email] = None
+    for user_id, email in rows:
+        known[email] = user_id
+
+
+def _resolve_enrollments(db: Session, pairs: Set[Tuple[UUID, UUID]]) -> Dict[Tuple[UUID, UUID], UUID]:
+    """Map (user id, module id) to the enrollment covering that module."""
+    if not pairs:
+        return {}
+    user_ids = [str(user_id) for user_id, _ in pairs]
+    module_ids = [str(module_id) for _, module_id in pairs]
+    rows = db.execute(
+        text(
+            "SELECT DISTINCT ON (e.user_id, m.id) e.user_id, m.id, e.id "
+            "FROM unnest(CAST(:user_ids AS uuid[]), CAST(:module_ids AS uuid[])) AS p(user_id, module_id) "
+            "JOIN modules m ON m.id = p.module_id "
+            "JOIN enrollments e ON e.user_id = p.user_id AND e.program_id = m.program_id "
+            "ORDER BY e.user_id, m.id, (e.status = 'active') DESC, e.start_date DESC"
+        ),
+        {"user_ids": user_ids, "module_ids": module_ids},
+    ).all()
+    return {(user_id, module_id): enrollment_id for user_id, module_id, enrollment_id in rows}
+
+
+def _apply(db: Session, activity: Dict[Tuple[UUID, UUID], datetime]) -> int:
+    """Write (enrollment id, module id) -> timestamp, keeping the later value."""
+    if not activity:
+        return 0
+    params = {
+        "enrollment_ids": [str(enrollment_id) for enrollment_id, _ in activity],
+        "module_ids": [str(module_id) for _, module_id in activity],
+        "occurred": list(activity.values()),
+    }
+    values = (
+        "unnest(CAST(:enrollment_ids AS uuid[]), CAST(:module_ids AS uuid[]), "
+        "CAST(:occurred AS timestamptz[])) AS v(enrollment_id, module_id, occurred)"
+    )
+    # Activity on a module the student has no progress row for yet creates one
+    db.execute(
+        text(
+            "INSERT INTO module_progress (id, enrollment_id, module_id, scorm_status, progress_pct, "
+            "last_scroll_position, active_time_seconds, sections_viewed, last_activity_at) "
+            "SELECT gen_random_uuid(), v.enrollment_id, v.module_id, 'incomplete', 0, 0, 0, '[]', v.occurred "
+            f"FROM {values} "
+            "ON CONFLICT (enrollment_id, module_id) DO UPDATE "
+            "SET last_activity_at = GREATEST(module_progress.last_activity_at, excluded.last_activity_at)"
+        ),
+        params,
+    )
+    return len(activity)
+
+
+def _announce(
+    touched: Dict[UUID, List[Tuple[UUID, UUID]]], completed: Set[Tuple[UUID, UUID]]
+) -> None:
+    """Push one progress.updated per learner, and xapi.completed per completed module."""
+    for user_id, modules in touched.items():
+        topics = [user_topic(user_id), STAFF_TOPIC]
+        publish(
+            "progress.updated",
+            {"user_id": user_id, "module_ids": sorted({m for _, m in modules}, key=str), "source": "xapi"},
+            topics,
+        )
+        for enrollment_id, module_id in modules:
+            if (user_id, module_id) in completed:
+                publish(
+                    "xapi.completed",
+                    {"user_id": user_id, "enrollment_id": enrollment_id, "module_id": module_id},
+                    topics,
+                )
+
+
+def project_statements(db: Session, batch_size: int = 5000, lag_seconds: Optional[int] = None) -> int:
+    """
+    Apply statements stored since the last checkpoint to module_progress.
+
+    Each batch's writes and checkpoint advance commit together, and the
+    GREATEST() merge makes replaying a batch harmless.
+
+    Returns:
+        Number of statements processed
+    """
+    processed = 0
+    emails: Dict[str, Optional[UUID]] = {}
+    after = get_checkpoint(db, PROGRESS_PROJECTION_CONSUMER)
+    while True:
+        batch = fetch_statement_batch(db, after, batch_size, lag_seconds)
+        if not batch:
+            break
+
+        latest, completed_refs = _latest_activity(batch)
+        _resolve_emails(db, {ref[1] for ref, _ in latest if ref[0] == "email"}, emails)
+        by_user: Dict[Tuple[UUID, UUID], datetime] = {}
+        completed: Set[Tuple[UUID, UUID]] = set()
+        for (ref, module_id), occurred in latest.items():
+            user_id = emails.get(ref[1]) if ref[0] == "email" else ref[1]
+            if user_id is None:
+                continue
+            key = (user_id, module_id)
+            if key not in by_user or occurred > by_user[key]:
+                by_user[key] = occurred
+            if (ref, module_id) in completed_refs:
+                completed.add(key)
+
+        enrollments = _resolve_enrollments(db, set(by_user))
+        by_enrollment: Dict[Tuple[UUID, UUID], datetime] = {}
+        touched: Dict[UUID, List[Tuple[UUID, UUID]]] = {}
+        for (user_id, module_id), occurred in by_user.items():
+            enrollment_id = enrollments.get((user_id, module_id))
+            if enrollment_id is not None:
+                by_enrollment[(enrollment_id, module_id)] = occurred
+                touched.setdefault(user_id, []).append((enrollment_id, module_id))
+        _apply(db, by_enrollment)
+
+        last = batch[-1]
+        after = (last.stored_at, last.id)
+        save_checkpoint(db, PROGRESS_PROJECTION_CONSUMER, *after)
+        db.commit()
+        progress_snapshot_cache.invalidate_enrollments({enrollment_id for enrollment_id, _ in by_enrollment})
+        _announce(touched, completed)
+        processed += len(batch)
+        if len(batch) < batch_size:
+            break
+
+    if processed:
+        logger.info("Projected %d xAPI statements onto module progress", processed)
+    return processed
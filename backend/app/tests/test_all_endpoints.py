@@ -201,3 +201,137 @@ def test_compliance_reports(client, auth_headers):
         response = client.get(f"/reports/compliance/{resource}?format=csv", headers=auth_headers)
         assert response.status_code == 200
         assert "text/csv" in response.headers.get("content-type", "")
+
+    # Student records: staff only
+    assert client.get("/reports/compliance/attendance?format=csv").status_code == 401
+
+
+def test_compliance_csv_streams_batches_with_student_names(client, db, auth_headers, test_user, test_module):
+    """CSV export is produced batch by batch, header first, with decrypted names"""
+    from app.db.models.compliance.attendance import AttendanceLog
+    from app.services.compliance_reports import iter_csv, iter_report_rows, report_fields
+
+    db.add_all([
+        AttendanceLog(
+            user_id=test_user.id,
+            module_id=test_module.id,
+            session_type="live",
+            started_at=datetime(2025, 1, day, 10, tzinfo=timezone.utc),
+            ended_at=datetime(2025, 1, day, 11, tzinfo=timezone.utc),
+        )
+        for day in range(1, 6)
+    ])
+    db.commit()
+
+    chunks = list(iter_csv(
+        iter_report_rows(db, AttendanceLog, batch_size=2),
+        report_fields(AttendanceLog),
+        rows_per_chunk=2,
+    ))
+    assert chunks[0].startswith("student_name,id,user_id,module_id,")
+    assert chunks[0].count("\n") == 1
+    assert all(chunk.count("\n") <= 2 for chunk in chunks[1:])
+    user_lines = [line for chunk in chunks for line in chunk.splitlines() if str(test_user.id) in line]
+    assert len(user_lines) == 5
+    assert all(line.startswith("Test User,") for line in user_lines)
+
+    response = client.get("/reports/compliance/attendance?format=csv", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.text.count("Test User,") >= 5
+
+
+def test_compliance_export_filters_and_projects_columns(client, db, auth_headers, test_user, test_module):
+    """Date range, student, program and columns= narrow the export in SQL"""
+    from app.db.models.compliance.attendance import AttendanceLog
+    from app.db.models.compliance.complaint import Complaint
+    from app.tests.utils import create_user_with_roles
+
+    other = create_user_with_roles(
+        db, email=f"other_{uuid4().hex[:6]}@example.edu", password="Abcdefghij!23", roles=["student"]
+    )
+    for user, day in ((test_user, 3), (test_user, 20), (other, 10)):
+        db.add(AttendanceLog(
+            user_id=user.id,
+            module_id=test_module.id,
+            session_type="lab",
+            started_at=datetime(2025, 3, day, 10, tzinfo=timezone.utc),
+            ended_at=datetime(2025, 3, day, 11, tzinfo=timezone.utc),
+        ))
+    db.add(Complaint(
+        user_id=test_user.id, submitted_at=datetime(2025, 3, 1, tzinfo=timezone.utc), details="x", status="resolved"
+    ))
+    db.commit()
+
+    def export(query):
+        response = client.get(f"/reports/compliance/attendance?{query}", headers=auth_headers)
+        assert response.status_code == 200, response.text
+        return response.text.splitlines()
+
+    lines = export(f"user_id={test_user.id}&start=2025-03-01&end=2025-03-31")
+    assert len(lines) == 3
+    lines = export(f"user_id={test_user.id}&start=2025-03-04&end=2025-03-20")
+    assert len(lines) == 2 and ",2025-03-20T" in lines[1]
+    lines = export(
+        f"program_id={test_module.program_id}&start=2025-03-01&end=2025-03-31&columns=started_at,student_name"
+    )
+    assert lines[0] == "student_name,started_at"
+    assert len(lines) == 4
+    assert "Test User,2025-03-03T10:00:00+00:00" in lines
+
+    complaints = client.get(
+        f"/reports/compliance/complaints?status=resolved&user_id={test_user.id}", headers=auth_headers
+    )
+    assert complaints.status_code == 200
+    assert len(complaints.text.splitlines()) == 2
+
+    for query in ("status=open", "columns=id,nope", "start=2025-03-02&end=2025-03-01"):
+        assert client.get(f"/reports/compliance/attendance?{query}", headers=auth_headers).status_code == 400
+
+
+def test_compliance_typed_exports_keep_column_types(client, db, auth_headers, test_user, test_program, monkeypatch):
+    """XLSX and Parquet exports carry timestamps, decimals and numbers, not text"""
+    import io
+    from decimal import Decimal
+
+    import pytest
+
+    from app.core.config import settings
+    from app.db.models.compliance.transcript import Transcript
+
+    openpyxl = pytest.importorskip("openpyxl")
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    generated_at = datetime(2025, 5, 1, 12, 30, tzinfo=timezone.utc)
+    db.add(Transcript(user_id=test_user.id, program_id=test_program.id, gpa=Decimal("3.75"), generated_at=generated_at))
+    db.commit()
+
+    query = f"user_id={test_user.id}&columns=student_name,user_id,gpa,generated_at"
+    response = client.get(f"/reports/compliance/transcripts?format=parquet&{query}", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-disposition"].endswith('transcripts_report.parquet"')
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.column_names == ["student_name", "user_id", "gpa", "generated_at"]
+    assert str(table.schema.field("gpa").type) == "decimal128(3, 2)"
+    assert str(table.schema.field("generated_at").type) == "timestamp[us, tz=UTC]"
+    assert table.to_pylist() == [{
+        "student_name": "Test User",
+        "user_id": str(test_user.id),
+        "gpa": Decimal("3.75"),
+        "generated_at": generated_at,
+    }]
+
+    response = client.get(f"/reports/compliance/transcripts?format=xlsx&{query}", headers=auth_headers)
+    assert response.status_code == 200
+    sheet = openpyxl.load_workbook(io.BytesIO(response.content)).active
+    rows = list(sheet.iter_rows(values_only=True))
+    assert rows[0] == ("student_name", "user_id", "gpa", "generated_at")
+    assert rows[1][2] == 3.75
+    assert rows[1][3] == datetime(2025, 5, 1, 12, 30)
+
+    # XLSX is assembled before it is sent, so large exports go to /reports/jobs
+    monkeypatch.setattr(settings, "REPORT_XLSX_MAX_ROWS", 0)
+    response = client.get(f"/reports/compliance/transcripts?format=xlsx&{query}", headers=auth_headers)
+    assert response.status_code == 400
+    assert "/reports/jobs" in response.json()["detail"]
+    response = client.get(f"/reports/compliance/transcripts?format=parquet&{query}", headers=auth_headers)
+    assert response.status_code == 200
@@ -1,17 +1,21 @@
 """Tests for enrollment agreement workflow."""
 import base64
-from datetime import datetime, timezone
+import hashlib
+import os
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from types import SimpleNamespace
 from uuid import uuid4
 
 from fastapi.testclient import TestClient
+from pypdf import PdfReader
 
 from app.main import app
 from app.tests.utils import create_user_with_roles
 from app.db.session import SessionLocal
 from app.db.models.document import DocumentTemplate
-from app.domain.enrollment.schema import get_enrollment_agreement_schema
+from app.domain.enrollment.schema import get_enrollment_agreement_schema, reload_enrollment_agreement_schema
 from app.services.enrollment_pdf import SchemaDrivenPDFService
 
 client = TestClient(app)
@@ -43,6 +47,19 @@ SAMPLE_PDF_BASE64 = (
 )
 
 
+def _signature_base64(size=(600, 200)) -> str:
+    """A signature pad capture: transparent canvas with one dark stroke."""
+    from io import BytesIO
+
+    from PIL import Image, ImageDraw
+
+    canvas = Image.new("RGBA", size, (0, 0, 0, 0))
+    ImageDraw.Draw(canvas).line([(150, 120), (250, 80), (350, 130)], fill=(15, 23, 42, 255), width=4)
+    buffer = BytesIO()
+    canvas.save(buffer, "PNG")
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+
 def _create_template():
     template_dir = Path("app/static/documents/templates")
     template_dir.mkdir(parents=True, exist_ok=True)
@@ -148,7 +165,7 @@ def test_admin_can_counter_sign_agreement():
     headers_registrar = _auth_headers(registrar_email, "RegistrarPass!23")
     counter_response = client.post(
         f"/api/documents/{document_id}/counter-sign",
-        json={"typed_name": "Registrar QA", "signature_data": "YmFzZTY0LXNpZ25hdHVyZQ=="},
+        json={"typed_name": "Registrar QA", "signature_data": _signature_base64()},
         headers=headers_registrar,
     )
     assert counter_response.status_code == 200, counter_response.text
@@ -229,9 +246,316 @@ def test_schema_driven_pdf_service_generates(tmp_path):
     assert output_path.stat().st_size > 0
 
 
+def test_schema_render_plan_is_compiled_once_and_rebound(tmp_path):
+    schema = get_enrollment_agreement_schema()
+    plan = SchemaDrivenPDFService(schema).plan
+    assert SchemaDrivenPDFService(get_enrollment_agreement_schema()).plan is plan
+
+    field_name = next(
+        field["name"]
+        for section in schema["sections"]
+        for element in section.get("elements", [])
+        for field in element.get("fields") or []
+        if "." in field["name"]
+    )
+    group, key = field_name.split(".", 1)
+    for value, other in (("Rendered Alpha", "Rendered Beta"), ("Rendered Beta", "Rendered Alpha")):
+        output_path = tmp_path / f"{value}.pdf"
+        assert SchemaDrivenPDFService(schema).generate_pdf(
+            output_pdf_path=output_path,
+            document=SimpleNamespace(id=uuid4()),
+            form_data={group: {key: value}},
+            signatures=[],
+        )
+        text = "\n".join(page.extract_text() for page in PdfReader(str(output_path)).pages)
+        assert value in text
+        assert other not in text
+
+    reload_enrollment_agreement_schema()
+    assert SchemaDrivenPDFService(get_enrollment_agreement_schema()).plan is not plan
+
+
+def test_consecutive_renders_with_long_values_succeed(tmp_path):
+    """Static flowables pushed to the next frame in one render must still lay out in the next."""
+    schema = get_enrollment_agreement_schema()
+    fields = [
+        field["name"]
+        for section in schema["sections"]
+        for element in section.get("elements", [])
+        for field in element.get("fields") or []
+        if "." in field["name"]
+    ]
+    # Each length pushes some static flowables (spacers, section headers) to
+    # the next page; rendering it twice postpones the same ones again
+    for index, repeat in enumerate((3, 3, 9, 9, 20, 20)):
+        form_data: dict = {}
+        for field_name in fields:
+            group, key = field_name.split(".", 1)
+            form_data.setdefault(group, {})[key] = "lorem ipsum " * repeat
+        output_path = tmp_path / f"agreement-{index}.pdf"
+        assert SchemaDrivenPDFService(schema).generate_pdf(
+            output_pdf_path=output_path,
+            document=SimpleNamespace(id=uuid4()),
+            form_data=form_data,
+            signatures=[],
+        ), f"render {index} failed"
+        assert len(PdfReader(str(output_path)).pages) >= 1
+
+
 def test_public_advisors_endpoint():
     response = client.get("/api/public/sign/advisors")
     assert response.status_code == 200
     data = response.json()
     assert isinstance(data, list)
     assert any(entry["id"] == "mary_jones" for entry in data)
+
+
+def test_counter_signed_pdf_is_generated_in_background():
+    from app.services.background_jobs import shutdown_executor
+
+    admin_email = "agreements.async.admin@test.edu"
+    registrar_email = "agreements.async.registrar@test.edu"
+    _create_user(admin_email, "AdminPass!23", ["admin"])
+    _create_user(registrar_email, "RegistrarPass!23", ["registrar"])
+    student = _create_user("agreements.async.student@test.edu", "StudentPass!23", ["student"])
+    template = _create_template()
+
+    headers_admin = _auth_headers(admin_email, "AdminPass!23")
+    response = client.post(
+        "/api/documents/enrollment/send",
+        json={"user_id": str(student.id), "template_id": str(template.id), "course_type": "twenty_week"},
+        headers=headers_admin,
+    )
+    assert response.status_code == 200
+    document_id = response.json()["id"]
+
+    headers_registrar = _auth_headers(registrar_email, "RegistrarPass!23")
+    try:
+        counter_response = client.post(
+            f"/api/documents/{document_id}/counter-sign",
+            json={"typed_name": "Registrar QA", "signature_data": _signature_base64()},
+            headers=headers_registrar,
+        )
+        assert counter_response.status_code == 200, counter_response.text
+        assert counter_response.json()["pdf_status"] in ("pending", "ready")
+
+        download = client.get(f"/api/documents/{document_id}/download?wait=60", headers=headers_registrar)
+        assert download.status_code == 200, download.text
+        assert download.headers["content-type"] == "application/pdf"
+
+        detail = client.get(f"/api/documents/{document_id}", headers=headers_registrar).json()
+        assert detail["pdf_status"] == "ready"
+        assert detail["signed_file_path"] is None
+        assert detail["signed_blob_hash"] == hashlib.sha256(download.content).hexdigest()
+
+        assert download.headers["etag"] == f'"{detail["signed_blob_hash"]}"'
+        revalidated = client.get(
+            f"/api/documents/{document_id}/download",
+            headers={**headers_registrar, "If-None-Match": download.headers["etag"]},
+        )
+        assert revalidated.status_code == 304
+    finally:
+        shutdown_executor()
+
+
+def test_pending_pdfs_are_redispatched_once_per_retry_interval(monkeypatch):
+    from app.db.models.document import SignedDocument
+    from app.services import signed_pdfs
+
+    submitted = []
+
+    def fake_run_in_pool(func, *args, pool):
+        submitted.append((args[0], pool))
+        return Future()
+
+    monkeypatch.setattr(signed_pdfs, "run_in_pool", fake_run_in_pool)
+    template = _create_template()
+    session = SessionLocal()
+    try:
+        document = SignedDocument(
+            template_id=template.id,
+            status="completed",
+            pdf_status="pending",
+            pdf_requested_at=datetime.now(timezone.utc) - timedelta(hours=1),
+        )
+        session.add(document)
+        session.commit()
+
+        signed_pdfs.dispatch_pending_pdfs(session)
+        assert (str(document.id), signed_pdfs.SIGNED_PDF_POOL) in submitted
+        session.refresh(document)
+        assert document.pdf_requested_at > datetime.now(timezone.utc) - timedelta(minutes=1)
+
+        # Not due again until SIGNED_PDF_RETRY_SECONDS after this dispatch
+        submitted.clear()
+        signed_pdfs.dispatch_pending_pdfs(session)
+        assert str(document.id) not in [document_id for document_id, _ in submitted]
+    finally:
+        session.close()
+
+
+def test_template_cache_reuses_parsed_template(tmp_path):
+    from io import BytesIO
+
+    from PIL import Image
+    from pypdf import PdfReader
+
+    from app.services.pdf_service import PDFSignatureService
+    from app.services.template_cache import TemplateCache
+
+    template_path = tmp_path / "template.pdf"
+    template_path.write_bytes(base64.b64decode(SAMPLE_PDF_BASE64))
+    signature_png = BytesIO()
+    Image.new("RGB", (40, 12), "white").save(signature_png, "PNG")
+    signature = base64.b64encode(signature_png.getvalue()).decode()
+    cache = TemplateCache(max_bytes=len(template_path.read_bytes()) * 2)
+    template_id = uuid4()
+
+    outputs = []
+    for index in range(2):
+        with cache.reader(template_id, "v1", template_path) as template_pdf:
+            output = tmp_path / f"signed-{index}.pdf"
+            assert PDFSignatureService.overlay_signatures(
+                template_pdf, output, [(signature, "student", 80, 120)], metadata={"document_id": str(index)}
+            )
+            outputs.append(output)
+    assert (cache.hits, cache.misses) == (1, 1)
+    # The cached template is not modified by the overlays
+    first, second = (PdfReader(str(path)).pages[-1].extract_text() for path in outputs)
+    assert first.count("Student Signature") == second.count("Student Signature") == 1
+
+    # A replaced file is re-read, other templates evict least recently used ones
+    template_path.write_bytes(template_path.read_bytes())
+    os.utime(template_path, ns=(0, 1))
+    cache.get(template_id, "v1", template_path)
+    assert cache.misses == 2
+    cache.get(uuid4(), "v1", template_path)
+    cache.get(uuid4(), "v1", template_path)
+    assert cache.size <= cache.max_bytes
+    cache.invalidate(template_id)
+    cache.get(template_id, "v1", template_path)
+    assert cache.misses == 5
+
+
+def test_signatures_are_normalized_and_stored_by_hash(tmp_path, monkeypatch):
+    from io import BytesIO
+
+    import pytest
+    from PIL import Image
+
+    from app.core.config import settings
+    from app.services import signature_images
+
+    from app.services.file_store import get_file_store
+
+    monkeypatch.setattr(settings, "FILE_STORE_DIR", str(tmp_path / "blobs"))
+    capture = _signature_base64(size=(1200, 400))
+
+    signature_hash = signature_images.store_signature(capture)
+    # Same capture, same blob
+    assert signature_images.store_signature(capture) == signature_hash
+    blob = get_file_store().local_path(signature_hash)
+    assert blob.parent.name == signature_hash[2:4]
+    assert len(list(blob.parent.iterdir())) == 1
+    assert blob.stat().st_size < len(capture)
+
+    with Image.open(blob) as image:
+        # Cropped to the stroke (plus padding), within the configured bounds
+        assert image.width <= settings.SIGNATURE_MAX_WIDTH and image.height <= settings.SIGNATURE_MAX_HEIGHT
+        assert image.width < 300 and image.height < 100
+
+    stored = SimpleNamespace(signature_hash=signature_hash, signature_data=None)
+    legacy = SimpleNamespace(signature_hash=None, signature_data=capture)
+    assert signature_images.signature_image(stored) == blob.read_bytes()
+    assert signature_images.signature_image(legacy) == base64.b64decode(capture.split(",", 1)[1])
+
+    blank = BytesIO()
+    Image.new("RGBA", (300, 100), (0, 0, 0, 0)).save(blank, "PNG")
+    for invalid in (base64.b64encode(blank.getvalue()).decode(), "YmFzZTY0LXNpZ25hdHVyZQ==", "not base64!"):
+        with pytest.raises(signature_images.InvalidSignatureImage):
+            signature_images.store_signature(invalid)
+
+
+def test_oversized_signature_canvas_is_rejected():
+    from app.schemas.document import SIGNATURE_DATA_MAX_LENGTH
+
+    admin_email = "agreements.canvas.admin@test.edu"
+    _create_user(admin_email, "AdminPass!23", ["admin"])
+    student = _create_user("agreements.canvas.student@test.edu", "StudentPass!23", ["student"])
+    template = _create_template()
+    response = client.post(
+        "/api/documents/enrollment/send",
+        json={"user_id": str(student.id), "template_id": str(template.id), "course_type": "twenty_week"},
+        headers=_auth_headers(admin_email, "AdminPass!23"),
+    )
+    assert response.status_code == 200, response.text
+    signing_token = response.json()["signing_token"]
+
+    # Compresses to a small payload but would decode to hundreds of MB
+    oversized = _signature_base64(size=(9000, 9000))
+    assert len(oversized) < SIGNATURE_DATA_MAX_LENGTH
+    response = client.post(
+        f"/api/public/sign/{signing_token}",
+        json={"typed_name": "QA Student", "signature_data": oversized},
+    )
+    assert response.status_code == 400, response.text
+
+    response = client.post(
+        f"/api/public/sign/{signing_token}",
+        json={"typed_name": "QA Student", "signature_data": "A" * (SIGNATURE_DATA_MAX_LENGTH + 1)},
+    )
+    assert response.status_code == 422
+
+    assert client.get(f"/api/public/sign/{signing_token}").json()["status"] == "pending"
+
+
+def test_document_listing_is_keyset_paginated_and_filtered():
+    admin_email = "listing.admin@test.edu"
+    _create_user(admin_email, "AdminPass!23", ["admin"])
+    student = _create_user("listing.student@test.edu", "StudentPass!23", ["student"])
+    template = _create_template()
+    other_template = _create_template()
+    headers = _auth_headers(admin_email, "AdminPass!23")
+
+    sent = []
+    for index in range(5):
+        payload = {
+            "user_id": str(student.id),
+            "template_id": str(template.id if index < 3 else other_template.id),
+            "course_type": "twenty_week",
+            "signer_email": f"listing.{index}@example.edu",
+        }
+        response = client.post("/api/documents/enrollment/send", json=payload, headers=headers)
+        assert response.status_code == 200, response.text
+        sent.append(response.json()["id"])
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get(f"/api/documents/user/{student.id}", params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        assert body["total"] == 5
+        assert body["total_is_estimate"] is False
+        assert len(body["documents"]) <= 2
+        assert all(doc["template_name"] == "Enrollment Agreement" for doc in body["documents"])
+        seen.extend(doc["id"] for doc in body["documents"])
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+    assert seen == list(reversed(sent))
+
+    by_template = client.get(
+        f"/api/documents/user/{student.id}", params={"template_id": str(other_template.id)}, headers=headers
+    ).json()
+    assert [doc["id"] for doc in by_template["documents"]] == list(reversed(sent[3:]))
+    assert by_template["total"] == 2
+
+    future = client.get(
+        "/api/documents/", params={"created_from": "2999-01-01T00:00:00Z", "status": "pending"}, headers=headers
+    ).json()
+    assert future == {"documents": [], "total": 0, "total_is_estimate": False, "next_cursor": None}
+
+    bad_cursor = client.get(f"/api/documents/user/{student.id}", params={"cursor": "not-a-cursor"}, headers=headers)
+    assert bad_cursor.status_code == 400
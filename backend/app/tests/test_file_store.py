@@ -0,0 +1,193 @@
+"""Tests for the content-addressed file store and its reference counting."""
+import hashlib
+import os
+import stat
+import tempfile
+import time
+from datetime import datetime, timezone
+from io import BytesIO
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+
+from app.core.config import settings
+from app.db.models.document import DocumentTemplate
+from app.db.models.file_blob import FileBlob
+from app.db.session import SessionLocal
+from app.services.file_store import (
+    BlobNotFound,
+    FileStore,
+    LocalFileStore,
+    S3FileStore,
+    collect_garbage,
+    get_file_store,
+)
+
+
+class _NoSuchKey(Exception):
+    response = {"Error": {"Code": "NoSuchKey"}}
+
+
+class _Paginator:
+    def __init__(self, objects):
+        self.objects = objects
+
+    def paginate(self, Bucket, Prefix):
+        keys = sorted(key for bucket, key in self.objects if bucket == Bucket and key.startswith(Prefix))
+        for start in range(0, len(keys), 2):
+            yield {"Contents": [
+                {"Key": key, "LastModified": self.objects[(Bucket, key)][1]} for key in keys[start:start + 2]
+            ]}
+
+
+class _S3Stub:
+    """Just the boto3 S3 client calls S3FileStore makes, backed by a dict."""
+
+    def __init__(self):
+        self.objects = {}
+        self.puts = 0
+
+    def _get(self, Bucket, Key):
+        try:
+            return self.objects[(Bucket, Key)]
+        except KeyError:
+            raise _NoSuchKey(Key)
+
+    def put_object(self, Bucket, Key, Body):
+        self.puts += 1
+        data = Body if isinstance(Body, bytes) else Body.read()
+        self.objects[(Bucket, Key)] = (data, datetime.now(timezone.utc))
+
+    def get_object(self, Bucket, Key):
+        return {"Body": BytesIO(self._get(Bucket, Key)[0])}
+
+    def head_object(self, Bucket, Key):
+        data, modified = self._get(Bucket, Key)
+        return {"ContentLength": len(data), "LastModified": modified}
+
+    def copy_object(self, Bucket, Key, CopySource, MetadataDirective):
+        data, _ = self._get(CopySource["Bucket"], CopySource["Key"])
+        self.objects[(Bucket, Key)] = (data, datetime.now(timezone.utc))
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+    def get_paginator(self, operation):
+        assert operation == "list_objects_v2"
+        return _Paginator(self.objects)
+
+
+def test_local_file_store_deduplicates_by_content(tmp_path):
+    store = LocalFileStore(tmp_path / "blobs")
+    data = b"%PDF-1.4 enrollment agreement"
+    blob_hash = store.put_bytes(data)
+
+    assert blob_hash == hashlib.sha256(data).hexdigest()
+    assert store.path(blob_hash) == tmp_path / "blobs" / blob_hash[:2] / blob_hash[2:4] / blob_hash
+    assert store.read(blob_hash) == data
+
+    staged = tmp_path / "upload.pdf"
+    staged.write_bytes(data)
+    assert store.put_file(staged, move=True) == blob_hash
+    assert not staged.exists()
+    assert [name for name, _ in store.iter_blobs()] == [blob_hash]
+
+    store.delete(blob_hash)
+    assert not store.exists(blob_hash)
+    with pytest.raises(BlobNotFound):
+        store.read(blob_hash)
+
+
+def test_local_file_store_blobs_are_readable_by_the_web_server(tmp_path):
+    # nginx sends blobs through X-Accel-Redirect as another user
+    store = LocalFileStore(tmp_path / "blobs")
+    from_bytes = store.put_bytes(b"%PDF-1.4 unsigned copy")
+
+    fd, scratch = tempfile.mkstemp(dir=tmp_path)  # 0600, like the signed PDF scratch file
+    with os.fdopen(fd, "wb") as handle:
+        handle.write(b"%PDF-1.4 signed copy")
+    moved = store.put_file(Path(scratch), move=True)
+
+    for blob_hash in (from_bytes, moved):
+        assert stat.S_IMODE(store.path(blob_hash).stat().st_mode) == 0o644
+
+
+def test_s3_file_store_shards_keys_and_skips_existing_content(tmp_path):
+    client = _S3Stub()
+    store = S3FileStore("records", prefix="blobs/", client=client)
+    first = store.put_bytes(b"template")
+    second = store.put_bytes(b"signed")
+    assert store.put_bytes(b"template") == first
+    assert client.puts == 2
+    assert ("records", f"blobs/{first[:2]}/{first[2:4]}/{first}") in client.objects
+
+    assert store.read(first) == b"template"
+    assert store.size(second) == len(b"signed")
+    assert store.local_path(first) is None
+    assert sorted(name for name, _ in store.iter_blobs()) == sorted([first, second])
+
+    store.delete(second)
+    assert not store.exists(second)
+    assert store.modified_at(second) is None
+    with pytest.raises(BlobNotFound):
+        store.open(second)
+
+
+def test_incomplete_file_store_backend_cannot_be_constructed():
+    class ReadOnlyStore(FileStore):
+        def open(self, blob_hash):
+            raise BlobNotFound(blob_hash)
+
+    with pytest.raises(TypeError, match="put_file"):
+        ReadOnlyStore()
+
+
+def test_references_are_counted_and_unreferenced_blobs_collected(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "FILE_STORE_DIR", str(tmp_path / "blobs"))
+    store = get_file_store()
+    blob_hash = store.put_bytes(f"template {uuid4()}".encode())
+    orphan_hash = store.put_bytes(f"never referenced {uuid4()}".encode())
+
+    session = SessionLocal()
+    try:
+        templates = [
+            DocumentTemplate(name="Enrollment Agreement", version=f"v{index}", blob_hash=blob_hash)
+            for index in range(2)
+        ]
+        session.add_all(templates)
+        session.commit()
+        assert session.get(FileBlob, blob_hash).ref_count == 2
+
+        session.delete(templates[0])
+        session.commit()
+        blob = session.get(FileBlob, blob_hash)
+        session.refresh(blob)
+        assert (blob.ref_count, blob.released_at) == (1, None)
+
+        # Still referenced, so kept even with no grace period
+        monkeypatch.setattr(settings, "FILE_STORE_GC_GRACE_SECONDS", 0)
+        past = time.time() - 60
+        for name in (blob_hash, orphan_hash):
+            os.utime(store.path(name), (past, past))
+        result = collect_garbage(session)
+        assert result["orphans_removed"] == 1
+        assert store.exists(blob_hash) and not store.exists(orphan_hash)
+
+        session.delete(templates[1])
+        session.commit()
+        session.refresh(blob)
+        assert blob.ref_count == 0 and blob.released_at is not None
+
+        # Released, but the grace period has not passed
+        monkeypatch.setattr(settings, "FILE_STORE_GC_GRACE_SECONDS", 3600)
+        collect_garbage(session)
+        assert store.exists(blob_hash)
+
+        monkeypatch.setattr(settings, "FILE_STORE_GC_GRACE_SECONDS", 0)
+        assert collect_garbage(session)["blobs_removed"] >= 1
+        assert not store.exists(blob_hash)
+        session.expire_all()
+        assert session.get(FileBlob, blob_hash) is None
+    finally:
+        session.close()
@@ -0,0 +1,162 @@
+"""Tests for the streaming upload pipeline (documents and module content)."""
+import asyncio
+import hashlib
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.core.config import settings
+from app.core.uploads import UPLOAD_CHUNK_SIZE, receive_upload
+from app.db.session import SessionLocal
+from app.main import app
+from app.middleware.body_limit import RequestBodyLimitMiddleware
+from app.routers import content
+from app.tests.utils import create_user_with_roles, seed_student_program
+
+client = TestClient(app)
+
+
+def _auth_headers(email: str, password: str) -> dict:
+    response = client.post("/api/auth/login", json={"email": email, "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+class _CountingStream(BytesIO):
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+def test_receive_upload_rejects_while_streaming(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_STAGING_DIR", str(tmp_path / "staging"))
+
+    oversized = _CountingStream(b"# Lessons\n" * (UPLOAD_CHUNK_SIZE // 2))
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(receive_upload(UploadFile(oversized, filename="lessons.md"), {".md"}, max_size_mb=1))
+    assert exc.value.status_code == 400
+    assert "too large" in exc.value.detail
+    # Cut off after the chunk that crossed the limit, not read to the end
+    assert oversized.bytes_read <= 2 * UPLOAD_CHUNK_SIZE < len(oversized.getvalue())
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(receive_upload(UploadFile(BytesIO(b"<html>"), filename="form.pdf"), {".pdf"}, max_size_mb=1))
+    assert "doesn't match extension" in exc.value.detail
+
+    assert list((tmp_path / "staging").iterdir()) == []
+
+    data = b"# Lessons\n" * 1000
+    upload = asyncio.run(receive_upload(UploadFile(BytesIO(data), filename="lessons.md"), {".md"}, max_size_mb=1))
+    with upload:
+        assert upload.size == len(data)
+        assert upload.sha256 == hashlib.sha256(data).hexdigest()
+        destination = asyncio.run(upload.move_to(tmp_path / "modules" / "lessons.md"))
+    assert destination.read_bytes() == data
+    assert list((tmp_path / "staging").iterdir()) == []
+
+
+def test_oversized_request_body_is_refused_before_parsing():
+    received = []
+    limited = FastAPI()
+
+    @limited.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        received.append(file.filename)
+        return {"ok": True}
+
+    limited.add_middleware(RequestBodyLimitMiddleware, max_bytes=4096)
+    limited_client = TestClient(limited)
+
+    small = limited_client.post("/upload", files={"file": ("small.md", b"# Lessons\n")})
+    assert small.status_code == 200
+
+    # Declared too large: refused from Content-Length alone
+    declared = limited_client.post("/upload", files={"file": ("big.md", b"x" * 8192)})
+    assert declared.status_code == 413
+    assert "too large" in declared.json()["detail"]
+
+    # Chunked, without Content-Length: cut off once past the limit
+    def chunked_form():
+        yield b'--XX\r\nContent-Disposition: form-data; name="file"; filename="big.md"\r\n\r\n'
+        for _ in range(4):
+            yield b"x" * 2048
+        yield b"\r\n--XX--\r\n"
+
+    streamed = limited_client.post(
+        "/upload", content=chunked_form(), headers={"Content-Type": "multipart/form-data; boundary=XX"}
+    )
+    assert streamed.status_code == 413
+    assert received == ["small.md"]
+
+
+def test_student_document_upload_is_sanitized_and_hashed(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_STAGING_DIR", str(tmp_path / "staging"))
+    session = SessionLocal()
+    try:
+        create_user_with_roles(session, email="uploads.student@test.edu", password="StudentPass!23", roles=["student"])
+    finally:
+        session.close()
+    headers = _auth_headers("uploads.student@test.edu", "StudentPass!23")
+
+    buffer = BytesIO()
+    Image.new("RGB", (64, 48), (200, 30, 30)).save(buffer, "PNG")
+    response = client.post(
+        "/api/documents/upload",
+        data={"document_type": "identification"},
+        files={"file": ("id.png", buffer.getvalue(), "image/png")},
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    body = response.json()
+    stored = Path("app/static") / body["file_path"]
+    try:
+        assert body["file_type"] == "image"
+        assert body["size_bytes"] == stored.stat().st_size
+        assert body["sha256"] == hashlib.sha256(stored.read_bytes()).hexdigest()
+    finally:
+        stored.unlink(missing_ok=True)
+    assert list((tmp_path / "staging").iterdir()) == []
+
+
+def test_h5p_upload_is_validated_before_replacing_activity(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_STAGING_DIR", str(tmp_path / "staging"))
+    monkeypatch.setattr(content, "MODULES_BASE", tmp_path / "modules")
+    monkeypatch.setattr(content, "H5P_CACHE", tmp_path / "h5p_cache")
+    session = SessionLocal()
+    try:
+        module = seed_student_program(session)["modules"][0]
+        module_id, module_code = str(module.id), module.code
+        create_user_with_roles(session, email="uploads.admin@test.edu", password="AdminPass!23", roles=["admin"])
+    finally:
+        session.close()
+    headers = _auth_headers("uploads.admin@test.edu", "AdminPass!23")
+
+    package = b"PK\x03\x04" + b"\x00" * 2048
+    response = client.post(
+        f"/api/content/modules/{module_id}/h5p",
+        data={"activity_id": "vitals-quiz"},
+        files={"file": ("quiz.h5p", package, "application/octet-stream")},
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    activity = tmp_path / "modules" / f"module{module_code}" / "vitals-quiz.h5p"
+    assert activity.read_bytes() == package
+
+    response = client.post(
+        f"/api/content/modules/{module_id}/h5p",
+        data={"activity_id": "vitals-quiz"},
+        files={"file": ("quiz.h5p", b"not a zip archive", "application/octet-stream")},
+        headers=headers,
+    )
+    assert response.status_code == 400
+    assert activity.read_bytes() == package
+    assert list((tmp_path / "staging").iterdir()) == []
@@ -10,6 +10,7 @@ from app.main import app
 from app.db.session import get_db
 from app.db.models.program import Program, Module
 from app.db.models.enrollment import Enrollment, ModuleProgress
+from app.services.progress_cache import progress_snapshot_cache
 from app.tests.utils import create_user_with_roles
 import uuid
 
@@ -35,6 +36,8 @@ def client_fixture(db_session):
             pass
 
     app.dependency_overrides[get_db] = override_get_db
+    # Fixtures rewrite enrollments directly in the database
+    progress_snapshot_cache.clear()
     yield TestClient(app)
     app.dependency_overrides.clear()
 
@@ -555,3 +558,319 @@ def test_complete_progress_tracking_flow(
     mod_data = response4.json()
     assert mod_data["scorm_status"] == "completed"
     assert mod_data["score"] == 90
+
+
+# ======================
+# xAPI -> last_activity projection
+# ======================
+
+def test_last_activity_projected_from_xapi(
+    client: TestClient,
+    db_session: Session,
+    test_users,
+    test_enrollment,
+    test_program_and_modules
+):
+    """Statements about a module surface as that module's last_activity"""
+    from app.services.xapi_progress_projection import project_statements
+
+    auth_headers, current_user_id = login_and_prepare_student(client, db_session, test_enrollment)
+    modules = test_program_and_modules["modules"]
+
+    for minute in (5, 20):
+        response = client.post(
+            "/api/xapi/statements",
+            json={
+                "actor": {"mbox": "mailto:Alice.Progress@test.edu"},
+                "verb": {"id": "http://adlnet.gov/expapi/verbs/experienced"},
+                "object": {"id": f"http://aada.edu/modules/{modules[1].id}"},
+                "timestamp": f"2024-05-01T10:{minute:02d}:00+00:00",
+            },
+        )
+        assert response.status_code == 201
+
+    project_statements(db_session, lag_seconds=0)
+
+    response = client.get(f"/api/progress/{current_user_id}", headers=auth_headers)
+    assert response.status_code == 200
+    by_module = {m["module_id"]: m for m in response.json()["modules"]}
+    assert by_module[str(modules[0].id)]["last_activity"] is None
+    assert by_module[str(modules[1].id)]["last_activity"].startswith("2024-05-01T10:20:00")
+
+    response = client.get(
+        f"/api/progress/{current_user_id}/module/{modules[1].id}",
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["last_activity"].startswith("2024-05-01T10:20:00")
+
+
+# ======================
+# POST /api/progress/heartbeat
+# ======================
+
+def test_heartbeats_coalesce_and_flush(
+    client: TestClient,
+    db_session: Session,
+    test_users,
+    test_enrollment,
+    test_program_and_modules
+):
+    """Heartbeats are buffered, merged per module and written in one flush"""
+    from app.services.progress_buffer import heartbeat_buffer
+
+    auth_headers, current_user_id = login_and_prepare_student(client, db_session, test_enrollment)
+    module_id = test_program_and_modules["modules"][0].id
+    beats = [
+        {"last_scroll_position": 100, "active_time_delta_seconds": 10, "sections_viewed": ["intro"]},
+        {"last_scroll_position": 450, "active_time_delta_seconds": 15, "sections_viewed": ["intro", "hipaa"]},
+        {"active_time_delta_seconds": 5},
+    ]
+    for beat in beats:
+        response = client.post(
+            "/api/progress/heartbeat",
+            json={"enrollment_id": str(test_enrollment.id), "module_id": str(module_id), **beat},
+            headers=auth_headers
+        )
+        assert response.status_code == 202
+
+    # Nothing written yet, but reads in this worker already see the heartbeats
+    assert db_session.query(ModuleProgress).filter(
+        ModuleProgress.enrollment_id == test_enrollment.id
+    ).count() == 0
+    response = client.get(f"/api/progress/{current_user_id}/module/{module_id}", headers=auth_headers)
+    assert response.json()["last_scroll_position"] == 450
+    assert response.json()["active_time_seconds"] == 30
+
+    assert heartbeat_buffer.flush(db_session) >= 1
+    client.post(
+        "/api/progress/heartbeat",
+        json={
+            "enrollment_id": str(test_enrollment.id),
+            "module_id": str(module_id),
+            "active_time_delta_seconds": 20,
+            "sections_viewed": ["quiz", "intro"],
+        },
+        headers=auth_headers
+    )
+    heartbeat_buffer.flush(db_session)
+
+    db_session.expire_all()
+    progress = db_session.query(ModuleProgress).filter(
+        ModuleProgress.enrollment_id == test_enrollment.id,
+        ModuleProgress.module_id == module_id
+    ).one()
+    assert progress.last_scroll_position == 450
+    assert progress.active_time_seconds == 50
+    assert progress.sections_viewed == ["intro", "hipaa", "quiz"]
+    assert progress.scorm_status == "incomplete"
+
+
+def test_heartbeat_rejects_other_students_enrollment(
+    client: TestClient,
+    db_session: Session,
+    test_users,
+    test_enrollment,
+    test_program_and_modules
+):
+    """Students cannot send heartbeats against another student's enrollment"""
+    login_and_prepare_student(client, db_session, test_enrollment)
+    other = create_user_with_roles(
+        db_session,
+        email="bob.progress@test.edu",
+        password="TestPass123!",
+        first_name="Bob",
+        last_name="Progress",
+        roles=["student"],
+    )
+    other_headers = get_auth_headers(client, "bob.progress@test.edu", "TestPass123!")
+    assert other.id != test_enrollment.user_id
+
+    response = client.post(
+        "/api/progress/heartbeat",
+        json={
+            "enrollment_id": str(test_enrollment.id),
+            "module_id": str(test_program_and_modules["modules"][0].id),
+            "active_time_delta_seconds": 5,
+        },
+        headers=other_headers
+    )
+    assert response.status_code == 403
+
+
+def test_progress_snapshot_joins_program_and_is_cached(
+    client: TestClient,
+    db_session: Session,
+    test_users,
+    test_enrollment,
+    test_program_and_modules
+):
+    """Overview reports the program name, and progress writes refresh the cached snapshot"""
+    auth_headers, current_user_id = login_and_prepare_student(client, db_session, test_enrollment)
+    modules = test_program_and_modules["modules"]
+
+    response = client.get(f"/api/progress/{current_user_id}", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["program_name"] == "Test Program"
+    assert [m["module_code"] for m in data["modules"]] == [m.code for m in modules]
+
+    response = client.post(
+        "/api/progress/",
+        json={
+            "enrollment_id": str(test_enrollment.id),
+            "module_id": str(modules[2].id),
+            "scorm_status": "passed",
+        },
+        headers=auth_headers
+    )
+    assert response.status_code == 201
+
+    data = client.get(f"/api/progress/{current_user_id}", headers=auth_headers).json()
+    assert data["completed_modules"] == 1
+    assert data["modules"][2]["scorm_status"] == "passed"
+
+
+# ======================
+# Cohort analytics
+# ======================
+
+def test_program_summary_and_matrix_after_refresh(
+    client: TestClient,
+    db_session: Session,
+    test_users,
+    test_enrollment,
+    test_program_and_modules
+):
+    """Instructors see cohort figures from the refreshed view; students cannot"""
+    student_headers, _ = login_and_prepare_student(client, db_session, test_enrollment)
+    program = test_program_and_modules["program"]
+    modules = test_program_and_modules["modules"]
+    db_session.add(ModuleProgress(
+        enrollment_id=test_enrollment.id,
+        module_id=modules[0].id,
+        scorm_status="passed",
+        score=88,
+        progress_pct=100
+    ))
+    db_session.commit()
+
+    assert client.get(
+        f"/api/progress/programs/{program.id}/summary", headers=student_headers
+    ).status_code == 403
+
+    headers = get_auth_headers(client, "instructor.progress@test.edu", "TestPass123!")
+    assert client.post("/api/progress/programs/refresh", headers=headers).status_code == 200
+
+    response = client.get(f"/api/progress/programs/{program.id}/summary", headers=headers)
+    assert response.status_code == 200
+    summary = response.json()
+    assert summary["students"] == 1
+    assert summary["students_completed"] == 0
+    assert [m["module_code"] for m in summary["modules"]] == [m.code for m in modules]
+    assert summary["modules"][0]["completed"] == 1
+    assert summary["modules"][0]["average_score"] == 88.0
+    assert summary["modules"][1]["not_started"] == 1
+
+    response = client.get(f"/api/progress/programs/{program.id}/matrix", headers=headers)
+    assert response.status_code == 200
+    matrix = response.json()
+    assert matrix["modules"]["id"] == [str(m.id) for m in modules]
+    assert matrix["rows"] == [
+        [str(test_enrollment.id), str(test_enrollment.user_id), "pnn", [88, None, None], [100, 0, 0]]
+    ]
+
+
+# ======================
+# At-risk scoring
+# ======================
+
+def test_at_risk_scoring_ranks_inactive_enrollment(
+    client: TestClient,
+    db_session: Session,
+    test_users,
+    test_enrollment,
+    test_program_and_modules
+):
+    """A stalled, behind-pace enrollment is scored and listed for staff only"""
+    from datetime import datetime, timedelta, timezone
+    from app.services.risk_scoring import compute_risk_scores
+
+    student_headers, _ = login_and_prepare_student(client, db_session, test_enrollment)
+    modules = test_program_and_modules["modules"]
+    test_enrollment.start_date = date.today() - timedelta(days=60)
+    test_enrollment.expected_end_date = date.today() + timedelta(days=30)
+    db_session.add(ModuleProgress(
+        enrollment_id=test_enrollment.id,
+        module_id=modules[0].id,
+        scorm_status="incomplete",
+        progress_pct=20,
+        score=40,
+        last_accessed_at=datetime.now(timezone.utc) - timedelta(days=30)
+    ))
+    db_session.commit()
+
+    assert compute_risk_scores(db_session)["scored"] == 1
+    # Nothing changed since, so the incremental run writes nothing
+    assert compute_risk_scores(db_session)["scored"] == 0
+
+    assert client.get("/api/progress/at-risk", headers=student_headers).status_code == 403
+
+    headers = get_auth_headers(client, "instructor.progress@test.edu", "TestPass123!")
+    response = client.get(
+        "/api/progress/at-risk",
+        params={"program_id": str(test_program_and_modules["program"].id), "min_level": "low"},
+        headers=headers
+    )
+    assert response.status_code == 200
+    learners = response.json()
+    assert [learner["enrollment_id"] for learner in learners] == [str(test_enrollment.id)]
+    assert learners[0]["inactivity_days"] >= 29
+    assert learners[0]["pace_gap"] > 0
+    assert learners[0]["risk_level"] in ("medium", "high")
+
+    # New activity brings the enrollment back into the incremental run
+    progress = db_session.query(ModuleProgress).filter_by(enrollment_id=test_enrollment.id).one()
+    progress.last_activity_at = datetime.now(timezone.utc)
+    db_session.commit()
+    assert compute_risk_scores(db_session)["scored"] == 1
+    assert compute_risk_scores(db_session)["scored"] == 0
+
+
+def test_progress_update_is_pushed_to_subscribers(
+    client: TestClient,
+    db_session: Session,
+    test_users,
+    test_enrollment,
+    test_program_and_modules
+):
+    """Saving progress notifies the learner's event stream"""
+    import asyncio
+    from app.services.realtime import broker, user_topic
+
+    auth_headers, current_user_id = login_and_prepare_student(client, db_session, test_enrollment)
+    module = test_program_and_modules["modules"][0]
+
+    async def scenario():
+        subscription = broker.subscribe([user_topic(current_user_id)])
+        try:
+            response = await asyncio.to_thread(
+                client.post,
+                "/api/progress/",
+                json={
+                    "enrollment_id": str(test_enrollment.id),
+                    "module_id": str(module.id),
+                    "scorm_status": "completed",
+                    "progress_pct": 100,
+                },
+                headers=auth_headers,
+            )
+            assert response.status_code == 201
+            return await subscription.get(2)
+        finally:
+            broker.unsubscribe(subscription)
+
+    event = asyncio.run(scenario())
+    assert event.type == "progress.updated"
+    assert str(event.data["enrollment_id"]) == str(test_enrollment.id)
+    assert event.data["scorm_status"] == "completed"
@@ -0,0 +1,74 @@
+"""Tests for the server-sent change notification channel"""
+import asyncio
+import threading
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.realtime import EventBroker, PgNotifyBridge, user_topic
+
+
+def test_broker_routes_events_by_topic_across_threads():
+    broker = EventBroker()
+
+    async def scenario():
+        subscription = broker.subscribe([user_topic("a"), "staff"])
+        publisher = threading.Thread(target=lambda: (
+            broker.publish("progress.updated", {"n": 1}, [user_topic("b")]),
+            broker.publish("progress.updated", {"n": 2}, [user_topic("a")]),
+            broker.publish("document.signed", {"n": 3}, ["staff", user_topic("a")]),
+        ))
+        publisher.start()
+        publisher.join()
+        received = [await subscription.get(1), await subscription.get(1), await subscription.get(0.05)]
+        broker.unsubscribe(subscription)
+        return received
+
+    first, second, nothing = asyncio.run(scenario())
+    assert (first.type, first.data) == ("progress.updated", {"n": 2})
+    assert (second.type, second.data) == ("document.signed", {"n": 3})
+    assert nothing is None
+    assert second.encode().startswith(f"id: {second.id}\nevent: document.signed\ndata: ")
+    assert broker.subscriber_count() == 0
+
+
+def test_slow_subscriber_gets_resync_instead_of_backlog():
+    broker = EventBroker()
+
+    async def scenario():
+        subscription = broker.subscribe(["staff"], max_queue=2)
+        for n in range(5):
+            broker.publish("progress.updated", {"n": n}, ["staff"])
+        await asyncio.sleep(0)  # let the queued deliveries run
+        return await subscription.get(1), await subscription.get(0.05)
+
+    resync, nothing = asyncio.run(scenario())
+    assert resync.type == "resync"
+    assert nothing is None
+
+
+def test_notify_bridge_delivers_through_postgres():
+    broker = EventBroker()
+    bridge = PgNotifyBridge(broker, channel="lms_events_test", poll_seconds=0.2)
+
+    async def scenario():
+        subscription = broker.subscribe(["staff"])
+        bridge.start()
+        for _ in range(50):
+            if bridge.listening:
+                break
+            await asyncio.sleep(0.1)
+        await asyncio.to_thread(broker.publish, "xapi.completed", {"module_id": "m1"}, ["staff"])
+        return await subscription.get(5)
+
+    try:
+        event = asyncio.run(scenario())
+    finally:
+        bridge.stop()
+    assert event.type == "xapi.completed"
+    assert event.data == {"module_id": "m1"}
+
+
+def test_event_stream_requires_authentication():
+    client = TestClient(app)
+    assert client.get("/api/events/stream").status_code == 401
@@ -0,0 +1,138 @@
+import hashlib
+import io
+import json
+import zipfile
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.db.models.background_job import BackgroundJob
+from app.db.models.compliance.attendance import AttendanceLog
+from app.services import background_jobs
+
+
+def _add_attendance(db, user, module, day):
+    db.add(AttendanceLog(
+        user_id=user.id,
+        module_id=module.id,
+        session_type="live",
+        started_at=datetime(2025, 2, day, 10, tzinfo=timezone.utc),
+        ended_at=datetime(2025, 2, day, 11, tzinfo=timezone.utc),
+    ))
+    db.commit()
+
+
+def test_compliance_report_job_renders_once_per_source_version(
+    client, db, auth_headers, test_user, test_module, report_artifact_dir, wait_for_job
+):
+    """Report jobs run in the worker pool and are reused until a source table changes"""
+
+    def run_report():
+        response = client.post(
+            "/reports/jobs", json={"resource": "attendance", "format": "csv"}, headers=auth_headers
+        )
+        assert response.status_code in (200, 202)
+        job = wait_for_job(response.json(), "/reports/jobs")
+        assert job["status"] == "succeeded", job
+        return response.status_code, job
+
+    _add_attendance(db, test_user, test_module, 1)
+    status_code, first = run_report()
+    assert status_code == 202
+    assert first["row_count"] == first["progress_done"] >= 1
+
+    download = client.get(f"/reports/jobs/{first['id']}/download", headers=auth_headers)
+    assert download.status_code == 200
+    assert download.headers["content-type"].startswith("text/csv")
+    assert download.text.startswith("student_name,")
+    assert "Test User," in download.text
+
+    status_code, cached = run_report()
+    assert status_code == 200
+    assert cached["id"] == first["id"]
+
+    _add_attendance(db, test_user, test_module, 2)
+    status_code, fresh = run_report()
+    assert status_code == 202
+    assert fresh["id"] != first["id"]
+    assert fresh["row_count"] == first["row_count"] + 1
+
+    missing = client.get(f"/reports/jobs/{uuid4()}", headers=auth_headers)
+    assert missing.status_code == 404
+    unknown = client.post("/reports/jobs", json={"resource": "nope"}, headers=auth_headers)
+    assert unknown.status_code == 404
+
+
+def test_sweep_times_out_jobs_by_start_and_never_revives_them(db, report_artifact_dir, monkeypatch):
+    """A job that waited in the queue is timed out from its start; a timed-out job stays failed"""
+    monkeypatch.setattr(settings, "REPORT_JOB_TIMEOUT_SECONDS", 3600)
+    now = datetime.now(timezone.utc)
+    waited = BackgroundJob(
+        kind="compliance_report", params={}, cache_key=uuid4().hex, status="running",
+        created_at=now - timedelta(hours=2), started_at=now - timedelta(minutes=5),
+    )
+    stuck = BackgroundJob(
+        kind="compliance_report", params={}, cache_key=uuid4().hex, status="running",
+        created_at=now - timedelta(hours=3), started_at=now - timedelta(hours=2),
+    )
+    job = BackgroundJob(kind="compliance_report", params={}, cache_key=uuid4().hex)
+    db.add_all([waited, stuck, job])
+    db.commit()
+
+    background_jobs.sweep_jobs(db)
+    db.refresh(waited)
+    db.refresh(stuck)
+    assert waited.status == "running"
+    assert (stuck.status, stuck.error) == ("failed", "Timed out or interrupted")
+
+    def handler(handler_db, params, out, progress):
+        # The sweeper gives up on the job while it is still rendering
+        handler_db.execute(
+            update(BackgroundJob).where(BackgroundJob.id == job.id).values(status="failed")
+        )
+        handler_db.commit()
+        out.write(b"late")
+        return {"filename": "late.csv", "content_type": "text/csv", "row_count": 1}
+
+    monkeypatch.setattr(background_jobs, "_resolve_handler", lambda kind: handler)
+    background_jobs.run_job(str(job.id))
+    db.refresh(job)
+    assert job.status == "failed" and job.artifact_sha256 is None
+
+
+def test_compliance_bundle_zips_parts_with_manifest(
+    client, db, auth_headers, test_user, test_module, report_artifact_dir
+):
+    """The audit bundle holds every requested part plus a checksummed manifest"""
+    _add_attendance(db, test_user, test_module, 3)
+
+    response = client.get(
+        f"/reports/compliance/bundle?resources=attendance,complaints&user_id={test_user.id}",
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+
+    bundle = zipfile.ZipFile(io.BytesIO(response.content))
+    assert sorted(bundle.namelist()) == [
+        "attendance_report.csv",
+        "attendance_report.pdf",
+        "complaints_report.csv",
+        "complaints_report.pdf",
+        "manifest.json",
+    ]
+    manifest = json.loads(bundle.read("manifest.json"))
+    assert manifest["filters"] == {"user_id": str(test_user.id)}
+    for entry in manifest["files"]:
+        content = bundle.read(entry["file"])
+        assert hashlib.sha256(content).hexdigest() == entry["sha256"]
+        assert entry["size"] == len(content)
+    counts = {entry["file"]: entry["row_count"] for entry in manifest["files"]}
+    assert counts["attendance_report.csv"] == counts["attendance_report.pdf"] == 1
+    assert counts["complaints_report.csv"] == 0
+    assert "Test User," in bundle.read("attendance_report.csv").decode()
+
+    assert client.get("/reports/compliance/bundle?resources=nope", headers=auth_headers).status_code == 404
+    assert client.get("/reports/compliance/bundle?formats=xml", headers=auth_headers).status_code == 400
@@ -314,3 +314,100 @@ def test_student_cannot_delete_scorm_record():
     )
 
     assert response.status_code == 403
+
+
+def test_repeated_upserts_keep_single_record():
+    """Repeated saves update one row and keep fields that were not sent"""
+    email = "scorm.repeat@test.edu"
+    password = "StudentPass!23"
+    user = _create_user(email, password, roles=["student"])
+    module = _create_module()
+    token = _get_auth_token(email, password)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    first = client.post(
+        "/api/scorm/records",
+        json={
+            "user_id": str(user.id),
+            "module_id": str(module.id),
+            "score_raw": 40.0,
+            "interactions": {"q1": "a"},
+        },
+        headers=headers
+    )
+    assert first.status_code == 201
+    for status in ("incomplete", "completed"):
+        response = client.post(
+            "/api/scorm/records",
+            json={"user_id": str(user.id), "module_id": str(module.id), "lesson_status": status},
+            headers=headers
+        )
+        assert response.status_code == 201
+        assert response.json()["id"] == first.json()["id"]
+
+    records = client.get(f"/api/scorm/records/{user.id}", headers=headers).json()
+    matching = [r for r in records if r["module_id"] == str(module.id)]
+    assert len(matching) == 1
+    assert matching[0]["lesson_status"] == "completed"
+    assert float(matching[0]["score_raw"]) == 40.0
+    assert matching[0]["interactions"] == {"q1": "a"}
+
+
+def test_runtime_commits_append_interactions_and_accrue_time():
+    """Runtime commits apply cmi deltas, append interactions and sum finished sessions"""
+    email = "scorm.runtime@test.edu"
+    password = "StudentPass!23"
+    user = _create_user(email, password, roles=["student"])
+    module = _create_module()
+    token = _get_auth_token(email, password)
+    headers = {"Authorization": f"Bearer {token}"}
+    url = f"/api/scorm/runtime/{module.id}/commit"
+
+    first = client.post(
+        url,
+        json={"cmi": {
+            "cmi.core.lesson_status": "incomplete",
+            "cmi.core.session_time": "0000:10:00.00",
+            "cmi.interactions.0.id": "q1",
+            "cmi.interactions.0.type": "choice",
+            "cmi.interactions.0.student_response": "a",
+            "cmi.interactions.0.correct_responses.0.pattern": "b",
+            "cmi.interactions.0.result": "wrong",
+        }},
+        headers=headers
+    )
+    assert first.status_code == 200
+    assert first.json()["interactions_written"] == 1
+
+    second = client.post(
+        url,
+        json={
+            "cmi": {
+                "cmi.core.lesson_status": "passed",
+                "cmi.core.score.raw": "90",
+                "cmi.core.session_time": "0000:20:00.00",
+                "cmi.interactions.1.id": "q2",
+                "cmi.interactions.1.latency": "0000:00:12.50",
+                "cmi.interactions.1.result": "correct",
+            },
+            "finish": True,
+        },
+        headers=headers
+    )
+    assert second.status_code == 200
+    assert second.json() == {"record_id": first.json()["record_id"], "interactions_written": 1}
+
+    record = client.get(f"/api/scorm/records/{user.id}/{module.id}", headers=headers).json()
+    assert record["lesson_status"] == "passed"
+    assert float(record["score_raw"]) == 90.0
+    assert float(record["session_time_seconds"]) == 1200.0
+    assert float(record["total_time_seconds"]) == 1200.0
+
+    interactions = client.get(f"/api/scorm/records/{user.id}/{module.id}/interactions", headers=headers).json()
+    assert [i["interaction_id"] for i in interactions] == ["q1", "q2"]
+    assert interactions[0]["learner_response"] == "a"
+    assert interactions[0]["correct_responses"] == ["b"]
+    assert float(interactions[1]["latency_seconds"]) == 12.5
+
+    bad = client.post(url, json={"cmi": {"cmi.core.session_time": "ten minutes"}}, headers=headers)
+    assert bad.status_code == 422
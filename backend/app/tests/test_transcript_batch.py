@@ -0,0 +1,48 @@
+import csv
+import io
+import zipfile
+from datetime import date
+from uuid import uuid4
+
+from app.db.models.compliance.transcript import Transcript
+from app.db.models.enrollment import Enrollment, ModuleProgress
+
+
+def test_transcript_batch_issues_zip_for_cohort(
+    client, auth_headers, test_user, test_program, test_module, db, report_artifact_dir, wait_for_job, monkeypatch
+):
+    """Batch transcripts are rendered in a worker, stored per student and zipped with an index"""
+    monkeypatch.setenv("TRANSCRIPT_RENDER_WORKERS", "1")
+
+    enrollment = Enrollment(
+        user_id=test_user.id, program_id=test_program.id, start_date=date(2025, 3, 1), status="completed"
+    )
+    db.add(enrollment)
+    db.commit()
+    db.add(ModuleProgress(
+        enrollment_id=enrollment.id, module_id=test_module.id, scorm_status="completed", score=88, progress_pct=100
+    ))
+    db.commit()
+
+    response = client.post("/transcripts/batch", json={"program_id": str(test_program.id)}, headers=auth_headers)
+    assert response.status_code == 202, response.text
+    job = wait_for_job(response.json(), "/transcripts/batch")
+    assert job["status"] == "succeeded", job
+    assert job["row_count"] == 1
+    assert client.get(f"/jobs/{job['id']}", headers=auth_headers).json()["status"] == "succeeded"
+
+    download = client.get(job["download_url"].removeprefix("/api"), headers=auth_headers)
+    assert download.status_code == 200
+    archive = zipfile.ZipFile(io.BytesIO(download.content))
+    pdfs = [name for name in archive.namelist() if name.endswith(".pdf")]
+    assert len(pdfs) == 1 and archive.read(pdfs[0]).startswith(b"%PDF")
+    index = list(csv.DictReader(io.StringIO(archive.read("index.csv").decode())))
+    assert index[0]["file"] == pdfs[0]
+    assert index[0]["user_id"] == str(test_user.id)
+
+    db.expire_all()
+    transcript = db.get(Transcript, index[0]["transcript_id"])
+    assert transcript is not None and transcript.pdf_url
+
+    missing = client.post("/transcripts/batch", json={"program_id": str(uuid4())}, headers=auth_headers)
+    assert missing.status_code == 404
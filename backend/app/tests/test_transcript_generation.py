@@ -1,6 +1,9 @@
+from datetime import datetime, timezone
 from pathlib import Path
+from uuid import UUID, uuid4
 
 from fastapi.testclient import TestClient
+from pypdf import PdfReader
 from sqlalchemy import text
 
 from app.db.session import SessionLocal
@@ -53,3 +56,102 @@ def test_transcript_generation_flow():
     assert pdf_download.headers["content-type"] == "application/pdf"
 
     db.close()
+
+
+def test_transcript_pdf_is_reused_until_inputs_change(tmp_path, monkeypatch):
+    from app.core.config import settings
+    from app.db.models.compliance.transcript import Transcript
+    from app.services import transcripts as transcript_service
+
+    monkeypatch.setattr(transcript_service, "GENERATED_DIR", tmp_path)
+    monkeypatch.setattr(settings, "TRANSCRIPT_PDF_GRACE_SECONDS", 0)
+    _reset_academic_tables()
+    db = SessionLocal()
+    seed = seed_student_program(db)
+    client = TestClient(app)
+    payload = {"user_id": str(seed["student"].id), "program_id": str(seed["program"].id)}
+
+    first = client.post("/api/transcripts", json=payload).json()
+    second = client.post("/api/transcripts", json=payload).json()
+    assert second["id"] != first["id"]
+    assert second["pdf_url"] == first["pdf_url"], "Unchanged results should reuse the PDF"
+    assert Path(first["pdf_url"]).parent == tmp_path
+
+    seed["progresses"][0].score = (seed["progresses"][0].score or 0) // 2
+    db.commit()
+    changed = client.post("/api/transcripts", json=payload).json()
+    assert changed["pdf_url"] != first["pdf_url"]
+    assert len(list(tmp_path.glob("*.pdf"))) == 2
+
+    # Still referenced by the second transcript
+    assert transcript_service.sweep_transcript_pdfs(db)["files_removed"] == 0
+    assert client.delete(f"/api/transcripts/{first['id']}").status_code == 204
+    assert client.delete(f"/api/transcripts/{second['id']}").status_code == 204
+    assert transcript_service.sweep_transcript_pdfs(db)["files_removed"] == 1
+    assert not Path(first["pdf_url"]).exists()
+    assert Path(changed["pdf_url"]).exists()
+    assert db.get(Transcript, UUID(changed["id"])).content_hash == Path(changed["pdf_url"]).stem
+
+    db.close()
+
+
+def test_reused_transcript_pdf_shows_its_own_issue_date(tmp_path, monkeypatch):
+    from app.schemas.transcripts import ModuleResult
+    from app.services import transcripts as transcript_service
+
+    monkeypatch.setattr(transcript_service, "GENERATED_DIR", tmp_path)
+    modules = [
+        ModuleResult(
+            module_id=uuid4(), module_code="MOD-1", module_title="Infection Control", score=90, progress_pct=100
+        )
+    ]
+
+    def issue(issued_at):
+        return transcript_service.ensure_transcript_pdf("Ada Student", "DA (DA-1)", issued_at, modules, None)
+
+    march = issue(datetime(2026, 3, 2, 9, tzinfo=timezone.utc))
+    assert issue(datetime(2026, 3, 2, 17, tzinfo=timezone.utc)) == march, "Same day reuses the PDF"
+    october = issue(datetime(2026, 10, 19, 9, tzinfo=timezone.utc))
+    assert october[0] != march[0]
+    assert "Issued: 2026-10-19" in PdfReader(october[1]).pages[0].extract_text()
+
+
+def test_transcript_pdf_download_supports_etag_and_ranges(tmp_path, monkeypatch):
+    from app.core.config import settings
+    from app.services import transcripts as transcript_service
+
+    monkeypatch.setattr(transcript_service, "GENERATED_DIR", tmp_path / "generated")
+    _reset_academic_tables()
+    db = SessionLocal()
+    seed = seed_student_program(db)
+    client = TestClient(app)
+    transcript = client.post(
+        "/api/transcripts", json={"user_id": str(seed["student"].id), "program_id": str(seed["program"].id)}
+    ).json()
+    url = f"/api/transcripts/{transcript['id']}/pdf"
+    pdf = Path(transcript["pdf_url"]).read_bytes()
+
+    full = client.get(url)
+    etag = full.headers["etag"]
+    assert etag == f'"{Path(transcript["pdf_url"]).stem}"'
+    assert full.headers["accept-ranges"] == "bytes"
+    assert full.content == pdf
+
+    revalidated = client.get(url, headers={"If-None-Match": f'"stale", {etag}'})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == etag and revalidated.content == b""
+
+    partial = client.get(url, headers={"Range": "bytes=0-99", "If-Range": etag})
+    assert partial.status_code == 206
+    assert partial.headers["content-range"] == f"bytes 0-99/{len(pdf)}"
+    assert partial.content == pdf[:100]
+
+    # nginx sends the bytes; the API only answers with where to find them
+    monkeypatch.setattr(settings, "DOWNLOAD_ACCEL_REDIRECT_LOCATION", "/protected/")
+    monkeypatch.setattr(settings, "DOWNLOAD_ACCEL_REDIRECT_ROOT", str(tmp_path))
+    redirected = client.get(url)
+    assert redirected.status_code == 200 and redirected.content == b""
+    assert redirected.headers["x-accel-redirect"] == f"/protected/generated/{Path(transcript['pdf_url']).name}"
+    assert redirected.headers["etag"] == etag
+
+    db.close()
@@ -65,3 +65,55 @@ def test_xapi_filters_by_agent_and_since():
     verb_statements = verb_filter.json()
     assert len(verb_statements) == 1
     assert verb_statements[0]["verb"]["id"] == verbs[1]["id"]
+
+
+def _post_statements(client: TestClient, count: int) -> None:
+    for idx in range(count):
+        client.post(
+            "/api/xapi/statements",
+            json={
+                "actor": {"name": f"Student {idx}", "mbox": f"mailto:student{idx}@example.com"},
+                "verb": {"id": "http://adlnet.gov/expapi/verbs/experienced"},
+                "object": {"id": f"activity-{idx}"},
+                "timestamp": datetime(2024, 1, 1, 12, idx, tzinfo=timezone.utc).isoformat(),
+            },
+        )
+
+
+def test_xapi_result_pages_follow_more_token():
+    _clear_xapi()
+    client = TestClient(app)
+    _post_statements(client, 5)
+
+    seen = []
+    url = "/api/xapi/statements?format=result&limit=2"
+    pages = 0
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        seen.extend(statement["id"] for statement in body["statements"])
+        url = body["more"]
+        pages += 1
+
+    assert pages == 3
+    assert len(seen) == 5
+    assert len(set(seen)) == 5
+
+
+def test_xapi_ndjson_export_streams_all_statements():
+    _clear_xapi()
+    client = TestClient(app)
+    _post_statements(client, 3)
+
+    response = client.get("/api/xapi/statements", params={"format": "ndjson"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [line for line in response.text.splitlines() if line]
+    assert len(lines) == 3
+
+
+def test_xapi_rejects_malformed_more_token():
+    client = TestClient(app)
+    response = client.get("/api/xapi/statements", params={"format": "result", "more": "not-a-cursor"})
+    assert response.status_code == 400
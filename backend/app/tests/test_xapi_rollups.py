@@ -0,0 +1,57 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from app.db.session import SessionLocal
+from app.main import app
+from app.services.xapi_maintenance import ensure_partitions, rollup_statements
+from app.utils.durations import parse_iso8601_duration
+
+
+def test_parse_iso8601_duration():
+    assert parse_iso8601_duration("PT1H2M3.5S") == 3723.5
+    assert parse_iso8601_duration("P1DT30M") == 88200
+    assert parse_iso8601_duration("PT") is None
+    assert parse_iso8601_duration("00:10:00") is None
+    assert parse_iso8601_duration(None) is None
+
+
+def test_rollup_aggregates_new_statements_once():
+    client = TestClient(app)
+    mbox = f"mailto:rollup_{uuid4().hex[:8]}@example.com"
+    activity = f"http://aada.edu/modules/{uuid4()}"
+    verbs = ["attempted", "attempted", "completed"]
+    for idx, verb in enumerate(verbs):
+        response = client.post(
+            "/api/xapi/statements",
+            json={
+                "actor": {"mbox": mbox},
+                "verb": {"id": f"http://adlnet.gov/expapi/verbs/{verb}"},
+                "object": {"id": activity},
+                "result": {"score": {"raw": 70 + idx * 10}, "duration": "PT2M"},
+                "timestamp": datetime(2024, 3, 1, 9, idx, tzinfo=timezone.utc).isoformat(),
+            },
+        )
+        assert response.status_code == 201, response.text
+
+    db = SessionLocal()
+    try:
+        ensure_partitions(db)
+        assert rollup_statements(db, lag_seconds=0) >= len(verbs)
+        # A second run finds nothing new
+        assert rollup_statements(db, lag_seconds=0) == 0
+    finally:
+        db.close()
+
+    response = client.get("/api/xapi/rollups", params={"actor": mbox, "activity": activity})
+    assert response.status_code == 200
+    rows = response.json()
+    assert len(rows) == 1
+    row = rows[0]
+    assert row["day"] == "2024-03-01"
+    assert row["statements"] == 3
+    assert row["attempts"] == 2
+    assert row["completions"] == 1
+    assert float(row["best_score"]) == 90.0
+    assert row["time_spent_seconds"] == 360
@@ -0,0 +1,63 @@
+"""
+Duration parsing for learning-record formats.
+
+xAPI result.duration and SCORM 2004 cmi.session_time use ISO 8601 durations
+(e.g. "PT1H2M3.5S"); SCORM 1.2 cmi.core.session_time uses a CMITimespan
+("HHHH:MM:SS.SS").
+"""
+import re
+from typing import Optional
+
+_ISO8601_DURATION = re.compile(
+    r"^P(?:(?P<days>\d+(?:\.\d+)?)D)?"
+    r"(?:T(?:(?P<hours>\d+(?:\.\d+)?)H)?"
+    r"(?:(?P<minutes>\d+(?:\.\d+)?)M)?"
+    r"(?:(?P<seconds>\d+(?:\.\d+)?)S)?)?$"
+)
+
+_SCORM12_TIMESPAN = re.compile(r"^(?P<hours>\d{2,4}):(?P<minutes>[0-5]\d):(?P<seconds>[0-5]\d(?:\.\d{1,2})?)$")
+
+
+def parse_iso8601_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Convert an ISO 8601 duration to seconds.
+
+    Only day and time components are supported; year/month designators are
+    ambiguous for elapsed time and never emitted by xAPI/SCORM content.
+
+    Returns:
+        Total seconds, or None if the value is empty or not a duration
+    """
+    if not value or not isinstance(value, str):
+        return None
+    match = _ISO8601_DURATION.match(value.strip().upper())
+    if not match or value.strip().upper() in ("P", "PT"):
+        return None
+    parts = {key: float(amount) for key, amount in match.groupdict().items() if amount}
+    return (
+        parts.get("days", 0.0) * 86400
+        + parts.get("hours", 0.0) * 3600
+        + parts.get("minutes", 0.0) * 60
+        + parts.get("seconds", 0.0)
+    )
+
+
+def parse_scorm12_timespan(value: Optional[str]) -> Optional[float]:
+    """
+    Convert a SCORM 1.2 CMITimespan ("HHHH:MM:SS.SS") to seconds.
+
+    Returns:
+        Total seconds, or None if the value is empty or not a timespan
+    """
+    if not value or not isinstance(value, str):
+        return None
+    match = _SCORM12_TIMESPAN.match(value.strip())
+    if not match:
+        return None
+    return int(match["hours"]) * 3600 + int(match["minutes"]) * 60 + float(match["seconds"])
+
+
+def parse_scorm_session_time(value: Optional[str]) -> Optional[float]:
+    """Convert a SCORM session_time in either the 1.2 or 2004 format to seconds."""
+    seconds = parse_scorm12_timespan(value)
+    return seconds if seconds is not None else parse_iso8601_duration(value)
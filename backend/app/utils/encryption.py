@@ -4,7 +4,8 @@ HIPAA-compliant encryption utilities for PHI data.
 Uses PostgreSQL pgcrypto for transparent column-level encryption.
 Encryption key should be stored in environment variables, not in code.
 """
-from typing import Optional
+from typing import Dict, Iterable, Optional
+from uuid import UUID
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 import os
@@ -58,6 +59,33 @@ def decrypt_value(db: Session, encrypted_value: str) -> Optional[str]:
     return result
 
 
+def decrypt_user_names(db: Session, user_ids: Iterable[UUID]) -> Dict[UUID, str]:
+    """
+    Decrypt the full names of many users in one query.
+
+    Args:
+        db: Database session
+        user_ids: Users to look up (missing users are left out of the result)
+
+    Returns:
+        Mapping of user id to "First Last"
+    """
+    ids = [str(user_id) for user_id in set(user_ids)]
+    if not ids:
+        return {}
+
+    rows = db.execute(
+        text(
+            "SELECT id, pgp_sym_decrypt(decode(first_name, 'base64'), :key), "
+            "pgp_sym_decrypt(decode(last_name, 'base64'), :key) "
+            "FROM users WHERE id = ANY(CAST(:ids AS uuid[]))"
+        ),
+        {"ids": ids, "key": ENCRYPTION_KEY}
+    ).all()
+
+    return {user_id: f"{first_name} {last_name}" for user_id, first_name, last_name in rows}
+
+
 def encrypt_dict_fields(db: Session, data: dict, fields: list[str]) -> dict:
     """
     Encrypt specific fields in a dictionary.
@@ -0,0 +1,106 @@
+"""
+Move signatures captured before the file store into it.
+
+Each legacy document_signatures row with inline signature_data is normalized
+(cropped, downscaled PNG), written to the file store, and left with only
+its signature_hash. Rows whose data is not a usable image are reported and
+left untouched, so their PDFs render exactly as before.
+
+Usage examples:
+    # Count what would be migrated
+    DATABASE_URL=postgresql+psycopg2://... PYTHONPATH=backend \\
+        python backend/scripts/migrate_signature_images.py --dry-run
+
+    # Migrate in batches of 200
+    DATABASE_URL=postgresql+psycopg2://... PYTHONPATH=backend \\
+        python backend/scripts/migrate_signature_images.py --batch-size 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import uuid
+from typing import List, Tuple
+
+from sqlalchemy import select
+
+from app.db import models  # noqa: F401 ensure model registration
+from app.db.models.document import DocumentSignature
+from app.db.session import SessionLocal
+from app.services.signature_images import InvalidSignatureImage, store_signature
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Move inline signature images to the file store.")
+    parser.add_argument("--batch-size", type=int, default=100, help="Rows per transaction.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report how many rows would be migrated.")
+    return parser.parse_args()
+
+
+def migrate_batch(
+    session, after: uuid.UUID | None, batch_size: int
+) -> Tuple[uuid.UUID | None, int, List[Tuple[uuid.UUID, str]]]:
+    """
+    Migrate the next batch of legacy rows (ordered by id, after `after`).
+
+    Returns:
+        (last_id_seen or None when done, rows_migrated, failures)
+    """
+    query = (
+        select(DocumentSignature)
+        .where(DocumentSignature.signature_hash.is_(None), DocumentSignature.signature_data.is_not(None))
+        .order_by(DocumentSignature.id)
+        .limit(batch_size)
+    )
+    if after is not None:
+        query = query.where(DocumentSignature.id > after)
+    signatures = session.scalars(query).all()
+
+    migrated = 0
+    failures: List[Tuple[uuid.UUID, str]] = []
+    for signature in signatures:
+        try:
+            signature.signature_hash = store_signature(signature.signature_data)
+        except InvalidSignatureImage as exc:
+            failures.append((signature.id, str(exc)))
+            continue
+        signature.signature_data = None
+        migrated += 1
+    session.commit()
+    return (signatures[-1].id if signatures else None), migrated, failures
+
+
+def main() -> None:
+    args = parse_args()
+    session = SessionLocal()
+    try:
+        if args.dry_run:
+            pending = session.query(DocumentSignature).filter(
+                DocumentSignature.signature_hash.is_(None), DocumentSignature.signature_data.is_not(None)
+            ).count()
+            print(f"{pending} signature(s) still store their image inline.")
+            return
+
+        after = None
+        migrated_total = 0
+        failures: List[Tuple[uuid.UUID, str]] = []
+        while True:
+            # Rows that fail keep their data, so page by id rather than re-querying
+            after, migrated, batch_failures = migrate_batch(session, after, args.batch_size)
+            if after is None:
+                break
+            migrated_total += migrated
+            failures.extend(batch_failures)
+            print(f"\r{migrated_total} signature(s) migrated", end="", flush=True)
+
+        print(f"\nMigrated {migrated_total} signature(s).")
+        if failures:
+            print("Left inline (not a usable image):")
+            for signature_id, reason in failures:
+                print(f" - {signature_id}: {reason}")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
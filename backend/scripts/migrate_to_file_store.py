@@ -0,0 +1,179 @@
+"""
+Move document PDFs and signature images from before the file store into it.
+
+- document_templates.file_path -> blob_hash
+- signed_documents.unsigned_file_path / signed_file_path -> *_blob_hash
+- signature PNGs in SIGNATURE_BLOB_DIR are copied under the same hash
+
+Rows whose file is missing are reported and left untouched. The old paths are
+kept (and the files left in place) unless --remove-files is given, so the
+0027 migration can still be downgraded until then. Reference counts are
+recounted at the end.
+
+Usage examples:
+    # Count what would be migrated
+    DATABASE_URL=postgresql+psycopg2://... PYTHONPATH=backend \\
+        python backend/scripts/migrate_to_file_store.py --dry-run
+
+    # Migrate in batches of 200, deleting the old files afterwards
+    DATABASE_URL=postgresql+psycopg2://... PYTHONPATH=backend \\
+        python backend/scripts/migrate_to_file_store.py --batch-size 200 --remove-files
+"""
+
+from __future__ import annotations
+
+import argparse
+import uuid
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from app.db import models  # noqa: F401 ensure model registration
+from app.db.models.document import DocumentSignature, DocumentTemplate, SignedDocument
+from app.db.session import SessionLocal
+from app.services.signed_pdfs import DOCUMENTS_BASE
+from app.services.file_store import get_file_store, recount_references
+from app.services.signature_images import legacy_signature_path
+
+# (model, old path column, new hash column)
+PATH_COLUMNS = (
+    (DocumentTemplate, "file_path", "blob_hash"),
+    (SignedDocument, "unsigned_file_path", "unsigned_blob_hash"),
+    (SignedDocument, "signed_file_path", "signed_blob_hash"),
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Move document files and signature images to the file store.")
+    parser.add_argument("--batch-size", type=int, default=100, help="Rows per transaction.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report how many rows would be migrated.")
+    parser.add_argument(
+        "--remove-files",
+        action="store_true",
+        help="Clear the old path columns and delete the files once stored.",
+    )
+    return parser.parse_args()
+
+
+def legacy_path(path_value: str) -> Path:
+    """Resolve a stored path the way the documents router does."""
+    candidate = Path(path_value)
+    if candidate.is_absolute():
+        return candidate
+    if candidate.parts[:1] == (DOCUMENTS_BASE.parent.name,):
+        # Signed PDFs used to be recorded relative to app/ ("static/documents/signed/...")
+        candidate = Path(*candidate.parts[1:])
+    return DOCUMENTS_BASE.parent / candidate
+
+
+def _pending(model, path_column: str, hash_column: str):
+    return select(model).where(getattr(model, hash_column).is_(None), getattr(model, path_column).is_not(None))
+
+
+def migrate_batch(
+    session, model, path_column: str, hash_column: str, after: Optional[uuid.UUID], batch_size: int,
+    remove_files: bool, removable: List[Path],
+) -> Tuple[Optional[uuid.UUID], int, List[Tuple[uuid.UUID, str]]]:
+    """
+    Store the files of the next batch of rows (ordered by id, after `after`).
+
+    With remove_files, cleared paths are appended to `removable`.
+
+    Returns:
+        (last_id_seen or None when done, rows_migrated, failures)
+    """
+    query = _pending(model, path_column, hash_column).order_by(model.id).limit(batch_size)
+    if after is not None:
+        query = query.where(model.id > after)
+    rows = session.scalars(query).all()
+
+    store = get_file_store()
+    migrated = 0
+    failures: List[Tuple[uuid.UUID, str]] = []
+    for row in rows:
+        path = legacy_path(getattr(row, path_column))
+        if not path.is_file():
+            failures.append((row.id, f"{path_column} {path} not found"))
+            continue
+        setattr(row, hash_column, store.put_file(path))
+        if remove_files:
+            setattr(row, path_column, None)
+            removable.append(path)
+        migrated += 1
+    session.commit()
+    return (rows[-1].id if rows else None), migrated, failures
+
+
+def migrate_signatures(session, remove_files: bool) -> Tuple[int, List[Tuple[str, str]]]:
+    """Copy signature PNGs from SIGNATURE_BLOB_DIR into the store."""
+    store = get_file_store()
+    hashes = session.scalars(
+        select(DocumentSignature.signature_hash).where(DocumentSignature.signature_hash.is_not(None)).distinct()
+    ).all()
+    copied = 0
+    failures: List[Tuple[str, str]] = []
+    for signature_hash in hashes:
+        path = legacy_signature_path(signature_hash)
+        if not store.exists(signature_hash):
+            if not path.is_file():
+                failures.append((signature_hash, "signature image not found"))
+                continue
+            if store.put_file(path) != signature_hash:
+                failures.append((signature_hash, "content does not match its hash"))
+                continue
+            copied += 1
+        if remove_files:
+            path.unlink(missing_ok=True)
+    return copied, failures
+
+
+def main() -> None:
+    args = parse_args()
+    session = SessionLocal()
+    try:
+        if args.dry_run:
+            for model, path_column, hash_column in PATH_COLUMNS:
+                pending = session.scalar(
+                    select(func.count()).select_from(_pending(model, path_column, hash_column).subquery())
+                )
+                print(f"{pending} {model.__tablename__}.{path_column} file(s) not in the file store.")
+            return
+
+        failures: List[Tuple[object, str]] = []
+        removable: List[Path] = []
+        for model, path_column, hash_column in PATH_COLUMNS:
+            after = None
+            migrated_total = 0
+            while True:
+                # Rows that fail keep their path, so page by id rather than re-querying
+                after, migrated, batch_failures = migrate_batch(
+                    session, model, path_column, hash_column, after, args.batch_size, args.remove_files, removable
+                )
+                if after is None:
+                    break
+                migrated_total += migrated
+                failures.extend(batch_failures)
+            print(f"Stored {migrated_total} {model.__tablename__}.{path_column} file(s).")
+
+        copied, signature_failures = migrate_signatures(session, args.remove_files)
+        failures.extend(signature_failures)
+        print(f"Copied {copied} signature image(s).")
+
+        recount_references(session)
+        session.commit()
+
+        # Only after every table is done: unsigned copies may point at their template's file
+        for path in set(removable):
+            path.unlink(missing_ok=True)
+
+        if failures:
+            print("Left as they were:")
+            for key, reason in failures:
+                print(f" - {key}: {reason}")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
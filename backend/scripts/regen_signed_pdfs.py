@@ -21,7 +21,7 @@ from sqlalchemy import or_
 
 from app.db.session import SessionLocal
 from app.db.models.document import DocumentTemplate, SignedDocument
-from app.routers.documents import _generate_signed_pdf
+from app.services.signed_pdfs import build_signed_pdf
 
 
 def _collect_documents(
@@ -38,7 +38,8 @@ def _collect_documents(
 
     if not rebuild_existing:
         query = query.filter(
-            or_(SignedDocument.signed_file_path.is_(None), SignedDocument.signed_file_path == "")
+            SignedDocument.signed_blob_hash.is_(None),
+            or_(SignedDocument.signed_file_path.is_(None), SignedDocument.signed_file_path == ""),
         )
 
     query = query.order_by(SignedDocument.completed_at.asc())
@@ -80,7 +81,7 @@ def regenerate_signed_pdfs(
             )
             continue
 
-        regenerated = _generate_signed_pdf(doc, template, session, current_user=None, request=None)
+        regenerated = build_signed_pdf(doc, template, session)
         if regenerated:
             session.refresh(doc)
             success += 1
@@ -101,7 +102,7 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--rebuild-existing",
         action="store_true",
-        help="Regenerate even if signed_file_path already exists.",
+        help="Regenerate even if a signed PDF already exists.",
     )
     parser.add_argument(
         "--limit",
@@ -42,6 +42,7 @@ def reset_statuses(keep_completed: int) -> tuple[int, int]:
             doc.counter_signed_at = None
             doc.completed_at = None
             doc.signed_file_path = None
+            doc.signed_blob_hash = None
 
         session.commit()
         return total, len(reset_docs)
@@ -0,0 +1,72 @@
+"""
+Issue transcripts for a whole program cohort outside the API (e.g. at graduation).
+
+Renders in parallel like POST /transcripts/batch, but runs in this process
+and writes the ZIP to --out instead of the job artifact store.
+
+Usage examples:
+    # Everyone in program MA-CERT
+    DATABASE_URL=postgresql+psycopg2://... PYTHONPATH=backend \\
+        python backend/scripts/transcript_batch.py --program MA-CERT --out ma_transcripts.zip
+
+    # Only the cohort that started in spring 2026
+    DATABASE_URL=postgresql+psycopg2://... PYTHONPATH=backend \\
+        python backend/scripts/transcript_batch.py --program MA-CERT \\
+        --start 2026-01-01 --end 2026-04-30 --out spring_2026.zip
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from datetime import date
+from uuid import UUID
+
+from app.db import models  # noqa: F401 ensure model registration
+from app.db.models import crm  # noqa: F401
+from app.db.models.program import Program
+from app.db.session import SessionLocal
+from app.services.transcripts import render_transcript_batch
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Issue transcripts for every student in a program cohort.")
+    parser.add_argument("--program", required=True, help="Program code or id.")
+    parser.add_argument("--start", type=date.fromisoformat, help="Only enrollments starting on/after (YYYY-MM-DD).")
+    parser.add_argument("--end", type=date.fromisoformat, help="Only enrollments starting on/before (YYYY-MM-DD).")
+    parser.add_argument("--out", required=True, help="Path of the ZIP to write.")
+    return parser.parse_args()
+
+
+def _find_program(db, value: str) -> Program | None:
+    try:
+        return db.get(Program, UUID(value))
+    except ValueError:
+        return db.query(Program).filter(Program.code == value).first()
+
+
+def main() -> None:
+    args = parse_args()
+    db = SessionLocal()
+    try:
+        program = _find_program(db, args.program)
+        if program is None:
+            sys.exit(f"Program {args.program} not found.")
+        params = {"program_id": str(program.id)}
+        if args.start:
+            params["start"] = args.start.isoformat()
+        if args.end:
+            params["end"] = args.end.isoformat()
+
+        def progress(done: int, total: int | None) -> None:
+            print(f"\r{done}/{total} transcripts rendered", end="", flush=True)
+
+        with open(args.out, "wb") as out:
+            info = render_transcript_batch(db, params, out, progress)
+        print(f"\nIssued {info['row_count']} transcripts for {program.code}; wrote {args.out}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Run xAPI storage maintenance outside the API process (e.g. from cron).
+
+Usage examples:
+    # Create upcoming partitions, roll up new statements, apply retention
+    DATABASE_URL=postgresql+psycopg2://... PYTHONPATH=backend \\
+        python backend/scripts/xapi_maintenance.py
+
+    # Only roll up, leaving partitions untouched
+    DATABASE_URL=postgresql+psycopg2://... PYTHONPATH=backend \\
+        python backend/scripts/xapi_maintenance.py --rollup-only
+
+    # Catch module_progress.last_activity_at up with new statements
+    DATABASE_URL=postgresql+psycopg2://... PYTHONPATH=backend \\
+        python backend/scripts/xapi_maintenance.py --project-progress
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from app.services.scheduler import run_exclusive
+from app.services.xapi_maintenance import rollup_statements, run_maintenance
+from app.services.xapi_progress_projection import project_statements
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Maintain xAPI partitions, rollups and retention.")
+    parser.add_argument(
+        "--rollup-only",
+        action="store_true",
+        help="Only fold new statements into xapi_daily_rollups.",
+    )
+    parser.add_argument(
+        "--project-progress",
+        action="store_true",
+        help="Project new statements onto module_progress.last_activity_at instead.",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    # Same lock names as the in-process jobs so cron and API workers never overlap
+    if args.project_progress:
+        result = run_exclusive("xapi-progress-projection", project_statements)
+    else:
+        job = rollup_statements if args.rollup_only else run_maintenance
+        result = run_exclusive("xapi-maintenance", job)
+    if result is None:
+        print("Another process is running xAPI maintenance; nothing to do.")
+        return
+    print(f"xAPI maintenance complete: {result}")
+
+
+if __name__ == "__main__":
+    main()